@@ -9,6 +9,7 @@ from services.brand import BrandService, BrandRequestService
 from dependencies.auth import get_current_active_user
 from dependencies.role_checker import brand_access, require_brands_manage
 from services.permission_service import PermissionService
+from services.keyword_matcher import brand_dictionary
 import os
 import uuid
 from datetime import datetime
@@ -551,6 +552,8 @@ def delete_brand(
                 updated_users += 1
         
         db.commit()
+        # Pasif marka OCR marka sözlüğünden çıkar
+        brand_dictionary.invalidate()
         
         # Özet bilgi
         summary = {
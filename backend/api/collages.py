@@ -268,6 +268,11 @@ async def complete_product_info(
         collage_created = False
         
         if product.brand_id and product.price is not None:
+            # Kolaj aşağıda inline yeniden oluşturuluyor - kuyruğa eklenmez (çift render /
+            # silme-oluşturma yarışı olmasın), sadece eski cache'li kolaj düşürülür
+            from services.smart_collage_service import smart_collage_service
+            smart_collage_service.invalidate_product(product.id)
+            
             # Get product images (excluding tags and old collages)
             product_images = [img for img in product.images if img.image_type not in ['collage', 'tag']]
             
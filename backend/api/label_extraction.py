@@ -3,15 +3,22 @@ Label Extraction API
 Comprehensive label information extraction endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 
 from database import get_db
 from dependencies.auth import get_current_active_user
+from dependencies.role_checker import brand_access
 from models.user import User
 from services.smart_label_extractor import smart_label_extractor
+from services.extraction_batch import (
+    extraction_batch_service, items_from_lists, items_from_ndjson, ndjson_response_lines, price_config_of
+)
+from services.ocr_reextraction import ocr_reextraction_service
 from core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -25,6 +32,17 @@ class LabelExtractionTest(BaseModel):
     text: str
     product_type: str = "default"
 
+class LabelExtractionBatch(BaseModel):
+    texts: List[str] = []
+    product_ids: List[int] = []
+    product_type: str = "default"
+
+class ProductReextraction(BaseModel):
+    brand_id: Optional[int] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    dry_run: bool = False
+
 class LabelFieldUpdate(BaseModel):
     field_type: str
     patterns: List[str]
@@ -69,6 +87,68 @@ async def extract_label_info(
             detail=str(e)
         )
 
+@router.post("/extract-batch")
+async def extract_label_info_batch(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Toplu etiket çıkarma (process pool) - sonuçlar NDJSON akışı: her metin/ürün
+    için bir satır, en sonda özet satırı ({"done": true, ...}).
+    
+    Gövde: LabelExtractionBatch JSON'u ya da application/x-ndjson satırları
+    ({"id", "text", "product_type"} veya {"product_id"} - ürünün kayıtlı OCR metni)
+    """
+    from services.smart_price_extractor import smart_price_extractor
+    
+    accessible_brand_ids = brand_access.get_accessible_brand_ids(current_user, db)
+    if request.headers.get('content-type', '').startswith('application/x-ndjson'):
+        items = items_from_ndjson(request.stream(), 'default', current_user.id, accessible_brand_ids)
+    else:
+        try:
+            batch = LabelExtractionBatch(**await request.json())
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        items = items_from_lists(batch.texts, batch.product_ids, batch.product_type, current_user.id, accessible_brand_ids)
+    
+    return StreamingResponse(
+        ndjson_response_lines(
+            extraction_batch_service.stream('label', items, price_config_of(smart_price_extractor))
+        ),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/reextract-products")
+async def reextract_products(
+    request: ProductReextraction,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Kayıtlı ham OCR yanıtlarından ürün alanlarını güncel kurallarla yeniden
+    çıkar (Vision çağrısı yok). NDJSON akışı: değişen her ürün için bir satır
+    ({"product_id", "changes": {alan: [eski, yeni]}}), en sonda özet.
+    dry_run=true ile sadece fark raporlanır.
+    """
+    if request.brand_id is not None and not brand_access.check_brand_access(current_user, request.brand_id, db):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Bu markaya erişim yetkiniz yok")
+    
+    accessible_brand_ids = brand_access.get_accessible_brand_ids(current_user, db)
+    return StreamingResponse(
+        ndjson_response_lines(
+            ocr_reextraction_service.run(
+                current_user.id,
+                accessible_brand_ids,
+                brand_id=request.brand_id,
+                date_from=request.date_from,
+                date_to=request.date_to,
+                dry_run=request.dry_run
+            )
+        ),
+        media_type="application/x-ndjson"
+    )
+
 @router.get("/config")
 async def get_label_extraction_config(
     current_user: User = Depends(get_current_active_user)
@@ -122,3 +122,140 @@ async def get_template_cache_stats(
     
     return enterprise_template_service.get_stats()
 
+@router.get("/performance/upload-admission")
+async def get_upload_admission_state(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Upload admission controller: bütçe kullanımı, çalışan ve bekleyen job'lar
+    """
+    from services.upload_admission import upload_admission
+    
+    return upload_admission.get_state()
+
+@router.get("/performance/ocr-batching")
+async def get_ocr_batching_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Vision batch birleştirici: batch sayısı, ortalama batch boyutu, flush nedenleri
+    """
+    from services.vision_batcher import vision_batcher
+    
+    return vision_batcher.get_stats()
+
+@router.get("/performance/ocr-http")
+async def get_ocr_http_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    OCR HTTP istemcisi: uçuştaki istekler, yeniden denemeler, protokol
+    """
+    from services.ocr_http_client import ocr_http_client
+    
+    return ocr_http_client.get_stats()
+
+@router.get("/performance/ocr-dispatcher")
+async def get_ocr_dispatcher_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    OCR dispatcher: AIMD eşzamanlılık sınırı, devre kesici durumu, günlük kota
+    """
+    from services.ocr_dispatcher import ocr_dispatcher
+    
+    return ocr_dispatcher.get_stats()
+
+@router.get("/performance/ocr-cache")
+async def get_ocr_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    İçerik hash'li OCR sonuç deposu: bellek / disk hit oranı, eviction
+    """
+    from services.ocr_result_store import ocr_result_store
+    
+    return ocr_result_store.get_stats()
+
+@router.get("/performance/perceptual-index")
+async def get_perceptual_index_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Yakın-kopya indeksi: tekrar kullanılan etiket OCR'ları, atlanan kopya görseller
+    """
+    from services.perceptual_hash import perceptual_index
+    
+    return perceptual_index.get_stats()
+
+@router.get("/performance/ocr-preprocess")
+async def get_ocr_preprocess_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    OCR ön işleme: kırpılan görseller, istek başına ortalama boyut
+    """
+    from services.ocr_preprocessor import ocr_preprocessor
+    
+    return ocr_preprocessor.get_stats()
+
+
+@router.get("/performance/brand-dictionary")
+async def get_brand_dictionary_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Marka sözlüğü: yüklemeler, yeniden kurulan otomatlar, sürüm
+    """
+    from services.keyword_matcher import brand_dictionary
+    
+    return brand_dictionary.get_stats()
+
+
+@router.get("/performance/extraction-batch")
+async def get_extraction_batch_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Toplu etiket/fiyat çıkarma: işlenen metin, saniyedeki metin, worker durumu
+    """
+    from services.extraction_batch import extraction_batch_service
+    
+    return extraction_batch_service.get_stats()
+
+
+@router.get("/performance/ocr-reextraction")
+async def get_ocr_reextraction_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Ham OCR yanıtlarından yeniden çıkarma: işlenen / değişen / yazılan ürünler
+    """
+    from services.ocr_reextraction import ocr_reextraction_service
+    
+    return ocr_reextraction_service.get_stats()
+
+
+@router.get("/performance/collage-render")
+async def get_collage_render_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Kolaj render farm: render sayısı, ortalama süre, worker durumu
+    """
+    from services.collage_render_farm import collage_render_farm
+    
+    return collage_render_farm.get_stats()
+
+
+@router.get("/performance/collage-queue")
+def get_collage_queue_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Kolaj kuyruğu: hazır / geri çekilmede / lease'li / dead derinlikleri, en eski öğe yaşı
+    (sync endpoint - kuyruk sorguları FastAPI'nin thread pool'unda çalışır)
+    """
+    from services.smart_collage_service import smart_collage_service
+    
+    return smart_collage_service.get_queue_status()
@@ -3,15 +3,20 @@ Price Extraction API
 Dynamic price extraction configuration endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 from pydantic import BaseModel
 
 from database import get_db
 from dependencies.auth import get_current_active_user
+from dependencies.role_checker import brand_access
 from models.user import User
 from services.smart_price_extractor import smart_price_extractor
+from services.extraction_batch import (
+    extraction_batch_service, items_from_lists, items_from_ndjson, ndjson_response_lines, price_config_of
+)
 from core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -42,6 +47,11 @@ class PriceExtractionTest(BaseModel):
     text: str
     product_type: str = "default"
 
+class PriceExtractionBatch(BaseModel):
+    texts: List[str] = []
+    product_ids: List[int] = []
+    product_type: str = "default"
+
 @router.get("/config")
 async def get_price_extraction_config(
     current_user: User = Depends(get_current_active_user)
@@ -170,6 +180,36 @@ async def test_price_extraction(
             detail=str(e)
         )
 
+@router.post("/test-batch")
+async def test_price_extraction_batch(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Toplu fiyat çıkarma (process pool, güncel fiyat ayarlarıyla) - sonuçlar
+    NDJSON akışı: her metin/ürün için bir satır, en sonda özet satırı.
+    
+    Gövde: PriceExtractionBatch JSON'u ya da application/x-ndjson satırları
+    ({"id", "text", "product_type"} veya {"product_id", "product_type"})
+    """
+    accessible_brand_ids = brand_access.get_accessible_brand_ids(current_user, db)
+    if request.headers.get('content-type', '').startswith('application/x-ndjson'):
+        items = items_from_ndjson(request.stream(), 'default', current_user.id, accessible_brand_ids)
+    else:
+        try:
+            batch = PriceExtractionBatch(**await request.json())
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        items = items_from_lists(batch.texts, batch.product_ids, batch.product_type, current_user.id, accessible_brand_ids)
+    
+    return StreamingResponse(
+        ndjson_response_lines(
+            extraction_batch_service.stream('price', items, price_config_of(smart_price_extractor))
+        ),
+        media_type="application/x-ndjson"
+    )
+
 @router.get("/product-types")
 async def get_product_types(
     current_user: User = Depends(get_current_active_user)
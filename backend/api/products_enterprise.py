@@ -13,15 +13,18 @@ Features:
 - Modular architecture
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, Query
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, Query, Request, Header
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
+from sqlalchemy.exc import IntegrityError
 from typing import List, Dict, Any, Optional
 import os
+import json
+import asyncio
 from datetime import datetime
 
-from database import get_db
+from database import get_db, SessionLocal
 from dependencies.auth import get_current_active_user
 from dependencies.role_checker import resource_access, brand_access
 from models.user import User
@@ -30,6 +33,11 @@ from models.upload_job import UploadJob
 from models.product import Product, ProductImage
 from services.product_upload_manager import ProductUploadManager
 from services.product_helpers import ProductHelpers
+from services.permission_service import PermissionService
+from services.resumable_upload_service import resumable_upload_service
+from services.upload_progress_bus import upload_progress_bus, TERMINAL_STATUSES
+from schemas.product import UploadSessionCreate
+from core.exceptions import BaseAppException, create_http_exception
 from core.logging import get_logger
 
 logger = get_logger('products_enterprise')
@@ -59,6 +67,18 @@ async def upload_products_v2(
         logger.error(f"Upload endpoint error: {e}")
         raise HTTPException(status_code=500, detail="Upload failed")
 
+def _check_job_access(job_id: int, current_user: User, db: Session):
+    """Job durumunu sadece yükleyen ya da ürün yöneticisi (products.manage) görür"""
+    owner_id = upload_progress_bus.get_owner(job_id)
+    if owner_id is None:
+        row = db.query(UploadJob.uploader_id).filter(UploadJob.id == job_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Job not found")
+        owner_id = row[0]
+    if owner_id != current_user.id and not PermissionService(db).has_permission(current_user.id, 'products.manage'):
+        # Başka kullanıcıların job ID'leri taranamasın - var/yok bilgisi de verilmez
+        raise HTTPException(status_code=404, detail="Job not found")
+
 @router.get("/upload-status/{job_id}")
 async def get_upload_status(
     job_id: int,
@@ -66,31 +86,202 @@ async def get_upload_status(
 ):
     """Get upload job status"""
     try:
+        # Bu process'te çalışan job - bellekteki snapshot, DB sorgusu yok
+        snapshot = upload_progress_bus.get_snapshot(job_id)
+        if snapshot:
+            return {key: snapshot[key] for key in (
+                'job_id', 'status', 'total_files', 'processed_files',
+                'failed_files', 'created_at', 'completed_at'
+            )}
+        
         job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
         
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        # Extract failed files count from processing_log
-        failed_files = 0
-        if job.processing_log and isinstance(job.processing_log, dict):
-            failed_files = job.processing_log.get('failed_files', 0)
-        
-        return {
-            'job_id': job.id,
-            'status': job.status,
-            'total_files': job.total_files,
-            'processed_files': job.processed_files,
-            'failed_files': failed_files,
-            'created_at': job.created_at,
-            'completed_at': job.completed_at
-        }
+        return _job_status_payload(job)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Status check error: {e}")
         raise HTTPException(status_code=500, detail="Status check failed")
 
+def _job_status_payload(job: UploadJob) -> Dict[str, Any]:
+    """UploadJob satırından durum yanıtı"""
+    # Extract failed files count from processing_log
+    failed_files = 0
+    if job.processing_log and isinstance(job.processing_log, dict):
+        failed_files = job.processing_log.get('failed_files', 0)
+    
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'total_files': job.total_files,
+        'processed_files': job.processed_files,
+        'failed_files': failed_files,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None
+    }
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.get("/upload-status/{job_id}/stream")
+async def stream_upload_status(
+    job_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload ilerlemesini Server-Sent Events olarak akıt.
+    Olaylar: progress (job sayaçları), file (dosya aşaması), complete (son durum).
+    Sadece job'u yükleyen ya da products.manage izni olan kullanıcı izleyebilir.
+    """
+    _check_job_access(job_id, current_user, db)
+    
+    async def event_stream():
+        if upload_progress_bus.get_snapshot(job_id):
+            async for message in upload_progress_bus.subscribe(job_id):
+                if await request.is_disconnected():
+                    return
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(message['event'], message['data'])
+            return
+        
+        # Job başka bir worker'da (veya bitmiş) - DB snapshot'ını seyrek aralıklarla izle
+        last_payload = None
+        while not await request.is_disconnected():
+            with SessionLocal() as session:
+                job = session.query(UploadJob).filter(UploadJob.id == job_id).first()
+                payload = _job_status_payload(job) if job else None
+            if payload is None:
+                yield _sse('error', {'job_id': job_id, 'detail': 'Job not found'})
+                return
+            if payload['status'] in TERMINAL_STATUSES:
+                yield _sse('complete', payload)
+                return
+            if payload != last_payload:
+                yield _sse('progress', payload)
+                last_payload = payload
+            else:
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(upload_progress_bus.flush_interval)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _get_session_job(job_id: int, current_user: User, db: Session) -> UploadJob:
+    """Resumable upload oturumu - sadece sahibi erişebilir"""
+    job = db.query(UploadJob).filter(
+        UploadJob.id == job_id,
+        UploadJob.uploader_id == current_user.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return job
+
+async def _read_chunk_body(request: Request, limit: int) -> bytes:
+    """Parça gövdesini en fazla limit byte okuyarak al (fazlası belleğe alınmaz)"""
+    content_length = request.headers.get('content-length')
+    if content_length is not None:
+        try:
+            declared = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if declared > limit:
+            raise HTTPException(status_code=413, detail=f"Chunk exceeds session chunk size ({limit} bytes)")
+    
+    # Content-Length yoksa (chunked transfer) akış sınırla okunur
+    body = bytearray()
+    async for part in request.stream():
+        body.extend(part)
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail=f"Chunk exceeds session chunk size ({limit} bytes)")
+    return bytes(body)
+
+@router.post("/upload-sessions")
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Resumable upload oturumu aç - dosyalar parça parça gönderilir"""
+    try:
+        resumable_upload_service.validate_manifest(session_data.files)
+        upload_job = upload_manager._create_upload_job(
+            current_user, len(session_data.files), db, status='uploading'
+        )
+        return resumable_upload_service.init_session(upload_job, session_data.files, db)
+    except BaseAppException as e:
+        raise create_http_exception(e)
+    except Exception as e:
+        logger.error(f"Upload session error: {e}")
+        raise HTTPException(status_code=500, detail="Upload session could not be created")
+
+@router.put("/upload-sessions/{job_id}/files/{file_index}/chunks/{chunk_index}")
+async def upload_session_chunk(
+    job_id: int,
+    file_index: int,
+    chunk_index: int,
+    request: Request,
+    x_chunk_checksum: str = Header(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Tek bir parçayı yükle (body: ham byte, X-Chunk-Checksum: md5)"""
+    job = _get_session_job(job_id, current_user, db)
+    if job.status != 'uploading':
+        raise HTTPException(status_code=409, detail=f"Upload session is {job.status}")
+
+    data = await _read_chunk_body(request, resumable_upload_service.max_chunk_bytes(job))
+    try:
+        return await resumable_upload_service.write_chunk(job, file_index, chunk_index, data, x_chunk_checksum)
+    except BaseAppException as e:
+        raise create_http_exception(e)
+    except Exception as e:
+        logger.error(f"Chunk upload error (job {job_id}): {e}")
+        raise HTTPException(status_code=500, detail="Chunk upload failed")
+
+@router.get("/upload-sessions/{job_id}")
+async def get_upload_session(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Oturum durumu - kaldığı yerden devam için eksik parçalar"""
+    job = _get_session_job(job_id, current_user, db)
+    return resumable_upload_service.get_status(job)
+
+@router.post("/upload-sessions/{job_id}/complete")
+async def complete_upload_session(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Tüm parçalar geldiyse dosyaları doğrula ve işlemeyi başlat"""
+    job = _get_session_job(job_id, current_user, db)
+    # Koşullu geçiş: eşzamanlı ikinci /complete aynı job'u tekrar başlatmaz
+    if not resumable_upload_service.begin_completion(job, db):
+        raise HTTPException(status_code=409, detail=f"Upload session is {job.status}")
+
+    try:
+        staged_files = await resumable_upload_service.finalize(job)
+        return upload_manager.start_processing(staged_files, current_user, job, db, background_tasks)
+    except BaseAppException as e:
+        resumable_upload_service.abort_completion(job, db)
+        raise create_http_exception(e)
+    except Exception as e:
+        logger.error(f"Upload session completion error (job {job_id}): {e}")
+        resumable_upload_service.abort_completion(job, db)
+        raise HTTPException(status_code=500, detail="Upload session could not be completed")
+
 @router.put("/{product_id}")
 async def update_product(
     product_id: int,
@@ -127,7 +318,12 @@ async def update_product(
         
         product.updated_at = datetime.now()
         
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # (code, color, brand_id) UNIQUE - pasif kayıtlar dahil aynı ürün zaten var
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Bu marka ve renkte aynı kodlu bir ürün zaten var")
         db.refresh(product)
         
         # OTOMATIK KOLAJ: Bilgiler tamamsa kolaj oluştur ve paylaş
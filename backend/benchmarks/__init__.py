@@ -0,0 +1,4 @@
+"""
+Performance benchmarks (not part of the test suite)
+Run from the backend directory: python -m benchmarks.<name>
+"""
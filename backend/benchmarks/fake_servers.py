@@ -0,0 +1,264 @@
+"""
+Local stand-ins for external services used by the upload pipeline
+
+- FakeVisionServer: Google Vision images:annotate (HTTP, aiohttp)
+- FakeFTPServer: Bunny CDN storage (minimal FTP, passive mode)
+- FakeTelegramServer: Telegram Bot API (sendPhoto, sendVideo, getMe ...)
+
+Her sunucu istek başına yapılandırılabilir gecikme ekler ve çağrı sayısını
+tutar; benchmark sonunda hangi dış servisin kaç kez çağrıldığı raporlanır.
+"""
+
+import asyncio
+import base64
+import re
+from typing import Dict, Optional, Set
+
+from aiohttp import web
+
+
+class _LatencyMixin:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self.calls: Dict[str, int] = {}
+
+    async def _delay(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class _HTTPFake(_LatencyMixin):
+    """aiohttp tabanlı sahte servis iskeleti"""
+
+    def __init__(self, latency_ms: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        super().__init__(latency_ms)
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    def build_app(self) -> web.Application:
+        raise NotImplementedError
+
+    async def start(self):
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+
+class FakeVisionServer(_HTTPFake):
+    """
+    POST /v1/images:annotate - etiket metnini döndürür.
+    Sentetik etiket görselleri metni JPEG yorumuna (COM) gömer; sahte sunucu
+    onu okur, böylece yanıt gerçek bir OCR çıktısına benzer.
+    """
+
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/v1/images:annotate', self.annotate)
+        return app
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/v1/images:annotate"
+
+    async def annotate(self, request: web.Request) -> web.Response:
+        await self._delay('annotate')
+        payload = await request.json()
+        responses = []
+        for item in payload.get('requests', []):
+            text = self._embedded_text(item.get('image', {}).get('content', ''))
+            responses.append({
+                'fullTextAnnotation': {'text': text},
+                'textAnnotations': [{'description': text}] if text else []
+            })
+        return web.json_response({'responses': responses})
+
+    def _embedded_text(self, content: str) -> str:
+        try:
+            data = base64.b64decode(content)
+        except Exception:
+            return ''
+        # JPEG COM segmenti: FF FE <len:2> <text>
+        marker = data.find(b'\xff\xfe')
+        if marker < 0:
+            return ''
+        length = int.from_bytes(data[marker + 2:marker + 4], 'big')
+        return data[marker + 4:marker + 2 + length].decode('utf-8', errors='ignore')
+
+
+class FakeTelegramServer(_HTTPFake):
+    """Bot API: /bot{token}/{method} - her zaman ok=true"""
+
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route('*', '/bot{token}/{method}', self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        await self._delay(method)
+        await request.read()
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': {'id': 1, 'is_bot': True, 'username': 'benchmark_bot'}})
+        return web.json_response({'ok': True, 'result': {'message_id': sum(self.calls.values())}})
+
+
+class FakeFTPServer(_LatencyMixin):
+    """
+    Bunny storage için yeterli FTP alt kümesi:
+    USER, PASS, TYPE, PASV, CWD, PWD, MKD, STOR, DELE, NLST, NOOP, QUIT.
+    Dosyalar saklanmaz; sadece byte sayısı tutulur.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        super().__init__(latency_ms)
+        self.host = host
+        self.port = port
+        self.directories: Set[str] = {'/'}
+        self.files: Dict[str, int] = {}
+        self.bytes_received = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _resolve(self, cwd: str, path: str) -> str:
+        joined = path if path.startswith('/') else f"{cwd.rstrip('/')}/{path}"
+        parts = []
+        for part in joined.split('/'):
+            if part in ('', '.'):
+                continue
+            if part == '..':
+                if parts:
+                    parts.pop()
+                continue
+            parts.append(part)
+        return '/' + '/'.join(parts)
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        cwd = '/'
+        data_server = None
+        data_conn: asyncio.Future = None
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        async def open_passive():
+            nonlocal data_server, data_conn
+            loop = asyncio.get_event_loop()
+            data_conn = loop.create_future()
+
+            async def accept(data_reader, data_writer):
+                if not data_conn.done():
+                    data_conn.set_result((data_reader, data_writer))
+
+            data_server = await asyncio.start_server(accept, self.host, 0)
+            port = data_server.sockets[0].getsockname()[1]
+            h = self.host.replace('.', ',')
+            await reply(f"227 Entering Passive Mode ({h},{port >> 8},{port & 0xff})")
+
+        async def close_passive():
+            nonlocal data_server
+            if data_server:
+                data_server.close()
+                data_server = None
+
+        try:
+            await reply("220 Fake Bunny Storage")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, argument = line.decode('utf-8', errors='ignore').strip().partition(' ')
+                command = command.upper()
+                await self._delay(command)
+
+                if command == 'USER':
+                    await reply("331 Password required")
+                elif command == 'PASS':
+                    await reply("230 Logged in")
+                elif command in ('TYPE', 'NOOP', 'OPTS'):
+                    await reply("200 OK")
+                elif command == 'PASV':
+                    await open_passive()
+                elif command == 'PWD':
+                    await reply(f'257 "{cwd}"')
+                elif command == 'CWD':
+                    target = self._resolve(cwd, argument)
+                    if target in self.directories:
+                        cwd = target
+                        await reply("250 OK")
+                    else:
+                        await reply("550 No such directory")
+                elif command == 'MKD':
+                    target = self._resolve(cwd, argument)
+                    self.directories.add(target)
+                    await reply(f'257 "{target}" created')
+                elif command == 'STOR':
+                    target = self._resolve(cwd, argument)
+                    await reply("150 Opening data connection")
+                    data_reader, data_writer = await data_conn
+                    size = 0
+                    while True:
+                        chunk = await data_reader.read(65536)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                    data_writer.close()
+                    await close_passive()
+                    self.files[target] = size
+                    self.bytes_received += size
+                    await reply("226 Transfer complete")
+                elif command == 'NLST':
+                    await reply("150 Here comes the listing")
+                    data_reader, data_writer = await data_conn
+                    prefix = cwd.rstrip('/') + '/'
+                    names = {path[len(prefix):].split('/')[0] for path in list(self.files) + list(self.directories)
+                             if path.startswith(prefix) and path != prefix}
+                    data_writer.write(''.join(f"{name}\r\n" for name in sorted(names)).encode())
+                    await data_writer.drain()
+                    data_writer.close()
+                    await close_passive()
+                    await reply("226 Listing complete")
+                elif command == 'DELE':
+                    self.files.pop(self._resolve(cwd, argument), None)
+                    await reply("250 Deleted")
+                elif command == 'QUIT':
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await close_passive()
+            writer.close()
+
+
+def parse_latency(spec: str) -> Dict[str, float]:
+    """'vision=250,ftp=20,telegram=80' -> {'vision': 250.0, ...}"""
+    latencies = {}
+    for part in filter(None, (p.strip() for p in (spec or '').split(','))):
+        match = re.fullmatch(r'(\w+)=(\d+(?:\.\d+)?)', part)
+        if not match:
+            raise ValueError(f"Invalid latency spec: {part}")
+        latencies[match.group(1)] = float(match.group(2))
+    return latencies
@@ -0,0 +1,177 @@
+"""
+Image resize benchmark
+
+Kamera boyutundaki JPEG'leri kolaj / thumbnail hedeflerine indirirken eski
+yol (tam decode + tek LANCZOS) ile services.image_resize (JPEG draft + reduce
++ tek LANCZOS) arasında karşılaştırır:
+
+    - Görsel başına decode + resize süresi (ms, ortalama / p50 / p99)
+    - Peak RSS artışı (MB) - her yol ayrı bir process'te ölçülür, Pillow'un
+      C tarafı ayırmaları tracemalloc'a görünmez
+    - Çıktı farkı: iki yolun ürettiği görseller arasındaki ortalama mutlak
+      piksel farkı (0-255) - kalite kaybı olmadığını göstermek için
+
+Hedefler: kolaj tek görsel (fit 710x1100), kolaj 3'lü ana görsel (cover 424x1100),
+ImageOptimizer thumbnail (300x400) ve EnterpriseImageService 'md' (300x300).
+
+Kullanım (backend dizininden):
+
+    python -m benchmarks.image_resize --count 20 --size 4032x3024
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageChops, ImageDraw, ImageStat
+
+from services.image_resize import cover_size, fit_size, resize_cover, resize_fit
+
+# (ad, kutu, cover mı)
+TARGETS = [
+    ('collage_single', (710, 1100), False),
+    ('collage_cover', (424, 1100), True),
+    ('optimizer_thumb', (300, 400), False),
+    ('enterprise_md', (300, 300), False),
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def generate_photos(directory: str, count: int, size: Tuple[int, int], seed: int) -> List[str]:
+    """Fotoğrafa benzer (dokulu, gradyanlı) JPEG'ler - düz renk JPEG decode'u gerçekçi değil"""
+    rng = random.Random(seed)
+    paths = []
+    for index in range(count):
+        base = Image.linear_gradient('L').resize(size).convert('RGB')
+        draw = ImageDraw.Draw(base)
+        for _ in range(400):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            radius = rng.randint(10, size[0] // 12)
+            draw.ellipse([x, y, x + radius, y + radius], fill=tuple(rng.randrange(256) for _ in range(3)))
+        noise = Image.effect_noise(size, 40).convert('RGB')
+        photo = Image.blend(base, noise, 0.25)
+        # Dikey çekimler de olsun
+        if index % 3 == 2:
+            photo = photo.transpose(Image.Transpose.ROTATE_90)
+        path = os.path.join(directory, f"photo_{index:03d}.jpg")
+        photo.save(path, 'JPEG', quality=90)
+        paths.append(path)
+    return paths
+
+
+def legacy_resize(path: str, box: Tuple[int, int], cover: bool) -> Image.Image:
+    """Eski yol: tam çözünürlükte decode, tek LANCZOS"""
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        if cover:
+            scaled = cover_size(img.size, box)
+            img = img.resize(scaled, Image.Resampling.LANCZOS)
+            left, top = (scaled[0] - box[0]) // 2, (scaled[1] - box[1]) // 2
+            return img.crop((left, top, left + box[0], top + box[1]))
+        return img.resize(fit_size(img.size, box), Image.Resampling.LANCZOS)
+
+
+def draft_resize(path: str, box: Tuple[int, int], cover: bool) -> Image.Image:
+    """Yeni yol: services.image_resize"""
+    with Image.open(path) as img:
+        resized = resize_cover(img, box) if cover else resize_fit(img, box)
+        return resized.convert('RGB')
+
+
+VARIANTS = {'legacy': legacy_resize, 'draft': draft_resize}
+
+
+def _peak_rss_mb() -> float:
+    # Linux'ta ru_maxrss KB, macOS'ta byte
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _measure(variant: str, paths: List[str], box: Tuple[int, int], cover: bool, out_dir: str, queue):
+    """Ayrı process'te: süreler + peak RSS artışı; çıktılar karşılaştırma için PNG yazılır"""
+    function = VARIANTS[variant]
+    baseline_mb = _peak_rss_mb()
+    # İlk decode'un tek seferlik maliyeti süreye girmesin (peak'e girer - aynı iş)
+    function(paths[0], box, cover)
+    timings = []
+    for index, path in enumerate(paths):
+        started = time.perf_counter()
+        resized = function(path, box, cover)
+        timings.append((time.perf_counter() - started) * 1000)
+        resized.save(os.path.join(out_dir, f"{variant}_{index:03d}.png"))
+    queue.put({'timings': timings, 'peak_mb': _peak_rss_mb() - baseline_mb})
+
+
+def run_variant(variant: str, paths: List[str], box: Tuple[int, int], cover: bool, out_dir: str) -> Dict[str, float]:
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(variant, paths, box, cover, out_dir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    timings = result['timings']
+    return {
+        'mean_ms': sum(timings) / len(timings),
+        'p50_ms': percentile(timings, 50),
+        'p99_ms': percentile(timings, 99),
+        'peak_mb': result['peak_mb'],
+    }
+
+
+def mean_difference(out_dir: str, count: int) -> float:
+    """İki yolun çıktıları arasındaki ortalama mutlak piksel farkı"""
+    total = 0.0
+    for index in range(count):
+        with Image.open(os.path.join(out_dir, f"legacy_{index:03d}.png")) as old, \
+                Image.open(os.path.join(out_dir, f"draft_{index:03d}.png")) as new:
+            total += sum(ImageStat.Stat(ImageChops.difference(old, new)).mean) / 3
+    return total / count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="JPEG draft + reduce resize benchmark")
+    parser.add_argument('--count', type=int, default=20, help="Number of photos")
+    parser.add_argument('--size', default='4032x3024', help="Photo size WxH")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    size = tuple(int(part) for part in args.size.lower().split('x'))
+    workdir = tempfile.mkdtemp(prefix='resize_bench_')
+    try:
+        paths = generate_photos(workdir, args.count, size, args.seed)
+        print(f"photos: {args.count} x {size[0]}x{size[1]} JPEG (seed {args.seed})")
+        print(f"{'target':<16} {'path':<7} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak MB':>9}")
+        for name, box, cover in TARGETS:
+            out_dir = os.path.join(workdir, name)
+            os.makedirs(out_dir)
+            results = {variant: run_variant(variant, paths, box, cover, out_dir) for variant in VARIANTS}
+            for variant, stats in results.items():
+                print(
+                    f"{name:<16} {variant:<7} {stats['mean_ms']:9.1f} {stats['p50_ms']:9.1f} "
+                    f"{stats['p99_ms']:9.1f} {stats['peak_mb']:9.1f}"
+                )
+            speedup = results['legacy']['mean_ms'] / results['draft']['mean_ms']
+            print(f"{'':<16} speedup {speedup:.2f}x, mean pixel diff {mean_difference(out_dir, args.count):.2f}/255")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
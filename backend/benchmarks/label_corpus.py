@@ -0,0 +1,85 @@
+"""
+Label text corpus
+
+Vision OCR'ın etiketlerden döndürdüğü metne benzeyen örnekler: el ile
+yazılmış tipik etiketler (tek ve çift etiket, Türkçe karakter, OCR hataları)
+ve bunlardan seed'li türetilmiş varyasyonlar.
+"""
+
+import random
+from typing import List
+
+SAMPLE_LABELS = [
+    # DZAYN BRANDS - tam etiket
+    "DZAYN BRANDS\nVV-6124-B\nSİYAH\nELBİSE\nBEDEN 36-42\nFİYAT 1.299,90 TL\n8681234567890\n"
+    "%95 POLYESTER %5 ELASTAN\nMADE IN TURKEY\nFW",
+    # OCR DIZAYN'i SVV okuyor
+    "S VV BRANDS\nVITA VIEN\nLL-2E626\nBLACK\nTULUM\n38/44\n$45.50\nwww.dizaynbrands.com",
+    # KOKART - minimal
+    "KOKART\nKOD: KY-557\n36-42\nKAHVE",
+    # ANNAVERO
+    "ANNAVERO\nAN-50226 B\nKIRMIZI\nPANTOLON\nSIZE 38-46\nPRICE 899 TL\nYıkama 30 derece\nÜretim Türkiye",
+    # Çift etiket (ikinci etiket ilk 12 satırın dışında)
+    "ESTA LINE\nEL-1022\nBEYAZ\nGÖMLEK\n40-48\n750 TL\n\n\n\n\n\n\n\n"
+    "FEVER\nFV-3301\nLACIVERT\nCEKET\n44-52\n1.450 TL\n100% Cotton\nwash 30 gentle\nMade in China",
+    # Etiket dışı gürültü
+    "MY8\nMOB: 0532 000 00 00\nTEL 0212 000 00 00\nPF-8840\nBEJ\nTUNİK\nBeden: 36/42\nFİYAT: 650,00 ₺\nQUALITY GUARANTEE",
+    # Marka yok
+    "QX-10293\nOLIVE\nKAZAK\n2XL\nComposition: 80% Wool, 20% Nylon",
+    # Renk göstergesi ile
+    "LILIUM\nREF LM-441\nRenk: Vizon\nHIRKA\n36-40\nS/S",
+]
+
+BRANDS = ['DZAYN BRANDS', 'DIZAYN BRANDS', 'KOKART', 'ANNAVERO', 'LILIUM', 'MY8', 'FEVER', 'ESTA LINE', 'BILJANA', '']
+PREFIXES = ['VV', 'AN', 'LL', 'EL', 'PF', 'KY', 'SNL', 'FV']
+COLORS = ['SİYAH', 'SIYAH', 'BLACK', 'BEYAZ', 'WHITE', 'KIRMIZI', 'LACİVERT', 'NAVY', 'BEJ', 'VİZON', 'EKRU', 'DAMSON',
+          'DEVE TÜYÜ', 'KHAKI', 'TAŞ', 'KAHVERENGİ', 'BORDO']
+TYPES = ['ELBİSE', 'TULUM', 'PANTOLON', 'GÖMLEK', 'TUNİK', 'CEKET', 'KAZAK', 'HIRKA', 'ETEK', 'TAKIM', 'JACKET',
+         'DRESS', 'BLOUSE', 'ŞORT']
+MATERIALS = ['%100 PAMUK', '95% Cotton, 5% Elastane', '%80 VİSKON %20 POLYESTER', 'Polyester', '100% Linen']
+NOISE = ['www.dizaynbrands.com', 'MOB: 0532 111 22 33', 'QUALITY GUARANTEE', 'UNDER LICENSE', 'TRK', '******', '| |']
+
+
+def _label(rng: random.Random) -> List[str]:
+    prefix = rng.choice(PREFIXES)
+    code = f"{prefix}-{rng.randint(100, 99999)}"
+    if rng.random() < 0.3:
+        code += f"-{rng.choice('ABCDE')}"
+    low = rng.choice([34, 36, 38, 40, 42])
+    lines = [
+        rng.choice(BRANDS),
+        rng.choice([code, f"KOD: {code}", f"MODEL {code}", code.replace('-', '')]),
+        rng.choice(COLORS) if rng.random() < 0.9 else f"Renk: {rng.choice(COLORS).title()}",
+        rng.choice(TYPES),
+        rng.choice([f"{low}-{low + 6}", f"BEDEN {low}-{low + 8}", f"{low}/{low + 6}", f"Size: {low}-{low + 4}"]),
+    ]
+    if rng.random() < 0.8:
+        lines.append(rng.choice([
+            f"FİYAT {rng.randint(199, 2999)},{rng.choice(['00', '90', '99'])} TL",
+            f"${rng.randint(15, 120)}.{rng.choice(['00', '50', '90'])}",
+            f"{rng.randint(199, 2999)} ₺",
+            f"PRICE {rng.randint(20, 300)} EUR",
+        ]))
+    if rng.random() < 0.5:
+        lines.append(''.join(str(rng.randint(0, 9)) for _ in range(13)))
+    if rng.random() < 0.5:
+        lines.append(rng.choice(MATERIALS))
+    if rng.random() < 0.3:
+        lines.append(rng.choice(['Made in Turkey', 'ÜRETİM TÜRKİYE', 'made in china', 'Origin Italy']))
+    if rng.random() < 0.3:
+        lines.append(rng.choice(['Yıkama 30 derece', 'wash cold, gentle', 'FW', 'S/S', 'kurutma yok']))
+    for _ in range(rng.randint(0, 3)):
+        lines.insert(rng.randint(0, len(lines)), rng.choice(NOISE))
+    return [line for line in lines if line]
+
+
+def generate_corpus(count: int = 2000, seed: int = 42) -> List[str]:
+    """SAMPLE_LABELS + seed'li türetilmiş etiketler; ~%25'i çift etiket (uzun metin)"""
+    rng = random.Random(seed)
+    corpus = list(SAMPLE_LABELS)
+    while len(corpus) < count:
+        lines = _label(rng)
+        if rng.random() < 0.25:
+            lines += [''] * rng.randint(0, 4) + _label(rng) + _label(rng)
+        corpus.append('\n'.join(lines))
+    return corpus[:count]
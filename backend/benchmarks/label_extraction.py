@@ -0,0 +1,140 @@
+"""
+Label extraction microbenchmark
+
+SmartLabelExtractor.extract_all_fields'ı etiket korpusu üzerinde derlenmiş
+alan motoru (LabelFieldEngine) ile eski alan-başına-iki-geçiş uygulaması
+(motor öncesi modül, git geçmişinden değiştirilmeden yüklenir - bkz.
+benchmarks.label_reference) arasında karşılaştırır:
+
+    - Her etikette çıktı birebir aynı mı (LabelInfo alanları + missing_fields)
+    - Farklar ayrı sayılır: İ/ı katlaması (turkish_fold - İ, I ve ı aynı harf)
+      kasıtlı davranış değişikliğidir; etikette İ/ı ya da sözlükte ı/İ ile
+      yazılmış bir kelime varsa ve sadece sözlük alanları değiştiyse 'folding'
+      sayılır. Geri kalan her fark 'unexpected' - çıkış kodu 1
+    - Etiket başına süre (µs), hızlanma oranı
+    - --no-price: fiyat çıkarıcısı (iki tarafta da aynı kod) devre dışı,
+      sadece motorun kapsadığı alanlar ölçülür
+
+Kullanım (backend dizininden):
+
+    python -m benchmarks.label_extraction --count 2000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from dataclasses import asdict
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.label_corpus import generate_corpus
+from benchmarks.label_reference import REFERENCE_REVISION, ReferenceUnavailable, load_reference_extractor
+from services.keyword_matcher import KeywordMatcher
+from services.label_field_engine import PRODUCT_TYPE_INDICATORS
+from services.smart_label_extractor import LabelInfo, SmartLabelExtractor
+
+TURKISH_I = frozenset('İı')
+# Sözlük eşleşmesiyle bulunan alanlar ve onlardan türeyenler - katlamadan etkilenebilir
+FOLDING_FIELDS = frozenset(['brand', 'color', 'product_type', 'material', 'country', 'confidence', 'missing_fields'])
+
+Mismatch = Tuple[str, Dict[str, tuple]]
+
+
+def _dotted_keywords(extractor: SmartLabelExtractor) -> KeywordMatcher:
+    """Sözlüklerde ı/İ ile yazılmış kelimeler - düz 'I' ile okunan halleri eskiden eşleşmezdi (HIRKA / hırka)"""
+    keywords = [
+        *extractor.brand_patterns['common_brands'],
+        *extractor.color_patterns['common_colors'],
+        *extractor.material_patterns['materials'],
+        *extractor.country_patterns['countries'],
+        *PRODUCT_TYPE_INDICATORS,
+    ]
+    return KeywordMatcher(keyword for keyword in keywords if TURKISH_I & set(keyword)).build()
+
+
+def classify_mismatches(
+    extractor: SmartLabelExtractor,
+    corpus: List[str],
+    expected: List[LabelInfo],
+    actual: List[LabelInfo]
+) -> Tuple[List[Mismatch], List[Mismatch]]:
+    """(İ/ı katlaması farkları, beklenmeyen farklar) - her biri (metin, {alan: (eski, yeni)})"""
+    dotted = _dotted_keywords(extractor)
+    folding, unexpected = [], []
+    for text, old, new in zip(corpus, expected, actual):
+        old, new = asdict(old), asdict(new)
+        if old == new:
+            continue
+        diff = {key: (old[key], new[key]) for key in old if old[key] != new[key]}
+        involves_i = bool(TURKISH_I & set(text)) or dotted.contains_any(text)
+        (folding if involves_i and diff.keys() <= FOLDING_FIELDS else unexpected).append((text, diff))
+    return folding, unexpected
+
+
+async def _run(extractor: SmartLabelExtractor, corpus: List[str]) -> List[LabelInfo]:
+    return [await extractor.extract_all_fields(text) for text in corpus]
+
+
+async def _time(extractor: SmartLabelExtractor, corpus: List[str], repeat: int) -> float:
+    """En iyi tekrarın etiket başına süresi (µs)"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await _run(extractor, corpus)
+        best = min(best, time.perf_counter() - started)
+    return best / len(corpus) * 1e6
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SmartLabelExtractor field engine microbenchmark")
+    parser.add_argument('--count', type=int, default=2000, help="Corpus size")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-price', action='store_true', help="Stub the shared price extractor out")
+    parser.add_argument('--reference-rev', default=REFERENCE_REVISION, help="Git revision of the pre-engine extractor")
+    args = parser.parse_args(argv)
+
+    # Ölçüm log formatlamasını değil çıkarmayı kapsasın
+    logging.disable(logging.INFO)
+
+    if args.no_price:
+        from services.smart_price_extractor import smart_price_extractor
+
+        async def no_price(text: str, product_type: str = 'default') -> Optional[str]:
+            return "Eksik"
+        smart_price_extractor.extract_price = no_price
+
+    corpus = generate_corpus(args.count, args.seed)
+    try:
+        reference = load_reference_extractor(args.reference_rev)
+    except ReferenceUnavailable as e:
+        print(f"reference unavailable: {e}")
+        return 2
+    engine = SmartLabelExtractor()
+
+    expected = await _run(reference, corpus)
+    actual = await _run(engine, corpus)
+    folding, unexpected = classify_mismatches(engine, corpus, expected, actual)
+    folding_fields = Counter(key for _, diff in folding for key in diff if key not in ('confidence', 'missing_fields'))
+
+    reference_us = await _time(reference, corpus, args.repeat)
+    engine_us = await _time(engine, corpus, args.repeat)
+
+    print(f"labels:      {len(corpus)} (seed {args.seed}, price {'off' if args.no_price else 'on'})")
+    print(f"reference:   {reference_us:8.1f} us/label ({args.reference_rev})")
+    print(f"engine:      {engine_us:8.1f} us/label")
+    print(f"speedup:     {reference_us / engine_us:8.2f}x")
+    print(f"identical:   {len(corpus) - len(folding) - len(unexpected)}/{len(corpus)}")
+    print(f"İ/ı folding: {len(folding)} ({', '.join(f'{key} {count}' for key, count in folding_fields.most_common())})")
+    for text, diff in folding[:3]:
+        print(f"  FOLDING {text[:60]!r}: {diff}")
+    print(f"unexpected:  {len(unexpected)}")
+    for text, diff in unexpected[:5]:
+        print(f"  MISMATCH {text[:60]!r}: {diff}")
+    return 1 if unexpected else 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
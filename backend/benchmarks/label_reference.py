@@ -0,0 +1,52 @@
+"""
+Label extraction reference
+
+Alan motoru (LabelFieldEngine) öncesi SmartLabelExtractor doğruluk kahini
+olarak kullanılır. Kod kopyalanmaz: modülün kaynağı git geçmişinden
+(REFERENCE_REVISION) okunur ve ayrı bir modül olarak yüklenir - kahin, seri
+öncesi davranışın ta kendisidir.
+
+    load_reference_module()     -> eski smart_label_extractor modülü
+    load_reference_extractor()  -> eski SmartLabelExtractor instance'ı
+
+Eski modül sadece standart kütüphane ile brand_label_patterns /
+smart_price_extractor servislerini kullanır; DB'ye ihtiyaç duymaz.
+"""
+
+import os
+import subprocess
+import types
+from functools import lru_cache
+
+# Alan motoru öncesi son commit (smart_label_extractor.py'nin orijinal hali)
+REFERENCE_REVISION = '84f1d9da'
+REFERENCE_PATH = 'backend/services/smart_label_extractor.py'
+
+
+class ReferenceUnavailable(RuntimeError):
+    """Git geçmişi yok (sığ klon, paket kurulumu) ya da revizyon bulunamadı"""
+
+
+def _read_source(revision: str) -> str:
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        return subprocess.run(
+            ['git', 'show', f'{revision}:{REFERENCE_PATH}'],
+            cwd=repo_root, capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = getattr(e, 'stderr', '') or str(e)
+        raise ReferenceUnavailable(f"Cannot read {REFERENCE_PATH} at {revision}: {detail.strip()}") from e
+
+
+@lru_cache(maxsize=None)
+def load_reference_module(revision: str = REFERENCE_REVISION) -> types.ModuleType:
+    """Eski smart_label_extractor modülünü değiştirmeden yükle"""
+    module = types.ModuleType(f'smart_label_extractor_{revision}')
+    module.__file__ = f'{revision}:{REFERENCE_PATH}'
+    exec(compile(_read_source(revision), module.__file__, 'exec'), module.__dict__)
+    return module
+
+
+def load_reference_extractor(revision: str = REFERENCE_REVISION):
+    return load_reference_module(revision).SmartLabelExtractor()
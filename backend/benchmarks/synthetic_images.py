@@ -0,0 +1,87 @@
+"""
+Synthetic upload set generator
+
+Gerçek yüklemelere benzer dosya setleri üretir:
+    AN-50226 B BLACK.jpg        <- etiket (tag) görseli
+    AN-50226 B BLACK 11.jpg     <- ürün görselleri
+    AN-50226 B BLACK 12.jpg
+Etiket görsellerinde etiket metni çizilir ve JPEG yorumuna da gömülür;
+FakeVisionServer yanıtını bu yorumdan üretir.
+"""
+
+import os
+import random
+from typing import List
+
+from PIL import Image, ImageDraw
+
+COLORS = ['BLACK', 'WHITE', 'NAVY', 'BEIGE', 'KHAKI', 'DAMSON', 'BROWN', 'GREY']
+PRODUCT_TYPES = ['ELBİSE', 'PANTOLON', 'TUNİK', 'CEKET', 'ETEK']
+PREFIXES = ['AN', 'VV', 'EL', 'PF', 'KL']
+
+
+def _tag_text(code: str, color: str, rng: random.Random) -> str:
+    low = rng.choice([36, 38, 40, 44])
+    return (
+        f"{code}\n{color}\n{rng.choice(PRODUCT_TYPES)}\n"
+        f"BEDEN {low}-{low + 6}\nFIYAT ${rng.randint(15, 90)}.{rng.choice(['00', '50', '90'])}"
+    )
+
+
+def _write_jpeg(path: str, size, background, text: str = None, quality: int = 85):
+    image = Image.new('RGB', size, background)
+    draw = ImageDraw.Draw(image)
+    if text:
+        y = size[1] // 6
+        for line in text.splitlines():
+            draw.text((size[0] // 10, y), line, fill=(0, 0, 0))
+            y += size[1] // 10
+    else:
+        # Düz renk JPEG gerçek fotoğraftan çok küçük olur - biraz doku ekle
+        for _ in range(200):
+            x, y = random.randrange(size[0]), random.randrange(size[1])
+            draw.rectangle([x, y, x + 40, y + 40], fill=tuple(random.randrange(256) for _ in range(3)))
+    kwargs = {'quality': quality}
+    if text:
+        kwargs['comment'] = text.encode('utf-8')
+    image.save(path, 'JPEG', **kwargs)
+
+
+def generate_upload_set(
+    directory: str,
+    file_count: int,
+    images_per_product: int = 4,
+    image_size=(1600, 2000),
+    seed: int = 42
+) -> List[str]:
+    """
+    file_count dosyalık set üret (her ürün: 1 etiket + images_per_product görsel).
+    Dosya yollarını döndürür; aynı seed aynı seti üretir.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    # Her seed farklı ürün kodları üretir - önceki koşuların DB/OCR cache'i sonucu etkilemez
+    code_base = rng.randint(10000, 89999)
+    product_index = 0
+    while len(paths) < file_count:
+        code = f"{rng.choice(PREFIXES)}-{code_base + product_index}"
+        variant = rng.choice(['A', 'B', 'C'])
+        color = rng.choice(COLORS)
+        base = f"{code} {variant} {color}"
+        product_index += 1
+
+        tag_path = os.path.join(directory, f"{base}.jpg")
+        _write_jpeg(tag_path, (1200, 1600), (255, 255, 255), _tag_text(f"{code}-{variant}", color, rng))
+        paths.append(tag_path)
+
+        for number in range(images_per_product):
+            if len(paths) >= file_count:
+                break
+            image_path = os.path.join(directory, f"{base} {11 + number}.jpg")
+            _write_jpeg(image_path, image_size, tuple(rng.randrange(80, 230) for _ in range(3)))
+            paths.append(image_path)
+
+    return paths
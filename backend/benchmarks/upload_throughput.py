@@ -0,0 +1,255 @@
+"""
+Upload throughput benchmark
+
+ProductUploadManager.process_upload'ı uçtan uca (staging -> OCR -> CDN -> DB
+-> kolaj planlama) sentetik dosyalarla çalıştırır. Google Vision, Bunny FTP
+ve Telegram yerel sahte sunuculara yönlendirilir (gecikme ayarlanabilir).
+
+Rapor (her dosya sayısı için):
+    - files/sec (istek + background işleme dahil toplam süre)
+    - aşama bazında çağrı sayısı, p50 / p99 (ms)
+    - peak RSS (MB) ve dış servis çağrı sayıları
+
+Kullanım (backend dizininden; DATABASE_URL geçici bir MySQL veritabanını
+göstermeli - benchmark gerçek ürün/job kayıtları oluşturur):
+
+    python -m benchmarks.upload_throughput --sizes 10,100,500 \\
+        --latency vision=250,ftp=5,telegram=80 --json results.json
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import psutil
+
+from benchmarks.fake_servers import FakeFTPServer, FakeTelegramServer, FakeVisionServer, parse_latency
+from benchmarks.synthetic_images import generate_upload_set
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class StageTimer:
+    """Servis metotlarını sarmalayıp süre toplar (sadece ölçüm, davranış değişmez)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def wrap(self, target: Any, method: str, stage: str):
+        original = getattr(target, method)
+
+        @functools.wraps(original)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.samples[stage].append((time.perf_counter() - started) * 1000.0)
+
+        setattr(target, method, timed)
+
+    def reset(self):
+        self.samples.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 50), 2),
+                'p99_ms': round(percentile(values, 99), 2)
+            }
+            for stage, values in sorted(self.samples.items())
+        }
+
+
+class RSSSampler:
+    """Koşu boyunca peak RSS"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self._task = asyncio.get_event_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def configure_environment(vision: FakeVisionServer, ftp: FakeFTPServer, telegram: FakeTelegramServer):
+    """Servis singleton'ları import edilmeden ÖNCE çağrılmalı"""
+    from core.config import settings
+
+    settings.ocr.vision_api_url = vision.api_url
+    os.environ['BUNNY_FTP_HOST'] = ftp.host
+    os.environ['BUNNY_FTP_PORT'] = str(ftp.port)
+    # Kolaj indirmeleri hızlıca 404 alır; kolaj üretimi bu benchmark'ın kapsamı dışında
+    os.environ['BUNNY_CDN_BASE_URL'] = f"{vision.base_url}/cdn"
+    os.environ['TELEGRAM_API_BASE_URL'] = telegram.base_url
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark')
+    os.environ.setdefault('TELEGRAM_CHAT_ID', '1')
+
+
+def instrument(timer: StageTimer, manager) -> None:
+    from services.upload_staging import upload_staging_service
+    from services.ultra_fast_upload_service import ultra_fast_upload_service
+    from services.product_cdn_processor import product_cdn_processor
+
+    timer.wrap(upload_staging_service, 'stage_file', 'staging')
+    timer.wrap(ultra_fast_upload_service, '_process_single_ocr_cached', 'ocr')
+    timer.wrap(ultra_fast_upload_service, '_upload_product_group_to_cdn', 'cdn_group')
+    timer.wrap(ultra_fast_upload_service, '_batch_database_insert', 'db_batch')
+    timer.wrap(product_cdn_processor, '_process_ocr', 'ocr')
+    timer.wrap(product_cdn_processor, '_upload_to_cdn', 'cdn_file')
+    timer.wrap(product_cdn_processor, 'process_single_file', 'file_total')
+    timer.wrap(manager, '_schedule_collages_ultra_fast', 'collage_schedule')
+    timer.wrap(manager, '_create_collages_for_batch', 'collage_schedule')
+
+
+async def run_size(manager, timer: StageTimer, fakes: Dict[str, Any], size: int, mode: str, workdir: str, seed: int):
+    from fastapi import BackgroundTasks, UploadFile
+    from database import SessionLocal
+    from models.user import User
+
+    source_dir = os.path.join(workdir, f"set_{size}")
+    paths = generate_upload_set(source_dir, size, seed=seed + size)
+    input_bytes = sum(os.path.getsize(path) for path in paths)
+
+    handles = [open(path, 'rb') for path in paths]
+    files = [UploadFile(file=handle, filename=os.path.basename(path)) for handle, path in zip(handles, paths)]
+
+    calls_before = {name: dict(server.calls) for name, server in fakes.items()}
+    timer.reset()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.is_active == True).first()
+        if not user:
+            raise SystemExit("Benchmark needs at least one active user in the database")
+
+        background_tasks = BackgroundTasks()
+        with RSSSampler() as rss:
+            started = time.perf_counter()
+            result = await manager.process_upload(
+                files, user, db, background_tasks, use_ultra_fast=(mode == 'ultra_fast')
+            )
+            ingest_seconds = time.perf_counter() - started
+            await background_tasks()
+            total_seconds = time.perf_counter() - started
+    finally:
+        db.close()
+        for handle in handles:
+            handle.close()
+        shutil.rmtree(source_dir, ignore_errors=True)
+
+    external_calls = {
+        name: sum(server.calls.values()) - sum(calls_before[name].values())
+        for name, server in fakes.items()
+    }
+
+    return {
+        'files': size,
+        'mode': result.get('mode', mode),
+        'job_id': result.get('job_id'),
+        'input_mb': round(input_bytes / 1024 / 1024, 1),
+        'ingest_s': round(ingest_seconds, 3),
+        'total_s': round(total_seconds, 3),
+        'files_per_sec': round(size / total_seconds, 2) if total_seconds else 0.0,
+        'peak_rss_mb': round(rss.peak / 1024 / 1024, 1),
+        'stages': timer.summary(),
+        'external_calls': external_calls
+    }
+
+
+def print_report(results: List[Dict[str, Any]]):
+    print()
+    print(f"{'files':>6} {'mode':>10} {'total s':>9} {'files/s':>8} {'ingest s':>9} {'peak RSS':>9}  external calls")
+    for row in results:
+        calls = ', '.join(f"{name}={count}" for name, count in row['external_calls'].items())
+        print(f"{row['files']:>6} {row['mode']:>10} {row['total_s']:>9.2f} {row['files_per_sec']:>8.2f} "
+              f"{row['ingest_s']:>9.2f} {row['peak_rss_mb']:>7.1f}MB  {calls}")
+        for stage, stats in row['stages'].items():
+            print(f"{'':>8}{stage:<18} n={stats['count']:<5} p50={stats['p50_ms']:>9.1f}ms  p99={stats['p99_ms']:>9.1f}ms")
+    print()
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end upload throughput benchmark")
+    parser.add_argument('--sizes', default='10,100,500', help="Comma separated file counts")
+    parser.add_argument('--mode', choices=['ultra_fast', 'standard', 'both'], default='ultra_fast')
+    parser.add_argument('--latency', default='vision=250,ftp=5,telegram=80',
+                        help="Per-request latency in ms for each fake service")
+    parser.add_argument('--seed', type=int, default=int(time.time()),
+                        help="Synthetic data seed (new codes/checksums per run keep caches cold)")
+    parser.add_argument('--json', dest='json_path', help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    latency = parse_latency(args.latency)
+    fakes = {
+        'vision': FakeVisionServer(latency.get('vision', 0)),
+        'ftp': FakeFTPServer(latency.get('ftp', 0)),
+        'telegram': FakeTelegramServer(latency.get('telegram', 0))
+    }
+    for server in fakes.values():
+        await server.start()
+    configure_environment(fakes['vision'], fakes['ftp'], fakes['telegram'])
+
+    # Servisler ortam değişkenleri ayarlandıktan sonra import edilir
+    from services.product_upload_manager import ProductUploadManager
+
+    manager = ProductUploadManager()
+    timer = StageTimer()
+    instrument(timer, manager)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    modes = ['ultra_fast', 'standard'] if args.mode == 'both' else [args.mode]
+    workdir = tempfile.mkdtemp(prefix='upload_bench_')
+
+    results = []
+    try:
+        for mode in modes:
+            for size in sizes:
+                print(f"[bench] {mode}: {size} files ...", flush=True)
+                results.append(await run_size(manager, timer, fakes, size, mode, workdir, args.seed))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        from services.ocr_http_client import ocr_http_client
+        await ocr_http_client.close()
+        for server in fakes.values():
+            await server.stop()
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, 'w') as handle:
+            json.dump({'seed': args.seed, 'latency_ms': latency, 'results': results}, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
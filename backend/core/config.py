@@ -67,6 +67,39 @@ class OCRConfig(BaseSettings):
     parallel_workers: int = Field(default=10, env="OCR_PARALLEL_WORKERS")
     timeout: int = Field(default=30, env="OCR_TIMEOUT")
     retry_count: int = Field(default=3, env="OCR_RETRY_COUNT")
+    vision_api_url: str = Field(default="https://vision.googleapis.com/v1/images:annotate", env="GOOGLE_VISION_API_URL")
+    vision_feature: str = Field(default="DOCUMENT_TEXT_DETECTION", env="OCR_VISION_FEATURE")  # Sadece kullanılan özellik istenir
+    batch_max_images: int = Field(default=16, env="OCR_BATCH_MAX_IMAGES")  # images:annotate başına görsel (Vision sınırı 16)
+    batch_max_mb: int = Field(default=8, env="OCR_BATCH_MAX_MB")  # Batch istek gövdesi üst sınırı (base64)
+    batch_window_ms: int = Field(default=25, env="OCR_BATCH_WINDOW_MS")  # Batch dolmasa da bu süre sonunda gönder
+    http_pool_size: int = Field(default=100, env="OCR_HTTP_POOL_SIZE")  # Paylaşılan keep-alive bağlantı havuzu
+    http_keepalive_seconds: int = Field(default=30, env="OCR_HTTP_KEEPALIVE_SECONDS")
+    http2: bool = Field(default=False, env="OCR_HTTP2")  # httpx[http2] kuruluysa HTTP/2
+    retry_backoff_seconds: float = Field(default=0.5, env="OCR_RETRY_BACKOFF_SECONDS")  # Üstel geri çekilme başlangıcı
+    cache_path: Optional[str] = Field(default="data/ocr_cache.sqlite3", env="OCR_CACHE_PATH")  # Kalıcı OCR sonuç deposu (boşsa sadece bellek)
+    cache_memory_entries: int = Field(default=5000, env="OCR_CACHE_MEMORY_ENTRIES")  # Bellek LRU katmanı üst sınırı
+    cache_ttl_days: int = Field(default=180, env="OCR_CACHE_TTL_DAYS")
+    preprocess_max_side: int = Field(default=1600, env="OCR_PREPROCESS_MAX_SIDE")  # OCR'a gönderilen görselin uzun kenarı
+    preprocess_crop: bool = Field(default=True, env="OCR_PREPROCESS_CROP")  # Etiket bölgesine kırp
+    preprocess_grayscale: bool = Field(default=True, env="OCR_PREPROCESS_GRAYSCALE")
+    preprocess_jpeg_quality: int = Field(default=85, env="OCR_PREPROCESS_JPEG_QUALITY")
+    brand_dictionary_refresh_seconds: int = Field(default=300, env="OCR_BRAND_DICTIONARY_REFRESH_SECONDS")  # Aktif marka sözlüğü en geç bu sürede yenilenir
+    extraction_batch_workers: int = Field(default=4, env="OCR_EXTRACTION_BATCH_WORKERS")  # Toplu etiket/fiyat çıkarma process sayısı (0 = process pool yok)
+    extraction_batch_chunk_size: int = Field(default=64, env="OCR_EXTRACTION_BATCH_CHUNK_SIZE")  # Worker'a tek seferde gönderilen metin sayısı
+    dispatcher_initial_concurrency: int = Field(default=8, env="OCR_DISPATCHER_INITIAL_CONCURRENCY")  # Vision'a eşzamanlı batch çağrısı başlangıç sınırı (AIMD)
+    dispatcher_min_concurrency: int = Field(default=1, env="OCR_DISPATCHER_MIN_CONCURRENCY")
+    dispatcher_max_concurrency: int = Field(default=64, env="OCR_DISPATCHER_MAX_CONCURRENCY")  # http_pool_size'ı geçmez
+    dispatcher_latency_tolerance: float = Field(default=2.0, env="OCR_DISPATCHER_LATENCY_TOLERANCE")  # Gecikme tabanın bu katını aşınca sınır düşer
+    dispatcher_queue_timeout_seconds: float = Field(default=60.0, env="OCR_DISPATCHER_QUEUE_TIMEOUT_SECONDS")  # Sırada en fazla bekleme, sonra dosya adına düşülür
+    breaker_failure_ratio: float = Field(default=0.5, env="OCR_BREAKER_FAILURE_RATIO")  # Son denemelerde bu oranda 429/5xx devreyi açar
+    breaker_min_calls: int = Field(default=10, env="OCR_BREAKER_MIN_CALLS")
+    breaker_window: int = Field(default=20, env="OCR_BREAKER_WINDOW")
+    breaker_open_seconds: float = Field(default=30.0, env="OCR_BREAKER_OPEN_SECONDS")  # Yarı açık denemeden önce bekleme (her başarısız denemede x2)
+    daily_quota: int = Field(default=0, env="OCR_DAILY_QUOTA")  # Günlük görsel kotası, process başına (0 = sınırsız)
+    daily_quota_burst: int = Field(default=0, env="OCR_DAILY_QUOTA_BURST")  # Token bucket kapasitesi (0 = kotanın 1/24'ü)
+    daily_quota_timezone: str = Field(default="America/Los_Angeles", env="OCR_DAILY_QUOTA_TIMEZONE")  # Sağlayıcının kota günü (Google: Pasifik gece yarısı)
+    reextraction_page_size: int = Field(default=500, env="OCR_REEXTRACTION_PAGE_SIZE")  # Yeniden çıkarmada tek sorguda okunan ürün
+    reextraction_write_batch_size: int = Field(default=200, env="OCR_REEXTRACTION_WRITE_BATCH_SIZE")  # Değişiklikler bu boyutta transaction'larla yazılır
 
 class UploadConfig(BaseSettings):
     """Upload konfigürasyonu"""
@@ -75,6 +108,31 @@ class UploadConfig(BaseSettings):
     allowed_extensions: List[str] = Field(default=["jpg", "jpeg", "png", "webp"], env="ALLOWED_EXTENSIONS")
     total_upload_size_mb: int = Field(default=500, env="TOTAL_UPLOAD_SIZE_MB")
     storage_path: str = Field(default="uploads", env="STORAGE_PATH")
+    staging_chunk_size_kb: int = Field(default=256, env="UPLOAD_STAGING_CHUNK_KB")  # Streaming ingest parça boyutu
+    resumable_chunk_size_kb: int = Field(default=1024, env="UPLOAD_RESUMABLE_CHUNK_KB")  # Parçalı yükleme parça boyutu
+    resumable_session_ttl_hours: int = Field(default=24, env="UPLOAD_RESUMABLE_SESSION_TTL_HOURS")  # Bu süre parça gelmeyen oturum ve staging dosyaları silinir
+    resume_stale_seconds: int = Field(default=120, env="UPLOAD_RESUME_STALE_SECONDS")  # Job lease süresi - heartbeat ile yenilenmezse job yarım kalmış sayılır
+    db_session_pool_size: int = Field(default=30, env="UPLOAD_DB_SESSION_POOL_SIZE")  # Dosya task'ları için eşzamanlı DB session sayısı
+    progress_flush_seconds: float = Field(default=2.0, env="UPLOAD_PROGRESS_FLUSH_SECONDS")  # UploadJob ilerleme yazımı debounce süresi
+    ultra_fast_max_files: int = Field(default=500, env="UPLOAD_ULTRA_FAST_MAX_FILES")  # Ultra fast mod için en fazla dosya
+    ultra_fast_max_mb: int = Field(default=400, env="UPLOAD_ULTRA_FAST_MAX_MB")  # Ultra fast mod tüm dosyaları aynı anda işler - boyut sınırı
+    admission_max_inflight_mb: int = Field(default=1024, env="UPLOAD_ADMISSION_MAX_INFLIGHT_MB")  # Tüm job'larda aynı anda işlenen veri
+    admission_max_ocr_calls: int = Field(default=300, env="UPLOAD_ADMISSION_MAX_OCR_CALLS")  # Tüm job'larda bekleyen OCR (etiket) çağrısı
+    admission_max_cpu_units: int = Field(default=1500, env="UPLOAD_ADMISSION_MAX_CPU_UNITS")  # Tüm job'larda aynı anda işlenen dosya
+    admission_max_queued_jobs: int = Field(default=20, env="UPLOAD_ADMISSION_MAX_QUEUED_JOBS")  # Kuyruk dolunca 503 + Retry-After
+    admission_small_job_files: int = Field(default=50, env="UPLOAD_ADMISSION_SMALL_JOB_FILES")  # Bu boyuttaki job'lar öncelikli
+    admission_small_job_reserve: float = Field(default=0.2, env="UPLOAD_ADMISSION_SMALL_JOB_RESERVE")  # Bütçenin küçük job'lara ayrılan payı
+    phash_enabled: bool = Field(default=True, env="UPLOAD_PHASH_ENABLED")  # Algısal hash ile yakın-kopya tespiti
+    phash_tag_radius: int = Field(default=4, env="UPLOAD_PHASH_TAG_RADIUS")  # Etiket OCR'ı bu Hamming mesafesine kadar tekrar kullanılır (64 bit)
+    phash_duplicate_radius: int = Field(default=6, env="UPLOAD_PHASH_DUPLICATE_RADIUS")  # Ürün görseli bu mesafeye kadar kopya sayılır
+    collage_render_workers: int = Field(default=0, env="UPLOAD_COLLAGE_RENDER_WORKERS")  # Kolaj render process sayısı (0 = CPU sayısı, -1 = process pool yok)
+    collage_queue_backend: str = Field(default="sqlite", env="UPLOAD_COLLAGE_QUEUE_BACKEND")  # Kolaj kuyruğu: sqlite | redis (Redis yoksa sqlite)
+    collage_queue_path: Optional[str] = Field(default="data/collage_queue.sqlite3", env="UPLOAD_COLLAGE_QUEUE_PATH")  # SQLite kuyruk dosyası (boşsa bellekte, restart'ta kaybolur)
+    collage_queue_concurrency: int = Field(default=0, env="UPLOAD_COLLAGE_QUEUE_CONCURRENCY")  # Kuyruğu boşaltan eşzamanlı kolaj sayısı (0 = render worker sayısı)
+    collage_queue_visibility_seconds: int = Field(default=600, env="UPLOAD_COLLAGE_QUEUE_VISIBILITY_SECONDS")  # Lease süresi - dolunca öğe başka worker'a verilir
+    collage_queue_max_attempts: int = Field(default=5, env="UPLOAD_COLLAGE_QUEUE_MAX_ATTEMPTS")  # Bu kadar başarısız denemeden sonra öğe dead olur
+    collage_queue_retry_base_seconds: float = Field(default=30.0, env="UPLOAD_COLLAGE_QUEUE_RETRY_BASE_SECONDS")  # Üstel geri çekilmenin ilk adımı
+    collage_queue_poll_seconds: float = Field(default=15.0, env="UPLOAD_COLLAGE_QUEUE_POLL_SECONDS")  # Güvenlik ağı: kaçan sinyaller / diğer process'lerin eklediklerini yoklama aralığı
 
 class TelegramConfig(BaseSettings):
     """Telegram konfigürasyonu"""
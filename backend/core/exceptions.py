@@ -59,6 +59,7 @@ class ErrorCode(Enum):
     SYSTEM_ERROR = "SYS_001"
     VALIDATION_ERROR = "SYS_002"
     CONFIGURATION_ERROR = "SYS_003"
+    SYSTEM_OVERLOADED = "SYS_004"
 
 class BaseAppException(Exception):
     """Base application exception"""
@@ -124,15 +125,24 @@ class ConfigurationError(BaseAppException):
     def __init__(self, message: str = "Configuration error", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, ErrorCode.CONFIGURATION_ERROR, details, 500)
 
+class ServiceOverloadedError(BaseAppException):
+    """Capacity exhausted - client should retry later"""
+    
+    def __init__(self, message: str = "Service overloaded", retry_after: int = 30, details: Optional[Dict[str, Any]] = None):
+        self.retry_after = retry_after
+        super().__init__(message, ErrorCode.SYSTEM_OVERLOADED, {**(details or {}), "retry_after": retry_after}, 503)
+
 def create_http_exception(exception: BaseAppException) -> HTTPException:
     """Convert BaseAppException to HTTPException"""
+    retry_after = getattr(exception, "retry_after", None)
     return HTTPException(
         status_code=exception.status_code,
         detail={
             "message": exception.message,
             "error_code": exception.error_code.value,
             "details": exception.details
-        }
+        },
+        headers={"Retry-After": str(retry_after)} if retry_after else None
     )
 
 def handle_exception(exception: Exception) -> HTTPException:
@@ -0,0 +1,61 @@
+"""
+Unit of Work
+Eşzamanlı async task'lar için görev başına kısa ömürlü session
+
+Bir Session thread/task güvenli değildir; aynı session'ı paylaşan onlarca
+coroutine birbirinin transaction'ını commit/rollback eder ve kilitleri uzun
+süre tutar. SessionPool her task'a kendi session'ını verir, iş bitince
+commit eder ve kapatır. Aynı anda açık session sayısı engine havuzunun
+altında tutulur ki diğer istekler bağlantısız kalmasın.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from core.logging import get_logger
+
+logger = get_logger('unit_of_work')
+
+
+class SessionPool:
+    """Sınırlı sayıda eşzamanlı unit of work"""
+
+    def __init__(self, max_sessions: int = 20):
+        self.max_sessions = max(1, max_sessions)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Event loop başladıktan sonra oluştur
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_sessions)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Session]:
+        """
+        Görev başına session: başarıda commit, hatada rollback, her durumda close.
+
+            async with pool.session() as db:
+                ...
+        """
+        async with self.semaphore:
+            db = SessionLocal()
+            self.active += 1
+            try:
+                yield db
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                self.active -= 1
+                db.close()
+
+    def get_stats(self) -> dict:
+        return {'max_sessions': self.max_sessions, 'active_sessions': self.active}
@@ -0,0 +1,64 @@
+"""
+Dialect-aware Upsert
+Unique anahtarı çakışan satırları mevcut kayıtla birleştiren toplu INSERT
+
+    MySQL       INSERT ... ON DUPLICATE KEY UPDATE
+    SQLite      INSERT ... ON CONFLICT (...) DO UPDATE / DO NOTHING
+    PostgreSQL  INSERT ... ON CONFLICT (...) DO UPDATE / DO NOTHING
+
+Eşzamanlı iki job aynı satırı eklemeye çalıştığında ikincisi hata almaz ve
+kopya oluşturmaz; ID'ler ardından tek bir IN sorgusuyla okunur (MySQL
+RETURNING desteklemez).
+"""
+
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import Table, insert
+from sqlalchemy.orm import Session
+
+from core.logging import get_logger
+
+logger = get_logger('upsert')
+
+
+def upsert_rows(
+    db: Session,
+    table: Table,
+    rows: List[Dict[str, Any]],
+    conflict_columns: Sequence[str],
+    update_columns: Sequence[str] = ()
+) -> None:
+    """
+    rows'u tek executemany ile ekle; conflict_columns unique anahtarında
+    çakışan satırlarda update_columns güncellenir (boşsa mevcut satır aynen kalır).
+    """
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        statement = mysql_insert(table)
+        # Boş güncelleme: anahtar kolonu kendisine eşitle (no-op, mevcut değer korunur)
+        values = {column: statement.inserted[column] for column in update_columns} or {
+            conflict_columns[0]: table.c[conflict_columns[0]]
+        }
+        statement = statement.on_duplicate_key_update(**values)
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table)
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=list(conflict_columns),
+                set_={column: statement.excluded[column] for column in update_columns}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=list(conflict_columns))
+    else:
+        logger.warning(f"[UPSERT] No upsert support for dialect {dialect}, using plain INSERT")
+        statement = insert(table)
+
+    db.execute(statement, rows)
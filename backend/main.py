@@ -87,6 +87,22 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error starting enterprise upload service: {e}")
     
+    # Resume upload jobs interrupted by a restart/deploy (stage journal)
+    try:
+        from api.products_enterprise import upload_manager
+        asyncio.create_task(upload_manager.resume_interrupted_jobs())
+        logger.info("Upload job resume watcher started")
+    except Exception as e:
+        logger.error(f"Error starting upload job resume watcher: {e}")
+    
+    # Expire abandoned resumable upload sessions and their staging files
+    try:
+        from services.resumable_upload_service import resumable_upload_service
+        asyncio.create_task(resumable_upload_service.sweep_expired_sessions())
+        logger.info("Resumable upload session sweeper started")
+    except Exception as e:
+        logger.error(f"Error starting resumable upload session sweeper: {e}")
+    
     # Start AI template generation scheduler
     try:
         from services.ai_template_generator import AITemplateGenerator
@@ -123,6 +139,35 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error stopping collage scheduler: {e}")
     
+    # Flush / drain batched Vision requests before their HTTP client goes away
+    try:
+        from services.vision_batcher import vision_batcher
+        await vision_batcher.close()
+    except Exception as e:
+        logger.error(f"Error closing Vision batcher: {e}")
+    
+    # Close pooled OCR HTTP connections
+    try:
+        from services.ocr_http_client import ocr_http_client
+        await ocr_http_client.close()
+        logger.info("OCR HTTP client closed")
+    except Exception as e:
+        logger.error(f"Error closing OCR HTTP client: {e}")
+    
+    # Stop batch extraction workers
+    try:
+        from services.extraction_batch import extraction_batch_service
+        extraction_batch_service.shutdown()
+    except Exception as e:
+        logger.error(f"Error stopping extraction batch workers: {e}")
+    
+    # Stop collage render workers
+    try:
+        from services.collage_render_farm import collage_render_farm
+        collage_render_farm.shutdown()
+    except Exception as e:
+        logger.error(f"Error stopping collage render farm: {e}")
+    
     logger.info("Application shutdown completed")
 
 from api import auth, users, brands, employee_requests, roles, system, categories
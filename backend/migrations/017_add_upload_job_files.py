@@ -0,0 +1,48 @@
+"""
+Add Upload Job Files
+Per-file stage journal for crash-resumable upload jobs
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Create upload_job_files table"""
+    op.create_table('upload_job_files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('file_index', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(255), nullable=False),
+        sa.Column('staged_path', sa.Text(), nullable=False),
+        sa.Column('checksum', sa.String(32), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('stage', sa.String(20), nullable=True),
+        sa.Column('ocr_data', sa.JSON(), nullable=True),
+        sa.Column('cdn_url', sa.String(500), nullable=True),
+        sa.Column('folder_path', sa.String(500), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['upload_jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_id', 'file_index', name='uq_upload_job_file')
+    )
+    
+    op.create_index('ix_upload_job_files_job_id', 'upload_job_files', ['job_id'])
+    op.create_index('ix_upload_job_files_stage', 'upload_job_files', ['stage'])
+    op.create_index('ix_upload_job_files_updated_at', 'upload_job_files', ['updated_at'])
+    print("✅ Created upload_job_files table")
+
+def downgrade():
+    """Drop upload_job_files table"""
+    op.drop_index('ix_upload_job_files_updated_at', table_name='upload_job_files')
+    op.drop_index('ix_upload_job_files_stage', table_name='upload_job_files')
+    op.drop_index('ix_upload_job_files_job_id', table_name='upload_job_files')
+    op.drop_table('upload_job_files')
+    print("✅ Dropped upload_job_files table")
@@ -0,0 +1,23 @@
+"""
+Add Product Image Perceptual Hash
+Near-duplicate detection for re-shot / re-exported product photos
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Add phash column to product_images"""
+    op.add_column('product_images', sa.Column('phash', sa.String(16), nullable=True))
+    print("✅ Added product_images.phash column")
+
+def downgrade():
+    """Remove phash column from product_images"""
+    op.drop_column('product_images', 'phash')
+    print("✅ Dropped product_images.phash column")
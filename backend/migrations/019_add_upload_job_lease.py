@@ -0,0 +1,27 @@
+"""
+Add Upload Job Lease
+Owner + heartbeat lease so only expired jobs are resumed by another worker
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Add lease columns to upload_jobs"""
+    op.add_column('upload_jobs', sa.Column('lease_owner', sa.String(64), nullable=True))
+    op.add_column('upload_jobs', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_upload_jobs_lease_expires_at', 'upload_jobs', ['lease_expires_at'])
+    print("✅ Added upload_jobs lease columns")
+
+def downgrade():
+    """Remove lease columns from upload_jobs"""
+    op.drop_index('ix_upload_jobs_lease_expires_at', table_name='upload_jobs')
+    op.drop_column('upload_jobs', 'lease_expires_at')
+    op.drop_column('upload_jobs', 'lease_owner')
+    print("✅ Dropped upload_jobs lease columns")
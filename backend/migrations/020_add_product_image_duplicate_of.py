@@ -0,0 +1,29 @@
+"""
+Add Product Image Duplicate Flag
+Near-duplicate product images keep their own row and point at the original
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Add duplicate_of_id column to product_images"""
+    op.add_column('product_images', sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+    op.create_index('ix_product_images_duplicate_of_id', 'product_images', ['duplicate_of_id'])
+    op.create_foreign_key(
+        'fk_product_images_duplicate_of', 'product_images', 'product_images', ['duplicate_of_id'], ['id']
+    )
+    print("✅ Added product_images.duplicate_of_id column")
+
+def downgrade():
+    """Remove duplicate_of_id column from product_images"""
+    op.drop_constraint('fk_product_images_duplicate_of', 'product_images', type_='foreignkey')
+    op.drop_index('ix_product_images_duplicate_of_id', table_name='product_images')
+    op.drop_column('product_images', 'duplicate_of_id')
+    print("✅ Dropped product_images.duplicate_of_id column")
@@ -0,0 +1,35 @@
+"""
+Add Product Upsert Key
+Unique (code, color, brand_id) so concurrent bulk upserts cannot duplicate products
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    """Add unique key on products (code, color, brand_id)"""
+    conn = op.get_bind()
+    duplicates = conn.execute(sa.text(
+        "SELECT code, color, brand_id, COUNT(*) FROM products "
+        "GROUP BY code, color, brand_id HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        # Ürünleri birleştirmek görsel / şablon kayıtlarını taşımayı gerektirir - otomatik yapılmaz
+        for code, color, brand_id, count in duplicates[:20]:
+            print(f"⚠️ Duplicate product {code} / {color} / brand {brand_id}: {count} rows")
+        raise RuntimeError(
+            f"{len(duplicates)} duplicate (code, color, brand_id) groups in products - merge them before upgrading"
+        )
+    op.create_unique_constraint('uq_products_code_color_brand', 'products', ['code', 'color', 'brand_id'])
+    print("✅ Added products (code, color, brand_id) unique key")
+
+def downgrade():
+    """Remove unique key on products (code, color, brand_id)"""
+    op.drop_constraint('uq_products_code_color_brand', 'products', type_='unique')
+    print("✅ Dropped products (code, color, brand_id) unique key")
@@ -10,7 +10,7 @@ from .social_media_channel import SocialMediaChannel
 from .social_media_message import SocialMediaMessage
 from .telegram_bot import TelegramBot
 from .product import Product, ProductImage
-from .upload_job import UploadJob
+from .upload_job import UploadJob, UploadJobFile
 from .template import Template
 from .template_permission import TemplatePermission
 from .user_brand import UserBrand
@@ -30,6 +30,7 @@ __all__ = [
     "Product",
     "ProductImage",
     "UploadJob",
+    "UploadJobFile",
     "Template",
     "TemplatePermission",
     "UserBrand"
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Toplu upsert anahtarı - eşzamanlı job'lar aynı ürünü iki kez oluşturamaz
+        UniqueConstraint('code', 'color', 'brand_id', name='uq_products_code_color_brand'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)  # Ürün adı (dosya adından çıkarılacak)
@@ -77,6 +81,8 @@ class ProductImage(Base):
     # AI analiz sonuçları
     is_cover_image = Column(Boolean, default=False)  # Kapak görseli mi?
     ai_analysis = Column(JSON, nullable=True)  # AI analiz sonuçları
+    phash = Column(String(16), nullable=True)  # 64 bit algısal hash (hex) - yakın-kopya tespiti
+    duplicate_of_id = Column(Integer, ForeignKey('product_images.id'), nullable=True, index=True)  # Yakın-kopyası olduğu asıl görsel
     
     # Durum
     is_active = Column(Boolean, default=True)
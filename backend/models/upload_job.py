@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -45,6 +45,44 @@ class UploadJob(Base):
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     
+    # Sahiplik (lease): job'u çalıştıran worker süreyi heartbeat ile uzatır;
+    # süresi dolan 'processing' / 'resuming' job başka bir worker'ca devralınır
+    lease_owner = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True, index=True)
+    
     def __repr__(self):
         return f"<UploadJob(id={self.id}, status='{self.status}', files={self.total_files})>"
 
+
+
+class UploadJobFile(Base):
+    """Dosya bazında aşama günlüğü - yeniden başlatmada kaldığı yerden devam için"""
+    __tablename__ = "upload_job_files"
+    __table_args__ = (
+        UniqueConstraint('job_id', 'file_index', name='uq_upload_job_file'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey('upload_jobs.id', ondelete='CASCADE'), nullable=False, index=True)
+    file_index = Column(Integer, nullable=False)
+    
+    # Staging bilgileri
+    filename = Column(String(255), nullable=False)
+    staged_path = Column(Text, nullable=False)
+    checksum = Column(String(32), nullable=True)
+    size = Column(Integer, default=0)
+    
+    # Stage: staged, ocr_done, cdn_uploaded, db_written, collage_scheduled, failed
+    stage = Column(String(20), default="staged", index=True)
+    
+    # Tamamlanan aşamaların sonuçları (tekrar OCR / CDN transferi yapılmaz)
+    ocr_data = Column(JSON, nullable=True)
+    cdn_url = Column(String(500), nullable=True)
+    folder_path = Column(String(500), nullable=True)
+    error_message = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<UploadJobFile(job_id={self.job_id}, index={self.file_index}, stage='{self.stage}')>"
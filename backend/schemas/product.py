@@ -184,3 +184,14 @@ class BulkProductProcess(BaseModel):
     """Toplu ürün işleme"""
     product_ids: List[int]
     force_reprocess: bool = False
+
+# Resumable Chunked Upload
+class UploadSessionFile(BaseModel):
+    """Parçalı yükleme için dosya bildirimi"""
+    filename: str
+    size: int = Field(..., ge=0)
+    checksum: str = Field(..., min_length=32, max_length=32)  # Tüm dosyanın MD5'i (hex)
+
+class UploadSessionCreate(BaseModel):
+    """Parçalı yükleme oturumu oluşturma"""
+    files: List[UploadSessionFile] = Field(..., min_length=1)
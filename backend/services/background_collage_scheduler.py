@@ -1,14 +1,24 @@
 """
 Background Collage Scheduler
 Otomatik kolaj işleme için background task scheduler
+
+Kuyruk eskiden 30 saniyede bir en fazla 3 öğe alınarak işleniyordu (dakikada
+6 kolaj). Artık render kapasitesi kadar worker task kuyruğu sürekli boşaltır:
+her worker bir öğe lease eder, işler, bitince hemen sıradakini alır. Kuyruk
+boşken worker'lar olayla uyanır: upload pipeline bir ürünün son dosyası
+commit edilince smart_collage_service.product_completed çağırır
+(complete_product_info kolajı kendisi inline oluşturur, kuyruğa eklemez). collage_queue_poll_seconds
+yoklaması sadece güvenlik ağıdır (kaçan sinyaller, diğer process'lerin
+eklediği öğeler). Periyodik döngü sadece bakım işlerini (cache temizliği,
+durum logu) yapar.
 """
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from sqlalchemy.orm import Session
 
-from database import get_db
+from core.config import settings
 from services.smart_collage_service import smart_collage_service
 from core.logging import get_logger
 
@@ -20,8 +30,17 @@ class BackgroundCollageScheduler:
     def __init__(self):
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
+        self.workers: List[asyncio.Task] = []
         logger.info("Background Collage Scheduler initialized")
     
+    def _concurrency(self) -> int:
+        """Eşzamanlı kolaj sayısı - varsayılan render farm worker sayısı"""
+        configured = settings.upload.collage_queue_concurrency
+        if configured > 0:
+            return configured
+        from services.collage_render_farm import collage_render_farm
+        return max(1, collage_render_farm.workers)
+    
     async def start_scheduler(self, interval_seconds: int = 30):
         """Scheduler'ı başlat"""
         if self.is_running:
@@ -29,8 +48,10 @@ class BackgroundCollageScheduler:
             return
         
         self.is_running = True
+        concurrency = self._concurrency()
+        self.workers = [asyncio.create_task(self._drain_worker(i)) for i in range(concurrency)]
         self.task = asyncio.create_task(self._scheduler_loop(interval_seconds))
-        logger.info(f"Background scheduler started with {interval_seconds}s interval")
+        logger.info(f"Background scheduler started: {concurrency} queue workers, {interval_seconds}s maintenance interval")
     
     async def stop_scheduler(self):
         """Scheduler'ı durdur"""
@@ -38,41 +59,44 @@ class BackgroundCollageScheduler:
             return
         
         self.is_running = False
-        if self.task:
-            self.task.cancel()
-            try:
-                await self.task
-            except asyncio.CancelledError:
-                pass
+        tasks = [task for task in [self.task, *self.workers] if task]
+        for task in tasks:
+            task.cancel()
+        # Yarıda kalan öğeler lease süresi dolunca tekrar alınır
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
         
         logger.info("Background scheduler stopped")
     
+    async def _drain_worker(self, index: int):
+        """Kuyruktan sürekli öğe al ve işle; boşken yeni öğe ya da poll aralığını bekle"""
+        poll_seconds = settings.upload.collage_queue_poll_seconds
+        while self.is_running:
+            try:
+                if not await smart_collage_service.process_next():
+                    await smart_collage_service.wait_for_work(poll_seconds)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"[SCHEDULER] Queue worker {index} error: {e}")
+                await asyncio.sleep(poll_seconds)
+    
     async def _scheduler_loop(self, interval_seconds: int):
-        """Ana scheduler döngüsü"""
+        """Bakım döngüsü - cache temizliği ve kuyruk durumu"""
         try:
             while self.is_running:
                 try:
-                    # Database session al
-                    db = next(get_db())
+                    # Eski cache'leri temizle (her 10 dakikada bir)
+                    if datetime.now().minute % 10 == 0:
+                        smart_collage_service.clear_old_cache(max_age_hours=24)
                     
-                    try:
-                        # Kolaj kuyruğunu işle
-                        await smart_collage_service.process_collage_queue(
-                            db, max_concurrent=3
+                    # Queue durumunu logla (her 5 dakikada bir)
+                    if datetime.now().minute % 5 == 0:
+                        status = await asyncio.get_running_loop().run_in_executor(
+                            None, smart_collage_service.get_queue_status
                         )
-                        
-                        # Eski cache'leri temizle (her 10 dakikada bir)
-                        if datetime.now().minute % 10 == 0:
-                            smart_collage_service.clear_old_cache(max_age_hours=24)
-                        
-                        # Queue durumunu logla (her 5 dakikada bir)
-                        if datetime.now().minute % 5 == 0:
-                            status = smart_collage_service.get_queue_status()
-                            if status['queue_size'] > 0:
-                                logger.info(f"[SCHEDULER] Queue: {status['queue_size']} items, Processing: {status['processing_count']}")
-                    
-                    finally:
-                        db.close()
+                        if status['queue_size'] > 0:
+                            logger.info(f"[SCHEDULER] Queue: {status['queue_size']} items, Processing: {status['processing_count']}")
                     
                 except Exception as e:
                     logger.error(f"[SCHEDULER] Error in loop: {e}")
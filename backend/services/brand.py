@@ -4,6 +4,7 @@ from models.brand import Brand, BrandRequest
 from models.user import User
 from schemas.brand import BrandCreate, BrandUpdate, BrandRequestCreate, BrandRequestUpdate
 from sqlalchemy import and_, or_
+from services.keyword_matcher import brand_dictionary
 import logging
 
 logger = logging.getLogger(__name__)
@@ -66,6 +67,7 @@ class BrandService:
             self.db.add(brand)
             self.db.commit()
             self.db.refresh(brand)
+            brand_dictionary.invalidate()
             return brand
         except Exception as e:
             logger.error(f"Error creating brand: {e}")
@@ -95,6 +97,7 @@ class BrandService:
 
             self.db.commit()
             self.db.refresh(brand)
+            brand_dictionary.invalidate()
             return brand
         except Exception as e:
             logger.error(f"Error updating brand: {e}")
@@ -110,6 +113,7 @@ class BrandService:
 
             brand.is_active = True
             self.db.commit()
+            brand_dictionary.invalidate()
             return True, "Brand activated successfully"
         except Exception as e:
             logger.error(f"Error activating brand: {e}")
@@ -125,6 +129,7 @@ class BrandService:
 
             brand.is_active = False
             self.db.commit()
+            brand_dictionary.invalidate()
             return True, "Brand deactivated successfully"
         except Exception as e:
             logger.error(f"Error deactivating brand: {e}")
@@ -23,14 +23,14 @@ class BunnyCDNService:
     
     def __init__(self):
         # Bunny CDN FTP credentials
-        self.hostname = "storage.bunnycdn.com"
+        self.hostname = os.getenv("BUNNY_FTP_HOST", "storage.bunnycdn.com")
         self.username = "kolajbot"
         self.password = "e65c54d3-f195-489e-a93e065a415a-caf5-406a"
         self.read_only_password = "0af62004-651e-4e32-8e5ee35ac5d3-50fd-4268"
-        self.port = 21
+        self.port = int(os.getenv("BUNNY_FTP_PORT", "21"))
         
         # CDN base URL for accessing files
-        self.cdn_base_url = "https://kolajbot.b-cdn.net"
+        self.cdn_base_url = os.getenv("BUNNY_CDN_BASE_URL", "https://kolajbot.b-cdn.net")
         
         logger.info("Bunny CDN Service initialized")
     
@@ -203,6 +203,43 @@ class BunnyCDNService:
             logger.error(f"File upload failed: {e}")
             return False, "", str(e)
     
+    async def upload_local_file(
+        self, 
+        local_path: str, 
+        filename: str, 
+        folder_path: str
+    ) -> Tuple[bool, str, str]:
+        """
+        Upload a file from disk to Bunny CDN (streamed, not loaded into memory)
+        Returns: (success, cdn_url, error_message)
+        """
+        try:
+            ftp = self._get_ftp_connection()
+            
+            try:
+                if not self._create_directory_structure(ftp, folder_path):
+                    return False, "", "Failed to create directory structure"
+                
+                ftp.cwd(f"/{folder_path}")
+                
+                safe_filename = self._sanitize_name(filename)
+                
+                # storbinary reads the handle in blocks
+                with open(local_path, 'rb') as file_handle:
+                    ftp.storbinary(f'STOR {safe_filename}', file_handle)
+                
+                cdn_url = f"{self.cdn_base_url}/{folder_path}/{safe_filename}"
+                
+                logger.info(f"File uploaded successfully: {cdn_url}")
+                return True, cdn_url, ""
+                
+            finally:
+                ftp.quit()
+                
+        except Exception as e:
+            logger.error(f"File upload failed: {e}")
+            return False, "", str(e)
+    
     async def upload_files_batch(
         self, 
         files_data: List[Dict[str, Any]], 
@@ -214,6 +251,7 @@ class BunnyCDNService:
         """
         Upload multiple files to CDN
         files_data: [{"content": bytes, "filename": str}, ...]
+                    or [{"path": str, "filename": str}, ...] for staged files
         Returns: [{"success": bool, "filename": str, "cdn_url": str, "error": str}, ...]
         """
         try:
@@ -243,14 +281,17 @@ class BunnyCDNService:
                 for file_data in files_data:
                     try:
                         filename = file_data["filename"]
-                        content = file_data["content"]
                         
                         # Sanitize filename
                         safe_filename = self._sanitize_name(filename)
                         
-                        # Upload file
-                        file_buffer = BytesIO(content)
-                        ftp.storbinary(f'STOR {safe_filename}', file_buffer)
+                        # Upload file (staged files are streamed from disk)
+                        if file_data.get("path"):
+                            with open(file_data["path"], 'rb') as file_handle:
+                                ftp.storbinary(f'STOR {safe_filename}', file_handle)
+                        else:
+                            file_buffer = BytesIO(file_data["content"])
+                            ftp.storbinary(f'STOR {safe_filename}', file_buffer)
                         
                         # Generate CDN URL
                         cdn_url = f"{self.cdn_base_url}/{folder_path}/{safe_filename}"
@@ -0,0 +1,167 @@
+"""
+Collage Layout Compiler
+Kolaj düzenlerini (1 / 2 / 3+ görsel) bir kez derlenen planlara çevirir
+
+Her kolajda yeniden yapılan işler:
+    - Her görsel için yeni 'L' köşe maskesi + RGBA ara görsel (_add_rounded_corners)
+    - Marka başlığı ve alt alandaki logo kutusu (markaya göre hep aynı)
+    - Slot koordinatlarının hesaplanması
+
+Derlenmiş plan:
+    - CollageLayout: slot kutuları, fit/cover modu, köşe yarıçapı
+    - Maske cache'i: (genişlik, yükseklik, yarıçap) başına bir 'L' maske; cover
+      slotlarının maskeleri derlemede hazırlanır, fit slotlarınınki (boyut
+      görselin oranına bağlı) ilk kullanımda
+    - Marka katmanları: başlık şeridi + alt şerit (arka plan ve logo kutusu)
+      marka başına bir kez çizilir, LRU ile sınırlı
+
+Render artık sadece şeritleri yapıştırır, ürün fotoğraflarını cache'li
+maskeyle doğrudan tuvale basar ve dinamik metni (badge, ürün bilgisi, fiyat)
+çizer. Fontlar ProfessionalCollageMaker._get_font cache'inden gelir.
+Cache'ler process başınadır - render farm worker'ları warm() ile başlar.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageDraw
+
+# Marka katmanı çifti ~0.4 MB (720x65 + 720x110 RGB)
+BRAND_LAYER_CACHE_SIZE = 64
+MASK_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class ImageSlot:
+    """Tuvalde bir ürün görseli kutusu"""
+    x: int
+    y: int
+    width: int
+    height: int
+    cover: bool  # True: kutuyu doldur, taşanı kırp; False: sığdır, dikeyde ortala
+    radius: int
+    center_x: bool = False  # fit slotunda yatayda da ortala
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def position(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        """Yeniden boyutlandırılmış görselin sol üst köşesi"""
+        if self.cover:
+            return self.x, self.y
+        x = self.x + (self.width - size[0]) // 2 if self.center_x else self.x
+        return x, self.y + (self.height - size[1]) // 2
+
+
+@dataclass(frozen=True)
+class CollageLayout:
+    name: str
+    slots: Tuple[ImageSlot, ...]
+
+
+class CollageLayoutCompiler:
+    """ProfessionalCollageMaker geometrisinden düzen planları ve statik katmanlar"""
+
+    def __init__(self, maker):
+        self.maker = maker
+        self._layouts: Dict[int, CollageLayout] = {}
+        self._masks: 'OrderedDict[Tuple[int, int, int], Image.Image]' = OrderedDict()
+        self._brand_layers: 'OrderedDict[str, Tuple[Image.Image, Image.Image]]' = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Düzenler
+    # ------------------------------------------------------------------
+
+    def _compile(self, image_count: int) -> CollageLayout:
+        maker = self.maker
+        padding, gap = maker.padding, maker.image_gap
+        top = maker.header_height
+        height = maker.height - maker.header_height - maker.bottom_height
+
+        if image_count == 1:
+            # Tek görsel - maksimum alan, iki eksende ortalı
+            slots = (ImageSlot(padding, top + padding, maker.width - padding * 2, height - padding * 2,
+                               cover=False, radius=8, center_x=True),)
+            name = 'single'
+        elif image_count == 2:
+            # 2 görsel yan yana, 5px aralık
+            pair_gap = 5
+            width = (maker.width - padding * 2 - pair_gap) // 2
+            slots = tuple(
+                ImageSlot(padding + i * (width + pair_gap), top + padding, width, height - padding * 2,
+                          cover=False, radius=6)
+                for i in range(2)
+            )
+            name = 'two'
+        else:
+            # Sol büyük (%60, tam yükseklik) + sağda üst üste iki küçük - hepsi cover
+            left_width = int((maker.width - padding * 2 - gap) * 0.6)
+            left_height = height - padding * 2
+            right_width = maker.width - left_width - padding * 2 - gap
+            right_height = (left_height - gap) // 2
+            right_x = padding + left_width + gap
+            slots = (
+                ImageSlot(padding, top + padding, left_width, left_height, cover=True, radius=8),
+                ImageSlot(right_x, top + padding, right_width, right_height, cover=True, radius=6),
+                ImageSlot(right_x, top + padding + right_height + gap, right_width, right_height, cover=True, radius=6),
+            )
+            name = 'multiple'
+
+        for slot in slots:
+            if slot.cover:
+                self.mask(slot.size, slot.radius)
+        return CollageLayout(name, slots)
+
+    def layout(self, image_count: int) -> CollageLayout:
+        key = min(image_count, 3)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = self._layouts[key] = self._compile(key)
+        return layout
+
+    # ------------------------------------------------------------------
+    # Maskeler ve marka katmanları
+    # ------------------------------------------------------------------
+
+    def mask(self, size: Tuple[int, int], radius: int) -> Image.Image:
+        """Yuvarlatılmış köşe maskesi ('L', 255 = görünür)"""
+        key = (size[0], size[1], radius)
+        mask = self._masks.get(key)
+        if mask is not None:
+            self._masks.move_to_end(key)
+            return mask
+        mask = Image.new('L', size, 0)
+        ImageDraw.Draw(mask).rounded_rectangle([(0, 0), size], radius, fill=255)
+        self._masks[key] = mask
+        if len(self._masks) > MASK_CACHE_SIZE:
+            self._masks.popitem(last=False)
+        return mask
+
+    def _render_brand_layers(self, brand: str) -> Tuple[Image.Image, Image.Image]:
+        maker = self.maker
+        # Başlık şeridi görsel alanının padding'ine kadar - görseller bu satırlara hiç basılmaz
+        header = Image.new('RGB', (maker.width, maker.header_height + maker.padding), maker.bg_color)
+        maker._draw_brand_header(header, ImageDraw.Draw(header), brand)
+        bottom = Image.new('RGB', (maker.width, maker.bottom_height), maker.bg_color)
+        maker._draw_bottom_background(bottom, ImageDraw.Draw(bottom), 0, brand)
+        return header, bottom
+
+    def brand_layers(self, brand: str) -> Tuple[Image.Image, Image.Image]:
+        """(başlık şeridi, alt şerit) - salt okunur, tuvale paste edilir"""
+        layers = self._brand_layers.get(brand)
+        if layers is not None:
+            self._brand_layers.move_to_end(brand)
+            return layers
+        layers = self._brand_layers[brand] = self._render_brand_layers(brand)
+        if len(self._brand_layers) > BRAND_LAYER_CACHE_SIZE:
+            self._brand_layers.popitem(last=False)
+        return layers
+
+    def warm(self, brands: List[str] = ()):
+        """Render worker başlangıcı: tüm düzenler (+ cover maskeleri) ve verilen markalar"""
+        for image_count in (1, 2, 3):
+            self.layout(image_count)
+        for brand in brands:
+            self.brand_layers(brand)
@@ -0,0 +1,722 @@
+"""
+Collage Queue
+Kalıcı, ürün başına tekilleştiren kolaj öncelik kuyruğu
+
+SmartCollageService.collage_queue düz bir Python listesiydi: "immediate"
+öğeler insert(0, ...) ile ekleniyor, pop(0) ile alınıyordu (O(n)), restart'ta
+kayboluyor ve her worker process'te ayrı bir kopyası oluyordu. Artık:
+
+    - Backend: SQLite (WAL, varsayılan - aynı makinedeki tüm worker'lar aynı
+      dosyayı paylaşır) ya da Redis (çok makineli kurulum; bağlanılamazsa SQLite)
+    - Öncelik: immediate < normal < low, aynı öncelikte FIFO
+    - Tekilleştirme: ürün başına tek kayıt. Bekleyen ürün tekrar eklenirse
+      sadece önceliği yükselir; işlenirken eklenirse (yeni görsel geldi)
+      iş bitince bir kez daha kuyruğa döner (rerun)
+    - Lease: lease() öğeyi visibility_seconds süreyle kilitler; ack() / fail()
+      gelmezse (process çöktü) süre dolunca öğe tekrar alınabilir
+    - Retry: fail() üstel geri çekilme (retry_base_seconds * 2^(deneme-1),
+      en fazla MAX_RETRY_DELAY) ile tekrar planlar; max_attempts'ten sonra
+      öğe "dead" olur ve tekrar eklenene kadar bekler
+    - Metrikler: hazır / geri çekilmede / lease'li / dead derinlikleri,
+      öncelik bazında hazır sayısı, en eski hazır öğenin yaşı
+
+Sayaçlar (enqueued, acked, ...) process başınadır; derinlikler backend'den
+okunduğu için tüm worker'lar için doğrudur.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from core.logging import get_logger
+
+logger = get_logger('collage_queue')
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRIORITIES = {'immediate': 0, 'normal': 1, 'low': 2}
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+# Geri çekilme üst sınırı (saniye)
+MAX_RETRY_DELAY = 3600
+
+# enqueue() sonuçları
+QUEUED, DUPLICATE, UPGRADED, RERUN, REVIVED = 'queued', 'duplicate', 'upgraded', 'rerun', 'revived'
+
+# fail() sonucu -> sayaç (rerun: işlenirken yeni iş geldi, hemen tekrar)
+FAIL_COUNTERS = {'retried': 'retries', 'rerun': 'retries', 'dead': 'dead_lettered'}
+
+
+@dataclass
+class CollageQueueItem:
+    """Lease edilmiş kuyruk öğesi - ack() / fail() için lease_token gerekir"""
+    product_id: int
+    priority: int
+    attempts: int
+    enqueued_at: float
+    lease_token: str
+
+    @property
+    def priority_name(self) -> str:
+        return PRIORITY_NAMES.get(self.priority, 'normal')
+
+
+class CollageQueue:
+    """Backend'lerin ortak kısmı: öncelik çözümleme, geri çekilme, sayaçlar"""
+
+    backend = 'base'
+
+    def __init__(self, visibility_seconds: int = 600, max_attempts: int = 5, retry_base_seconds: float = 30.0):
+        self.visibility_seconds = max(1, visibility_seconds)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = max(0.0, retry_base_seconds)
+        self.counters = {
+            'enqueued': 0, 'deduplicated': 0, 'reruns': 0, 'leases': 0, 'lease_expired': 0,
+            'acked': 0, 'retries': 0, 'dead_lettered': 0, 'stale_acks': 0
+        }
+
+    @staticmethod
+    def priority_of(priority: str) -> int:
+        return PRIORITIES.get(priority, PRIORITIES['normal'])
+
+    def retry_delay(self, attempts: int) -> float:
+        """attempts. başarısız denemeden sonraki bekleme (±%25 jitter)"""
+        delay = min(MAX_RETRY_DELAY, self.retry_base_seconds * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.75, 1.25)
+
+    def _count_enqueue(self, outcome: str):
+        if outcome in (QUEUED, REVIVED):
+            self.counters['enqueued'] += 1
+        elif outcome == RERUN:
+            self.counters['reruns'] += 1
+        else:
+            self.counters['deduplicated'] += 1
+
+    def _new_token(self) -> str:
+        return uuid.uuid4().hex
+
+    # Backend arayüzü
+    def enqueue(self, product_id: int, priority: str = 'normal') -> str:
+        raise NotImplementedError
+
+    def lease(self, count: int = 1) -> List[CollageQueueItem]:
+        raise NotImplementedError
+
+    def claim(self, product_id: int) -> Optional[CollageQueueItem]:
+        """Belirli ürünü (başkası işlemiyorsa) geri çekilmeyi beklemeden lease et"""
+        raise NotImplementedError
+
+    def ack(self, item: CollageQueueItem) -> bool:
+        raise NotImplementedError
+
+    def fail(self, item: CollageQueueItem, error: str = '') -> bool:
+        raise NotImplementedError
+
+    def depth(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def peek(self, limit: int = 10) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        try:
+            depth = self.depth()
+        except Exception as e:
+            logger.warning(f"[COLLAGE QUEUE] Depth query failed: {e}")
+            depth = {}
+        return {
+            'backend': self.backend,
+            **depth,
+            **self.counters,
+            'visibility_seconds': self.visibility_seconds,
+            'max_attempts': self.max_attempts
+        }
+
+
+class SQLiteCollageQueue(CollageQueue):
+    """SQLite (WAL) backend - aynı dosyayı kullanan tüm process'ler tek kuyruğu görür"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path: Optional[str], **kwargs: Any):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        # Dosya ilk kullanımda açılır (bkz. _db) - import dosya oluşturmaz
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._open_lock = threading.Lock()
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            with self._open_lock:
+                if self._conn is None:
+                    self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        try:
+            if not self.path:
+                raise ValueError("no path configured")
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        except Exception as e:
+            # Kalıcılık yok ama kuyruk semantiği (öncelik, dedupe, lease, retry) korunur
+            logger.warning(f"[COLLAGE QUEUE] Disk queue unavailable ({self.path}), using in-memory SQLite: {e}")
+            self.path = None
+            db = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS collage_queue ("
+            " product_id INTEGER PRIMARY KEY,"
+            " priority INTEGER NOT NULL,"
+            " enqueued_at REAL NOT NULL,"
+            " available_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " lease_token TEXT,"
+            " lease_until REAL,"
+            " rerun INTEGER NOT NULL DEFAULT 0,"
+            " dead INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT)"
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS collage_queue_order ON collage_queue (dead, priority, enqueued_at)"
+        )
+        if self.path:
+            logger.info(f"[COLLAGE QUEUE] SQLite queue opened: {self.path}")
+        return db
+
+    def _transaction(self, work):
+        """BEGIN IMMEDIATE - diğer process'lerin aynı anda lease etmesini engeller"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._db)
+                self._db.execute("COMMIT")
+                return result
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, product_id: int, priority: str = 'normal') -> str:
+        level = self.priority_of(priority)
+        now = time.time()
+
+        def work(db):
+            row = db.execute(
+                "SELECT priority, available_at, lease_until, dead FROM collage_queue WHERE product_id = ?",
+                (product_id,)
+            ).fetchone()
+            if row is None:
+                db.execute(
+                    "INSERT INTO collage_queue (product_id, priority, enqueued_at, available_at) VALUES (?, ?, ?, ?)",
+                    (product_id, level, now, now)
+                )
+                return QUEUED
+            current, available_at, lease_until, dead = row
+            if dead:
+                db.execute(
+                    "UPDATE collage_queue SET dead = 0, attempts = 0, priority = ?, enqueued_at = ?,"
+                    " available_at = ?, last_error = NULL WHERE product_id = ?",
+                    (level, now, now, product_id)
+                )
+                return REVIVED
+            if lease_until is not None and lease_until > now:
+                db.execute(
+                    "UPDATE collage_queue SET rerun = 1, priority = MIN(priority, ?) WHERE product_id = ?",
+                    (level, product_id)
+                )
+                return RERUN
+            if level < current or available_at > now:
+                # Yeni iş geldi: geri çekilmedeki öğe beklemeden tekrar denenir
+                db.execute(
+                    "UPDATE collage_queue SET priority = MIN(priority, ?), available_at = MIN(available_at, ?)"
+                    " WHERE product_id = ?",
+                    (level, now, product_id)
+                )
+            return UPGRADED if level < current else DUPLICATE
+
+        outcome = self._transaction(work)
+        self._count_enqueue(outcome)
+        return outcome
+
+    def _expire_leases(self, db, now: float):
+        """
+        Sahibi ack / fail etmeden kaybolan lease başarısız deneme sayılır: max_attempts
+        dolduysa dead-letter, değilse lease bitişinden itibaren geri çekilme.
+        """
+        rows = db.execute(
+            "SELECT product_id, attempts, lease_until, rerun FROM collage_queue"
+            " WHERE dead = 0 AND lease_until IS NOT NULL AND lease_until <= ?",
+            (now,)
+        ).fetchall()
+        for product_id, attempts, lease_until, rerun in rows:
+            self.counters['lease_expired'] += 1
+            if rerun:
+                self._requeue_sql(db, product_id, now)
+            elif attempts >= self.max_attempts:
+                db.execute(
+                    "UPDATE collage_queue SET dead = 1, lease_token = NULL, lease_until = NULL, last_error = ?"
+                    " WHERE product_id = ?",
+                    ('Lease expired', product_id)
+                )
+                self.counters['dead_lettered'] += 1
+            else:
+                db.execute(
+                    "UPDATE collage_queue SET available_at = ?, lease_token = NULL, lease_until = NULL,"
+                    " last_error = ? WHERE product_id = ?",
+                    (lease_until + self.retry_delay(attempts), 'Lease expired', product_id)
+                )
+
+    def _take(self, db, rows, now: float) -> List[CollageQueueItem]:
+        items = []
+        for product_id, priority, attempts, enqueued_at in rows:
+            token = self._new_token()
+            db.execute(
+                "UPDATE collage_queue SET lease_token = ?, lease_until = ?, attempts = attempts + 1"
+                " WHERE product_id = ?",
+                (token, now + self.visibility_seconds, product_id)
+            )
+            items.append(CollageQueueItem(product_id, priority, attempts + 1, enqueued_at, token))
+        self.counters['leases'] += len(items)
+        return items
+
+    def lease(self, count: int = 1) -> List[CollageQueueItem]:
+        now = time.time()
+
+        def work(db):
+            self._expire_leases(db, now)
+            rows = db.execute(
+                "SELECT product_id, priority, attempts, enqueued_at FROM collage_queue"
+                " WHERE dead = 0 AND available_at <= ? AND lease_until IS NULL"
+                " ORDER BY priority, enqueued_at LIMIT ?",
+                (now, max(1, count))
+            ).fetchall()
+            return self._take(db, rows, now)
+
+        return self._transaction(work)
+
+    def claim(self, product_id: int) -> Optional[CollageQueueItem]:
+        now = time.time()
+
+        def work(db):
+            self._expire_leases(db, now)
+            rows = db.execute(
+                "SELECT product_id, priority, attempts, enqueued_at FROM collage_queue"
+                " WHERE product_id = ? AND dead = 0 AND lease_until IS NULL",
+                (product_id,)
+            ).fetchall()
+            return self._take(db, rows, now)
+
+        items = self._transaction(work)
+        return items[0] if items else None
+
+    def _owned(self, db, item: CollageQueueItem) -> Optional[bool]:
+        """Lease hâlâ bu öğede mi? (rerun bayrağı, değilse None)"""
+        row = db.execute(
+            "SELECT rerun FROM collage_queue WHERE product_id = ? AND lease_token = ?",
+            (item.product_id, item.lease_token)
+        ).fetchone()
+        return None if row is None else bool(row[0])
+
+    def _requeue_sql(self, db, product_id: int, now: float):
+        db.execute(
+            "UPDATE collage_queue SET rerun = 0, attempts = 0, enqueued_at = ?, available_at = ?,"
+            " lease_token = NULL, lease_until = NULL WHERE product_id = ?",
+            (now, now, product_id)
+        )
+
+    def ack(self, item: CollageQueueItem) -> bool:
+        now = time.time()
+
+        def work(db):
+            rerun = self._owned(db, item)
+            if rerun is None:
+                return False
+            if rerun:
+                self._requeue_sql(db, item.product_id, now)
+            else:
+                db.execute("DELETE FROM collage_queue WHERE product_id = ?", (item.product_id,))
+            return True
+
+        acked = self._transaction(work)
+        self.counters['acked' if acked else 'stale_acks'] += 1
+        return acked
+
+    def fail(self, item: CollageQueueItem, error: str = '') -> bool:
+        now = time.time()
+
+        def work(db):
+            rerun = self._owned(db, item)
+            if rerun is None:
+                return None
+            if rerun:
+                # İşlenirken yeni iş geldi - denemeleri sıfırlayıp hemen tekrar
+                self._requeue_sql(db, item.product_id, now)
+                return 'retried'
+            if item.attempts >= self.max_attempts:
+                db.execute(
+                    "UPDATE collage_queue SET dead = 1, lease_token = NULL, lease_until = NULL, last_error = ?"
+                    " WHERE product_id = ?",
+                    (error[:500], item.product_id)
+                )
+                return 'dead'
+            db.execute(
+                "UPDATE collage_queue SET available_at = ?, lease_token = NULL, lease_until = NULL, last_error = ?"
+                " WHERE product_id = ?",
+                (now + self.retry_delay(item.attempts), error[:500], item.product_id)
+            )
+            return 'retried'
+
+        outcome = self._transaction(work)
+        self.counters[FAIL_COUNTERS.get(outcome, 'stale_acks')] += 1
+        return outcome is not None
+
+    def depth(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT"
+                " SUM(dead = 0 AND available_at <= ?1 AND (lease_until IS NULL OR lease_until <= ?1)),"
+                " SUM(dead = 0 AND available_at > ?1 AND (lease_until IS NULL OR lease_until <= ?1)),"
+                " SUM(dead = 0 AND lease_until > ?1),"
+                " SUM(dead = 1),"
+                " MIN(CASE WHEN dead = 0 AND available_at <= ?1 AND (lease_until IS NULL OR lease_until <= ?1)"
+                "     THEN enqueued_at END)"
+                " FROM collage_queue",
+                (now,)
+            ).fetchone()
+            by_priority = self._db.execute(
+                "SELECT priority, COUNT(*) FROM collage_queue"
+                " WHERE dead = 0 AND available_at <= ?1 AND (lease_until IS NULL OR lease_until <= ?1)"
+                " GROUP BY priority",
+                (now,)
+            ).fetchall()
+        ready, delayed, leased, dead, oldest = row
+        return {
+            'ready': ready or 0,
+            'delayed': delayed or 0,
+            'leased': leased or 0,
+            'dead': dead or 0,
+            'ready_by_priority': {PRIORITY_NAMES.get(level, str(level)): count for level, count in by_priority},
+            'oldest_ready_seconds': round(now - oldest, 1) if oldest else None,
+            'disk_path': self.path
+        }
+
+    def peek(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT product_id, priority, enqueued_at, attempts, available_at, lease_until, last_error"
+                " FROM collage_queue WHERE dead = 0 ORDER BY priority, enqueued_at LIMIT ?",
+                (limit,)
+            ).fetchall()
+        now = time.time()
+        return [
+            {
+                'product_id': product_id,
+                'priority': PRIORITY_NAMES.get(priority, str(priority)),
+                'scheduled_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(enqueued_at)),
+                'attempts': attempts,
+                'leased': lease_until is not None and lease_until > now,
+                'retry_in_seconds': round(available_at - now, 1) if available_at > now else 0,
+                'last_error': last_error
+            }
+            for product_id, priority, enqueued_at, attempts, available_at, lease_until, last_error in rows
+        ]
+
+
+# ----------------------------------------------------------------------
+# Redis backend
+# ----------------------------------------------------------------------
+
+# Anahtarlar: {prefix}ready (zset, skor = öncelik * PRIORITY_SPAN + enqueued_at),
+# {prefix}delayed (zset, skor = available_at), {prefix}leased (zset, skor = lease_until),
+# {prefix}dead (zset), {prefix}item:<id> (hash: priority, enqueued_at, attempts, token, rerun, last_error)
+PRIORITY_SPAN = 10 ** 10
+
+_REDIS_ENQUEUE = """
+local prefix, pid, level, now = ARGV[1], ARGV[2], tonumber(ARGV[3]), tonumber(ARGV[4])
+local item = prefix .. 'item:' .. pid
+if redis.call('EXISTS', item) == 0 then
+    redis.call('HSET', item, 'priority', level, 'enqueued_at', now, 'attempts', 0, 'rerun', 0)
+    redis.call('ZADD', prefix .. 'ready', level * tonumber(ARGV[5]) + now, pid)
+    return 'queued'
+end
+if redis.call('ZSCORE', prefix .. 'dead', pid) then
+    redis.call('ZREM', prefix .. 'dead', pid)
+    redis.call('HSET', item, 'priority', level, 'enqueued_at', now, 'attempts', 0, 'rerun', 0)
+    redis.call('HDEL', item, 'last_error')
+    redis.call('ZADD', prefix .. 'ready', level * tonumber(ARGV[5]) + now, pid)
+    return 'revived'
+end
+local current = tonumber(redis.call('HGET', item, 'priority'))
+local lease_until = redis.call('ZSCORE', prefix .. 'leased', pid)
+if lease_until and tonumber(lease_until) > now then
+    redis.call('HSET', item, 'rerun', 1, 'priority', math.min(current, level))
+    return 'rerun'
+end
+-- Yeni iş geldi: geri çekilmedeki öğe beklemeden tekrar denenir
+local delayed = redis.call('ZREM', prefix .. 'delayed', pid) == 1
+if level < current then
+    redis.call('HSET', item, 'priority', level)
+end
+if delayed or (level < current and redis.call('ZSCORE', prefix .. 'ready', pid)) then
+    local enqueued = tonumber(redis.call('HGET', item, 'enqueued_at'))
+    redis.call('ZADD', prefix .. 'ready', math.min(current, level) * tonumber(ARGV[5]) + enqueued, pid)
+end
+if level < current then
+    return 'upgraded'
+end
+return 'duplicate'
+"""
+
+# Süresi dolan lease'leri başarısız deneme sayar (max_attempts dolduysa dead, değilse lease
+# bitişinden itibaren geri çekilme), vadesi gelen geri çekilmeleri ready'ye taşır, count öğe
+# lease eder. ARGV[6] verilirse sadece o ürün (claim). ARGV[8..11]: max_attempts, retry_base,
+# MAX_RETRY_DELAY, jitter.
+_REDIS_LEASE = """
+local prefix, now, count, visibility, token, span = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4]), ARGV[5], tonumber(ARGV[7])
+local max_attempts, retry_base, max_delay, jitter = tonumber(ARGV[8]), tonumber(ARGV[9]), tonumber(ARGV[10]), tonumber(ARGV[11])
+local function ready_score(pid)
+    local fields = redis.call('HMGET', prefix .. 'item:' .. pid, 'priority', 'enqueued_at')
+    return tonumber(fields[1]) * span + tonumber(fields[2])
+end
+local expired, dead = 0, 0
+local leased = redis.call('ZRANGEBYSCORE', prefix .. 'leased', '-inf', now, 'WITHSCORES')
+for i = 1, #leased, 2 do
+    local pid, lease_until = leased[i], tonumber(leased[i + 1])
+    local item = prefix .. 'item:' .. pid
+    redis.call('ZREM', prefix .. 'leased', pid)
+    redis.call('HDEL', item, 'token')
+    expired = expired + 1
+    if redis.call('HGET', item, 'rerun') == '1' then
+        redis.call('HSET', item, 'rerun', 0, 'attempts', 0, 'enqueued_at', now)
+        redis.call('ZADD', prefix .. 'ready', ready_score(pid), pid)
+    else
+        local attempts = tonumber(redis.call('HGET', item, 'attempts'))
+        redis.call('HSET', item, 'last_error', 'Lease expired')
+        if attempts >= max_attempts then
+            redis.call('ZADD', prefix .. 'dead', now, pid)
+            dead = dead + 1
+        else
+            local delay = math.min(max_delay, retry_base * 2 ^ math.max(0, attempts - 1)) * jitter
+            redis.call('ZADD', prefix .. 'delayed', lease_until + delay, pid)
+        end
+    end
+end
+for _, pid in ipairs(redis.call('ZRANGEBYSCORE', prefix .. 'delayed', '-inf', now)) do
+    redis.call('ZREM', prefix .. 'delayed', pid)
+    redis.call('ZADD', prefix .. 'ready', ready_score(pid), pid)
+end
+local pids = {}
+if ARGV[6] ~= '' then
+    local pid = ARGV[6]
+    if redis.call('ZREM', prefix .. 'ready', pid) == 1 or redis.call('ZREM', prefix .. 'delayed', pid) == 1 then
+        pids[1] = pid
+    end
+else
+    local popped = redis.call('ZPOPMIN', prefix .. 'ready', count)
+    for i = 1, #popped, 2 do pids[#pids + 1] = popped[i] end
+end
+local result = {expired, dead}
+for _, pid in ipairs(pids) do
+    local item = prefix .. 'item:' .. pid
+    local attempts = redis.call('HINCRBY', item, 'attempts', 1)
+    redis.call('HSET', item, 'token', token .. pid)
+    redis.call('ZADD', prefix .. 'leased', now + visibility, pid)
+    local fields = redis.call('HMGET', item, 'priority', 'enqueued_at')
+    result[#result + 1] = pid
+    result[#result + 1] = fields[1]
+    result[#result + 1] = attempts
+    result[#result + 1] = fields[2]
+end
+return result
+"""
+
+# ARGV: prefix, pid, token, now, action ('ack' | 'retry' | 'dead'), delay, error, span
+_REDIS_FINISH = """
+local prefix, pid, token, now, action = ARGV[1], ARGV[2], ARGV[3], tonumber(ARGV[4]), ARGV[5]
+local item = prefix .. 'item:' .. pid
+if redis.call('HGET', item, 'token') ~= token then
+    return 'stale'
+end
+redis.call('ZREM', prefix .. 'leased', pid)
+redis.call('HDEL', item, 'token')
+if redis.call('HGET', item, 'rerun') == '1' then
+    local level = tonumber(redis.call('HGET', item, 'priority'))
+    redis.call('HSET', item, 'rerun', 0, 'attempts', 0, 'enqueued_at', now)
+    redis.call('ZADD', prefix .. 'ready', level * tonumber(ARGV[8]) + now, pid)
+    return 'rerun'
+end
+if action == 'ack' then
+    redis.call('DEL', item)
+    return 'acked'
+end
+redis.call('HSET', item, 'last_error', ARGV[7])
+if action == 'dead' then
+    redis.call('ZADD', prefix .. 'dead', now, pid)
+    return 'dead'
+end
+redis.call('ZADD', prefix .. 'delayed', now + tonumber(ARGV[6]), pid)
+return 'retried'
+"""
+
+
+class RedisCollageQueue(CollageQueue):
+    """Redis backend - birden fazla makinedeki worker'lar için (Lua script'leriyle atomik)"""
+
+    backend = 'redis'
+
+    def __init__(self, client, prefix: str = 'collage_queue:', **kwargs: Any):
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+        self._enqueue = client.register_script(_REDIS_ENQUEUE)
+        self._lease = client.register_script(_REDIS_LEASE)
+        self._finish = client.register_script(_REDIS_FINISH)
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    def enqueue(self, product_id: int, priority: str = 'normal') -> str:
+        outcome = self._text(self._enqueue(args=[
+            self.prefix, product_id, self.priority_of(priority), time.time(), PRIORITY_SPAN
+        ]))
+        self._count_enqueue(outcome)
+        return outcome
+
+    def _lease_items(self, count: int, product_id: Optional[int]) -> List[CollageQueueItem]:
+        token = self._new_token()
+        result = self._lease(args=[
+            self.prefix, time.time(), max(1, count), self.visibility_seconds, token,
+            '' if product_id is None else product_id, PRIORITY_SPAN,
+            self.max_attempts, self.retry_base_seconds, MAX_RETRY_DELAY, random.uniform(0.75, 1.25)
+        ])
+        self.counters['lease_expired'] += int(result[0])
+        self.counters['dead_lettered'] += int(result[1])
+        items = []
+        for i in range(2, len(result), 4):
+            pid = self._text(result[i])
+            items.append(CollageQueueItem(
+                product_id=int(pid),
+                priority=int(float(self._text(result[i + 1]))),
+                attempts=int(result[i + 2]),
+                enqueued_at=float(self._text(result[i + 3])),
+                lease_token=token + pid
+            ))
+        self.counters['leases'] += len(items)
+        return items
+
+    def lease(self, count: int = 1) -> List[CollageQueueItem]:
+        return self._lease_items(count, None)
+
+    def claim(self, product_id: int) -> Optional[CollageQueueItem]:
+        items = self._lease_items(1, product_id)
+        return items[0] if items else None
+
+    def _finish_item(self, item: CollageQueueItem, action: str, delay: float = 0.0, error: str = '') -> str:
+        return self._text(self._finish(args=[
+            self.prefix, item.product_id, item.lease_token, time.time(), action, delay, error[:500], PRIORITY_SPAN
+        ]))
+
+    def ack(self, item: CollageQueueItem) -> bool:
+        outcome = self._finish_item(item, 'ack')
+        self.counters['stale_acks' if outcome == 'stale' else 'acked'] += 1
+        return outcome != 'stale'
+
+    def fail(self, item: CollageQueueItem, error: str = '') -> bool:
+        if item.attempts >= self.max_attempts:
+            outcome = self._finish_item(item, 'dead', error=error)
+        else:
+            outcome = self._finish_item(item, 'retry', self.retry_delay(item.attempts), error)
+        self.counters[FAIL_COUNTERS.get(outcome, 'stale_acks')] += 1
+        return outcome != 'stale'
+
+    def depth(self) -> Dict[str, Any]:
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.zcard(self.prefix + 'ready')
+        pipe.zcount(self.prefix + 'delayed', '-inf', now)
+        pipe.zcount(self.prefix + 'delayed', f'({now}', '+inf')
+        pipe.zcount(self.prefix + 'leased', '-inf', now)
+        pipe.zcount(self.prefix + 'leased', f'({now}', '+inf')
+        pipe.zcard(self.prefix + 'dead')
+        for level in PRIORITY_NAMES:
+            pipe.zrangebyscore(self.prefix + 'ready', level * PRIORITY_SPAN, (level + 1) * PRIORITY_SPAN - 1,
+                               start=0, num=1, withscores=True)
+            pipe.zcount(self.prefix + 'ready', level * PRIORITY_SPAN, (level + 1) * PRIORITY_SPAN - 1)
+        results = pipe.execute()
+        ready, due, delayed, expired, leased, dead = results[:6]
+
+        by_priority, oldest = {}, None
+        for index, level in enumerate(PRIORITY_NAMES):
+            first, count = results[6 + index * 2], results[7 + index * 2]
+            if count:
+                by_priority[PRIORITY_NAMES[level]] = count
+            if first:
+                enqueued_at = first[0][1] - level * PRIORITY_SPAN
+                oldest = enqueued_at if oldest is None else min(oldest, enqueued_at)
+        return {
+            # Vadesi gelmiş geri çekilmeler bir sonraki lease'te hazır olur; süresi dolmuş lease'ler
+            # de burada sayılır (bir sonraki lease'te geri çekilmeye ya da dead'e geçebilir)
+            'ready': ready + due + expired,
+            'delayed': delayed,
+            'leased': leased,
+            'dead': dead,
+            'ready_by_priority': by_priority,
+            'oldest_ready_seconds': round(now - oldest, 1) if oldest else None
+        }
+
+    def peek(self, limit: int = 10) -> List[Dict[str, Any]]:
+        pids = [self._text(pid) for pid in self.client.zrange(self.prefix + 'ready', 0, limit - 1)]
+        pipe = self.client.pipeline()
+        for pid in pids:
+            pipe.hgetall(self.prefix + 'item:' + pid)
+        items = []
+        for pid, fields in zip(pids, pipe.execute()):
+            fields = {self._text(key): self._text(value) for key, value in fields.items()}
+            if not fields:
+                continue
+            items.append({
+                'product_id': int(pid),
+                'priority': PRIORITY_NAMES.get(int(float(fields['priority'])), fields['priority']),
+                'scheduled_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(float(fields['enqueued_at']))),
+                'attempts': int(fields.get('attempts', 0)),
+                'leased': False,
+                'retry_in_seconds': 0,
+                'last_error': fields.get('last_error')
+            })
+        return items
+
+
+def _resolve_path(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path)
+
+
+def create_collage_queue() -> CollageQueue:
+    """Konfigürasyondaki backend; Redis seçili ama erişilemiyorsa SQLite"""
+    upload = settings.upload
+    options = {
+        'visibility_seconds': upload.collage_queue_visibility_seconds,
+        'max_attempts': upload.collage_queue_max_attempts,
+        'retry_base_seconds': upload.collage_queue_retry_base_seconds
+    }
+    if upload.collage_queue_backend == 'redis':
+        try:
+            import redis
+            client = redis.from_url(settings.redis.url, socket_timeout=settings.redis.timeout)
+            client.ping()
+            logger.info("[COLLAGE QUEUE] Using Redis queue")
+            return RedisCollageQueue(client, **options)
+        except Exception as e:
+            logger.warning(f"[COLLAGE QUEUE] Redis unavailable, falling back to SQLite: {e}")
+    path = _resolve_path(upload.collage_queue_path) if upload.collage_queue_path else None
+    return SQLiteCollageQueue(path, **options)
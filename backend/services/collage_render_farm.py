@@ -0,0 +1,160 @@
+"""
+Collage Render Farm
+Kolaj render'ını event loop'tan alıp CPU sayısı kadar process'e dağıtır
+
+create_professional_collage saf Pillow işidir (decode, resize, maske, kalite
+95 JPEG encode) ve async kod içinden doğrudan çağrılıyordu: her kolaj süresince
+event loop duruyor, tüm API istekleri bekliyordu. Artık:
+
+    - Çağıran serileştirilebilir bir CollageRenderSpec gönderir, await eder;
+      sonuç çıktı dosyasının yolu (başarısızsa None)
+    - Render spawn edilmiş worker process'lerde çalışır - GIL paylaşılmaz,
+      throughput çekirdek sayısıyla ölçeklenir
+    - Her worker başlarken font cache'ini ve derlenmiş kolaj düzenlerini
+      (collage_layout) hazırlar
+    - Worker çökerse havuz yeniden kurulur ve kolaj bir kez daha denenir;
+      üst üste çökerse tek thread'li yedek executor'a düşülür (yine event
+      loop dışında) - bkz. spawn_pool
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from core.logging import get_logger
+from services.spawn_pool import SpawnPool
+
+logger = get_logger('collage_render_farm')
+
+
+@dataclass
+class CollageRenderSpec:
+    """create_professional_collage argümanları - worker'a pickle ile gider"""
+    product_code: str
+    color: str
+    brand: str
+    product_type: str
+    size_range: str
+    price: Optional[float]
+    product_images: List[str]
+    output_path: str
+    product_code_2: Optional[str] = None
+    color_2: Optional[str] = None
+    product_type_2: Optional[str] = None
+    size_range_2: Optional[str] = None
+    price_2: Optional[float] = None
+    badge: Optional[str] = None
+    logo: Optional[str] = None
+
+
+# ----------------------------------------------------------------------
+# Worker tarafı (spawn edilen process'te çalışır - modül seviyesinde olmalı)
+# ----------------------------------------------------------------------
+
+def _init_worker():
+    from services.professional_collage_maker import professional_collage_maker
+    professional_collage_maker.warm_fonts()
+    professional_collage_maker.layouts.warm()
+
+
+def _render(spec: CollageRenderSpec) -> Optional[str]:
+    from services.professional_collage_maker import professional_collage_maker
+    if professional_collage_maker.create_professional_collage(**asdict(spec)):
+        return spec.output_path
+    return None
+
+
+# ----------------------------------------------------------------------
+# Ana process
+# ----------------------------------------------------------------------
+
+class CollageRenderFarm:
+    """Awaitable kolaj render - process pool"""
+
+    def __init__(self, workers: int = 0):
+        # 0 = CPU sayısı, < 0 = process pool yok (tek thread'li executor)
+        self.pool = SpawnPool(
+            'RENDER FARM', workers if workers != 0 else (os.cpu_count() or 1), initializer=_init_worker
+        )
+        self._fallback: Optional[ThreadPoolExecutor] = None
+        self.in_flight = 0
+        self.stats = {
+            'renders': 0, 'failures': 0, 'render_seconds': 0.0, 'in_process_renders': 0
+        }
+
+    @property
+    def workers(self) -> int:
+        return self.pool.workers
+
+    def _get_fallback(self) -> ThreadPoolExecutor:
+        # Pillow font nesneleri thread'ler arasında paylaşılıyor - yedek yol tek thread
+        if self._fallback is None:
+            self._fallback = ThreadPoolExecutor(max_workers=1, thread_name_prefix='collage-render')
+        return self._fallback
+
+    async def _render_once(self, spec: CollageRenderSpec) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        pool = self.pool.get()
+        if pool is None:
+            self.stats['in_process_renders'] += 1
+            return await loop.run_in_executor(self._get_fallback(), _render, spec)
+        try:
+            result = await loop.run_in_executor(pool, _render, spec)
+        except BrokenProcessPool as e:
+            self.pool.broken(e, pool)
+            raise
+        self.pool.succeeded()
+        return result
+
+    async def render(self, spec: CollageRenderSpec) -> Optional[str]:
+        """Kolajı render et; başarılıysa spec.output_path, değilse None"""
+        started = time.monotonic()
+        self.in_flight += 1
+        try:
+            try:
+                result = await self._render_once(spec)
+            except BrokenProcessPool:
+                # Çöken worker'dı, spec değil: yeniden kurulan havuzda (ya da yedekte) bir kez daha
+                result = await self._render_once(spec)
+        except Exception as e:
+            logger.error(f"[RENDER FARM] Render failed for {spec.product_code}: {e}")
+            result = None
+        finally:
+            self.in_flight -= 1
+
+        self.stats['renders'] += 1
+        self.stats['render_seconds'] += time.monotonic() - started
+        if result is None:
+            self.stats['failures'] += 1
+        return result
+
+    async def render_many(self, specs: List[CollageRenderSpec]) -> List[Optional[str]]:
+        """Birden fazla kolaj - worker sayısı kadar paralel"""
+        return list(await asyncio.gather(*(self.render(spec) for spec in specs)))
+
+    def shutdown(self):
+        self.pool.shutdown()
+        if self._fallback is not None:
+            self._fallback.shutdown(wait=False)
+            self._fallback = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        renders = self.stats['renders']
+        return {
+            **self.stats,
+            'render_seconds': round(self.stats['render_seconds'], 3),
+            'avg_render_seconds': round(self.stats['render_seconds'] / renders, 3) if renders else None,
+            'in_flight': self.in_flight,
+            'worker_restarts': self.pool.restarts,
+            'workers': self.workers,
+            'pool_running': self.pool.running
+        }
+
+
+# Global instance
+collage_render_farm = CollageRenderFarm(workers=settings.upload.collage_render_workers)
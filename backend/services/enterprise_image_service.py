@@ -9,6 +9,7 @@ from typing import List, Dict, Any, Optional, Tuple
 from fastapi import HTTPException
 from fastapi.responses import FileResponse
 from PIL import Image
+from services.image_resize import draft_for_size, fit_size, resize_to
 import io
 import redis
 import json
@@ -108,28 +109,19 @@ class EnterpriseImageService:
         try:
             # Open image
             with Image.open(image_path) as img:
-                # Convert to RGB if necessary
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    img = img.convert('RGB')
-                
                 # Get target size
                 target_size = self.thumbnail_sizes.get(size, (300, 300))
+                new_size = fit_size(img.size, target_size)
                 
-                # Calculate resize dimensions maintaining aspect ratio
-                img_ratio = img.width / img.height
-                target_ratio = target_size[0] / target_size[1]
+                # JPEG: decode at the smallest DCT scale that still covers the target
+                draft_for_size(img, new_size)
                 
-                if img_ratio > target_ratio:
-                    # Image is wider, fit to width
-                    new_width = target_size[0]
-                    new_height = int(target_size[0] / img_ratio)
-                else:
-                    # Image is taller, fit to height
-                    new_height = target_size[1]
-                    new_width = int(target_size[1] * img_ratio)
+                # Convert to RGB if necessary
+                if img.mode in ('RGBA', 'LA', 'P'):
+                    img = img.convert('RGB')
                 
-                # Resize image
-                resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                # Resize image (reduce + single LANCZOS pass)
+                resized_img = resize_to(img, new_size)
                 
                 # Get quality setting
                 quality_value = self.quality_settings.get(quality, 90)
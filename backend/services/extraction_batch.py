@@ -0,0 +1,388 @@
+"""
+Extraction Batch Service
+SmartLabelExtractor / SmartPriceExtractor'ı çok sayıda metin üzerinde
+process pool ile çalıştırır
+
+/label-extraction/extract ve /price-extraction/test tek metin işler; kayıtlı
+binlerce ai_extracted_data metnini yeni kurallarla yeniden doğrulamak binlerce
+HTTP isteği demekti. Toplu akış:
+
+    - Girdi (metinler, NDJSON satırları ya da ürün ID'leri) chunk_size'lık
+      parçalara bölünür; parçalar spawn edilmiş worker process'lerde çalışır
+      (regex/sözlük işi CPU'ya bağlı - GIL'i paylaşmaz)
+    - Aynı anda en fazla workers x 2 parça işlenir: girdi akarken bellek sabit kalır
+    - Sonuçlar parça bittikçe NDJSON satırı olarak akıtılır (sıra girdiyle aynı
+      olmak zorunda değil - her satırda id var)
+
+Fiyat çıkarıcısının çalışma zamanında değiştirilen ayarları (price-extraction
+config endpoint'leri) her parçayla worker'lara gönderilir.
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from core.config import settings
+from core.logging import get_logger
+from services.spawn_pool import SpawnPool
+
+logger = get_logger('extraction_batch')
+
+# (id, metin, product_type)
+BatchItem = Tuple[Any, Optional[str], str]
+
+PRICE_CONFIG_ATTRS = ('currency_symbols', 'price_keywords', 'exclusion_patterns', 'price_ranges')
+PRODUCT_LOOKUP_CHUNK = 500
+# Tek NDJSON satırının üst sınırı - satır sonu gelmeyen gövde belleği şişirmez
+MAX_NDJSON_LINE_BYTES = 1024 * 1024
+
+
+def price_config_of(extractor) -> Dict[str, Any]:
+    """Worker'lara gönderilecek fiyat ayarları (sadece değiştirilebilen alanlar)"""
+    return {attr: getattr(extractor, attr) for attr in PRICE_CONFIG_ATTRS}
+
+
+def label_info_payload(label_info) -> Dict[str, Any]:
+    """LabelInfo -> /extract yanıtındaki label_info (raw_text hariç)"""
+    payload = asdict(label_info)
+    payload.pop('raw_text', None)
+    return payload
+
+
+def product_info_payload(product_info) -> Dict[str, Any]:
+    """ProductInfo (UnifiedOCRService.extract_product_info) -> sonuç satırı (raw_text hariç)"""
+    payload = asdict(product_info)
+    payload.pop('raw_text', None)
+    return payload
+
+
+# ----------------------------------------------------------------------
+# Worker tarafı (spawn edilen process'te çalışır - modül seviyesinde olmalı)
+# ----------------------------------------------------------------------
+
+def _apply_price_config(price_config: Dict[str, Any]):
+    from services.smart_price_extractor import smart_price_extractor
+    for attr, value in price_config.items():
+        setattr(smart_price_extractor, attr, value)
+
+
+async def _extract_items(kind: str, items: List[BatchItem]) -> List[Dict[str, Any]]:
+    from services.smart_label_extractor import smart_label_extractor
+    from services.smart_price_extractor import smart_price_extractor
+
+    results = []
+    for key, text, product_type in items:
+        try:
+            if kind == 'label':
+                label_info = await smart_label_extractor.extract_all_fields(text, product_type)
+                results.append({'id': key, 'success': True, 'label_info': label_info_payload(label_info)})
+            elif kind == 'product':
+                # Upload akışındaki çıkarma birebir (OCR çağrısı yok, metin hazır)
+                from services.unified_ocr_service import OCRResult, unified_ocr_service
+                product_info = await unified_ocr_service.extract_product_info(
+                    OCRResult(text=text, confidence=0.9, language='tr', processing_time=0.0, method='reextraction', metadata={})
+                )
+                results.append({'id': key, 'success': True, 'product_info': product_info_payload(product_info)})
+            else:
+                price = await smart_price_extractor.extract_price(text, product_type)
+                results.append({'id': key, 'success': True, 'extracted_price': price, 'product_type': product_type})
+        except Exception as e:
+            results.append({'id': key, 'success': False, 'error': str(e)})
+    return results
+
+
+def _run_chunk(kind: str, items: List[BatchItem], price_config: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if price_config:
+        _apply_price_config(price_config)
+    return asyncio.run(_extract_items(kind, items))
+
+
+def _init_worker():
+    # Desenler / sözlükler worker başına bir kez derlenir
+    import services.smart_label_extractor  # noqa: F401
+    import services.smart_price_extractor  # noqa: F401
+
+
+# ----------------------------------------------------------------------
+# Ana process
+# ----------------------------------------------------------------------
+
+class ExtractionBatchService:
+    """Toplu etiket / fiyat çıkarma - process pool + NDJSON akışı"""
+
+    def __init__(self, workers: int = 4, chunk_size: int = 64):
+        self.pool = SpawnPool('EXTRACTION BATCH', workers, initializer=_init_worker)
+        self.chunk_size = max(1, chunk_size)
+        self.max_pending_chunks = max(2, workers * 2)
+        self.stats = {
+            'batches': 0, 'items': 0, 'errors': 0, 'chunks': 0,
+            'in_process_chunks': 0, 'busy_seconds': 0.0
+        }
+
+    @property
+    def workers(self) -> int:
+        return self.pool.workers
+
+    def _submit(
+        self, kind: str, chunk: List[BatchItem], price_config: Optional[Dict[str, Any]]
+    ) -> Tuple[asyncio.Future, Optional[ProcessPoolExecutor]]:
+        loop = asyncio.get_running_loop()
+        pool = self.pool.get()
+        self.stats['chunks'] += 1
+        if pool is None:
+            # Worker yok: aynı kod varsayılan thread executor'da (ayarlar zaten bu process'te)
+            self.stats['in_process_chunks'] += 1
+            return loop.run_in_executor(None, _run_chunk, kind, chunk, None), None
+        return loop.run_in_executor(pool, _run_chunk, kind, chunk, price_config), pool
+
+    def _chunk_results(
+        self, future: asyncio.Future, chunk: List[BatchItem], pool: Optional[ProcessPoolExecutor]
+    ) -> List[Dict[str, Any]]:
+        try:
+            results = future.result()
+            if pool is not None:
+                self.pool.succeeded()
+            return results
+        except BrokenProcessPool as e:
+            # Worker öldü (OOM vb.) - havuz bir sonraki parçada yeniden kurulur
+            self.pool.broken(e, pool)
+            return [{'id': key, 'success': False, 'error': 'Extraction worker crashed'} for key, _, _ in chunk]
+        except Exception as e:
+            logger.error(f"[EXTRACTION BATCH] Chunk failed: {e}")
+            return [{'id': key, 'success': False, 'error': str(e)} for key, _, _ in chunk]
+
+    async def stream(
+        self,
+        kind: str,
+        items: Union[Iterable[BatchItem], AsyncIterator[BatchItem]],
+        price_config: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        kind: 'label', 'price' ya da 'product' (UnifiedOCRService.extract_product_info,
+        bkz. ocr_reextraction). Her öğe için bir sonuç, en sonda özet
+        ({'done': True, ...}) üretir.
+        """
+        started = time.monotonic()
+        counts = {'items': 0, 'errors': 0}
+        pending: Dict[asyncio.Future, Tuple[List[BatchItem], Optional[ProcessPoolExecutor]]] = {}
+        chunk: List[BatchItem] = []
+        self.stats['batches'] += 1
+
+        def finished(result: Dict[str, Any]) -> Dict[str, Any]:
+            counts['items'] += 1
+            if not result.get('success'):
+                counts['errors'] += 1
+            return result
+
+        async def drain(until: int):
+            while len(pending) > until:
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    for result in self._chunk_results(future, *pending.pop(future)):
+                        yield finished(result)
+
+        async for key, text, product_type in _aiter(items):
+            if not text:
+                yield finished({'id': key, 'success': False, 'error': 'No text to extract'})
+                continue
+            chunk.append((key, text, product_type or 'default'))
+            if len(chunk) >= self.chunk_size:
+                future, pool = self._submit(kind, chunk, price_config)
+                pending[future] = chunk, pool
+                chunk = []
+                # Girdi hızlı akarken bekleyen parça sayısı sınırlı kalır
+                async for result in drain(self.max_pending_chunks - 1):
+                    yield result
+
+        if chunk:
+            future, pool = self._submit(kind, chunk, price_config)
+            pending[future] = chunk, pool
+        async for result in drain(0):
+            yield result
+
+        elapsed = time.monotonic() - started
+        self.stats['items'] += counts['items']
+        self.stats['errors'] += counts['errors']
+        self.stats['busy_seconds'] += elapsed
+        yield {
+            'done': True,
+            'count': counts['items'],
+            'errors': counts['errors'],
+            'elapsed_seconds': round(elapsed, 3),
+            'items_per_second': round(counts['items'] / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+    def get_stats(self) -> Dict[str, Any]:
+        busy = self.stats['busy_seconds']
+        return {
+            **self.stats,
+            'busy_seconds': round(busy, 3),
+            'items_per_second': round(self.stats['items'] / busy, 1) if busy > 0 else 0.0,
+            'worker_restarts': self.pool.restarts,
+            'workers': self.workers,
+            'chunk_size': self.chunk_size,
+            'pool_running': self.pool.running
+        }
+
+
+async def _aiter(items: Union[Iterable[BatchItem], AsyncIterator[BatchItem]]) -> AsyncIterator[BatchItem]:
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+# ----------------------------------------------------------------------
+# Girdi kaynakları
+# ----------------------------------------------------------------------
+
+def product_text(ai_extracted_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """ai_extracted_data içindeki OCR metni (file processor 'raw_text', ultra fast / CDN 'text' yazar)"""
+    if not isinstance(ai_extracted_data, dict):
+        return None
+    return ai_extracted_data.get('raw_text') or ai_extracted_data.get('text')
+
+
+def filter_accessible(query, user_id: int, accessible_brand_ids: Optional[List[int]]):
+    """Product sorgusunu kullanıcının erişebildiği ürünlerle sınırla (products listesiyle aynı kural)"""
+    from sqlalchemy import or_
+    from models.product import Product
+
+    if accessible_brand_ids is None:
+        return query
+    if accessible_brand_ids:
+        return query.filter(or_(Product.created_by == user_id, Product.brand_id.in_(accessible_brand_ids)))
+    return query.filter(Product.created_by == user_id)
+
+
+def load_product_texts(
+    product_ids: List[int],
+    user_id: int,
+    accessible_brand_ids: Optional[List[int]]
+) -> List[Tuple[int, Optional[str]]]:
+    """
+    Ürün ID'lerinin OCR metinleri, kullanıcının erişebildiği ürünlerle sınırlı
+    (products listesiyle aynı kural). Bulunamayanlar metinsiz döner.
+    """
+    from database import SessionLocal
+    from models.product import Product
+
+    with SessionLocal() as db:
+        query = db.query(Product.id, Product.ai_extracted_data).filter(Product.id.in_(product_ids))
+        query = filter_accessible(query, user_id, accessible_brand_ids)
+        texts = {product_id: product_text(data) for product_id, data in query}
+    return [(product_id, texts.get(product_id)) for product_id in product_ids]
+
+
+async def _resolve_products(
+    entries: List[Tuple[int, str]],
+    user_id: int,
+    accessible_brand_ids: Optional[List[int]]
+) -> AsyncIterator[BatchItem]:
+    loop = asyncio.get_running_loop()
+    rows = await loop.run_in_executor(
+        None, load_product_texts, [product_id for product_id, _ in entries], user_id, accessible_brand_ids
+    )
+    for (product_id, text), (_, product_type) in zip(rows, entries):
+        yield product_id, text, product_type
+
+
+async def items_from_lists(
+    texts: List[str],
+    product_ids: List[int],
+    product_type: str,
+    user_id: int,
+    accessible_brand_ids: Optional[List[int]]
+) -> AsyncIterator[BatchItem]:
+    """JSON gövdesi: metinler (id = sıra) ve ürün ID'leri (id = ürün ID'si)"""
+    for index, text in enumerate(texts):
+        yield index, text, product_type
+    for start in range(0, len(product_ids), PRODUCT_LOOKUP_CHUNK):
+        entries = [(product_id, product_type) for product_id in product_ids[start:start + PRODUCT_LOOKUP_CHUNK]]
+        async for item in _resolve_products(entries, user_id, accessible_brand_ids):
+            yield item
+
+
+async def items_from_ndjson(
+    chunks: AsyncIterator[bytes],
+    default_product_type: str,
+    user_id: int,
+    accessible_brand_ids: Optional[List[int]]
+) -> AsyncIterator[BatchItem]:
+    """
+    application/x-ndjson gövdesi, istek okunurken işlenir. Her satır
+    {"id", "text", "product_type"} ya da {"product_id", "product_type"}.
+    Ürün ID'leri PRODUCT_LOOKUP_CHUNK'lık gruplar halinde DB'den çözülür;
+    okunamayan satır metinsiz öğe (hata sonucu) olur.
+    """
+    entries: List[Tuple[int, str]] = []
+    index = 0
+    async for line in _ndjson_lines(chunks):
+        try:
+            if line is None:
+                raise ValueError(f"line longer than {MAX_NDJSON_LINE_BYTES} bytes")
+            record = json.loads(line)
+            product_type = record.get('product_type') or default_product_type
+            if record.get('product_id') is not None:
+                entries.append((int(record['product_id']), product_type))
+            else:
+                yield record.get('id', index), record.get('text'), product_type
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"[EXTRACTION BATCH] Invalid NDJSON line {index}: {e}")
+            yield index, None, default_product_type
+        index += 1
+        if len(entries) >= PRODUCT_LOOKUP_CHUNK:
+            async for item in _resolve_products(entries, user_id, accessible_brand_ids):
+                yield item
+            entries = []
+    if entries:
+        async for item in _resolve_products(entries, user_id, accessible_brand_ids):
+            yield item
+
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Boş olmayan satırlar. Geçersiz UTF-8 akışı kesmez (satır JSON olarak reddedilir);
+    sınırı aşan satır None olur ve satır sonuna kadar kalanı atılır.
+    """
+    buffer = b''
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if skipping:
+                # Sınırı aşan satırın sonu
+                skipping = False
+            elif len(line) > MAX_NDJSON_LINE_BYTES:
+                yield None
+            elif line.strip():
+                yield line.decode('utf-8', errors='replace')
+        if len(buffer) > MAX_NDJSON_LINE_BYTES:
+            if not skipping:
+                yield None
+                skipping = True
+            buffer = b''
+    if buffer.strip() and not skipping:
+        yield buffer.decode('utf-8', errors='replace')
+
+
+async def ndjson_response_lines(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for result in results:
+        yield json.dumps(result, ensure_ascii=False, default=str) + '\n'
+
+
+# Global instance
+extraction_batch_service = ExtractionBatchService(
+    workers=settings.ocr.extraction_batch_workers,
+    chunk_size=settings.ocr.extraction_batch_chunk_size
+)
@@ -0,0 +1,158 @@
+"""
+Filename Parser
+Yükleme dosya adları için tek geçişli, derlenmiş ve memoize edilmiş ayrıştırıcı
+
+Dosya adı grameri:
+    AN-50226 B BLACK.jpg            -> etiket (tag) görseli
+    AN-50226 B BLACK 11.jpg         -> ürün görseli, açı numarası 11
+    VV-6124 BLACK & VV-2590 BLACK   -> çift ürün
+
+Sınıflandırma, ürün kodu, renk, marka ipucu, açı numarası ve çift ürün
+bilgisi tek seferde çıkarılır; upload hattının her aşaması (sınıflandırma,
+DAG scheduler, CDN işleme, kolaj planlama) aynı ParsedFilename kaydını
+kullanır. Sonuçlar sınırlı bir LRU'da tutulur - bir job'daki her dosya adı
+aşama sayısından bağımsız olarak bir kez ayrıştırılır.
+"""
+
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.logging import get_logger
+
+logger = get_logger('filename_parser')
+
+# VV-6124-B, VV-6124 B, VV6124B, VV-6124 (renk kelimesinin ilk harfi son ek sayılmaz)
+CODE_PATTERN = re.compile(r'^(([A-Z]{2,4})-?\d{3,6}(?:[-\s]?[A-Z](?![A-Z]))?)')
+CODE_SUFFIX_PATTERN = re.compile(r'([A-Z]{2,4}-?\d{3,6})\s+([A-Z])$')
+# Ürün görselleri " 11", " 14" gibi açı numarasıyla biter
+ANGLE_PATTERN = re.compile(r'\s+(\d+)\s*$')
+LEADING_SEPARATORS = re.compile(r'^[-\s_]+')
+TRAILING_NUMBER = re.compile(r'\s*\d+\s*$')
+
+DUAL_PATTERNS = (
+    re.compile(r'^([A-Z0-9-]+\s+[A-Z\s]+?)\s*-\s*([A-Z0-9-]+\s+[A-Z\s]+?)$'),  # "LL-2Z27 B BLACK - LL-2V28 B BLACK"
+    re.compile(r'([A-Z0-9-]+)\s*-\s*([A-Z0-9-]+)'),  # "KY-557 - SNL-11026 BROWN"
+    re.compile(r'(.+?)\s*&\s*(.+?)$'),  # "VV-6124 BLACK & VV-2590 BLACK"
+    re.compile(r'(.+?)\s*\+\s*(.+?)$'),  # "VV-6124 BLACK + VV-2590 BLACK"
+)
+
+
+@dataclass(frozen=True)
+class ParsedFilename:
+    """Bir dosya adının ayrıştırılmış hali"""
+    filename: str
+    stem: str
+    code: Optional[str]  # Normalize: VV-6124 B -> VV-6124-B
+    color: str  # Koddan sonra kalan kısım (açı numarası hariç), yoksa ''
+    brand_hint: Optional[str]  # Kod ön eki (VV, PF, ...)
+    angle_number: Optional[int]
+    dual_parts: Optional[Tuple[str, str]] = None  # Çift ürün: ayıracın iki yanındaki ürün metni
+
+    @property
+    def is_tag(self) -> bool:
+        """Açı numarası olmayan görseller etiket görselidir"""
+        return self.angle_number is None
+
+    @property
+    def is_dual(self) -> bool:
+        return self.dual_parts is not None
+
+    @property
+    def dependency_key(self) -> Optional[Tuple[str, str]]:
+        """Ürün görsellerini etiket görseline bağlayan (code, color) anahtarı"""
+        if not self.code:
+            return None
+        return self.code, self.color.upper()
+
+
+class FilenameParser:
+    """Derlenmiş desenlerle tek geçişli ayrıştırma + sınırlı LRU memo"""
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, ParsedFilename]" = OrderedDict()
+        self._lock = Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def parse(self, filename: str) -> ParsedFilename:
+        """Tek dosya adını ayrıştır (memoize)"""
+        with self._lock:
+            parsed = self._cache.get(filename)
+            if parsed is not None:
+                self._cache.move_to_end(filename)
+                self.stats['hits'] += 1
+                return parsed
+
+        parsed = self._parse(filename)
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self._cache[filename] = parsed
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return parsed
+
+    def parse_many(self, filenames: Iterable[str]) -> Dict[str, ParsedFilename]:
+        """Bir job'daki tüm dosya adlarını tek çağrıda ayrıştır"""
+        return {filename: self.parse(filename) for filename in filenames}
+
+    def classify(self, files: Iterable) -> Tuple[List, List]:
+        """UploadFile/StagedFile listesini (etiketler, ürün görselleri) olarak ayır"""
+        tags, products = [], []
+        for file in files:
+            (tags if self.parse(file.filename).is_tag else products).append(file)
+        return tags, products
+
+    def is_tag(self, filename: str) -> bool:
+        return self.parse(filename).is_tag
+
+    def dependency_key(self, filename: str) -> Optional[Tuple[str, str]]:
+        return self.parse(filename).dependency_key
+
+    def _parse(self, filename: str) -> ParsedFilename:
+        stem = os.path.basename(filename.rsplit('.', 1)[0])
+        stem_upper = stem.upper()
+
+        angle_match = ANGLE_PATTERN.search(stem)
+        angle_number = int(angle_match.group(1)) if angle_match else None
+
+        code = None
+        brand_hint = None
+        color = ''
+        code_match = CODE_PATTERN.match(stem_upper)
+        if code_match:
+            code = CODE_SUFFIX_PATTERN.sub(r'\1-\2', code_match.group(1))
+            brand_hint = code_match.group(2)
+            color = LEADING_SEPARATORS.sub('', stem[code_match.end():].strip())
+            color = TRAILING_NUMBER.sub('', color)
+
+        return ParsedFilename(
+            filename=filename,
+            stem=stem,
+            code=code,
+            color=color,
+            brand_hint=brand_hint,
+            angle_number=angle_number,
+            dual_parts=self._dual_parts(stem.strip())
+        )
+
+    def _dual_parts(self, stem: str) -> Optional[Tuple[str, str]]:
+        for pattern in DUAL_PATTERNS:
+            match = pattern.search(stem)
+            if match:
+                part1, part2 = match.groups()
+                if len(part1.strip()) > 3 and len(part2.strip()) > 3:
+                    # Eşleşen ayıraçtan böl: koddaki tire (LL-2Z27) ayıraç sayılmaz
+                    return stem[:match.end(1)].strip(), stem[match.start(2):].strip()
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, 'cached': len(self._cache)}
+
+
+# Global instance
+filename_parser = FilenameParser()
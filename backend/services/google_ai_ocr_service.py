@@ -3,17 +3,22 @@ Google AI OCR Service - Refactored for Modularity
 Modern, hızlı ve doğru OCR çözümü
 """
 
-import os
+import asyncio
 import base64
 import json
 import requests
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import logging
-from PIL import Image
-import io
 import re
+from core.config import settings
 from core.logging import get_logger
-from core.exceptions import BaseAppException
+from core.exceptions import ExternalServiceError
+from services.vision_batcher import vision_batcher
+from services.ocr_http_client import ocr_http_client
+from services.ocr_dispatcher import ocr_dispatcher
+from services.ocr_result_store import ocr_result_store
+from services.ocr_preprocessor import ocr_preprocessor
+from services.ocr_raw_response import compact_annotation
 
 logger = get_logger('google_ai_ocr')
 
@@ -21,87 +26,81 @@ class GoogleAIOCRService:
     """Google AI Vision API ile OCR işlemleri"""
     
     def __init__(self):
-        from core.config import settings
         self.api_key = settings.google_ai.api_key
-        self.api_url = "https://vision.googleapis.com/v1/images:annotate"
+        self.api_url = settings.ocr.vision_api_url
+        # _extract_text_from_annotation sadece fullTextAnnotation/textAnnotations okur - tek özellik yeterli
+        self.feature = settings.ocr.vision_feature
         
         if not self.api_key:
             raise ValueError("GOOGLE_AI_API_KEY not found in database settings")
         
-        self.ocr_cache = {}
+        # Eşzamanlı istekler tüm job'lar arasında çok görselli çağrılarda birleşir
+        vision_batcher.set_transport(self._annotate_batch_async)
     
-    def _encode_image(self, image_path: str) -> str:
-        """Resmi base64 formatına çevir"""
-        try:
-            with open(image_path, 'rb') as image_file:
-                return base64.b64encode(image_file.read()).decode('utf-8')
-        except Exception as e:
-            logger.error(f"Image encoding error: {e}")
-            raise BaseAppException(f"Image encoding failed: {e}")
+    def _call_google_vision_api(self, image_data: str) -> Dict:
+        """Google Vision API'yi tek görsel için çağır"""
+        return {'responses': self._call_google_vision_api_batch([image_data])}
     
-    def _preprocess_image(self, image_path: str) -> str:
-        """Resmi OCR için optimize et"""
-        try:
-            image = Image.open(image_path)
-            
-            # Resize if too large
-            max_size = (2048, 2048)
-            if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-                image.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Save processed image
-            processed_path = image_path.replace('.', '_processed.')
-            image.save(processed_path, 'JPEG', quality=85)
-            
-            return processed_path
-        except Exception as e:
-            logger.error(f"Image preprocessing error: {e}")
-            return image_path
+    def _build_payload(self, images: List[str]) -> Dict:
+        return {
+            "requests": [
+                {
+                    "image": {"content": image_data},
+                    "features": [{"type": self.feature}]
+                }
+                for image_data in images
+            ]
+        }
     
-    def _call_google_vision_api(self, image_data: str) -> Dict:
-        """Google Vision API'yi çağır"""
+    def _call_google_vision_api_batch(self, images: List[str]) -> List[Dict]:
+        """Tek images:annotate isteğinde birden fazla görsel - görsel başına yanıt listesi (senkron)"""
         if not self.api_key:
-            raise BaseAppException("Google AI API key not configured")
+            raise ExternalServiceError("Google AI API key not configured")
             
         try:
-            payload = {
-                "requests": [
-                    {
-                        "image": {"content": image_data},
-                        "features": [
-                            {"type": "TEXT_DETECTION", "maxResults": 50},
-                            {"type": "DOCUMENT_TEXT_DETECTION", "maxResults": 50}
-                        ]
-                    }
-                ]
-            }
+            payload = self._build_payload(images)
             
             response = requests.post(
                 f"{self.api_url}?key={self.api_key}",
                 json=payload,
-                timeout=30
+                timeout=settings.ocr.timeout
             )
             
             if response.status_code != 200:
-                raise BaseAppException(f"API call failed: {response.status_code}")
+                raise ExternalServiceError(f"API call failed: {response.status_code}")
             
-            return response.json()
+            return response.json().get('responses', [])
+        except ExternalServiceError:
+            raise
         except Exception as e:
             logger.error(f"API call error: {e}")
-            raise BaseAppException(f"API call failed: {e}")
+            raise ExternalServiceError(f"API call failed: {e}")
+    
+    async def _annotate_batch_async(self, images: List[str]) -> List[Dict]:
+        """
+        Batcher transport'u - paylaşılan keep-alive havuzu, thread kullanmaz.
+        Çağrı ocr_dispatcher'dan geçer (eşzamanlılık sınırı, devre kesici, kota).
+        """
+        if not self.api_key:
+            raise ExternalServiceError("Google AI API key not configured")
+        
+        url = f"{self.api_url}?key={self.api_key}"
+        payload = self._build_payload(images)
+        response = await ocr_dispatcher.run(
+            len(images),
+            lambda observe: ocr_http_client.post_json(url, payload, observe=observe)
+        )
+        return response.get('responses', [])
     
     def _extract_text_from_response(self, response: Dict) -> str:
         """API yanıtından metin çıkar"""
+        if 'responses' not in response or not response['responses']:
+            return ""
+        return self._extract_text_from_annotation(response['responses'][0])
+    
+    def _extract_text_from_annotation(self, response_data: Dict) -> str:
+        """Tek görselin annotate yanıtından metin çıkar"""
         try:
-            if 'responses' not in response or not response['responses']:
-                return ""
-            
-            response_data = response['responses'][0]
-            
             # DOCUMENT_TEXT_DETECTION öncelikli
             if 'fullTextAnnotation' in response_data:
                 return response_data['fullTextAnnotation'].get('text', '')
@@ -186,36 +185,44 @@ class GoogleAIOCRService:
             logger.error(f"Product info parsing error: {e}")
             return {'code': '', 'color': '', 'brand': '', 'size': '', 'material': ''}
     
+    def _prepare_image(self, image_path: str) -> str:
+        """Bellek içi preprocess (draft decode, etiket kırpma, küçültme) + base64"""
+        try:
+            data = ocr_preprocessor.prepare(image_path)
+        except Exception as e:
+            # Decode edilemeyen dosya Vision'a olduğu gibi gönderilir
+            ocr_preprocessor.stats['errors'] += 1
+            logger.error(f"Image preprocessing error: {e}")
+            with open(image_path, 'rb') as image_file:
+                data = image_file.read()
+        return base64.b64encode(data).decode('utf-8')
+    
     def extract_text_from_image(self, image_path: str) -> str:
         """Resimden metin çıkar"""
         try:
-            # Cache kontrolü
-            if image_path in self.ocr_cache:
-                return self.ocr_cache[image_path]
-            
-            # Resmi işle
-            processed_path = self._preprocess_image(image_path)
-            
-            # Base64 encode
-            image_data = self._encode_image(processed_path)
-            
-            # API çağrısı
-            response = self._call_google_vision_api(image_data)
+            # API çağrısı (sonuç cache'i içerik hash'i ile UnifiedOCRService'te)
+            response = self._call_google_vision_api(self._prepare_image(image_path))
             
             # Metin çıkar
-            text = self._extract_text_from_response(response)
-            
-            # Cache'e kaydet
-            self.ocr_cache[image_path] = text
-            
-            # Geçici dosyayı sil
-            if processed_path != image_path and os.path.exists(processed_path):
-                os.remove(processed_path)
-            
-            return text
+            return self._extract_text_from_response(response)
         except Exception as e:
             logger.error(f"Text extraction error: {e}")
-            raise BaseAppException(f"Text extraction failed: {e}")
+            raise ExternalServiceError(f"Text extraction failed: {e}")
+    
+    async def extract_text_async(self, image_path: str, content_hash: Optional[str] = None) -> str:
+        """
+        Resimden metin çıkar - istek diğer eşzamanlı isteklerle tek annotate çağrısında birleşir.
+        content_hash verilirse kompakt ham yanıt (metin + geometri) yeniden çıkarma için saklanır.
+        """
+        loop = asyncio.get_event_loop()
+        image_data = await loop.run_in_executor(None, self._prepare_image, image_path)
+        response = await vision_batcher.submit(image_data)
+        
+        if content_hash:
+            raw = compact_annotation(response)
+            if raw is not None:
+                ocr_result_store.put_raw(content_hash, raw)
+        return self._extract_text_from_annotation(response)
     
     def extract_product_info(self, image_path: str) -> Dict[str, str]:
         """Resimden ürün bilgilerini çıkar"""
@@ -224,34 +231,38 @@ class GoogleAIOCRService:
             return self._parse_product_info(text)
         except Exception as e:
             logger.error(f"Product info extraction error: {e}")
-            raise BaseAppException(f"Product info extraction failed: {e}")
+            raise ExternalServiceError(f"Product info extraction failed: {e}")
     
     def batch_extract_text(self, image_paths: List[str]) -> List[str]:
-        """Birden fazla resimden metin çıkar"""
-        try:
-            results = []
-            for path in image_paths:
+        """Birden fazla resimden metin çıkar (batch_max_images'lık annotate çağrıları)"""
+        results = []
+        batch_size = vision_batcher.max_images
+        for start in range(0, len(image_paths), batch_size):
+            chunk = image_paths[start:start + batch_size]
+            prepared = []
+            for path in chunk:
                 try:
-                    text = self.extract_text_from_image(path)
-                    results.append(text)
+                    prepared.append(self._prepare_image(path))
                 except Exception as e:
                     logger.error(f"Batch processing error for {path}: {e}")
-                    results.append("")
-            return results
-        except Exception as e:
-            logger.error(f"Batch extraction error: {e}")
-            raise BaseAppException(f"Batch extraction failed: {e}")
+                    prepared.append(None)
+            
+            images = [image_data for image_data in prepared if image_data is not None]
+            try:
+                responses = iter(self._call_google_vision_api_batch(images) if images else [])
+            except Exception as e:
+                logger.error(f"Batch extraction error: {e}")
+                responses = iter([])
+            
+            for image_data in prepared:
+                response = next(responses, {}) if image_data is not None else {}
+                results.append(self._extract_text_from_annotation(response) if 'error' not in response else "")
+        return results
     
-    def get_cache_stats(self) -> Dict[str, int]:
-        """Cache istatistiklerini al"""
-        return {
-            'cached_items': len(self.ocr_cache),
-            'cache_hits': getattr(self, '_cache_hits', 0),
-            'cache_misses': getattr(self, '_cache_misses', 0)
-        }
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Cache istatistiklerini al (paylaşılan içerik hash'li OCR store)"""
+        return ocr_result_store.get_stats()
     
     def clear_cache(self):
-        """Cache'i temizle"""
-        self.ocr_cache.clear()
-        self._cache_hits = 0
-        self._cache_misses = 0
+        """Cache'i temizle (bellek katmanı; disk katmanı TTL ile budanır)"""
+        ocr_result_store.clear_memory()
@@ -7,6 +7,7 @@ from PIL import Image, ImageOps
 import os
 from typing import Tuple, Optional
 from core.logging import get_logger
+from services.image_resize import open_for_size, resize_fit
 
 logger = get_logger('image_optimizer')
 
@@ -37,8 +38,8 @@ class ImageOptimizer:
             # Orijinal dosya boyutu
             original_size = os.path.getsize(input_path)
             
-            # Görseli aç
-            img = Image.open(input_path)
+            # Görseli aç - JPEG, full boyuta yetecek en küçük DCT ölçeğinde decode edilir
+            img = open_for_size(input_path, (self.max_width, self.max_height))
             
             # EXIF rotation düzelt (Pillow 9.1.0+ uyumlu)
             try:
@@ -62,17 +63,14 @@ class ImageOptimizer:
                 img = img.convert('RGB')
             
             # 1. FULL BOYUT OPTIMIZE (max 1920x2560)
-            img_full = img.copy()
-            if img_full.width > self.max_width or img_full.height > self.max_height:
-                img_full.thumbnail((self.max_width, self.max_height), Image.Resampling.LANCZOS)
+            img_full = resize_fit(img, (self.max_width, self.max_height), upscale=False)
             
             full_path = os.path.join(output_dir, filename)
             img_full.save(full_path, 'JPEG', quality=self.quality_full, optimize=True)
             optimized_size = os.path.getsize(full_path)
             
-            # 2. THUMBNAIL (300x400)
-            img_thumb = img.copy()
-            img_thumb.thumbnail(self.thumb_size, Image.Resampling.LANCZOS)
+            # 2. THUMBNAIL (300x400) - orijinal yerine küçültülmüş full'dan
+            img_thumb = resize_fit(img_full, self.thumb_size, upscale=False)
             
             thumb_filename = f"thumb_{filename}"
             thumb_path = os.path.join(output_dir, thumb_filename)
@@ -115,7 +113,8 @@ class ImageOptimizer:
     def create_thumbnail_only(self, input_path: str, size: Tuple[int, int] = None) -> Optional[Image.Image]:
         """Sadece thumbnail oluştur (bellekte)"""
         try:
-            img = Image.open(input_path)
+            thumb_size = size or self.thumb_size
+            img = open_for_size(input_path, thumb_size)
             try:
                 img = ImageOps.exif_transpose(img)
             except AttributeError:
@@ -127,10 +126,7 @@ class ImageOptimizer:
             if img.mode != 'RGB':
                 img = img.convert('RGB')
             
-            thumb_size = size or self.thumb_size
-            img.thumbnail(thumb_size, Image.Resampling.LANCZOS)
-            
-            return img
+            return resize_fit(img, thumb_size, upscale=False)
             
         except Exception as e:
             logger.error(f"[THUMB ERROR] {input_path}: {e}")
@@ -0,0 +1,109 @@
+"""
+Image Resize
+Kolaj, thumbnail ve optimize edilmiş görseller için ortak küçültme
+
+Kamera JPEG'leri (12-50 MP) tam çözünürlükte decode edilip tek LANCZOS ile
+birkaç yüz piksele indiriliyordu: decode süresi ve bellek tam bitmap kadar,
+LANCZOS çekirdeği de kaynak piksel sayısıyla büyür. Üç adımlı küçültme:
+
+    1. JPEG draft mode: decoder DCT ölçeklemesiyle doğrudan 1/2, 1/4 ya da 1/8
+       boyutta çözer - hedefin REDUCING_GAP katından küçük ölçek seçilmez
+    2. Image.reduce: kalan tam sayı katı kutu ortalamasıyla ucuza düşürülür
+       (yine hedefin REDUCING_GAP katında durur)
+    3. Tek yüksek kaliteli yeniden örnekleme (LANCZOS) hedef boyuta
+
+Draft sadece henüz yüklenmemiş görselde etkilidir: Image.open'dan sonra,
+convert / exif_transpose / load'dan önce çağrılmalı. JPEG olmayan görsellerde
+1. adım hiçbir şey yapmaz, 2. ve 3. adım yine uygulanır.
+"""
+
+from typing import Tuple
+
+from PIL import Image
+
+# Son resample'a kaynak olarak hedefin en az bu katı bırakılır (Pillow thumbnail varsayılanı)
+REDUCING_GAP = 2.0
+
+# EXIF yönlendirmesi 90/270 derece olan değerler - kutu draft için çevrilir
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+Size = Tuple[int, int]
+
+
+def fit_size(size: Size, box: Size, upscale: bool = True) -> Size:
+    """Kutunun içine sığan boyut (aspect korunur); upscale=False ise büyütmez"""
+    width, height = size
+    if not upscale and width <= box[0] and height <= box[1]:
+        return width, height
+    if width / height > box[0] / box[1]:
+        return box[0], max(1, int(box[0] * height / width))
+    return max(1, int(box[1] * width / height)), box[1]
+
+
+def cover_size(size: Size, box: Size) -> Size:
+    """Kutuyu tamamen dolduran boyut (aspect korunur, taşan kısım kırpılacak)"""
+    width, height = size
+    if width / height > box[0] / box[1]:
+        return max(box[0], int(box[1] * width / height)), box[1]
+    return box[0], max(box[1], int(box[0] * height / width))
+
+
+def is_transposed(img: Image.Image) -> bool:
+    """EXIF orientation genişlik/yüksekliği yer değiştiriyor mu"""
+    try:
+        return img.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS
+    except Exception:
+        return False
+
+
+def draft_for_size(img: Image.Image, size: Size, reducing_gap: float = REDUCING_GAP) -> Image.Image:
+    """
+    JPEG'i size * reducing_gap'ten küçük olmayan en küçük DCT ölçeğinde decode
+    edilecek şekilde ayarla. Yüklenmiş ya da JPEG olmayan görselde etkisiz.
+    """
+    request = (max(1, int(size[0] * reducing_gap)), max(1, int(size[1] * reducing_gap)))
+    if request[0] < img.width or request[1] < img.height:
+        img.draft(None, request)
+    return img
+
+
+def resize_to(
+    img: Image.Image,
+    size: Size,
+    resample: int = Image.Resampling.LANCZOS,
+    reducing_gap: float = REDUCING_GAP
+) -> Image.Image:
+    """draft -> reduce -> tek resample ile tam olarak size boyutuna getir"""
+    draft_for_size(img, size, reducing_gap)
+    if img.mode not in ('1', 'P'):
+        factor = int(min(img.width / (size[0] * reducing_gap), img.height / (size[1] * reducing_gap)))
+        if factor > 1:
+            img = img.reduce(factor)
+    if img.size == tuple(size):
+        return img
+    return img.resize(size, resample)
+
+
+def resize_fit(img: Image.Image, box: Size, upscale: bool = True) -> Image.Image:
+    """Aspect ratio koruyarak kutuya sığdır"""
+    return resize_to(img, fit_size(img.size, box, upscale))
+
+
+def resize_cover(img: Image.Image, box: Size) -> Image.Image:
+    """Kutuyu tam doldur, taşan kenarları ortadan kırp"""
+    scaled = cover_size(img.size, box)
+    img = resize_to(img, scaled)
+    left = (scaled[0] - box[0]) // 2
+    top = (scaled[1] - box[1]) // 2
+    return img.crop((left, top, left + box[0], top + box[1]))
+
+
+def open_for_size(path: str, box: Size, cover: bool = False, upscale: bool = False) -> Image.Image:
+    """
+    Dosyayı aç ve kutuya göre draft ayarla (EXIF döndürmesi hesaba katılır).
+    Dönen görsel henüz yüklenmemiştir; exif_transpose / convert sonra yapılır.
+    """
+    img = Image.open(path)
+    oriented_box = (box[1], box[0]) if is_transposed(img) else tuple(box)
+    target = cover_size(img.size, oriented_box) if cover else fit_size(img.size, oriented_box, upscale)
+    return draft_for_size(img, target)
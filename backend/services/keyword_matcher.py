@@ -0,0 +1,233 @@
+"""
+Keyword Matcher
+Renk, marka ve ürün tipi sözlükleri için Aho-Corasick çoklu desen eşleştirici
+
+Eski akışta her sözlük (renkler, ürün tipleri, marka listeleri) sırayla
+`keyword in text` ile taranıyordu: maliyet metin uzunluğu x sözlük boyutu.
+Otomat sözlükten bir kez kurulur ve metni tek geçişte tarar; süre sözlük
+büyüklüğünden bağımsız olarak metin uzunluğuyla doğrusal kalır.
+
+Türkçe büyük/küçük harf katlaması: Python'un lower()'ı 'İ' harfini iki
+karaktere ('i' + birleşik nokta) çevirir, OCR ise 'ı'/'İ' yerine çoğu zaman
+ASCII 'I' okur. turkish_fold İ, I ve ı harflerini 'i'ye indirger; böylece
+'HIRKA', 'hırka', 'VİZON' ve 'vizon' aynı anahtara düşer.
+
+BrandDictionary statik marka listelerine aktif Brand kayıtlarını ekler;
+markalar değişince (BrandService) ya da refresh süresi dolunca yeniden kurulur.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import settings
+from core.logging import get_logger
+
+logger = get_logger('keyword_matcher')
+
+_TURKISH_FOLD = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i'})
+
+# Sözlüğe alınmayan yer tutucu marka adları (otomatik oluşturulan kayıtlar)
+GENERIC_BRAND_NAMES = frozenset(['brand', 'brands', 'default brand', 'uploads', 'marka', 'firma'])
+
+
+def turkish_fold(text: str) -> str:
+    """Türkçe duyarlı küçük harf: İ/I/ı -> i, ardından lower()"""
+    return text.translate(_TURKISH_FOLD).lower()
+
+
+def _is_word_char(char: str) -> bool:
+    # re modülündeki \w ile aynı tanım
+    return char.isalnum() or char == '_'
+
+
+def is_whole_word(text: str, start: int, end: int) -> bool:
+    """text[start:end] iki yanında kelime karakteri yoksa True (regex \\b eşdeğeri)"""
+    return (start == 0 or not _is_word_char(text[start - 1])) and (end == len(text) or not _is_word_char(text[end]))
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick otomatı. Anahtar kelimeler turkish_fold ile katlanarak eklenir,
+    aramalar katlanmış metin üzerinde yapılır. Her kelimenin bir payload'ı
+    vardır; sözlükteki sıra önceliği `rank` olarak payload'la birlikte saklanır.
+    """
+
+    def __init__(self, keywords: Iterable[Any] = (), whole_word: bool = False):
+        self.whole_word = whole_word
+        # Düğüm i: geçişler, hata bağlantısı, çıktılar [(uzunluk, rank, payload, whole_word)]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int, Any, bool]]] = [[]]
+        self._built = False
+        self.size = 0
+        for keyword in keywords:
+            self.add(keyword)
+
+    def add(self, keyword: str, payload: Any = None, whole_word: Optional[bool] = None):
+        """Kelime ekle (payload verilmezse kelimenin kendisi)"""
+        folded = turkish_fold(keyword)
+        if not folded:
+            return
+        node = 0
+        for char in folded:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        self._out[node].append((
+            len(folded), self.size, keyword if payload is None else payload,
+            self.whole_word if whole_word is None else whole_word
+        ))
+        self.size += 1
+        self._built = False
+
+    def build(self) -> "KeywordMatcher":
+        """Hata bağlantılarını BFS ile kur; çıktılar hata zinciri boyunca birleştirilir"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str, folded: bool = False) -> Iterator[Tuple[int, int, int, Any]]:
+        """(başlangıç, bitiş, rank, payload) - metindeki sırayla, çakışanlar dahil"""
+        if not self._built:
+            self.build()
+        if not folded:
+            text = turkish_fold(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, rank, payload, whole_word in out[node]:
+                start = index + 1 - length
+                if whole_word and not is_whole_word(text, start, index + 1):
+                    continue
+                yield start, index + 1, rank, payload
+
+    def ranked(self, text: str, folded: bool = False) -> List[Any]:
+        """Eşleşen payload'lar sözlük sırasıyla (tekrarsız) - `for k in list: if k in text` eşdeğeri"""
+        ranks = {}
+        for _, _, rank, payload in self.iter_matches(text, folded):
+            ranks.setdefault(rank, payload)
+        return [ranks[rank] for rank in sorted(ranks)]
+
+    def first(self, text: str, folded: bool = False) -> Optional[Any]:
+        """Sözlükte en önce gelen eşleşmenin payload'ı"""
+        best_rank, best = None, None
+        for _, _, rank, payload in self.iter_matches(text, folded):
+            if best_rank is None or rank < best_rank:
+                best_rank, best = rank, payload
+                if rank == 0:
+                    break
+        return best
+
+    def contains_any(self, text: str, folded: bool = False) -> bool:
+        for _ in self.iter_matches(text, folded):
+            return True
+        return False
+
+
+class BrandDictionary:
+    """Statik marka listeleri + aktif Brand adları -> KeywordMatcher"""
+
+    def __init__(self, refresh_seconds: int = 300):
+        self.refresh_seconds = refresh_seconds
+        self.version = 0
+        self._names: Optional[List[str]] = None
+        self._loaded_at = 0.0
+        self._matchers: Dict[Tuple[str, ...], Tuple[int, KeywordMatcher]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'loads': 0, 'load_errors': 0, 'builds': 0, 'invalidations': 0}
+
+    def invalidate(self):
+        """Brand eklendi/güncellendi/(de)aktive edildi - sonraki kullanımda yeniden yükle"""
+        with self._lock:
+            self._names = None
+            self.stats['invalidations'] += 1
+
+    def names(self) -> List[str]:
+        """Aktif marka adları (DB'ye ulaşılamazsa boş liste, refresh süresi sonunda tekrar denenir)"""
+        if self._names is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return self._names
+        with self._lock:
+            if self._names is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+                return self._names
+            names = self._load_names()
+            if names != self._names:
+                self.version += 1
+            self._names = names
+            self._loaded_at = time.monotonic()
+            return names
+
+    def _load_names(self) -> List[str]:
+        try:
+            from database import SessionLocal
+            from models.brand import Brand
+            db = SessionLocal()
+            try:
+                rows = db.query(Brand.name).filter(Brand.is_active == True).order_by(Brand.id).all()
+            finally:
+                db.close()
+            self.stats['loads'] += 1
+            return [
+                name.strip() for (name,) in rows
+                if name and len(name.strip()) >= 3 and turkish_fold(name.strip()) not in GENERIC_BRAND_NAMES
+            ]
+        except Exception as e:
+            self.stats['load_errors'] += 1
+            logger.warning(f"[BRAND DICT] Could not load brands: {e}")
+            return []
+
+    def matcher(self, static_brands: Sequence[str] = ()) -> KeywordMatcher:
+        """
+        Önce statik liste (payload: (kelime, None), alt dize eşleşmesi), ardından
+        DB markaları (payload: (kelime, marka adı), tam kelime eşleşmesi).
+        """
+        names = self.names()
+        key = tuple(static_brands)
+        cached = self._matchers.get(key)
+        if cached and cached[0] == self.version:
+            return cached[1]
+
+        matcher = KeywordMatcher()
+        for brand in static_brands:
+            matcher.add(brand, (brand, None))
+        for name in names:
+            matcher.add(name, (name, name), whole_word=True)
+        matcher.build()
+        self._matchers[key] = (self.version, matcher)
+        self.stats['builds'] += 1
+        return matcher
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'version': self.version,
+            'brands': len(self._names or []),
+            'matchers': len(self._matchers),
+            'refresh_seconds': self.refresh_seconds
+        }
+
+
+# Global instance
+brand_dictionary = BrandDictionary(refresh_seconds=settings.ocr.brand_dictionary_refresh_seconds)
@@ -0,0 +1,356 @@
+"""
+Label Field Engine
+SmartLabelExtractor için derlenmiş, tek geçişli alan çıkarma motoru
+
+Eski akışta her _extract_* metodu önce öncelikli etiket metninde, sonra tüm
+metinde çalışıyor; her çağrı metni yeniden lower()'lıyor, kelimelere bölüyor
+ve desenleri ham string'lerden re cache'i üzerinden arıyordu. Motor:
+
+    - Tüm desenleri (gösterge kelimeleri dahil) kurulumda derler; renk,
+      ürün tipi, marka, malzeme ve ülke sözlükleri Aho-Corasick otomatıdır
+      (services.keyword_matcher) - Türkçe İ/ı katlamalı, metin boyunda doğrusal
+    - Metnin türevlerini (lower, katlanmış, temiz, kelimeler) LabelTextView'da
+      bir kez hesaplar; bir geçişte istenen tüm alanlar için aday üretir
+    - Tüm metin geçişini sadece öncelikli metin gerçekten daha kısaysa ve
+      sadece bulunamayan alanlar için yapar
+
+Alan sonuçları sözlük aramalarında Türkçe katlama ve aktif Brand kayıtları
+dışında eski metotlarla birebir aynıdır (benchmarks.label_extraction bir
+etiket korpusunda doğrular). Desenler bölge sınırı aşabildiği için
+(ör. [:\\s]* satır sonunu da yer) satır satır değil metin görünümü üzerinde
+çalışılır.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.logging import get_logger
+from services.keyword_matcher import KeywordMatcher, brand_dictionary, turkish_fold
+
+logger = get_logger('label_field_engine')
+
+# Öncelik sırası önemli - spesifik olanlar önce
+PRODUCT_TYPE_INDICATORS = [
+    # Turkish product types (highest priority)
+    'takim', 'takım', 'tulum', 'pantolon', 'jean', 'şalvar',
+    'gömlek', 'tişört', 'polo', 'bluz', 'tunik',
+    'elbise', 'etek', 'etekli',
+    'ceket', 'mont', 'kaban', 'blazer',
+    'kazak', 'hırka', 'pullover', 'yelek',
+    'şort', 'tayt', 'body',
+    # English product types
+    'suit', 'set', 'jumpsuit', 'trouser', 'pant',
+    'shirt', 'blouse', 't-shirt',
+    'dress', 'skirt',
+    'jacket', 'coat',
+    'sweater', 'cardigan', 'vest',
+    'shorts', 'leggings',
+    # Accessories
+    'ayakkabı', 'shoe', 'boot', 'sandal', 'sneaker', 'sandalet',
+    'çanta', 'bag', 'kemer', 'belt', 'şapka', 'hat', 'beret',
+    'yüzük', 'ring', 'kolye', 'necklace', 'bilezik', 'bracelet', 'küpe', 'earring',
+    'saat', 'watch', 'gözlük', 'glasses', 'sunglasses'
+]
+
+# Ürün tipi sanılmaması gereken kelimeler (kelimenin içinde geçmesi yeterli)
+PRODUCT_TYPE_SKIP_WORDS = [
+    'BRANDS', 'BRAND', 'MARKA', 'FİRMA', 'COMPANY', 'COLLECTION', 'LINE',
+    'SIZE', 'COLOR', 'PRICE', 'CODE', 'MODEL', 'RENK', 'BEDEN', 'FİYAT',
+    'DZAYN', 'DIZAYN', 'DZYN', 'ANNAVERO', 'KOKART', 'LILIUM', 'MY8',
+    'VITA', 'VIEN', 'QUALITY', 'MADE', 'TURKEY', 'TRK', 'UNDER', 'GUARANTEE',
+    'WWW', 'COM', 'MOB', 'TEL', 'PHONE', 'EMAIL'
+]
+
+BRAND_INDICATOR_WORDS = ('brands', 'brand', 'marka', 'firma', 'company')
+BRAND_SKIP_WORDS = frozenset(['SIZE', 'COLOR', 'PRICE', 'CODE', 'MODEL', 'TYPE', 'MADE', 'IN', 'VITA', 'V'])
+
+# Türkçe renk adlarının döndürülen yazımı
+COLOR_DISPLAY = {'siyah': 'Black', 'syah': 'Black', 'beyaz': 'White', 'kahverengi': 'Brown', 'kahve': 'Brown', 'camel': 'Camel'}
+
+# extract_all_fields'ın LabelInfo alan sırası
+FIELDS = (
+    'brand', 'product_code', 'color', 'size_range', 'price', 'product_type',
+    'material', 'season', 'barcode', 'country', 'care_instructions', 'composition'
+)
+
+
+def _indicator_patterns(indicators: Iterable[str], tail: str) -> List[Tuple[str, "re.Pattern"]]:
+    return [(indicator, re.compile(re.escape(indicator) + tail)) for indicator in indicators]
+
+
+class LabelTextView:
+    """Bir metnin alan çıkarıcıların ortak kullandığı türevleri (tembel, bir kez)"""
+
+    __slots__ = ('text', '_lower', '_folded', '_clean_lower', '_folded_clean', '_words', '_word_index')
+
+    def __init__(self, text: str):
+        self.text = text
+        self._lower = None
+        self._folded = None
+        self._clean_lower = None
+        self._folded_clean = None
+        self._words = None
+        self._word_index = None
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def folded(self) -> str:
+        """Türkçe katlanmış metin (sözlük eşleştirmesi)"""
+        if self._folded is None:
+            self._folded = turkish_fold(self.text)
+        return self._folded
+
+    @property
+    def clean_lower(self) -> str:
+        if self._clean_lower is None:
+            clean = self.text.replace('\n', ' ').replace('\r', ' ').replace('  ', ' ').strip()
+            self._clean_lower = clean.lower()
+        return self._clean_lower
+
+    @property
+    def folded_clean(self) -> str:
+        if self._folded_clean is None:
+            clean = self.text.replace('\n', ' ').replace('\r', ' ').replace('  ', ' ').strip()
+            self._folded_clean = turkish_fold(clean)
+        return self._folded_clean
+
+    @property
+    def words(self) -> List[str]:
+        if self._words is None:
+            self._words = self.text.split()
+        return self._words
+
+    @property
+    def word_index(self) -> Dict[str, str]:
+        """Katlanmış kelime -> metindeki ilk yazımı"""
+        if self._word_index is None:
+            index = {}
+            for word in self.words:
+                index.setdefault(turkish_fold(word), word)
+            self._word_index = index
+        return self._word_index
+
+
+class LabelFieldEngine:
+    """Desenleri SmartLabelExtractor'ın pattern sözlüklerinden derler"""
+
+    def __init__(self, extractor):
+        # Markalar: statik liste + aktif Brand kayıtları (brand_dictionary, markalar değişince yeniden kurulur)
+        self.common_brands = [brand.lower() for brand in extractor.brand_patterns['common_brands']]
+        self.brand_indicator_words = KeywordMatcher(BRAND_INDICATOR_WORDS).build()
+        self.brand_indicators = _indicator_patterns(extractor.brand_patterns['indicators'], r'[:\s]*([A-Za-z\s&]+)')
+
+        # Ürün kodu
+        self.code_indicators = _indicator_patterns(extractor.product_code_patterns['indicators'], r'[:\s]*([A-Za-z0-9\-]+)')
+        self.code_patterns = [re.compile(pattern) for pattern in extractor.product_code_patterns['patterns']]
+
+        # Renk: listedeki sıra önceliktir, tam kelime eşleşmesi
+        self.colors = KeywordMatcher(extractor.color_patterns['common_colors'], whole_word=True).build()
+        self.color_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in extractor.color_patterns['patterns']]
+
+        # Beden
+        self.size_indicators = _indicator_patterns(extractor.size_patterns['indicators'], r'[:\s]*(\d{2,3}[-/]\d{2,3})')
+        self.size_patterns = [re.compile(pattern) for pattern in extractor.size_patterns['patterns']]
+
+        # Ürün tipi
+        self.product_types = KeywordMatcher()
+        for indicator in PRODUCT_TYPE_INDICATORS:
+            self.product_types.add(indicator, turkish_fold(indicator))
+        self.product_types.build()
+        self.product_type_skip = KeywordMatcher(PRODUCT_TYPE_SKIP_WORDS).build()
+
+        # Diğer alanlar
+        self.material_patterns = [re.compile(pattern) for pattern in extractor.material_patterns['patterns']]
+        self.materials = KeywordMatcher()
+        for material in extractor.material_patterns['materials']:
+            self.materials.add(material, material.title())
+        self.materials.build()
+        self.season_patterns = [re.compile(pattern) for pattern in extractor.season_patterns['patterns']]
+        self.barcode_patterns = [re.compile(pattern) for pattern in extractor.barcode_patterns['patterns']]
+        self.country_patterns = [re.compile(pattern) for pattern in extractor.country_patterns['patterns']]
+        self.countries = KeywordMatcher()
+        for country in extractor.country_patterns['countries']:
+            self.countries.add(country, country.title())
+        self.countries.build()
+        self.care_patterns = [re.compile(pattern) for pattern in extractor.care_patterns['patterns']]
+        self.composition_patterns = [re.compile(pattern) for pattern in extractor.composition_patterns['patterns']]
+
+        # price async (smart_price_extractor) - motor dışında
+        self.extractors: Dict[str, Callable[[LabelTextView], Optional[str]]] = {
+            'brand': self.brand,
+            'product_code': self.product_code,
+            'color': self.color,
+            'size_range': self.size_range,
+            'product_type': self.product_type,
+            'material': self.material,
+            'season': self.season,
+            'barcode': self.barcode,
+            'country': self.country,
+            'care_instructions': self.care_instructions,
+            'composition': self.composition
+        }
+
+    # ------------------------------------------------------------------
+    # Geçişler
+    # ------------------------------------------------------------------
+
+    def extract_field(self, field: str, view: LabelTextView) -> Optional[str]:
+        try:
+            return self.extractors[field](view)
+        except Exception as e:
+            logger.error(f"[LABEL ENGINE] {field} error: {e}")
+            return None
+
+    def extract(self, view: LabelTextView, fields: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Bir metin görünümünde istenen tüm alanlar"""
+        return {field: self.extract_field(field, view) for field in fields}
+
+    def extract_with_fallback(
+        self,
+        priority: LabelTextView,
+        full: LabelTextView,
+        fields: Iterable[str]
+    ) -> Dict[str, Optional[str]]:
+        """Önce öncelikli etiket, bulunamayanlar için tüm metin (metinler farklıysa)"""
+        results = self.extract(priority, fields)
+        if full.text != priority.text:
+            missing = [field for field, value in results.items() if not value]
+            if missing:
+                results.update(self.extract(full, missing))
+        return results
+
+    # ------------------------------------------------------------------
+    # Alan çıkarıcılar (SmartLabelExtractor._extract_* ile aynı sonuç)
+    # ------------------------------------------------------------------
+
+    def brand(self, view: LabelTextView) -> Optional[str]:
+        clean_lower = view.clean_lower
+        if 'dzayn' in clean_lower or 'dizayn' in clean_lower:
+            return 'DZAYN BRANDS'
+        if 'brands' in clean_lower and ('vita' in clean_lower or 'vv' in clean_lower):
+            return 'DZAYN BRANDS'
+
+        words = view.words
+        for i, word in enumerate(words[:-1]):
+            word_clean = word.strip('.,!?;:').upper()
+            if len(word_clean) >= 3 and not word_clean.isdigit() and word_clean not in BRAND_SKIP_WORDS:
+                next_word = words[i + 1].lower()
+                if self.brand_indicator_words.contains_any(next_word):
+                    if 'brands' in next_word:
+                        return 'DZAYN BRANDS'
+                    return word_clean
+
+        # Statik markalar metindeki aynı kelimeyle, aktif Brand kayıtları kayıtlı adıyla döner
+        word_index = view.word_index
+        for keyword, brand_name in brand_dictionary.matcher(self.common_brands).ranked(view.folded_clean, folded=True):
+            if brand_name:
+                return brand_name.upper()
+            word = word_index.get(turkish_fold(keyword))
+            if word is not None:
+                return word.upper()
+
+        for indicator, pattern in self.brand_indicators:
+            match = pattern.search(view.lower)
+            if match:
+                return match.group(1).strip().title()
+        return None
+
+    def product_code(self, view: LabelTextView) -> Optional[str]:
+        for indicator, pattern in self.code_indicators:
+            match = pattern.search(view.lower)
+            if match:
+                return match.group(1).strip().upper()
+        for pattern in self.code_patterns:
+            match = pattern.search(view.text)
+            if match:
+                return match.group(1).strip().upper()
+        return None
+
+    def color(self, view: LabelTextView) -> Optional[str]:
+        color = self.colors.first(view.folded, folded=True)
+        if color:
+            return COLOR_DISPLAY.get(color.lower(), color.title())
+
+        for pattern in self.color_patterns:
+            match = pattern.search(view.text)
+            if match:
+                color = match.group(2) if len(match.groups()) > 1 else match.group(1)
+                return color.strip().title()
+        return None
+
+    def size_range(self, view: LabelTextView) -> Optional[str]:
+        for indicator, pattern in self.size_indicators:
+            match = pattern.search(view.lower)
+            if match:
+                return match.group(1).strip()
+        for pattern in self.size_patterns:
+            match = pattern.search(view.text)
+            if match:
+                return match.group(1).strip()
+        return None
+
+    def product_type(self, view: LabelTextView) -> Optional[str]:
+        word_index = view.word_index
+        for indicator in self.product_types.ranked(view.folded, folded=True):
+            word = word_index.get(indicator)
+            if word is not None:
+                return word.upper()
+
+        for word in view.words:
+            word_clean = word.strip('.,!?;:').upper()
+            if len(word_clean) >= 3 and not word_clean.isdigit() and not self.product_type_skip.contains_any(word_clean):
+                return word_clean
+        return None
+
+    def material(self, view: LabelTextView) -> Optional[str]:
+        for pattern in self.material_patterns:
+            match = pattern.search(view.text)
+            if match:
+                material = match.group(2) if len(match.groups()) > 1 else match.group(1)
+                return material.strip().title()
+        return self.materials.first(view.folded, folded=True)
+
+    def season(self, view: LabelTextView) -> Optional[str]:
+        for pattern in self.season_patterns:
+            match = pattern.search(view.lower)
+            if match:
+                return match.group(1).strip().upper()
+        return None
+
+    def barcode(self, view: LabelTextView) -> Optional[str]:
+        for pattern in self.barcode_patterns:
+            match = pattern.search(view.text)
+            if match:
+                barcode = match.group(1).strip()
+                if len(barcode) >= 8:
+                    return barcode
+        return None
+
+    def country(self, view: LabelTextView) -> Optional[str]:
+        for pattern in self.country_patterns:
+            match = pattern.search(view.lower)
+            if match:
+                country = match.group(2) if len(match.groups()) > 1 else match.group(1)
+                return country.strip().title()
+        return self.countries.first(view.folded, folded=True)
+
+    def care_instructions(self, view: LabelTextView) -> Optional[str]:
+        for pattern in self.care_patterns:
+            match = pattern.search(view.lower)
+            if match:
+                care = match.group(2) if len(match.groups()) > 1 else match.group(1)
+                return care.strip()
+        return None
+
+    def composition(self, view: LabelTextView) -> Optional[str]:
+        for pattern in self.composition_patterns:
+            match = pattern.search(view.text)
+            if match:
+                composition = match.group(2) if len(match.groups()) > 1 else match.group(1)
+                return composition.strip()
+        return None
@@ -0,0 +1,378 @@
+"""
+OCR Dispatcher
+Vision API çağrıları için uyarlamalı eşzamanlılık, devre kesici ve günlük kota
+
+Vision throttle etmeye başladığında (429) eski akışta hiçbir şey uyum
+sağlamıyordu: her çağrı yeniden denemelerini tüketip hata veriyor, görsel
+dosya adı ayrıştırmaya düşüyordu - bir 429 patlaması bütün upload'ın veri
+kalitesini bozuyordu. Dispatcher her annotate çağrısını üç kapıdan geçirir:
+
+    1. Devre kesici: son `window` denemenin hata oranı (429/5xx/zaman aşımı)
+       eşiği geçerse devre açılır, çağrılar sağlayıcıya gitmez. Süre dolunca
+       yarı açık: tek bir deneme isteği geçer; başarılıysa kapanır, değilse
+       süre ikiye katlanarak tekrar açılır (429'daki Retry-After'a uyulur)
+    2. Günlük kota: gün içinde kullanılan görsel birimi sayılır, sayaç
+       sağlayıcının kota sınırında sıfırlanır (Google: Pasifik gece yarısı).
+       Kota dolunca çağrı sağlayıcıya gitmez. Token bucket (saniyede
+       kota/86400 dolar) sadece yumuşatma içindir: günün kotası ilk
+       dakikalarda tek patlamada harcanmaz, kova boşsa beklenir
+    3. AIMD eşzamanlılık: gecikme normalse her başarılı yanıtta sınır
+       1/sınır kadar artar (tur başına +1), gecikme taban değerin
+       latency_tolerance katını aşarsa x0.9, 429/5xx'te x0.5 azalır
+
+Kapılarda beklenir, hemen düşülmez: çağıran en fazla queue_timeout saniye
+sırada kalır (devre açıksa açılma süresi, kova boşsa dolum süresi dahil).
+Süre dolarsa ExternalServiceError - UnifiedOCRService dosya adına düşer.
+Sinyaller ocr_http_client'ın her denemesinden gelir (yeniden denemeler dahil).
+
+Kota ve sınırlar process başınadır; birden çok worker varsa kota worker
+sayısına bölünerek verilmelidir. Günlük sayaç bellektedir, restart'ta sıfırlanır.
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from core.config import settings
+from core.exceptions import ExternalServiceError
+from core.logging import get_logger
+
+logger = get_logger('ocr_dispatcher')
+
+T = TypeVar('T')
+# observe(status, gecikme, retry_after) - status None: bağlantı hatası / zaman aşımı
+Observer = Callable[[Optional[int], float, Optional[float]], None]
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+THROTTLE_STATUSES = {429}
+SERVER_ERROR_STATUSES = {500, 502, 503, 504}
+# Devre açıkken / deneme sürerken bekleyenlerin yoklama aralığı
+POLL_INTERVAL = 0.25
+MAX_OPEN_SECONDS = 600
+
+
+class OCRDispatcher:
+    """AIMD eşzamanlılık + devre kesici + günlük kota token bucket'ı"""
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_tolerance: float = 2.0,
+        queue_timeout: float = 60.0,
+        failure_ratio: float = 0.5,
+        min_calls: int = 10,
+        window: int = 20,
+        open_seconds: float = 30.0,
+        daily_quota: int = 0,
+        quota_burst: int = 0,
+        quota_timezone: str = 'America/Los_Angeles'
+    ):
+        # AIMD
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.latency_ewma: Optional[float] = None
+        self.latency_floor: Optional[float] = None
+        self._last_decrease = 0.0
+
+        # Devre kesici
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=max(window, min_calls))
+        self._opened_at = 0.0
+        self._open_for = open_seconds
+        self._probe_in_flight = False
+
+        # Günlük kota (0 = sınırsız) - sağlayıcının gününe göre sayaç
+        self.daily_quota = daily_quota
+        try:
+            self.quota_timezone = ZoneInfo(quota_timezone)
+        except (ZoneInfoNotFoundError, ValueError) as e:
+            logger.warning(f"[OCR DISPATCH] Unknown quota timezone {quota_timezone}, using UTC: {e}")
+            self.quota_timezone = timezone.utc
+        self.quota_day: date = self._now().date()
+        self.day_used = 0
+        # Yumuşatma kovası
+        self.rate = daily_quota / 86400.0 if daily_quota else 0.0
+        self.capacity = float(quota_burst or max(16, daily_quota // 24)) if daily_quota else 0.0
+        self.tokens = self.capacity
+        self._refilled_at = time.monotonic()
+
+        self.stats = {
+            'calls': 0, 'attempts': 0, 'throttled': 0, 'server_errors': 0, 'transport_errors': 0,
+            'increases': 0, 'decreases': 0, 'circuit_opens': 0, 'probes': 0,
+            'rejected_circuit': 0, 'rejected_quota': 0, 'rejected_queue': 0, 'quota_used': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Çağrı
+    # ------------------------------------------------------------------
+
+    async def run(self, cost: int, call: Callable[[Observer], Awaitable[T]]) -> T:
+        """
+        cost: kotadan düşülecek birim (görsel sayısı). call, her HTTP denemesini
+        verilen observer'a bildirmelidir.
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        # Devre slot alındıktan sonra, gönderimden hemen önce kontrol edilir:
+        # sırada bekleyenler de devre açılınca sağlayıcıya gitmez
+        await self._acquire(deadline)
+        probe = False
+        try:
+            probe = await self._pass_circuit(deadline)
+            await self._take_tokens(cost, deadline)
+            self.stats['calls'] += 1
+            return await call(self._observe)
+        finally:
+            if probe:
+                self._probe_in_flight = False
+            self._release()
+
+    # ------------------------------------------------------------------
+    # Devre kesici
+    # ------------------------------------------------------------------
+
+    async def _pass_circuit(self, deadline: float) -> bool:
+        """Devreden geç; yarı açık durumda deneme isteğiysen True"""
+        while True:
+            now = time.monotonic()
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN and now - self._opened_at >= self._open_for:
+                self.state = HALF_OPEN
+                logger.info("[OCR DISPATCH] Circuit half-open, probing provider")
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self.stats['probes'] += 1
+                return True
+
+            # Açık ya da deneme sürüyor - süre yetiyorsa bekle
+            wait = self._opened_at + self._open_for - now if self.state == OPEN else POLL_INTERVAL
+            if now + wait > deadline:
+                self.stats['rejected_circuit'] += 1
+                raise ExternalServiceError(
+                    "OCR provider circuit open",
+                    details={'retry_after': round(max(wait, POLL_INTERVAL), 1)}
+                )
+            await asyncio.sleep(min(max(wait, 0.0), POLL_INTERVAL * 4))
+
+    def _record_outcome(self, success: bool, retry_after: Optional[float] = None):
+        if self.state == HALF_OPEN:
+            if success:
+                self.state = CLOSED
+                self._open_for = self.open_seconds
+                self._outcomes.clear()
+                logger.info("[OCR DISPATCH] Probe succeeded, circuit closed")
+            else:
+                self._open(min(self._open_for * 2, MAX_OPEN_SECONDS), retry_after)
+            return
+
+        self._outcomes.append(success)
+        if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) >= self.failure_ratio:
+                self._open(self.open_seconds, retry_after)
+
+    def _open(self, seconds: float, retry_after: Optional[float]):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._open_for = max(seconds, retry_after or 0.0)
+        self._outcomes.clear()
+        self.stats['circuit_opens'] += 1
+        logger.warning(f"[OCR DISPATCH] Circuit opened for {self._open_for:.1f}s")
+
+    # ------------------------------------------------------------------
+    # Günlük kota
+    # ------------------------------------------------------------------
+
+    def _now(self) -> datetime:
+        return datetime.now(self.quota_timezone)
+
+    def _roll_quota_day(self) -> float:
+        """Kota günü değiştiyse sayacı sıfırla; sıfırlanmaya kalan saniye"""
+        now = self._now()
+        if now.date() != self.quota_day:
+            logger.info(f"[OCR DISPATCH] Daily quota reset ({self.day_used} used on {self.quota_day})")
+            self.quota_day = now.date()
+            self.day_used = 0
+        next_day = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=self.quota_timezone)
+        # Aynı tzinfo'lu farkta yaz saati geçişi hesaba katılmaz - UTC üzerinden
+        return max((next_day.astimezone(timezone.utc) - now.astimezone(timezone.utc)).total_seconds(), 0.0)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    async def _take_tokens(self, cost: int, deadline: float):
+        if not self.rate:
+            return
+        # Kovadan büyük batch kovanın tamamıyla geçer (kota sayacına tam cost yazılır)
+        smoothed = min(float(cost), self.capacity)
+        while True:
+            resets_in = self._roll_quota_day()
+            if self.day_used + cost > self.daily_quota:
+                # Günün kotası doldu - yeni güne kadar sağlayıcıya gidilmez
+                if time.monotonic() + resets_in > deadline:
+                    self.stats['rejected_quota'] += 1
+                    raise ExternalServiceError(
+                        "OCR daily quota exhausted",
+                        details={'retry_after': round(resets_in, 1)}
+                    )
+                await asyncio.sleep(resets_in)
+                continue
+
+            self._refill()
+            if self.tokens >= smoothed:
+                self.tokens -= smoothed
+                self.day_used += cost
+                self.stats['quota_used'] += cost
+                return
+            wait = (smoothed - self.tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                self.stats['rejected_quota'] += 1
+                raise ExternalServiceError(
+                    "OCR quota rate limit",
+                    details={'retry_after': round(wait, 1)}
+                )
+            await asyncio.sleep(wait)
+
+    # ------------------------------------------------------------------
+    # AIMD eşzamanlılık
+    # ------------------------------------------------------------------
+
+    async def _acquire(self, deadline: float):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_event_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.monotonic()))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            if future.done():
+                # Slot zaman aşımı / iptalle aynı anda verildi - geri bırak
+                self._release()
+            else:
+                future.cancel()
+                self._waiters.remove(future)
+            if isinstance(error, asyncio.CancelledError):
+                raise
+            self.stats['rejected_queue'] += 1
+            raise ExternalServiceError("OCR dispatcher queue timeout")
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        # Slot doğrudan bekleyene devredilir (in_flight düşmeden)
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def _observe(self, status: Optional[int], latency: float, retry_after: Optional[float] = None):
+        """Her HTTP denemesinin sonucu (yeniden denemeler dahil)"""
+        self.stats['attempts'] += 1
+        if status in THROTTLE_STATUSES:
+            self.stats['throttled'] += 1
+            self._decrease(0.5)
+            self._record_outcome(False, retry_after)
+        elif status is None or status in SERVER_ERROR_STATUSES:
+            self.stats['transport_errors' if status is None else 'server_errors'] += 1
+            self._decrease(0.5)
+            self._record_outcome(False)
+        elif status == 200:
+            congested = self._observe_latency(latency)
+            if congested:
+                self._decrease(0.9)
+            else:
+                self._increase()
+            self._record_outcome(True)
+        else:
+            # 4xx: istek hatası, sağlayıcı sağlıklı
+            self._record_outcome(True)
+
+    def _observe_latency(self, latency: float) -> bool:
+        """Gecikme tabanın tolerans katını aştıysa True (kuyruklanma başladı)"""
+        if self.latency_ewma is None:
+            self.latency_ewma = self.latency_floor = latency
+            return False
+        self.latency_ewma += 0.2 * (latency - self.latency_ewma)
+        # Taban: en düşük EWMA, yük profili değişirse yavaşça yukarı kayar
+        self.latency_floor = min(self.latency_ewma, self.latency_floor + 0.01 * (self.latency_ewma - self.latency_floor))
+        return latency > self.latency_floor * self.latency_tolerance
+
+    def _increase(self):
+        previous = int(self.limit)
+        self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        if int(self.limit) > previous:
+            self.stats['increases'] += 1
+            self._wake()
+
+    def _decrease(self, factor: float):
+        # Aynı tıkanıklıkta uçuştaki her yanıt için ayrı ayrı düşme (tur başına bir kez)
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency_ewma or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        self.stats['decreases'] += 1
+        logger.info(f"[OCR DISPATCH] Concurrency limit -> {int(self.limit)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        resets_in = None
+        if self.rate:
+            self._refill()
+            resets_in = self._roll_quota_day()
+        retry_in = self._opened_at + self._open_for - time.monotonic() if self.state == OPEN else 0.0
+        return {
+            **self.stats,
+            'state': self.state,
+            'circuit_retry_in': round(max(retry_in, 0.0), 1),
+            'limit': int(self.limit),
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit,
+            'in_flight': self.in_flight,
+            'queued': len(self._waiters),
+            'latency_ewma': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            'latency_floor': round(self.latency_floor, 3) if self.latency_floor is not None else None,
+            'recent_failure_ratio': round(self._outcomes.count(False) / len(self._outcomes), 3) if self._outcomes else 0.0,
+            'daily_quota': self.daily_quota,
+            'quota_used_today': self.day_used,
+            'quota_resets_in': round(resets_in) if resets_in is not None else None,
+            'quota_tokens': round(self.tokens, 1) if self.rate else None
+        }
+
+
+# Global instance - tüm Vision çağrıları aynı sınırları paylaşır
+ocr_dispatcher = OCRDispatcher(
+    initial_limit=settings.ocr.dispatcher_initial_concurrency,
+    min_limit=settings.ocr.dispatcher_min_concurrency,
+    max_limit=min(settings.ocr.dispatcher_max_concurrency, settings.ocr.http_pool_size),
+    latency_tolerance=settings.ocr.dispatcher_latency_tolerance,
+    queue_timeout=settings.ocr.dispatcher_queue_timeout_seconds,
+    failure_ratio=settings.ocr.breaker_failure_ratio,
+    min_calls=settings.ocr.breaker_min_calls,
+    window=settings.ocr.breaker_window,
+    open_seconds=settings.ocr.breaker_open_seconds,
+    daily_quota=settings.ocr.daily_quota,
+    quota_burst=settings.ocr.daily_quota_burst,
+    quota_timezone=settings.ocr.daily_quota_timezone
+)
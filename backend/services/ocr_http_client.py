@@ -0,0 +1,175 @@
+"""
+OCR HTTP Client
+OCR API çağrıları için paylaşılan, keep-alive bağlantı havuzlu async istemci
+
+- Tek ClientSession: TLS bağlantıları tekrar kullanılır (her çağrıda el sıkışma yok)
+- Thread başına bir çağrı yok: yüzlerce istek aynı anda uçuşta olabilir,
+  sınır bağlantı havuzu (ocr.http_pool_size)
+- Zaman aşımı ve yeniden deneme settings.ocr'dan (timeout, retry_count);
+  429/5xx ve bağlantı hatalarında üstel geri çekilme, 429'da Retry-After
+- ocr.http2=True ve httpx[http2] kuruluysa HTTP/2 (tek bağlantıda çoklama),
+  aksi halde aiohttp + HTTP/1.1 keep-alive
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+import aiohttp
+
+from core.config import settings
+from core.exceptions import ExternalServiceError
+from core.logging import get_logger
+
+logger = get_logger('ocr_http_client')
+
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class OCRHttpClient:
+    """Paylaşılan async HTTP istemcisi (Vision API)"""
+
+    def __init__(
+        self,
+        pool_size: int = 100,
+        timeout: float = 30,
+        retry_count: int = 3,
+        backoff: float = 0.5,
+        keepalive: float = 30,
+        http2: bool = False
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retry_count = max(0, retry_count)
+        self.backoff = backoff
+        self.keepalive = keepalive
+        self.http2 = http2
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._httpx_client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Yeniden denenebilir taşıma hataları (httpx yüklenirse genişler)
+        self._transport_errors = (aiohttp.ClientError, asyncio.TimeoutError, OSError)
+        self.in_flight = 0
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    def _ensure_client(self):
+        loop = asyncio.get_event_loop()
+        # Session event loop'a bağlıdır (testler / benchmark yeni loop açabilir)
+        if self._loop is not loop:
+            self._session = None
+            self._httpx_client = None
+            self._loop = loop
+
+        if self.http2 and self._httpx_client is None:
+            try:
+                import httpx
+                self._httpx_client = httpx.AsyncClient(
+                    http2=True,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size,
+                        keepalive_expiry=self.keepalive
+                    )
+                )
+                self._transport_errors = self._transport_errors + (httpx.HTTPError,)
+                logger.info("OCR HTTP client using HTTP/2 (httpx)")
+            except ImportError:
+                logger.warning("HTTP/2 requested but httpx[http2] is not installed, using aiohttp")
+                self.http2 = False
+
+        if not self.http2 and (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    keepalive_timeout=self.keepalive,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+
+    async def _post(self, url: str, payload: Dict[str, Any]):
+        """(status, headers, json gövde) - gövde sadece 200'de okunur"""
+        if self.http2:
+            response = await self._httpx_client.post(url, json=payload)
+            return response.status_code, response.headers, response.json() if response.status_code == 200 else None
+        async with self._session.post(url, json=payload) as response:
+            body = await response.json(content_type=None) if response.status == 200 else None
+            return response.status, response.headers, body
+
+    async def post_json(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        observe: Optional[Callable[[Optional[int], float, Optional[float]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        JSON POST; geçici hatalarda retry_count kez yeniden dener.
+        observe(status, gecikme, retry_after) her denemeden sonra çağrılır
+        (status None: bağlantı hatası) - ocr_dispatcher sinyalleri buradan alır.
+        """
+        self._ensure_client()
+        self.stats['requests'] += 1
+        self.in_flight += 1
+        try:
+            last_error = None
+            for attempt in range(self.retry_count + 1):
+                if attempt:
+                    self.stats['retries'] += 1
+                started = time.monotonic()
+                try:
+                    status, headers, body = await self._post(url, payload)
+                    retry_after = headers.get('Retry-After') if status == 429 else None
+                    delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+                    if observe:
+                        observe(status, time.monotonic() - started, delay)
+                    if status == 200:
+                        return body
+                    last_error = ExternalServiceError(f"API call failed: {status}", details={'status': status})
+                    if status not in RETRYABLE_STATUSES:
+                        break
+                except self._transport_errors as e:
+                    if observe:
+                        observe(None, time.monotonic() - started, None)
+                    last_error = ExternalServiceError(f"API call failed: {type(e).__name__}: {e}")
+                    delay = None
+
+                if attempt < self.retry_count:
+                    if delay is None:
+                        delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                    logger.warning(f"[OCR HTTP] {last_error.message} - retry {attempt + 1}/{self.retry_count} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+
+            self.stats['failures'] += 1
+            raise last_error
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        if self._httpx_client is not None:
+            await self._httpx_client.aclose()
+        self._session = None
+        self._httpx_client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'in_flight': self.in_flight,
+            'pool_size': self.pool_size,
+            'protocol': 'http/2' if self.http2 else 'http/1.1'
+        }
+
+
+# Global instance
+ocr_http_client = OCRHttpClient(
+    pool_size=settings.ocr.http_pool_size,
+    timeout=settings.ocr.timeout,
+    retry_count=settings.ocr.retry_count,
+    backoff=settings.ocr.retry_backoff_seconds,
+    keepalive=settings.ocr.http_keepalive_seconds,
+    http2=settings.ocr.http2
+)
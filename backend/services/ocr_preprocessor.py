@@ -0,0 +1,156 @@
+"""
+OCR Preprocessor
+Diske yazmadan, tek decode ile OCR isteği baytları hazırlar
+
+Eski akış: görsel açılır, 2048px'e küçültülüp yanına `_processed` JPEG
+olarak yazılır, o dosya tekrar okunup base64'lenirdi. Yeni akış tamamen
+bellekte:
+
+    1. JPEG draft mode: decoder doğrudan hedef boyuta yakın ölçekte (1/2, 1/4, 1/8)
+       ve gri tonlamalı çözer - tam çözünürlüklü RGB bitmap hiç oluşmaz
+    2. Etiket bölgesi: küçük bir kopyada NumPy ile kenar yoğunluğu hesaplanır,
+       kenar enerjisinin büyük kısmını içeren kutuya kırpılır (arka plan gider)
+    3. Uyarlamalı küçültme: kırpılmış bölge max_side'a kadar - büyütme yapılmaz
+    4. JPEG doğrudan BytesIO'ya kodlanır
+"""
+
+import io
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from core.config import settings
+from core.logging import get_logger
+
+logger = get_logger('ocr_preprocessor')
+
+# Kırpma analizi bu boyutta bir kopya üzerinde yapılır
+ANALYSIS_SIDE = 256
+# Her kenardan kırpılabilecek kenar enerjisi oranı
+EDGE_TRIM = 0.02
+# Kırpma kutusuna eklenen pay (kutu boyutuna oranla)
+CROP_PADDING = 0.06
+
+
+class OCRPreprocessor:
+    """Bellek içi decode -> kırp -> küçült -> JPEG"""
+
+    def __init__(
+        self,
+        max_side: int = 1600,
+        crop: bool = True,
+        grayscale: bool = True,
+        quality: int = 85,
+        min_crop_ratio: float = 0.1,
+        max_crop_ratio: float = 0.85
+    ):
+        self.max_side = max_side
+        self.crop = crop
+        self.grayscale = grayscale
+        self.quality = quality
+        # Bu oranların dışındaki kutular güvenilmez (ya çok küçük ya da kazanç yok)
+        self.min_crop_ratio = min_crop_ratio
+        self.max_crop_ratio = max_crop_ratio
+
+        self._lock = threading.Lock()
+        self.stats = {'images': 0, 'cropped': 0, 'bytes_in': 0, 'bytes_out': 0, 'errors': 0}
+
+    def prepare(self, image_path: str) -> bytes:
+        """OCR isteği için JPEG baytları (CPU işi - executor'da çağrılmalı)"""
+        mode = 'L' if self.grayscale else 'RGB'
+        source_bytes = os.path.getsize(image_path)
+        with Image.open(image_path) as image:
+            # Draft sadece JPEG'de etkili; istenen boyuttan küçük ölçek seçmez
+            image.draft(mode, (self.max_side, self.max_side))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert(mode)
+
+        if self.crop:
+            box = self.label_box(image)
+            if box:
+                image = image.crop(box)
+                with self._lock:
+                    self.stats['cropped'] += 1
+
+        if max(image.size) > self.max_side:
+            image.thumbnail((self.max_side, self.max_side), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=self.quality, optimize=True)
+        data = output.getvalue()
+
+        with self._lock:
+            self.stats['images'] += 1
+            self.stats['bytes_in'] += source_bytes
+            self.stats['bytes_out'] += len(data)
+        return data
+
+    def label_box(self, image: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Kenar enerjisinin (metin, barkod, etiket kenarı) yoğunlaştığı kutu.
+        Satır/sütun projeksiyonlarında her iki uçtan EDGE_TRIM kadar enerji
+        bırakılır; düz arka plan (masa, duvar) kutunun dışında kalır.
+        """
+        width, height = image.size
+        scale = ANALYSIS_SIDE / max(width, height)
+        if scale < 1:
+            small = image.convert('L').resize(
+                (max(1, int(width * scale)), max(1, int(height * scale))), Image.Resampling.BILINEAR
+            )
+        else:
+            small, scale = image.convert('L'), 1.0
+
+        gray = np.asarray(small, dtype=np.int16)
+        if gray.shape[0] < 8 or gray.shape[1] < 8:
+            return None
+        gradient = np.abs(np.diff(gray, axis=1))[:-1, :] + np.abs(np.diff(gray, axis=0))[:, :-1]
+        # Sensör gürültüsü / kumaş dokusu yerine belirgin kenarlar
+        edges = gradient > max(24, np.percentile(gradient, 90))
+        if not edges.any():
+            return None
+
+        top, bottom = self._energy_span(edges.sum(axis=1))
+        left, right = self._energy_span(edges.sum(axis=0))
+
+        pad_y = int((bottom - top) * CROP_PADDING) + 1
+        pad_x = int((right - left) * CROP_PADDING) + 1
+        box = (
+            max(0, int((left - pad_x) / scale)),
+            max(0, int((top - pad_y) / scale)),
+            min(width, int((right + pad_x) / scale)),
+            min(height, int((bottom + pad_y) / scale))
+        )
+
+        ratio = (box[2] - box[0]) * (box[3] - box[1]) / float(width * height)
+        if ratio < self.min_crop_ratio or ratio > self.max_crop_ratio:
+            return None
+        return box
+
+    @staticmethod
+    def _energy_span(projection: np.ndarray) -> Tuple[int, int]:
+        cumulative = np.cumsum(projection)
+        total = cumulative[-1]
+        start = int(np.searchsorted(cumulative, total * EDGE_TRIM))
+        end = int(np.searchsorted(cumulative, total * (1 - EDGE_TRIM))) + 1
+        return start, min(end, len(projection))
+
+    def get_stats(self) -> Dict[str, Any]:
+        images = self.stats['images']
+        return {
+            **self.stats,
+            'avg_request_kb': round(self.stats['bytes_out'] / images / 1024, 1) if images else 0.0,
+            'size_ratio': round(self.stats['bytes_out'] / self.stats['bytes_in'], 3) if self.stats['bytes_in'] else 0.0,
+            'max_side': self.max_side
+        }
+
+
+# Global instance
+ocr_preprocessor = OCRPreprocessor(
+    max_side=settings.ocr.preprocess_max_side,
+    crop=settings.ocr.preprocess_crop,
+    grayscale=settings.ocr.preprocess_grayscale,
+    quality=settings.ocr.preprocess_jpeg_quality
+)
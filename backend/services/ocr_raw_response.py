@@ -0,0 +1,105 @@
+"""
+OCR Raw Response
+Vision annotate yanıtının kompakt, yeniden işlenebilir hali
+
+Tam Vision yanıtı (sembol sembol bounding box'lar) etiket başına yüzlerce KB
+tutar; çıkarma kurallarının ihtiyacı metin ve blok/satır geometrisidir.
+Kompakt biçim:
+
+    {
+        'v': 1,
+        'text': fullTextAnnotation metni,
+        'pages': [{'w', 'h', 'blocks': [{'box': [x0, y0, x1, y1],
+                                          'lines': [[x0, y0, x1, y1, metin], ...]}]}],
+        'words': [[x0, y0, x1, y1, metin], ...]   # sadece TEXT_DETECTION yanıtlarında
+    }
+
+Satırlar sembollerin detectedBreak bilgisinden kurulur (Vision satır
+döndürmez). ocr_result_store bunu içerik hash'iyle zlib sıkıştırılmış saklar;
+ocr_reextraction kural değişince API çağrısı yapmadan buradan yeniden çıkarır.
+"""
+
+from typing import Any, Dict, List, Optional
+
+RAW_FORMAT_VERSION = 1
+
+# Sembolden sonra satır biten kırılma türleri
+LINE_BREAKS = {'EOL_SURE_SPACE', 'LINE_BREAK', 'HYPHEN'}
+SPACE_BREAKS = {'SPACE', 'SURE_SPACE'}
+
+
+def _box(bounding: Optional[Dict[str, Any]]) -> List[int]:
+    """boundingBox/boundingPoly -> [x0, y0, x1, y1] (Vision 0 olan koordinatı atlar)"""
+    vertices = (bounding or {}).get('vertices') or []
+    if not vertices:
+        return [0, 0, 0, 0]
+    xs = [vertex.get('x', 0) for vertex in vertices]
+    ys = [vertex.get('y', 0) for vertex in vertices]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def _union(first: Optional[List[int]], second: List[int]) -> List[int]:
+    if first is None:
+        return list(second)
+    return [min(first[0], second[0]), min(first[1], second[1]), max(first[2], second[2]), max(first[3], second[3])]
+
+
+def _block_lines(block: Dict[str, Any]) -> List[list]:
+    lines = []
+    text, box = '', None
+
+    def close():
+        nonlocal text, box
+        if text.strip():
+            lines.append(box + [text.strip()])
+        text, box = '', None
+
+    for paragraph in block.get('paragraphs', []):
+        for word in paragraph.get('words', []):
+            box = _union(box, _box(word.get('boundingBox')))
+            for symbol in word.get('symbols', []):
+                text += symbol.get('text', '')
+                detected = ((symbol.get('property') or {}).get('detectedBreak') or {}).get('type')
+                if detected in SPACE_BREAKS:
+                    text += ' '
+                elif detected == 'HYPHEN':
+                    text += '-'
+                if detected in LINE_BREAKS:
+                    close()
+        # Paragraf sonu her zaman satır sonu
+        close()
+    return lines
+
+
+def compact_annotation(annotation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Tek görselin annotate yanıtı -> kompakt biçim (hata / boş yanıtta None)"""
+    if not annotation or 'error' in annotation:
+        return None
+
+    full = annotation.get('fullTextAnnotation')
+    if full:
+        return {
+            'v': RAW_FORMAT_VERSION,
+            'text': full.get('text', ''),
+            'pages': [
+                {
+                    'w': page.get('width', 0),
+                    'h': page.get('height', 0),
+                    'blocks': [
+                        {'box': _box(block.get('boundingBox')), 'lines': _block_lines(block)}
+                        for block in page.get('blocks', [])
+                    ]
+                }
+                for page in full.get('pages', [])
+            ]
+        }
+
+    annotations = annotation.get('textAnnotations')
+    if annotations:
+        return {
+            'v': RAW_FORMAT_VERSION,
+            'text': annotations[0].get('description', ''),
+            'pages': [],
+            'words': [_box(word.get('boundingPoly')) + [word.get('description', '')] for word in annotations[1:]]
+        }
+    return None
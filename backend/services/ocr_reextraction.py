@@ -0,0 +1,275 @@
+"""
+OCR Re-extraction
+Kayıtlı ham OCR yanıtlarından ürün alanlarını yeniden çıkarma (API çağrısı yok)
+
+SmartLabelExtractor / BrandLabelPatternService kuralları değişince Product
+alanlarını yenilemenin tek yolu görselleri yeniden yükleyip tekrar OCR'a
+ödemekti. Akış:
+
+    1. Ürünler marka / tarih aralığına göre sayfa sayfa okunur
+    2. Metin kaynağı: ai_extracted_data['content_hash'] ile ocr_result_store'daki
+       ham Vision yanıtı; yoksa (eski kayıtlar) ai_extracted_data'daki OCR metni.
+       Dosya adından üretilmiş metinler (filename_parsing) atlanır
+    3. extract_product_info extraction_batch process pool'unda paralel çalışır
+    4. Değişen alanlar write_batch_size'lık gruplar halinde tek transaction'da yazılır
+
+Elle düzeltilmiş değerler korunur: bir alan ancak boşsa ya da hâlâ önceki
+çıkarmanın ürettiği değeri (ai_extracted_data['ocr_*']) taşıyorsa değiştirilir.
+Ürün kodu ve renk ürünün kimliğidir (code + color + brand) - yeniden yazılmaz.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from core.config import settings
+from core.logging import get_logger
+from services.extraction_batch import BatchItem, extraction_batch_service, filter_accessible, product_text
+from services.ocr_result_store import ocr_result_store
+
+logger = get_logger('ocr_reextraction')
+
+# Product sütunu -> (ProductInfo alanı, önceki çıkarmanın ai_extracted_data anahtarı)
+FIELD_MAP = {
+    'product_type': ('product_type', 'ocr_product_type'),
+    'size_range': ('size', 'ocr_size'),
+    'price': ('price', 'ocr_price'),
+}
+# ai_extracted_data'da yenilenen OCR alanları
+DATA_FIELDS = {
+    'barcode': 'barcode',
+    'material': 'material',
+    'extracted_brand': 'brand_name',
+    'ocr_product_type': 'product_type',
+    'ocr_size': 'size',
+    'ocr_price': 'price',
+}
+MISSING_VALUES = (None, '', 'Eksik')
+
+
+def _price(value: Any) -> Optional[float]:
+    if value in MISSING_VALUES:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _column_value(column: str, value: Any) -> Any:
+    if column == 'price':
+        return _price(value)
+    return None if value in MISSING_VALUES else value
+
+
+def product_changes(row: Dict[str, Any], info: Dict[str, Any]) -> Tuple[Dict[str, List[Any]], Dict[str, Any]]:
+    """
+    (sütun değişiklikleri {sütun: [eski, yeni]}, yeni ai_extracted_data).
+    Veri değişmediyse ai_extracted_data None döner.
+    """
+    data = row['ai_extracted_data'] if isinstance(row['ai_extracted_data'], dict) else {}
+    changes = {}
+    for column, (info_field, previous_key) in FIELD_MAP.items():
+        new = _column_value(column, info.get(info_field))
+        current = row[column]
+        if new is None or new == current:
+            continue
+        previous = _column_value(column, data.get(previous_key))
+        if current in MISSING_VALUES or (previous is not None and current == previous):
+            changes[column] = [current, new]
+
+    new_data = {key: info.get(field) for key, field in DATA_FIELDS.items()}
+    if any(data.get(key) != value for key, value in new_data.items()):
+        new_data = {**data, **new_data, 'confidence': info.get('confidence'), 'reextracted_at': datetime.utcnow().isoformat()}
+    else:
+        new_data = None
+    return changes, new_data
+
+
+class OCRReextractionService:
+    """Marka / tarih aralığı için toplu yeniden çıkarma - NDJSON satırları üretir"""
+
+    def __init__(self, page_size: int = 500, write_batch_size: int = 200):
+        self.page_size = max(1, page_size)
+        self.write_batch_size = max(1, write_batch_size)
+        self.stats = {'runs': 0, 'products': 0, 'changed': 0, 'written': 0, 'from_raw': 0, 'from_text': 0, 'skipped': 0}
+
+    # ------------------------------------------------------------------
+    # Okuma
+    # ------------------------------------------------------------------
+
+    def _load_page(
+        self,
+        after_id: int,
+        brand_id: Optional[int],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        user_id: int,
+        accessible_brand_ids: Optional[List[int]]
+    ) -> List[Dict[str, Any]]:
+        from database import SessionLocal
+        from models.product import Product
+
+        with SessionLocal() as db:
+            query = db.query(
+                Product.id, Product.product_type, Product.size_range, Product.price, Product.ai_extracted_data
+            ).filter(Product.id > after_id, Product.ai_extracted_data.isnot(None))
+            if brand_id is not None:
+                query = query.filter(Product.brand_id == brand_id)
+            if date_from is not None:
+                query = query.filter(Product.created_at >= date_from)
+            if date_to is not None:
+                query = query.filter(Product.created_at < date_to)
+            query = filter_accessible(query, user_id, accessible_brand_ids)
+            return [row._asdict() for row in query.order_by(Product.id).limit(self.page_size)]
+
+    def _resolve_texts(self, rows: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Optional[str], str]]:
+        """(satır, metin, kaynak) - kaynak: 'raw', 'text' ya da 'none'"""
+        hashes = [
+            row['ai_extracted_data'].get('content_hash') for row in rows
+            if isinstance(row['ai_extracted_data'], dict) and row['ai_extracted_data'].get('content_hash')
+        ]
+        raws = ocr_result_store.get_raw_many(hashes)
+        resolved = []
+        for row in rows:
+            data = row['ai_extracted_data'] if isinstance(row['ai_extracted_data'], dict) else {}
+            raw = raws.get(data.get('content_hash'))
+            if raw is not None:
+                resolved.append((row, raw.get('text'), 'raw'))
+            elif data.get('method') != 'filename_parsing' and product_text(data):
+                resolved.append((row, product_text(data), 'text'))
+            else:
+                resolved.append((row, None, 'none'))
+        return resolved
+
+    def _next_page(self, after_id: int, filters: Dict[str, Any]) -> List[Tuple[Dict[str, Any], Optional[str], str]]:
+        return self._resolve_texts(self._load_page(after_id, **filters))
+
+    async def _items(
+        self,
+        rows_by_id: Dict[int, Dict[str, Any]],
+        sources: Dict[str, int],
+        **filters: Any
+    ) -> AsyncIterator[BatchItem]:
+        loop = asyncio.get_running_loop()
+        after_id = 0
+        while True:
+            rows = await loop.run_in_executor(None, self._next_page, after_id, filters)
+            if not rows:
+                return
+            for row, text, source in rows:
+                sources[source] += 1
+                if text:
+                    rows_by_id[row['id']] = row
+                    yield row['id'], text, 'default'
+            after_id = rows[-1][0]['id']
+
+    # ------------------------------------------------------------------
+    # Yazma
+    # ------------------------------------------------------------------
+
+    def _write(self, updates: List[Dict[str, Any]]) -> int:
+        from database import SessionLocal
+        from models.product import Product
+
+        with SessionLocal() as db:
+            try:
+                db.bulk_update_mappings(Product, updates)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        return len(updates)
+
+    async def _flush(self, updates: List[Dict[str, Any]]) -> int:
+        if not updates:
+            return 0
+        written = await asyncio.get_running_loop().run_in_executor(None, self._write, list(updates))
+        updates.clear()
+        return written
+
+    # ------------------------------------------------------------------
+    # Çalıştırma
+    # ------------------------------------------------------------------
+
+    async def run(
+        self,
+        user_id: int,
+        accessible_brand_ids: Optional[List[int]],
+        brand_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        dry_run: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Değişen her ürün için {'product_id', 'changes', 'data_changed'} satırı,
+        en sonda özet ({'done': True, ...}). dry_run'da hiçbir şey yazılmaz.
+        """
+        started = time.monotonic()
+        rows_by_id: Dict[int, Dict[str, Any]] = {}
+        sources = {'raw': 0, 'text': 0, 'none': 0}
+        counts = {'products': 0, 'changed': 0, 'written': 0, 'errors': 0}
+        updates: List[Dict[str, Any]] = []
+        self.stats['runs'] += 1
+
+        items = self._items(
+            rows_by_id, sources,
+            brand_id=brand_id, date_from=date_from, date_to=date_to,
+            user_id=user_id, accessible_brand_ids=accessible_brand_ids
+        )
+        async for result in extraction_batch_service.stream('product', items):
+            if result.get('done'):
+                continue
+            row = rows_by_id.pop(result['id'], None)
+            counts['products'] += 1
+            if row is None or not result.get('success'):
+                counts['errors'] += 1
+                yield {'product_id': result['id'], 'error': result.get('error', 'Extraction failed')}
+                continue
+
+            changes, new_data = product_changes(row, result['product_info'])
+            if not changes and new_data is None:
+                continue
+            counts['changed'] += 1
+            yield {'product_id': row['id'], 'changes': changes, 'data_changed': new_data is not None}
+
+            if not dry_run:
+                update = {'id': row['id'], 'updated_at': datetime.utcnow()}
+                update.update({column: new for column, (_, new) in changes.items()})
+                if new_data is not None:
+                    update['ai_extracted_data'] = new_data
+                updates.append(update)
+                if len(updates) >= self.write_batch_size:
+                    counts['written'] += await self._flush(updates)
+        counts['written'] += await self._flush(updates)
+
+        elapsed = time.monotonic() - started
+        self.stats['products'] += counts['products']
+        self.stats['changed'] += counts['changed']
+        self.stats['written'] += counts['written']
+        self.stats['from_raw'] += sources['raw']
+        self.stats['from_text'] += sources['text']
+        self.stats['skipped'] += sources['none']
+        logger.info(
+            f"[REEXTRACT] {counts['products']} products, {counts['changed']} changed, "
+            f"{counts['written']} written in {elapsed:.1f}s (raw={sources['raw']}, text={sources['text']})"
+        )
+        yield {
+            'done': True,
+            **counts,
+            'dry_run': dry_run,
+            'sources': sources,
+            'elapsed_seconds': round(elapsed, 3),
+            'products_per_second': round(counts['products'] / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'page_size': self.page_size, 'write_batch_size': self.write_batch_size}
+
+
+# Global instance
+ocr_reextraction_service = OCRReextractionService(
+    page_size=settings.ocr.reextraction_page_size,
+    write_batch_size=settings.ocr.reextraction_write_batch_size
+)
@@ -0,0 +1,361 @@
+"""
+OCR Result Store
+İçerik hash'i ile adreslenen, sınırlı ve kalıcı OCR sonuç deposu
+
+Eskiden üç ayrı OCR cache'i vardı (upload manager, ultra fast servis ve
+Google AI servisi); anahtarları farklıydı (dosya adı / yol / MD5) ve
+hiçbiri sınırlı değildi. Artık tek depo:
+
+    - Anahtar: görsel içeriğinin MD5'i (staging checksum'ı ile aynı)
+    - Bellek katmanı: max_entries ile sınırlı LRU
+    - Disk katmanı: SQLite (WAL) - restart sonrası da geçerli, Redis gerekmez
+    - Aynı içerik için eşzamanlı istekler tek OCR çağrısında birleşir
+    - Hit / miss / eviction metrikleri
+    - Ham Vision yanıtı (metin + blok/satır geometrisi, zlib) ayrı tabloda,
+      TTL'siz: kurallar değişince ocr_reextraction API'ye gitmeden buradan okur
+
+Aynı etiket fotoğrafı tekrar yüklendiğinde OCR'a bir daha ödeme yapılmaz.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+from core.logging import get_logger
+
+logger = get_logger('ocr_result_store')
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def content_hash_of_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Dosya içeriğinin MD5'i (staging checksum'ı ile aynı algoritma)"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRResultStore:
+    """Bellek LRU + SQLite disk katmanı"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 5000, ttl_days: int = 180):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_days * 86400 if ttl_days else None
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Disk katmanı ilk kullanımda açılır (bkz. _db) - import dosya oluşturmaz
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._opened = False
+        self._open_lock = threading.Lock()
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'writes': 0,
+            'evictions': 0,
+            'disk_errors': 0,
+            'raw_writes': 0,
+            'raw_bytes': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Disk katmanı
+    # ------------------------------------------------------------------
+
+    @property
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self._opened:
+            with self._open_lock:
+                if not self._opened:
+                    if self.path:
+                        self._open_disk(self.path)
+                    self._opened = True
+        return self._conn
+
+    def _open_disk(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                " content_hash TEXT PRIMARY KEY,"
+                " result TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            # Etiket pHash'leri (yakın-kopya etiketler için, bkz. perceptual_hash)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_phashes ("
+                " content_hash TEXT PRIMARY KEY,"
+                " phash TEXT NOT NULL,"
+                " scope TEXT)"
+            )
+            # Ham yanıtlar (bkz. ocr_raw_response) - yeniden çıkarma kaynağı, TTL ile silinmez
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_raw_responses ("
+                " content_hash TEXT PRIMARY KEY,"
+                " raw BLOB NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            if self.ttl_seconds:
+                db.execute("DELETE FROM ocr_results WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+                db.execute(
+                    "DELETE FROM ocr_phashes WHERE content_hash NOT IN (SELECT content_hash FROM ocr_results)"
+                )
+            self._conn = db
+            logger.info(f"OCR result store opened: {path}")
+        except Exception as e:
+            logger.warning(f"OCR result store disk tier disabled ({path}): {e}")
+
+    def _disk_get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        if self._db is None:
+            return None
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT result, created_at FROM ocr_results WHERE content_hash = ?", (content_hash,)
+                ).fetchone()
+        except Exception as e:
+            self.stats['disk_errors'] += 1
+            logger.warning(f"OCR store read failed: {e}")
+            return None
+        if not row:
+            return None
+        if self.ttl_seconds and row[1] < time.time() - self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def _disk_put(self, content_hash: str, result: Dict[str, Any]):
+        if self._db is None:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ocr_results (content_hash, result, created_at) VALUES (?, ?, ?)",
+                    (content_hash, json.dumps(result, ensure_ascii=False), time.time())
+                )
+        except Exception as e:
+            self.stats['disk_errors'] += 1
+            logger.warning(f"OCR store write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Bellek katmanı
+    # ------------------------------------------------------------------
+
+    def _memory_put(self, content_hash: str, result: Dict[str, Any]):
+        with self._lock:
+            self._memory[content_hash] = result
+            self._memory.move_to_end(content_hash)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    # ------------------------------------------------------------------
+    # Genel API
+    # ------------------------------------------------------------------
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Bellek, sonra disk. Diskten gelen sonuç belleğe alınır."""
+        if not content_hash:
+            return None
+        with self._lock:
+            result = self._memory.get(content_hash)
+            if result is not None:
+                self._memory.move_to_end(content_hash)
+                self.stats['memory_hits'] += 1
+                return result
+
+        result = self._disk_get(content_hash)
+        if result is not None:
+            self.stats['disk_hits'] += 1
+            self._memory_put(content_hash, result)
+            return result
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, content_hash: str, result: Dict[str, Any]):
+        if not content_hash or result is None:
+            return
+        self._memory_put(content_hash, result)
+        self._disk_put(content_hash, result)
+        self.stats['writes'] += 1
+
+    async def get_or_compute(
+        self,
+        content_hash: str,
+        compute: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        should_store: Callable[[Dict[str, Any]], bool] = lambda result: True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cache'te yoksa compute() çalıştır ve sakla. Aynı içerik için eşzamanlı
+        istekler ilk isteğin sonucunu bekler (aynı etiket iki job'da = tek OCR).
+        Lider iptal edilirse (ör. istemci bağlantıyı kesti) bekleyenler iptali
+        devralmaz: içlerinden biri yeni lider olup compute()'u kendisi çalıştırır.
+        """
+        while True:
+            pending = self._inflight.get(content_hash)
+            if pending is None:
+                break
+            self.stats['coalesced'] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Liderin iptali mi, bu task'ın kendi iptali mi?
+                if not pending.cancelled() or self._current_task_cancelling():
+                    raise
+                # Lider iptal edildi - tekrar dene (sonuç cache'e yazılmış olabilir)
+
+        cached = self.get(content_hash)
+        if cached is not None:
+            return cached
+
+        future = asyncio.get_event_loop().create_future()
+        self._inflight[content_hash] = future
+        try:
+            result = await compute()
+            if result is not None and should_store(result):
+                self.put(content_hash, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Bekleyen yoksa "exception never retrieved" uyarısı çıkmasın
+                future.exception()
+            raise
+        finally:
+            if self._inflight.get(content_hash) is future:
+                del self._inflight[content_hash]
+
+    @staticmethod
+    def _current_task_cancelling() -> bool:
+        """Çalışan task'ın kendisi iptal istendi mi (Python 3.11+: cancelling())"""
+        task = asyncio.current_task()
+        cancelling = getattr(task, 'cancelling', None)
+        return bool(cancelling()) if cancelling else False
+
+    def put_phash(self, content_hash: str, phash: str, scope: Optional[str]):
+        if self._db is None:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ocr_phashes (content_hash, phash, scope) VALUES (?, ?, ?)",
+                    (content_hash, phash, scope)
+                )
+        except Exception as e:
+            self.stats['disk_errors'] += 1
+            logger.warning(f"OCR store phash write failed: {e}")
+
+    def iter_phashes(self) -> List[Tuple[str, str, Optional[str]]]:
+        """Sonucu hâlâ depoda olan etiketlerin (content_hash, phash, scope) listesi"""
+        if self._db is None:
+            return []
+        try:
+            with self._lock:
+                return self._db.execute(
+                    "SELECT p.content_hash, p.phash, p.scope FROM ocr_phashes p"
+                    " JOIN ocr_results r ON r.content_hash = p.content_hash"
+                ).fetchall()
+        except Exception as e:
+            self.stats['disk_errors'] += 1
+            logger.warning(f"OCR store phash read failed: {e}")
+            return []
+
+    def put_raw(self, content_hash: str, raw: Dict[str, Any]):
+        """Kompakt ham yanıtı sıkıştırarak sakla (disk katmanı yoksa saklanmaz)"""
+        if self._db is None:
+            return
+        try:
+            blob = zlib.compress(json.dumps(raw, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ocr_raw_responses (content_hash, raw, created_at) VALUES (?, ?, ?)",
+                    (content_hash, blob, time.time())
+                )
+            self.stats['raw_writes'] += 1
+            self.stats['raw_bytes'] += len(blob)
+        except Exception as e:
+            self.stats['disk_errors'] += 1
+            logger.warning(f"OCR store raw write failed: {e}")
+
+    def get_raw_many(self, content_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """content_hash -> kompakt ham yanıt (bulunmayanlar sonuçta yok)"""
+        if self._db is None or not content_hashes:
+            return {}
+        found = {}
+        try:
+            # SQLite değişken sınırı (999) altında kalan parçalar
+            for start in range(0, len(content_hashes), 500):
+                part = content_hashes[start:start + 500]
+                with self._lock:
+                    rows = self._db.execute(
+                        f"SELECT content_hash, raw FROM ocr_raw_responses WHERE content_hash IN ({','.join('?' * len(part))})",
+                        part
+                    ).fetchall()
+                for content_hash, blob in rows:
+                    found[content_hash] = json.loads(zlib.decompress(blob).decode('utf-8'))
+        except Exception as e:
+            self.stats['disk_errors'] += 1
+            logger.warning(f"OCR store raw read failed: {e}")
+        return found
+
+    def get_raw(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        return self.get_raw_many([content_hash]).get(content_hash)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+        disk_entries = raw_entries = None
+        if self._db is not None:
+            try:
+                with self._lock:
+                    disk_entries = self._db.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+                    raw_entries = self._db.execute("SELECT COUNT(*) FROM ocr_raw_responses").fetchone()[0]
+            except Exception:
+                pass
+        return {
+            **self.stats,
+            'memory_entries': len(self._memory),
+            'max_memory_entries': self.max_entries,
+            'disk_entries': disk_entries,
+            'raw_entries': raw_entries,
+            'avg_raw_bytes': round(self.stats['raw_bytes'] / self.stats['raw_writes']) if self.stats['raw_writes'] else None,
+            'disk_path': self.path if self._db is not None else None,
+            'hit_rate': round((lookups - self.stats['misses']) / lookups, 3) if lookups else 0.0
+        }
+
+
+def _resolve_path(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path)
+
+
+# Global instance
+ocr_result_store = OCRResultStore(
+    path=_resolve_path(settings.ocr.cache_path) if settings.ocr.cache_path else None,
+    max_entries=settings.ocr.cache_memory_entries,
+    ttl_days=settings.ocr.cache_ttl_days
+)
@@ -0,0 +1,352 @@
+"""
+Perceptual Hash Index
+Yeniden çekilen / yeniden export edilen görseller için yakın-kopya tespiti
+
+Aynı etiket ya da ürün fotoğrafı tekrar çekildiğinde ya da farklı ayarlarla
+export edildiğinde baytları (ve MD5'i) değişir ama görüntü aynıdır. İçerik
+hash'i bunları yakalayamaz; algısal hash (pHash) yakalar:
+
+    - 32x32 gri tonlamalı küçültme (JPEG'de draft mode ile ucuz decode)
+    - 2B DCT, sol üst 8x8 düşük frekans bloğu, medyana göre 64 bit
+    - İki görselin benzerliği = hash'lerin Hamming mesafesi
+
+Hamming yarıçapı sorguları BK-tree ile yapılır (tüm kayıtları taramak yerine
+üçgen eşitsizliğiyle dallar budanır):
+
+    - Etiketler: pHash -> OCR store içerik hash'i. Aynı (kod, renk) etiketinin
+      yakın-kopyası daha önce OCR'landıysa sonucu tekrar kullanılır.
+    - Ürün görselleri: pHash -> ((kod, renk, açı), CDN yolu). Aynı ürün, renk ve
+      açının yakın-kopya görseli zaten varsa CDN yüklemesi atlanır; görsel
+      kaydı yine yazılır, mevcut CDN yolunu kullanır ve duplicate_of_id ile
+      işaretlenir.
+
+Hash gri tonlamalıdır: aynı şekilde çekilmiş farklı renkler yakın-kopya
+görünür. Bu yüzden her iki indeks de (kod, renk) kapsamıyla sorgulanır; rengi
+bilinmeyen görsel için eşleşme yapılmaz. Beyaz fondaki farklı açı çekimleri de
+birbirine yakın düşebilir - ürün görselleri ayrıca açı numarasıyla kapsanır,
+açı numarası farklı (ya da bilinmeyen) görseller asla kopya sayılmaz.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from core.config import settings
+from core.logging import get_logger
+
+logger = get_logger('perceptual_hash')
+
+HASH_SIZE = 8
+SAMPLE_SIZE = HASH_SIZE * 4
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """DCT-II dönüşüm matrisi (ölçek medyan eşiğini değiştirmez)"""
+    k = np.arange(size)
+    return np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * size))
+
+
+DCT_MATRIX = _dct_matrix(SAMPLE_SIZE)
+
+
+def compute_phash(path: str) -> int:
+    """64 bit pHash (CPU işi - executor'da çağrılmalı)"""
+    with Image.open(path) as image:
+        # JPEG'i hedef boyuta yakın ölçekte decode et (tam çözünürlük gerekmez)
+        image.draft('L', (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2))
+        pixels = np.asarray(
+            image.convert('L').resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.Resampling.BILINEAR),
+            dtype=np.float64
+        )
+
+    low = (DCT_MATRIX @ pixels @ DCT_MATRIX.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    # DC bileşeni genel parlaklıktır, eşiği kaydırmasın
+    bits = low > np.median(low[1:])
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+
+def product_scope(code: Optional[str], color: Optional[str]) -> Optional[str]:
+    """Yakın-kopya kapsamı 'KOD|RENK' - kod ya da renk yoksa None (eşleşme yapılmaz)"""
+    if not code or not color or color.strip().upper() in ('', 'UNKNOWN'):
+        return None
+    return f"{code.upper()}|{color.strip().upper()}"
+
+
+def filename_scope(filename: str) -> Optional[str]:
+    """Dosya adındaki (kod, renk) bağımlılık anahtarından kapsam"""
+    from services.filename_parser import filename_parser
+    key = filename_parser.dependency_key(filename)
+    return product_scope(*key) if key else None
+
+
+def image_scope(code: Optional[str], color: Optional[str], angle_number: Optional[int]) -> Optional[str]:
+    """Ürün görseli kapsamı 'KOD|RENK|AÇI' - açı numarası yoksa None (eşleşme yapılmaz)"""
+    scope = product_scope(code, color)
+    if not scope or angle_number is None:
+        return None
+    return f"{scope}|{angle_number}"
+
+
+def filename_image_scope(filename: str) -> Optional[str]:
+    """Dosya adındaki (kod, renk, açı numarası) ile ürün görseli kapsamı"""
+    from services.filename_parser import filename_parser
+    parsed = filename_parser.parse(filename)
+    key = parsed.dependency_key
+    return image_scope(*key, parsed.angle_number) if key else None
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def to_hex(phash: int) -> str:
+    return format(phash, '016x')
+
+
+def from_hex(value: str) -> int:
+    return int(value, 16)
+
+
+class BKTree:
+    """Hamming mesafesi üzerinde BK-tree (düğüm: [hash, payload'lar, {mesafe: çocuk}])"""
+
+    def __init__(self):
+        self._root: Optional[list] = None
+        self.size = 0
+
+    def add(self, value: int, payload: Any):
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [payload], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(payload)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [payload], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, Any]]:
+        """radius içindeki (mesafe, payload) çiftleri, en yakın önce"""
+        if self._root is None:
+            return []
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                results.extend((distance, payload) for payload in node[1])
+            # Üçgen eşitsizliği: sadece |d - r| .. d + r aralığındaki dallar
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        results.sort(key=lambda result: result[0])
+        return results
+
+
+class PerceptualHashIndex:
+    """Etiket ve ürün görseli yakın-kopya indeksleri"""
+
+    def __init__(self, tag_radius: int = 4, duplicate_radius: int = 6, enabled: bool = True):
+        self.tag_radius = tag_radius
+        self.duplicate_radius = duplicate_radius
+        self.enabled = enabled
+
+        self.tags = BKTree()
+        self.images = BKTree()
+        self._tags_loaded = False
+        self._images_loaded = False
+        self._lock = threading.Lock()
+
+        self.stats = {'hashed': 0, 'hash_errors': 0, 'tag_reuses': 0, 'duplicates': 0}
+
+    def compute(self, path: str) -> Optional[int]:
+        """pHash ya da None (decode edilemeyen dosya akışı durdurmaz)"""
+        if not self.enabled:
+            return None
+        try:
+            phash = compute_phash(path)
+            self.stats['hashed'] += 1
+            return phash
+        except Exception as e:
+            self.stats['hash_errors'] += 1
+            logger.warning(f"[PHASH] Could not hash {path}: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # Etiketler -> OCR sonucu
+    # ------------------------------------------------------------------
+
+    def _load_tags(self):
+        if self._tags_loaded:
+            return
+        from services.ocr_result_store import ocr_result_store
+        with self._lock:
+            if self._tags_loaded:
+                return
+            for content_hash, phash_hex, scope in ocr_result_store.iter_phashes():
+                self.tags.add(from_hex(phash_hex), (content_hash, scope))
+            self._tags_loaded = True
+            logger.info(f"[PHASH] Loaded {self.tags.size} tag hashes")
+
+    def find_tag(self, phash: int, scope: Optional[str]) -> Optional[str]:
+        """Aynı kapsamdaki (kod|renk) en yakın etiketin içerik hash'i"""
+        if not scope:
+            return None
+        self._load_tags()
+        for distance, (content_hash, tag_scope) in self.tags.search(phash, self.tag_radius):
+            if tag_scope == scope:
+                return content_hash
+        return None
+
+    def add_tag(self, phash: int, content_hash: str, scope: Optional[str]):
+        if not scope:
+            return
+        from services.ocr_result_store import ocr_result_store
+        self._load_tags()
+        with self._lock:
+            self.tags.add(phash, (content_hash, scope))
+        ocr_result_store.put_phash(content_hash, to_hex(phash), scope)
+
+    # ------------------------------------------------------------------
+    # Ürün görselleri -> mevcut CDN kaydı
+    # ------------------------------------------------------------------
+
+    def _load_images(self, db):
+        if self._images_loaded:
+            return
+        from models.product import Product, ProductImage
+        from services.filename_parser import filename_parser
+        with self._lock:
+            if self._images_loaded:
+                return
+            # Sadece asıl görseller - işaretli kopyalar aynı CDN yolunu paylaşır
+            rows = (
+                db.query(
+                    ProductImage.phash, ProductImage.file_path, ProductImage.filename,
+                    ProductImage.angle_number, Product.code, Product.color
+                )
+                .join(Product, Product.id == ProductImage.product_id)
+                .filter(
+                    ProductImage.phash.isnot(None),
+                    ProductImage.image_type == 'product',
+                    ProductImage.duplicate_of_id.is_(None)
+                )
+                .yield_per(5000)
+            )
+            for phash_hex, file_path, filename, angle_number, code, color in rows:
+                if angle_number is None:
+                    angle_number = filename_parser.parse(filename).angle_number
+                scope = image_scope(code, color, angle_number)
+                if scope:
+                    self.images.add(from_hex(phash_hex), (scope, file_path))
+            self._images_loaded = True
+            logger.info(f"[PHASH] Loaded {self.images.size} product image hashes")
+
+    def find_duplicate_images(
+        self,
+        db,
+        items: Iterable[Tuple[Any, Optional[int], str]]
+    ) -> Dict[Any, Dict[str, Any]]:
+        """
+        (anahtar, pHash, kapsam) listesi için aynı ürün + renk + açının aktif
+        yakın-kopya görselleri (kapsam: image_scope). Silinmiş kayıtlar tek bir
+        IN sorgusuyla elenir.
+        """
+        if not self.enabled:
+            return {}
+        items = [(key, phash, scope) for key, phash, scope in items if phash is not None and scope]
+        if not items:
+            return {}
+        self._load_images(db)
+
+        candidates = {}
+        for key, phash, scope in items:
+            candidates[key] = [
+                (distance, file_path)
+                for distance, (candidate_scope, file_path) in self.images.search(phash, self.duplicate_radius)
+                if candidate_scope == scope
+            ]
+
+        paths = {file_path for matches in candidates.values() for _, file_path in matches}
+        if not paths:
+            return {}
+        from models.product import ProductImage
+        active = {
+            row.file_path: row.id
+            for row in db.query(ProductImage.id, ProductImage.file_path)
+            .filter(
+                ProductImage.file_path.in_(list(paths)),
+                ProductImage.is_active == True,
+                ProductImage.duplicate_of_id.is_(None)
+            )
+        }
+
+        duplicates = {}
+        for key, matches in candidates.items():
+            for distance, file_path in matches:
+                if file_path in active:
+                    duplicates[key] = {'image_id': active[file_path], 'file_path': file_path, 'distance': distance}
+                    break
+        self.stats['duplicates'] += len(duplicates)
+        return duplicates
+
+    def find_originals(self, db, cdn_urls: Dict[Any, Tuple[str, str]]) -> Dict[Any, int]:
+        """
+        Devam ettirilen dosyalar için: {anahtar: (dosya adı, günlükteki CDN yolu)}.
+        CDN yolu başka bir dosya adının asıl kaydına aitse o kayıt yakın-kopyanın
+        asılıdır (ilk çalıştırmada yükleme atlanmış). Tek IN sorgusu.
+        """
+        if not cdn_urls:
+            return {}
+        from models.product import ProductImage
+        owners = {}
+        for image_id, file_path, filename in (
+            db.query(ProductImage.id, ProductImage.file_path, ProductImage.filename)
+            .filter(
+                ProductImage.file_path.in_(list({url for _, url in cdn_urls.values()})),
+                ProductImage.duplicate_of_id.is_(None)
+            )
+            .order_by(ProductImage.id)
+        ):
+            owners.setdefault(file_path, []).append((filename, image_id))
+
+        originals = {}
+        for key, (filename, url) in cdn_urls.items():
+            rows = owners.get(url, [])
+            # Dosyanın kendi yüklemesiyse asıl kayıt kendisidir
+            if rows and not any(owner == filename for owner, _ in rows):
+                originals[key] = rows[0][1]
+        return originals
+
+    def add_image(self, phash: Optional[int], scope: Optional[str], file_path: str):
+        if phash is None or not scope:
+            return
+        with self._lock:
+            self.images.add(phash, (scope, file_path))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'tag_hashes': self.tags.size,
+            'image_hashes': self.images.size,
+            'tag_radius': self.tag_radius,
+            'duplicate_radius': self.duplicate_radius
+        }
+
+
+# Global instance
+perceptual_index = PerceptualHashIndex(
+    tag_radius=settings.upload.phash_tag_radius,
+    duplicate_radius=settings.upload.phash_duplicate_radius,
+    enabled=settings.upload.phash_enabled
+)
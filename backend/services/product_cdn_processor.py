@@ -4,18 +4,24 @@ Handles product file processing with Bunny CDN integration
 """
 
 import os
-import re
 import asyncio
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 
 from models.user import User
 from models.brand import Brand
 from models.product import Product, ProductImage
 from services.bunny_cdn_service import bunny_cdn_service
 from services.unified_ocr_service import UnifiedOCRService, ProductInfo
+from services.upload_staging import upload_staging_service
+from services.filename_parser import filename_parser
+from services.product_helpers import find_product_by_key
+from services.upload_journal import upload_journal
+from services.perceptual_hash import filename_scope, image_scope, perceptual_index, to_hex
+from services.keyword_matcher import brand_dictionary
 from core.logging import get_logger
 
 logger = get_logger('product_cdn_processor')
@@ -24,8 +30,8 @@ class ProductCDNProcessor:
     """Process product files with CDN integration"""
     
     def __init__(self):
+        # OCR sonuçları içerik hash'i ile ocr_result_store'da (UnifiedOCRService içinde)
         self.ocr_service = UnifiedOCRService()
-        self.ocr_cache: Dict[str, Any] = {}
         logger.info("Product CDN Processor initialized")
     
     async def process_single_file(
@@ -36,9 +42,9 @@ class ProductCDNProcessor:
     ) -> Dict[str, Any]:
         """Process single file and upload to CDN"""
         try:
-            # Read file content
-            file_content = await file.read()
-            filename = file.filename
+            # Staged file: content stays on disk, later stages use its path
+            staged = await upload_staging_service.ensure_staged(file)
+            filename = staged.filename
             
             logger.info(f"[CDN PROCESS] Processing file: {filename}")
             
@@ -61,31 +67,86 @@ class ProductCDNProcessor:
             # Check if this is a tag image (for OCR)
             is_tag_image = self._is_tag_image(filename)
             
+            # Restart sonrası tamamlanmış aşamalar günlükten okunur
+            journal_entry = upload_journal.get(staged)
+            
             # Process OCR if it's a tag image
             ocr_data = None
             if is_tag_image:
-                ocr_data = await self._process_ocr(file_content, filename, product_code)
+                if journal_entry and journal_entry.get('ocr_data'):
+                    ocr_data = journal_entry['ocr_data']
+                else:
+                    ocr_data = await self._process_ocr(staged.path, filename, staged.checksum, scope=filename_scope(filename))
+                    if ocr_data:
+                        await upload_journal.advance_async(staged, 'ocr_done', ocr_data=ocr_data)
                 if ocr_data:
                     # Update product with OCR data
                     self._update_product_from_ocr(product, ocr_data, db)
             
-            # Upload to CDN
-            upload_result = await self._upload_to_cdn(
-                file_content, filename, brand, current_user, product_code, color
-            )
-            
-            if not upload_result["success"]:
-                logger.error(f"[CDN PROCESS] Upload failed: {upload_result['error']}")
-                return upload_result
+            # Yakın-kopya ürün görseli (yeniden çekim / export): CDN yüklemesi atlanır,
+            # kayıt asıl görselin CDN yolu ile yazılır ve duplicate_of_id ile işaretlenir
+            phash = None
+            duplicate_of = None
+            upload_result = None
+            resumed_url = journal_entry.get('cdn_url') if journal_entry else None
+            if not is_tag_image:
+                phash = await asyncio.get_event_loop().run_in_executor(None, perceptual_index.compute, staged.path)
+                if resumed_url:
+                    duplicate_of = perceptual_index.find_originals(db, {filename: (filename, resumed_url)}).get(filename)
+                else:
+                    scope = image_scope(product.code, product.color, filename_parser.parse(filename).angle_number)
+                    duplicate = perceptual_index.find_duplicate_images(db, [(filename, phash, scope)]).get(filename)
+                    if duplicate:
+                        logger.info(
+                            f"[CDN PROCESS] {filename} duplicates image {duplicate['image_id']} "
+                            f"(distance {duplicate['distance']}), skipping upload"
+                        )
+                        duplicate_of = duplicate['image_id']
+                        upload_result = {
+                            "success": True,
+                            "cdn_url": duplicate['file_path'],
+                            "folder_path": '',
+                            "error": None
+                        }
+                        await upload_journal.advance_async(staged, 'cdn_uploaded', cdn_url=duplicate['file_path'], folder_path='')
+            
+            # Upload to CDN (yakın-kopya için upload_result zaten asıl görselin yolu)
+            if upload_result is None and resumed_url and upload_journal.has_reached(staged, 'cdn_uploaded'):
+                upload_result = {
+                    "success": True,
+                    "cdn_url": resumed_url,
+                    "folder_path": journal_entry['folder_path'],
+                    "error": None
+                }
+            if upload_result is None:
+                upload_result = await self._upload_to_cdn(
+                    staged.path, filename, brand, current_user, product_code, color
+                )
+                
+                if not upload_result["success"]:
+                    logger.error(f"[CDN PROCESS] Upload failed: {upload_result['error']}")
+                    return upload_result
+                
+                await upload_journal.advance_async(
+                    staged, 'cdn_uploaded',
+                    cdn_url=upload_result['cdn_url'], folder_path=upload_result['folder_path']
+                )
+                perceptual_index.add_image(
+                    phash,
+                    image_scope(product.code, product.color, filename_parser.parse(filename).angle_number),
+                    upload_result['cdn_url']
+                )
             
             # Save image record to database with transaction safety
             try:
                 image_record = self._create_image_record(
-                    product, filename, upload_result, is_tag_image, db
+                    product, filename, upload_result, is_tag_image, db, phash=phash, duplicate_of=duplicate_of
                 )
                 
                 # CRITICAL: Ensure transaction is committed immediately
                 db.commit()
+                if image_record:
+                    await upload_journal.advance_async(staged, 'db_written')
                 logger.info(f"[CDN PROCESS] Database record committed: {filename}")
                 
             except Exception as db_error:
@@ -104,16 +165,17 @@ class ProductCDNProcessor:
                 "cdn_url": upload_result["cdn_url"],
                 "folder_path": upload_result["folder_path"],
                 "image_id": image_record.id if image_record else None,
-                "ocr_data": ocr_data
+                "ocr_data": ocr_data,
+                "duplicate_of": duplicate_of
             }
             
         except Exception as e:
-            logger.error(f"[CDN PROCESS] Error processing {filename}: {e}")
+            logger.error(f"[CDN PROCESS] Error processing {file.filename}: {e}")
             return {"success": False, "error": str(e)}
     
     async def _upload_to_cdn(
         self, 
-        file_content: bytes, 
+        local_path: str, 
         filename: str, 
         brand: Brand, 
         user: User, 
@@ -128,9 +190,9 @@ class ProductCDNProcessor:
                 brand, user, upload_date, product_code, color
             )
             
-            # Upload file
-            success, cdn_url, error = await bunny_cdn_service.upload_file(
-                file_content, filename, folder_path
+            # Upload file (streamed from disk)
+            success, cdn_url, error = await bunny_cdn_service.upload_local_file(
+                local_path, filename, folder_path
             )
             
             return {
@@ -150,9 +212,11 @@ class ProductCDNProcessor:
         filename: str, 
         upload_result: Dict[str, Any], 
         is_tag_image: bool, 
-        db: Session
+        db: Session,
+        phash: Optional[int] = None,
+        duplicate_of: Optional[int] = None
     ) -> Optional[ProductImage]:
-        """Create ProductImage record with CDN URL"""
+        """Create ProductImage record with CDN URL (yakın-kopya ise asıl görsele işaretli)"""
         try:
             # Check if image already exists
             existing_image = db.query(ProductImage).filter(
@@ -163,6 +227,9 @@ class ProductCDNProcessor:
             if existing_image:
                 # Update existing record with CDN URL
                 existing_image.file_path = upload_result["cdn_url"]
+                if phash is not None:
+                    existing_image.phash = to_hex(phash)
+                existing_image.duplicate_of_id = duplicate_of
                 existing_image.updated_at = datetime.utcnow()
                 db.commit()
                 logger.info(f"[CDN DB] Updated existing image record: {filename}")
@@ -175,6 +242,9 @@ class ProductCDNProcessor:
                 original_filename=filename,
                 file_path=upload_result["cdn_url"],  # Store CDN URL
                 image_type='tag' if is_tag_image else 'product',
+                angle_number=filename_parser.parse(filename).angle_number,
+                phash=to_hex(phash) if phash is not None else None,
+                duplicate_of_id=duplicate_of,
                 is_active=True,
                 created_at=datetime.utcnow(),
                 updated_at=datetime.utcnow()
@@ -194,42 +264,30 @@ class ProductCDNProcessor:
     
     async def _process_ocr(
         self, 
-        file_content: bytes, 
+        image_path: str, 
         filename: str, 
-        product_code: str
+        content_hash: Optional[str] = None,
+        scope: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """Process OCR for tag images"""
         try:
-            # Check cache first
-            cache_key = f"{product_code}_ocr"
-            if cache_key in self.ocr_cache:
-                logger.info(f"[CDN OCR] Using cached OCR for: {product_code}")
-                return self.ocr_cache[cache_key]
-            
-            # Save temp file for OCR processing
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-                temp_file.write(file_content)
-                temp_path = temp_file.name
-            
-            try:
-                # Process with OCR
-                ocr_result = await self.ocr_service.process_single_image(temp_path)
+            # Aynı içerik (ya da aynı ürünün yakın-kopya etiketi) daha önce OCR'landıysa store'dan döner
+            ocr_result = await self.ocr_service.process_image(image_path, content_hash=content_hash, scope=scope)
+            
+            if ocr_result and ocr_result.text:
+                logger.info(f"[CDN OCR] Processed: {filename} ({ocr_result.method})")
+                return {
+                    'text': ocr_result.text,
+                    'confidence': ocr_result.confidence,
+                    'method': ocr_result.method,
+                    # Ham Vision yanıtının anahtarı - ocr_reextraction buradan okur
+                    'content_hash': ocr_result.metadata.get('content_hash'),
+                    'success': True
+                }
+            else:
+                logger.warning(f"[CDN OCR] No valid OCR result for: {filename}")
+                return None
                 
-                if ocr_result and ocr_result.get('success'):
-                    # Cache the result
-                    self.ocr_cache[cache_key] = ocr_result
-                    logger.info(f"[CDN OCR] Processed and cached: {filename}")
-                    return ocr_result
-                else:
-                    logger.warning(f"[CDN OCR] No valid OCR result for: {filename}")
-                    return None
-                    
-            finally:
-                # Clean up temp file
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                    
         except Exception as e:
             logger.error(f"[CDN OCR] Error processing {filename}: {e}")
             return None
@@ -344,6 +402,7 @@ class ProductCDNProcessor:
                     db.add(brand)
                     db.commit()
                     db.refresh(brand)
+                    brand_dictionary.invalidate()
                     return brand
             
             return None
@@ -362,13 +421,8 @@ class ProductCDNProcessor:
     ) -> Product:
         """Find existing product or create new one"""
         try:
-            # Try to find existing product
-            existing_product = db.query(Product).filter(
-                Product.code == product_code,
-                Product.color == color,
-                Product.brand_id == brand.id,
-                Product.is_active == True
-            ).first()
+            # Try to find existing product (pasif kayıt yeniden aktif edilir - unique anahtar is_active'i kapsamaz)
+            existing_product = find_product_by_key(db, product_code, color, brand.id)
             
             if existing_product:
                 logger.info(f"[CDN PRODUCT] Found existing product: {product_code} - {color}")
@@ -387,7 +441,15 @@ class ProductCDNProcessor:
             )
             
             db.add(product)
-            db.commit()
+            try:
+                db.commit()
+            except IntegrityError:
+                # Eşzamanlı job aynı ürünü ekledi - onun satırını kullan
+                db.rollback()
+                existing_product = find_product_by_key(db, product_code, color, brand.id)
+                if existing_product is None:
+                    raise
+                return existing_product
             db.refresh(product)
             
             logger.info(f"[CDN PRODUCT] Created new product: {product_code} - {color}")
@@ -400,65 +462,20 @@ class ProductCDNProcessor:
     
     def _extract_from_filename(self, filename: str) -> Tuple[str, str]:
         """Extract product code and color from filename"""
-        try:
-            # Remove file extension
-            name_without_ext = filename.rsplit('.', 1)[0]
-            
-            # Common patterns for product codes
-            patterns = [
-                r'^([A-Z]{2,4}-?\d{3,6}(?:[-\s]?[A-Z])?)',  # VV-6124-B, VV-6124 B
-                r'^([A-Z]{2,4}\d{3,6}(?:[A-Z])?)',          # VV6124B
-            ]
-            
-            product_code = None
-            for pattern in patterns:
-                match = re.search(pattern, name_without_ext.upper())
-                if match:
-                    product_code = match.group(1)
-                    # Normalize format: VV-6124 B -> VV-6124-B
-                    product_code = re.sub(r'([A-Z]{2,4}-?\d{3,6})\s+([A-Z])$', r'\1-\2', product_code)
-                    break
-            
-            if not product_code:
-                logger.warning(f"Could not extract product code from: {filename}")
-                return "", ""
-            
-            # Extract color (everything after product code)
-            color_part = name_without_ext[len(product_code):].strip()
-            
-            # Remove common separators and numbers
-            color_part = re.sub(r'^[-\s_]+', '', color_part)  # Remove leading separators
-            color_part = re.sub(r'\s*\d+\s*$', '', color_part)  # Remove trailing numbers
-            
-            # Default color if not found
-            if not color_part:
-                color_part = "Default"
-            
-            logger.info(f"[CDN EXTRACT] {filename} -> Code: {product_code}, Color: {color_part}")
-            return product_code, color_part
-            
-        except Exception as e:
-            logger.error(f"Filename extraction error for {filename}: {e}")
+        parsed = filename_parser.parse(filename)
+        if not parsed.code:
+            logger.warning(f"Could not extract product code from: {filename}")
             return "", ""
+        
+        # Default color if not found
+        color = parsed.color or "Default"
+        logger.info(f"[CDN EXTRACT] {filename} -> Code: {parsed.code}, Color: {color}")
+        return parsed.code, color
     
     def _is_tag_image(self, filename: str) -> bool:
         """Check if image is a tag image (for OCR processing)"""
-        try:
-            # Tag images typically don't have trailing numbers
-            name_without_ext = filename.rsplit('.', 1)[0]
-            
-            # Check if filename ends with numbers (like " 11.jpg", " 14.jpg")
-            has_trailing_numbers = bool(re.search(r'\s+\d+\s*$', name_without_ext))
-            
-            # Tag images don't have trailing numbers
-            is_tag = not has_trailing_numbers
-            
-            logger.debug(f"[CDN TAG] {filename} -> is_tag: {is_tag}")
-            return is_tag
-            
-        except Exception as e:
-            logger.error(f"Tag detection error for {filename}: {e}")
-            return False
+        # Tag images don't have trailing numbers like " 11.jpg", " 14.jpg"
+        return filename_parser.is_tag(filename)
     
     async def create_product_collage(
         self, 
@@ -526,7 +543,7 @@ class ProductCDNProcessor:
             import tempfile
             import asyncio
             import aiohttp
-            from services.professional_collage_maker import professional_collage_maker
+            from services.collage_render_farm import CollageRenderSpec, collage_render_farm
             
             # OPTIMIZATION 1: Async parallel download with connection pooling
             temp_image_paths = []
@@ -567,8 +584,8 @@ class ProductCDNProcessor:
             temp_output.close()
             
             try:
-                # Create collage
-                success = professional_collage_maker.create_professional_collage(
+                # Create collage (render farm - event loop bloklanmaz)
+                rendered = await collage_render_farm.render(CollageRenderSpec(
                     product_code=product.code,
                     color=product.color,
                     brand=product.brand.name if product.brand else "Unknown",
@@ -577,9 +594,9 @@ class ProductCDNProcessor:
                     price=product.price,
                     product_images=temp_image_paths,
                     output_path=temp_output.name
-                )
+                ))
                 
-                if not success:
+                if not rendered:
                     logger.error(f"[CDN COLLAGE] Failed to create collage")
                     return None
                 
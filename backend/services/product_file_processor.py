@@ -4,8 +4,6 @@ Tek dosya işleme mantığı
 """
 
 import os
-import shutil
-import tempfile
 import unicodedata
 from datetime import datetime
 from typing import Optional, Dict, Any
@@ -17,6 +15,8 @@ from models.product import Product, ProductImage
 from services.unified_ocr_service import ProductInfo
 from services.brand_permission_service import BrandPermissionService
 from services.image_optimizer import image_optimizer
+from services.upload_staging import upload_staging_service
+from services.filename_parser import filename_parser
 from core.logging import get_logger
 
 logger = get_logger('product_file_processor')
@@ -27,6 +27,8 @@ class ProductFileProcessor:
     def __init__(self, upload_manager):
         self.upload_manager = upload_manager
         self.dual_product_info = None
+        # Etiketin ham Vision yanıtı anahtarı (ai_extracted_data['content_hash'])
+        self.tag_content_hash = None
     
     async def process_single_file(
         self,
@@ -37,25 +39,24 @@ class ProductFileProcessor:
         """Process single file with proper directory structure"""
         original_filename = file.filename
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-            contents = await file.read()
-            tmp_file.write(contents)
-            tmp_path = tmp_file.name
+        # Staged file is read once during ingest; OCR and the final move use its path
+        staged = await upload_staging_service.ensure_staged(file)
+        staged_here = staged is not file
+        tmp_path = staged.path
         
         try:
             logger.info(f"[UPLOAD] Processing file: {original_filename}")
             
             # Determine if this is a tag image or product image
-            import re
-            filename_without_extension = original_filename.rsplit('.', 1)[0]
-            has_trailing_number = bool(re.search(r'\s+\d+\s*$', filename_without_extension))
-            is_tag_image = not has_trailing_number
+            parsed_filename = filename_parser.parse(original_filename)
+            is_tag_image = parsed_filename.is_tag
             
-            logger.info(f"[TAG DETECTION] {original_filename} -> Tag: {is_tag_image} (trailing_number: {has_trailing_number})")
+            logger.info(f"[TAG DETECTION] {original_filename} -> Tag: {is_tag_image} (angle: {parsed_filename.angle_number})")
             
             # Extract information from filename
             logger.info(f"[FILENAME EXTRACT] Extracting from filename: {original_filename}")
             filename_code, filename_color, filename_brand, self.dual_product_info = self.upload_manager._extract_from_filename(original_filename)
+            self.tag_content_hash = None
             
             logger.info(f"[FILENAME RESULT] Brand: {filename_brand}, Code: {filename_code}, Color: {filename_color}")
             
@@ -70,7 +71,7 @@ class ProductFileProcessor:
             
             # For tag images, run OCR
             if is_tag_image:
-                await self._process_tag_image(tmp_path, product_info)
+                await self._process_tag_image(tmp_path, product_info, content_hash=staged.checksum)
             else:
                 # For non-tag images, try to use cached OCR data from tag image
                 cache_key = f"{filename_code}_{filename_color}".upper()
@@ -135,8 +136,8 @@ class ProductFileProcessor:
             else:
                 product = await self._create_new_product(product_info, brand, current_user, db)
             
-            # Create directory structure and save file
-            await self._save_file_to_directory(file, product, current_user, db, tmp_path)
+            # Create directory structure and move staged file into place
+            await self._save_file_to_directory(staged, product, current_user, db, tmp_path)
             
             # Only save file to directory - collages will be created when product is complete
             # await self._create_templates_and_collages(product, current_user, db)
@@ -147,10 +148,11 @@ class ProductFileProcessor:
             logger.error(f"Single file processing error: {e}")
             raise
         finally:
-            if os.path.exists(tmp_path):
+            # Job staging dirs are cleaned by the upload manager; ad-hoc ones here
+            if staged_here and staged.exists and staged.path == tmp_path:
                 os.unlink(tmp_path)
     
-    async def _process_tag_image(self, tmp_path: str, product_info: ProductInfo):
+    async def _process_tag_image(self, tmp_path: str, product_info: ProductInfo, content_hash: Optional[str] = None):
         """Process tag image with OCR"""
         try:
             # CRITICAL FIX: For dual products, OCR will find the codes, so use filename initially
@@ -162,8 +164,9 @@ class ProductFileProcessor:
                 ocr_product_info = self.upload_manager.ocr_cache[cache_key]
             else:
                 logger.info(f"[OCR] Tag image detected, running OCR")
-                ocr_result = await self.upload_manager.ocr_service.process_image(tmp_path)
+                ocr_result = await self.upload_manager.ocr_service.process_image(tmp_path, content_hash=content_hash)
                 ocr_product_info = await self.upload_manager.ocr_service.extract_product_info(ocr_result)
+                self.tag_content_hash = ocr_result.metadata.get('content_hash')
                 
                 # Save to cache with actual OCR-extracted code
                 # CRITICAL FIX: Always use FILENAME product_code format for cache key
@@ -176,11 +179,11 @@ class ProductFileProcessor:
                 
                 if cache_product_code and cache_color:
                     real_cache_key = f"{cache_product_code}_{cache_color}".upper()
-                    self.upload_manager.ocr_cache[real_cache_key] = ocr_product_info
+                    self.upload_manager.remember_tag_ocr(real_cache_key, ocr_product_info)
                     logger.info(f"[OCR CACHED] Saved to cache: {real_cache_key}")
                 else:
                     # Fallback to original cache key for dual products
-                    self.upload_manager.ocr_cache[cache_key] = ocr_product_info
+                    self.upload_manager.remember_tag_ocr(cache_key, ocr_product_info)
                     logger.info(f"[OCR CACHED] Saved to cache (fallback): {cache_key}")
             
             logger.info(f"[OCR RESULT] Type: {ocr_product_info.product_type}, Size: {ocr_product_info.size}, Price: {ocr_product_info.price}")
@@ -396,6 +399,7 @@ class ProductFileProcessor:
                     "ocr_product_type": product_info.product_type,
                     "ocr_size": product_info.size,
                     "ocr_price": product_info.price,
+                    "content_hash": self.tag_content_hash,
                     "dual_product_info": self.dual_product_info
                 },
                 created_by=current_user.id,
@@ -420,7 +424,8 @@ class ProductFileProcessor:
                     "extracted_brand": product_info.brand_name,
                     "ocr_product_type": product_info.product_type,
                     "ocr_size": product_info.size,
-                    "ocr_price": product_info.price
+                    "ocr_price": product_info.price,
+                    "content_hash": self.tag_content_hash
                 },
                 created_by=current_user.id,
                 is_active=True,
@@ -456,7 +461,7 @@ class ProductFileProcessor:
         os.makedirs(product_dir, exist_ok=True)
         logger.info(f"[UNIFIED PATH] Saving to: {product_dir}")
         
-        # FAST MODE: Skip optimization for speed, just copy the file
+        # FAST MODE: Skip optimization for speed, just move the staged file
         permanent_path = os.path.join(product_dir, file.filename)
         try:
             # Check file size - only optimize if > 2MB
@@ -472,14 +477,15 @@ class ProductFileProcessor:
                            f"{optimize_result['optimized_size']/1024:.1f}KB "
                            f"({optimize_result['compression_ratio']:.1f}% saved)")
             else:
-                # Small file - just copy it (FAST!)
-                shutil.copy2(tmp_path, permanent_path)
-                logger.info(f"[IMAGE COPIED] {file.filename}: {file_size/1024:.1f}KB (no optimization needed)")
+                # Small file - rename into place (same filesystem, no copy)
+                upload_staging_service.move_to(file, permanent_path)
+                logger.info(f"[IMAGE MOVED] {file.filename}: {file_size/1024:.1f}KB (no optimization needed)")
             
         except Exception as e:
             logger.error(f"[OPTIMIZE ERROR] {file.filename}: {e}")
             # Fallback: Orijinal dosyayı kullan
-            shutil.copy2(tmp_path, permanent_path)
+            if os.path.exists(tmp_path):
+                upload_staging_service.move_to(file, permanent_path)
         
         # Check if this image already exists for this product
         existing_image = db.query(ProductImage).filter(
@@ -578,8 +584,8 @@ class ProductFileProcessor:
                 else:
                     logger.info(f"[TEMPLATE] Skipped - already exists for product {product.code}")
                 
-                # Create professional collage (örnek görsellere göre)
-                from services.professional_collage_maker import professional_collage_maker
+                # Create professional collage (örnek görsellere göre) - render farm'da, event loop dışında
+                from services.collage_render_farm import CollageRenderSpec, collage_render_farm
                 from services.telegram_service import TelegramService
                 from services.template_service import TemplateService
                 telegram_service = TelegramService()
@@ -641,7 +647,7 @@ class ProductFileProcessor:
                     logo = 'lilium'
                 
                 # Create professional collage (örnek görsellere göre)
-                if professional_collage_maker.create_professional_collage(
+                if await collage_render_farm.render(CollageRenderSpec(
                     product_code=product.code,
                     color=product.color,
                     brand=product.brand.name if product.brand else "",
@@ -659,7 +665,7 @@ class ProductFileProcessor:
                     # Badge and logo
                     badge=badge,
                     logo=logo
-                ):
+                )):
                     logger.info(f"[PROFESSIONAL COLLAGE] Created/Updated: {collage_filename}")
                     
                     # Save collage to product as an image
@@ -764,7 +770,7 @@ class ProductFileProcessor:
             collage_path = os.path.join(collage_dir, collage_filename)
             
             # Import services
-            from services.professional_collage_maker import professional_collage_maker
+            from services.collage_render_farm import CollageRenderSpec, collage_render_farm
             from services.telegram_service import TelegramService
             telegram_service = TelegramService()
             
@@ -808,8 +814,8 @@ class ProductFileProcessor:
             
             logo = "my8"  # Default
             
-            # Create collage
-            if professional_collage_maker.create_professional_collage(
+            # Create collage (render farm - event loop bloklanmaz)
+            if await collage_render_farm.render(CollageRenderSpec(
                 product_code=product.code,
                 color=product.color,
                 brand=product.brand.name if product.brand else "",
@@ -820,7 +826,7 @@ class ProductFileProcessor:
                 output_path=collage_path,
                 badge=badge,
                 logo=logo
-            ):
+            )):
                 logger.info(f"[COLLAGE] Created: {collage_filename}")
                 
                 # Save to product images
@@ -5,17 +5,57 @@ Yardımcı fonksiyonlar ve utility'ler
 
 import re
 import os
-from typing import Optional, Dict, Any
+from datetime import datetime
+from typing import Iterable, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, update
 
 from models.product import Product
 from models.brand import Brand
 from services.unified_ocr_service import UnifiedOCRService
+from services.filename_parser import filename_parser
 from core.logging import get_logger
 
 logger = get_logger('product_helpers')
 
+# Tek UPDATE'teki en fazla ürün ID'si
+REACTIVATE_CHUNK = 1000
+
+
+def reactivate_products(db: Session, product_ids: Iterable[int]) -> int:
+    """
+    Pasif (soft delete) ürünleri tekrar aktif et - commit etmez.
+    products unique anahtarı (code, color, brand_id) is_active'i kapsamaz: aynı
+    ürün yeniden yüklenince yeni satır değil mevcut pasif satır kullanılır.
+    """
+    product_ids = list(set(product_ids))
+    reactivated = 0
+    for i in range(0, len(product_ids), REACTIVATE_CHUNK):
+        reactivated += db.execute(
+            update(Product)
+            .where(Product.id.in_(product_ids[i:i + REACTIVATE_CHUNK]), Product.is_active == False)
+            .values(is_active=True, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    if reactivated:
+        logger.info(f"[PRODUCT] Reactivated {reactivated} soft-deleted products")
+    return reactivated
+
+
+def find_product_by_key(db: Session, code: str, color: str, brand_id: int) -> Optional[Product]:
+    """Upsert anahtarıyla ürün (pasif kayıt dahil); pasifse aktif edilip commit edilir"""
+    product = db.query(Product).filter(
+        Product.code == code,
+        Product.color == color,
+        Product.brand_id == brand_id
+    ).order_by(Product.id).first()
+    if product is not None and not product.is_active:
+        reactivate_products(db, [product.id])
+        db.commit()
+        db.refresh(product)
+    return product
+
+
 class ProductHelpers:
     """Helper functions for product operations"""
     
@@ -30,13 +70,8 @@ class ProductHelpers:
             logger.info(f"[DUPLICATE CHECK] No existing product found for: {code} - {color} (missing code or color)")
             return None
         
-        # Exact match first
-        exact_match = db.query(Product).filter(
-            Product.code == code,
-            Product.color == color,
-            Product.brand_id == brand_id,
-            Product.is_active == True
-        ).first()
+        # Exact match first (pasif kayıt yeniden aktif edilir - unique anahtar is_active'i kapsamaz)
+        exact_match = find_product_by_key(db, code, color, brand_id)
         
         if exact_match:
             logger.info(f"[DUPLICATE CHECK] Exact match found: {code} - {color} (ID: {exact_match.id})")
@@ -46,11 +81,14 @@ class ProductHelpers:
         fuzzy_match = db.query(Product).filter(
             func.lower(Product.code) == code.lower(),
             func.lower(Product.color) == color.lower(),
-            Product.brand_id == brand_id,
-            Product.is_active == True
-        ).first()
+            Product.brand_id == brand_id
+        ).order_by(Product.id).first()
         
         if fuzzy_match:
+            if not fuzzy_match.is_active:
+                reactivate_products(db, [fuzzy_match.id])
+                db.commit()
+                db.refresh(fuzzy_match)
             logger.info(f"[DUPLICATE CHECK] Fuzzy match found: {fuzzy_match.code} - {fuzzy_match.color} (ID: {fuzzy_match.id})")
             return fuzzy_match
         
@@ -229,63 +267,40 @@ class ProductHelpers:
             # Additional security: Remove path traversal attempts
             clean_filename = os.path.basename(clean_filename)
             
-            # Check for dual product patterns
-            dual_patterns = [
-                r'([A-Z0-9-]+\s+[A-Z\s]+?)\s*-\s*([A-Z0-9-]+\s+[A-Z\s]+?)$',  # "LL-2Z27 B BLACK - LL-2V28 B BLACK"
-                r'([A-Z0-9-]+)\s*-\s*([A-Z0-9-]+)',  # "KY-557 - SNL-11026 BROWN"
-                r'(.+?)\s*&\s*(.+?)$',  # "VV-6124 BLACK & VV-2590 BLACK"
-                r'(.+?)\s*\+\s*(.+?)$', # "VV-6124 BLACK + VV-2590 BLACK"
-            ]
-            
+            # Dual product detection and split come from the shared filename parser
+            dual_parts = filename_parser.parse(filename).dual_parts
             dual_product_info = None
-            is_dual = False
-            
-            for pattern in dual_patterns:
-                match = re.search(pattern, clean_filename)
-                if match:
-                    part1, part2 = match.groups()
-                    if len(part1.strip()) > 3 and len(part2.strip()) > 3:
-                        is_dual = True
-                        break
             
-            if is_dual:
+            if dual_parts:
                 # Extract dual product information
-                parts = re.split(r'\s*[-&+]\s*', clean_filename)
-                if len(parts) >= 2:
-                    # First product
-                    part1 = parts[0].strip()
-                    code1 = self.ocr_service._extract_product_code(part1)
-                    color1 = self.ocr_service._extract_color(part1)
-                    
-                    # Second product
-                    part2 = parts[1].strip()
-                    code2 = self.ocr_service._extract_product_code(part2)
-                    color2 = self.ocr_service._extract_color(part2)
-                    
-                    logger.info(f"[DUAL PRODUCT] Product 1: {code1} {color1}")
-                    logger.info(f"[DUAL PRODUCT] Product 2: {code2} {color2}")
-                    
-                    # Use first product as main
-                    main_code = code1
-                    main_color = color1
-                    
-                    # Store both product info for dual products
-                    dual_product_info = {
-                        'code_1': code1,
-                        'color_1': color1,
-                        'code_2': code2,
-                        'color_2': color2
-                    }
-                else:
-                    # Fallback to single product
-                    main_code = self.ocr_service._extract_product_code(clean_filename)
-                    main_color = self.ocr_service._extract_color(clean_filename)
-                    dual_product_info = None
+                part1, part2 = dual_parts
+                
+                # First product
+                code1 = self.ocr_service._extract_product_code(part1)
+                color1 = self.ocr_service._extract_color(part1)
+                
+                # Second product
+                code2 = self.ocr_service._extract_product_code(part2)
+                color2 = self.ocr_service._extract_color(part2)
+                
+                logger.info(f"[DUAL PRODUCT] Product 1: {code1} {color1}")
+                logger.info(f"[DUAL PRODUCT] Product 2: {code2} {color2}")
+                
+                # Use first product as main
+                main_code = code1
+                main_color = color1
+                
+                # Store both product info for dual products
+                dual_product_info = {
+                    'code_1': code1,
+                    'color_1': color1,
+                    'code_2': code2,
+                    'color_2': color2
+                }
             else:
                 # Single product extraction
                 main_code = self.ocr_service._extract_product_code(clean_filename)
                 main_color = self.ocr_service._extract_color(clean_filename)
-                dual_product_info = None
             
             # Extract brand (from full filename)
             main_brand = self.ocr_service._extract_brand(filename)
@@ -7,7 +7,6 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Dict, Any, Optional
 import os
-import re
 from datetime import datetime
 import asyncio
 
@@ -23,6 +22,15 @@ from services.bunny_cdn_service import bunny_cdn_service
 from services.product_cdn_processor import product_cdn_processor
 from services.smart_collage_service import smart_collage_service
 from services.ultra_fast_upload_service import ultra_fast_upload_service
+from services.upload_staging import upload_staging_service, StagedFile
+from services.upload_journal import upload_journal, lease_until, STAGE_RANK, WORKER_ID
+from services.upload_progress_bus import upload_progress_bus
+from services.upload_scheduler import UploadDependencyScheduler
+from services.upload_admission import upload_admission, AdmissionTicket
+from services.filename_parser import filename_parser
+from database.unit_of_work import SessionPool
+from core.config import settings
+from core.exceptions import BaseAppException, create_http_exception
 from core.logging import get_logger
 
 logger = get_logger('product_upload_manager')
@@ -41,8 +49,19 @@ class ProductUploadManager:
         self.uploads_dir = os.path.join(project_root, 'uploads')
         os.makedirs(self.uploads_dir, exist_ok=True)
         
-        # OCR cache to avoid processing same tags multiple times
+        # code_color -> etiket OCR'ından çıkan ProductInfo (aynı ürünün diğer görselleri için).
+        # Ham OCR sonuçları içerik hash'i ile ocr_result_store'da; bu sadece sınırlı bir ürün indeksi
         self.ocr_cache: Dict[str, Any] = {}
+        self.ocr_cache_max_entries = settings.ocr.cache_memory_entries
+        
+        # Dosya adı yardımcıları tek instance (her çağrıda OCR servisi/executor kurulmasın)
+        self._helpers = None
+        
+        # Bu process'in job'ları - lease'leri heartbeat ile uzatılır
+        self._active_jobs: set = set()
+        
+        # Her dosya task'ı kendi session'ını kullanır (request session'ı paylaşılmaz)
+        self.session_pool = SessionPool(settings.upload.db_session_pool_size)
         
         # Initialize OCR service
         try:
@@ -76,39 +95,216 @@ class ProductUploadManager:
                 from fastapi import HTTPException
                 raise HTTPException(status_code=400, detail="No files provided")
             
+            # ADMISSION: Kuyruk doluysa job/staging oluşturmadan 503 + Retry-After
+            upload_admission.check_capacity()
+            
             upload_job = self._create_upload_job(current_user, len(files), db)
             
-            # ULTRA FAST MODE: Direct processing for better performance
-            if use_ultra_fast and len(files) <= 500:  # Ultra fast for reasonable file counts
-                logger.info(f"[ULTRA FAST MODE] Processing {len(files)} files directly")
+            try:
+                # STREAMING INGEST: Parçaları istek içinde bir kez okuyup staging'e yaz.
+                # Background task'lar artık byte değil dosya yolu ile çalışır.
+                files = await upload_staging_service.stage_files(files, upload_job.id)
                 
-                background_tasks.add_task(
-                    self._process_ultra_fast_background,
-                    files, current_user, upload_job.id, db
+                return self.start_processing(
+                    files, current_user, upload_job, db, background_tasks, use_ultra_fast, force_admission=True
                 )
+            except Exception as e:
+                # Job commit edildi ama işleme başlamadı: yarım staging'i sil, job'ı pending bırakma
+                upload_staging_service.cleanup_job(upload_job.id)
+                self._fail_upload_job(upload_job, db, str(e))
+                raise
+            
+        except BaseAppException as e:
+            raise create_http_exception(e)
+        except Exception as e:
+            logger.error(f"Upload processing error: {e}")
+            from fastapi import HTTPException
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    def start_processing(
+        self,
+        files: List,
+        current_user: User,
+        upload_job: UploadJob,
+        db: Session,
+        background_tasks,
+        use_ultra_fast: bool = True,
+        force_admission: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Stage edilmiş dosyalar için işleme task'ını başlat (normal ve resumable upload).
+        Bütçe doluysa job kuyruğa girer; kuyruk da doluysa ServiceOverloadedError.
+        """
+        ticket = upload_admission.reserve(upload_job.id, files, force=force_admission)
+        
+        try:
+            upload_job.status = 'processing'
+            upload_job.total_files = len(files)
+            # Admission kuyruğunda beklerken de bu worker'ın - heartbeat lease'i uzatır
+            upload_job.lease_owner = WORKER_ID
+            upload_job.lease_expires_at = lease_until(settings.upload.resume_stale_seconds)
+            db.commit()
+            self._active_jobs.add(upload_job.id)
+            
+            # İlerleme yayını + aşama günlüğü (restart sonrası job bu noktadan devam edebilir)
+            upload_progress_bus.start(upload_job)
+            upload_journal.record_staged(upload_job.id, files)
+        except Exception:
+            upload_admission.release(ticket)
+            self._active_jobs.discard(upload_job.id)
+            raise
+        
+        mode = self._choose_mode(files, use_ultra_fast)
+        background_tasks.add_task(self._run_job, mode, files, current_user, upload_job.id, db, ticket)
+        
+        queue_position = upload_admission.position(ticket)
+        return {
+            'success': True,
+            'message': 'Upload sıraya alındı' if queue_position else 'Upload başlatıldı',
+            'job_id': upload_job.id,
+            'status': 'processing',
+            'mode': mode,
+            'queue_position': queue_position
+        }
+    
+    def _choose_mode(self, files: List, use_ultra_fast: bool = True) -> str:
+        """Ultra fast tüm dosyaları aynı anda işler - sadece dosya sayısı ve toplam boyut uygunsa"""
+        total_mb = sum(getattr(file, 'size', 0) or 0 for file in files) / 1024 / 1024
+        if (use_ultra_fast and len(files) <= settings.upload.ultra_fast_max_files
+                and total_mb <= settings.upload.ultra_fast_max_mb):
+            return 'ultra_fast'
+        return 'standard'
+    
+    async def _run_job(
+        self,
+        mode: str,
+        files: List,
+        current_user: User,
+        job_id: int,
+        db: Session,
+        ticket: AdmissionTicket
+    ):
+        """Bütçe payı alınınca job'u seçilen modda çalıştır"""
+        self._active_jobs.add(job_id)
+        try:
+            if not ticket.granted:
+                logger.info(f"[ADMISSION] Job {job_id} waiting for capacity (position {upload_admission.position(ticket)})")
+                await upload_admission.acquire(ticket)
+            
+            # ULTRA FAST MODE: Direct processing for better performance
+            if mode == 'ultra_fast':  # Ultra fast for reasonable file counts
+                logger.info(f"[ULTRA FAST MODE] Processing {len(files)} files directly")
+                await self._process_ultra_fast_background(files, current_user, job_id, db)
             else:
                 # Fallback to original method for very large uploads
                 logger.info(f"[STANDARD MODE] Processing {len(files)} files in background")
-                
-                background_tasks.add_task(
-                    self._process_files_background,
-                    files, current_user, upload_job.id, db
+                await self._process_files_background(files, current_user, job_id, db)
+        finally:
+            upload_admission.release(ticket)
+            self._active_jobs.discard(job_id)
+            upload_journal.forget(job_id)
+            snapshot = upload_progress_bus.get_snapshot(job_id)
+            if snapshot:
+                # Son durum yazılmadan çıkıldı - dinleyenleri bilgilendir
+                upload_progress_bus.finish(job_id, 'error', snapshot['processed_files'])
+    
+    async def resume_interrupted_jobs(self):
+        """
+        Restart/deploy sırasında yarım kalan job'ları aşama günlüğünden devam ettir.
+        Startup'ta başlar, bu process'in job lease'lerini uzatan heartbeat'i de
+        başlatır ve periyodik olarak lease'i dolmuş job'ları tarar.
+        """
+        stale_seconds = settings.upload.resume_stale_seconds
+        asyncio.create_task(self._heartbeat_leases(stale_seconds))
+        while True:
+            try:
+                for job_id in upload_journal.find_interrupted_jobs(stale_seconds):
+                    if job_id in self._active_jobs or not upload_journal.claim_job(job_id, stale_seconds):
+                        continue
+                    logger.info(f"[RESUME] Resuming interrupted upload job {job_id}")
+                    self._active_jobs.add(job_id)
+                    asyncio.create_task(self._resume_job(job_id))
+            except Exception as e:
+                logger.error(f"[RESUME] Interrupted job scan failed: {e}")
+            await asyncio.sleep(stale_seconds)
+    
+    async def _heartbeat_leases(self, lease_seconds: int):
+        """Çalışan / kuyrukta bekleyen job'ların lease'ini süresi dolmadan uzat"""
+        interval = max(1, lease_seconds // 4)
+        while True:
+            await asyncio.sleep(interval)
+            jobs = list(self._active_jobs)
+            try:
+                renewed = await asyncio.get_event_loop().run_in_executor(
+                    None, upload_journal.renew_leases, jobs, lease_seconds
                 )
+                if renewed < len(jobs):
+                    logger.debug(f"[RESUME] {len(jobs) - renewed} active jobs not renewed (finished or lease lost)")
+            except Exception as e:
+                logger.error(f"[RESUME] Lease heartbeat failed: {e}")
+    
+    async def _resume_job(self, job_id: int):
+        """Günlükteki staged dosyalardan job'u yeniden kur ve işlemeye devam et"""
+        from database import SessionLocal
+        
+        db = SessionLocal()
+        try:
+            job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
+            current_user = db.query(User).filter(User.id == job.uploader_id).first() if job else None
+            if not job or not current_user:
+                logger.error(f"[RESUME] Job {job_id} or its uploader no longer exists")
+                # Kalıcı hata - lease'i bırak; yazılamazsa staging sonraki devralma için kalır
+                if job and upload_journal.fail_job(job_id, 'Uploader not found on resume'):
+                    upload_staging_service.cleanup_job(job_id)
+                return
             
-            return {
-                'success': True,
-                'message': 'Upload başlatıldı',
-                'job_id': upload_job.id,
-                'status': 'processing',
-                'mode': 'ultra_fast' if use_ultra_fast and len(files) <= 500 else 'standard'
-            }
+            files = []
+            lost = 0
+            for entry in upload_journal.load(job_id).values():
+                if entry['stage'] == 'failed':
+                    continue
+                staged = StagedFile(
+                    filename=entry['filename'],
+                    path=entry['staged_path'],
+                    size=entry['size'] or 0,
+                    checksum=entry['checksum'],
+                    job_id=job_id
+                )
+                # CDN'e yüklenmiş dosyaların staging kopyasına artık ihtiyaç yok
+                if STAGE_RANK.get(entry['stage'], -1) < STAGE_RANK['cdn_uploaded'] and not staged.exists:
+                    await upload_journal.mark_failed_async(staged, 'Staged file lost before CDN upload')
+                    lost += 1
+                    continue
+                files.append(staged)
+            
+            logger.info(f"[RESUME] Job {job_id}: {len(files)} files to continue, {lost} lost")
+            
+            job.status = 'processing'
+            db.commit()
+            upload_progress_bus.start(job)
             
+            ticket = upload_admission.reserve(job_id, files, force=True)
+            await self._run_job(self._choose_mode(files), files, current_user, job_id, db, ticket)
         except Exception as e:
-            logger.error(f"Upload processing error: {e}")
-            from fastapi import HTTPException
-            raise HTTPException(status_code=500, detail=str(e))
+            logger.error(f"[RESUME] Job {job_id} resume failed: {e}")
+        finally:
+            # Heartbeat durur - başarısız devralma lease dolunca tekrar denenir
+            self._active_jobs.discard(job_id)
+            db.close()
     
-    def _create_upload_job(self, user: User, file_count: int, db: Session) -> UploadJob:
+    def _fail_upload_job(self, upload_job: UploadJob, db: Session, error: str):
+        """Başlatılamayan job'ı hata durumuna çek (hata orijinal exception'ı gizlemez)"""
+        try:
+            db.rollback()
+            upload_job.status = 'error'
+            upload_job.error_message = error[:500]
+            upload_job.completed_at = datetime.now()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to mark upload job {upload_job.id} as failed: {e}")
+    
+    def _create_upload_job(self, user: User, file_count: int, db: Session, status: str = 'processing') -> UploadJob:
         """Create upload job record"""
         brand = db.query(Brand).first()
         if not brand:
@@ -122,7 +318,7 @@ class ProductUploadManager:
             uploader_id=user.id,
             brand_manager_id=None,
             upload_date=datetime.now(),
-            status='processing',
+            status=status,
             total_files=file_count,
             processed_files=0,
             base_path=os.path.join(self.uploads_dir, brand.name, str(user.id), datetime.now().strftime('%d%m%Y'))
@@ -140,6 +336,7 @@ class ProductUploadManager:
         db: Session
     ):
         """Process files in background with parallel processing"""
+        keep_staging = False
         try:
             processed_count = 0
             failed_count = 0
@@ -149,104 +346,79 @@ class ProductUploadManager:
             
             # CRITICAL: Sort files to process tag images first (for OCR caching)
             # Tag images don't have trailing numbers like " 11.jpg", " 14.jpg", etc.
-            import re
-            def is_tag_image(file):
-                filename = file.filename.rsplit('.', 1)[0]
-                return not bool(re.search(r'\s+\d+\s*$', filename))
-            
-            tag_images = [f for f in files if is_tag_image(f)]
-            other_images = [f for f in files if not is_tag_image(f)]
+            tag_images, other_images = filename_parser.classify(files)
             sorted_files = tag_images + other_images
             
             logger.info(f"[BATCH UPLOAD] Processing {total_files} files ({len(tag_images)} tags first, then {len(other_images)} product images)")
             
             # IMMEDIATE PROGRESS: Update job with initial status (0% but with info)
-            job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
-            if job:
-                job.processing_log = {
-                    "total_files": total_files,
-                    "tag_images": len(tag_images),
-                    "product_images": len(other_images),
-                    "tags_processed": 0,
-                    "products_processed": 0,
-                    "failed_files": 0,
-                    "status": "Etiket görselleri analiz ediliyor..."
-                }
-                db.commit()
+            await self._update_job_progress_detailed(
+                job_id, 0, 0, len(tag_images), len(other_images), 0, 0, db,
+                "Etiket görselleri analiz ediliyor..."
+            )
             
-            # HIZLANDIRILDI: Batch size artırıldı
-            optimal_batch_size = 50 if total_files > 20 else batch_size
+            # DAG SCHEDULER: Etiket OCR'ları paralel, her ürün görseli sadece
+            # kendi (code, color) etiketinin sonucunu bekler
+            progress = {'tags': 0, 'products': 0}
+            progress_every = 50 if total_files > 20 else batch_size
             
-            for i in range(0, total_files, optimal_batch_size):
-                batch = sorted_files[i:i + optimal_batch_size]
-                logger.info(f"[BATCH {i//optimal_batch_size + 1}] Processing {len(batch)} files")
-                
-                # CRITICAL: Process TAG images first SEQUENTIALLY to populate cache
-                # Then process other images in parallel
-                batch_tags = [f for f in batch if is_tag_image(f)]
-                batch_others = [f for f in batch if not is_tag_image(f)]
+            # Ürün başına kalan dosya: son dosya commit edilince kolaj hemen tetiklenir
+            # (batch sonunu ya da scheduler yoklamasını beklemeden)
+            remaining_files: Dict[Any, int] = {}
+            for file in sorted_files:
+                key = self._dependency_key(file.filename)
+                if key is not None:
+                    remaining_files[key] = remaining_files.get(key, 0) + 1
+            product_ids: Dict[Any, int] = {}
+            signalled_products = set()
+            
+            async def on_complete(file, result, is_tag):
+                nonlocal processed_count, failed_count
+                if isinstance(result, Exception):
+                    failed_count += 1
+                    logger.error(f"File processing error: {result}")
+                else:
+                    processed_count += 1
                 
-                results = []
+                key = self._dependency_key(file.filename)
+                if key in remaining_files:
+                    if isinstance(result, dict) and result.get('success') and result.get('product_id'):
+                        product_ids[key] = result['product_id']
+                    remaining_files[key] -= 1
+                    if remaining_files[key] == 0 and key in product_ids:
+                        signalled_products.add(product_ids[key])
+                        await smart_collage_service.product_completed(product_ids[key])
                 
-                # Process TAG images first (sequentially for cache)
-                tags_in_batch = 0
-                for tag_file in batch_tags:
-                    logger.info(f"[TAG FIRST] Processing tag image: {tag_file.filename}")
-                    result = await self._process_single_file(tag_file, current_user, db)
-                    results.append(result)
-                    tags_in_batch += 1
-                    
-                    # Update progress after each tag (for real-time feedback)
-                    if not isinstance(result, Exception):
-                        processed_count += 1
-                    else:
-                        failed_count += 1
-                        logger.error(f"File processing error: {result}")
-                    
+                if is_tag:
+                    progress['tags'] += 1
                     await self._update_job_progress_detailed(
-                        job_id, processed_count, failed_count, 
-                        len(tag_images), len(other_images), 
-                        min(tags_in_batch, len(tag_images)), 
-                        0, db, 
-                        f"Etiket {tags_in_batch}/{len(tag_images)} okundu..."
+                        job_id, processed_count, failed_count,
+                        len(tag_images), len(other_images),
+                        progress['tags'], progress['products'], db,
+                        f"Etiket {progress['tags']}/{len(tag_images)} okundu..."
                     )
-                
-                # Then process other images (parallel but with database safety)
-                if batch_others:
-                    # OPTIMIZED: Reduce parallelism to prevent database lock issues
-                    semaphore = asyncio.Semaphore(10)  # REDUCED: 30 -> 10 for database safety
-                    async def process_with_semaphore(file):
-                        async with semaphore:
-                            try:
-                                result = await self._process_single_file(file, current_user, db)
-                                # Small delay to prevent database contention
-                                await asyncio.sleep(0.1)
-                                return result
-                            except Exception as e:
-                                logger.error(f"[PARALLEL PROCESS] Error with {file.filename}: {e}")
-                                return e
-                    
-                    other_tasks = [process_with_semaphore(file) for file in batch_others]
-                    other_results = await asyncio.gather(*other_tasks, return_exceptions=True)
-                    results.extend(other_results)
-                    
-                    # Count results
-                    for result in other_results:
-                        if isinstance(result, Exception):
-                            logger.error(f"File processing error: {result}")
-                            failed_count += 1
-                        else:
-                            processed_count += 1
-                
-                await self._update_job_progress_detailed(
-                    job_id, processed_count, failed_count,
-                    len(tag_images), len(other_images),
-                    len(tag_images),
-                    processed_count - len(tag_images),
-                    db,
-                    f"Ürün görselleri işleniyor... {processed_count}/{total_files}"
-                )
-                logger.info(f"[BATCH PROGRESS] {processed_count}/{total_files} completed, {failed_count} failed")
+                else:
+                    progress['products'] += 1
+                    await self._update_job_progress_detailed(
+                        job_id, processed_count, failed_count,
+                        len(tag_images), len(other_images),
+                        progress['tags'], progress['products'], db,
+                        f"Ürün görselleri işleniyor... {processed_count}/{total_files}"
+                    )
+                    if progress['products'] % progress_every == 0 or progress['products'] == len(other_images):
+                        logger.info(f"[BATCH PROGRESS] {processed_count}/{total_files} completed, {failed_count} failed")
+            
+            scheduler = UploadDependencyScheduler(
+                key_fn=self._dependency_key,
+                is_tag_fn=filename_parser.is_tag,
+                tag_concurrency=settings.ocr.parallel_workers,
+                product_concurrency=self.session_pool.max_sessions  # Task başına session - DB havuzu sınırlar
+            )
+            await scheduler.run(
+                sorted_files,
+                lambda file: self._process_single_file(file, current_user),
+                on_complete
+            )
             
             # CRITICAL: Ensure all database transactions are committed before collage creation
             try:
@@ -256,14 +428,20 @@ class ProductUploadManager:
                 logger.error(f"[UPLOAD COMPLETE] Database commit error: {e}")
                 db.rollback()
             
-            # After all files processed and committed, create collages for products
-            await self._create_collages_for_batch(sorted_files, current_user, db)
+            # Güvenlik ağı: tamamlanma sinyali gitmemiş ürünler (ör. dosya adından ürün çıkmadı)
+            await self._create_collages_for_batch(sorted_files, current_user, db, skip_product_ids=signalled_products)
+            await upload_journal.advance_many_async([(file, {}) for file in sorted_files], 'collage_scheduled', requires='db_written')
             
             self._update_upload_job(job_id, processed_count, failed_count, db)
             logger.info(f"[UPLOAD COMPLETE] Total: {total_files}, Success: {processed_count}, Failed: {failed_count}")
             
         except Exception as e:
             logger.error(f"Background processing error: {e}")
+            # Job 'processing'de kalıp lease'i tutmasın; yazılamazsa staging sonraki devralma için kalır
+            keep_staging = not upload_journal.fail_job(job_id, f"Background processing error: {e}")
+        finally:
+            if not keep_staging:
+                upload_staging_service.cleanup_job(job_id)
     
     async def _process_ultra_fast_background(
         self,
@@ -286,8 +464,11 @@ class ProductUploadManager:
                 
                 # Schedule collages (lazy)
                 await self._schedule_collages_ultra_fast(files, current_user, db)
+                await upload_journal.advance_many_async([(file, {}) for file in files], 'collage_scheduled', requires='db_written')
             else:
                 logger.error(f"[ULTRA FAST] Failed: {result}")
+            
+            upload_staging_service.cleanup_job(job_id)
                 
         except Exception as e:
             logger.error(f"[ULTRA FAST] Background error: {e}")
@@ -305,10 +486,9 @@ class ProductUploadManager:
         try:
             # Extract unique product codes
             product_codes = set()
-            for file in files:
-                product_code = ultra_fast_upload_service._extract_product_code(file.filename)
-                if product_code:
-                    product_codes.add(product_code)
+            for parsed in filename_parser.parse_many(file.filename for file in files).values():
+                if parsed.code:
+                    product_codes.add(parsed.code)
             
             # Schedule collages
             for product_code in product_codes:
@@ -318,34 +498,22 @@ class ProductUploadManager:
                 ).first()
                 
                 if product:
-                    await smart_collage_service.schedule_collage_creation(
-                        product.id, priority="normal"
-                    )
+                    # Ultra fast modda tüm dosyalar burada commit edilmiş olur - kolaj worker'ı hemen uyanır
+                    await smart_collage_service.product_completed(product.id)
                     logger.info(f"[ULTRA FAST COLLAGE] Scheduled {product_code}")
-            
-            # Process a few immediately
-            if product_codes:
-                await smart_collage_service.process_collage_queue(db, max_concurrent=2)
                 
         except Exception as e:
             logger.error(f"[ULTRA FAST COLLAGE] Error: {e}")
     
-    async def _create_collages_for_batch(self, files, current_user: User, db: Session):
-        """Create collages for all products in batch after all files are processed"""
+    async def _create_collages_for_batch(self, files, current_user: User, db: Session, skip_product_ids=()):
+        """Create collages for products in batch that were not signalled on completion"""
         try:
             # Get unique product codes from files
             product_codes = set()
-            for file in files:
-                filename = file.filename.rsplit('.', 1)[0]
-                # Extract product code from filename (including suffix like -B, -C)
-                import re
-                # Match patterns like VV-6124-B, VV-6124 B, or VV-6124
-                code_match = re.search(r'^([A-Z]{2,4}-?\d{3,6}(?:[-\s]?[A-Z])?)', filename, re.IGNORECASE)
-                if code_match:
-                    code = code_match.group(1).upper()
-                    # Normalize: VV-6124 B -> VV-6124-B
-                    code = re.sub(r'([A-Z]{2,4}-?\d{3,6})\s+([A-Z])$', r'\1-\2', code)
-                    product_codes.add(code)
+            for parsed in filename_parser.parse_many(file.filename for file in files).values():
+                # Product code including suffix like -B, -C (VV-6124 B -> VV-6124-B)
+                if parsed.code:
+                    product_codes.add(parsed.code)
             
             logger.info(f"[COLLAGE BATCH] Creating collages for {len(product_codes)} products")
             
@@ -359,7 +527,7 @@ class ProductUploadManager:
                     Product.is_active == True
                 ).first()
                 
-                if product:
+                if product and product.id not in skip_product_ids:
                     # CRITICAL: Verify product has sufficient images for collage
                     image_count = db.query(ProductImage).filter(
                         ProductImage.product_id == product.id,
@@ -368,21 +536,17 @@ class ProductUploadManager:
                     ).count()
                     
                     if image_count >= 2:
-                        # Schedule for lazy processing only if we have enough images
-                        await smart_collage_service.schedule_collage_creation(
-                            product.id, priority="normal"
-                        )
+                        # Schedule only if we have enough images - render workers are woken immediately
+                        await smart_collage_service.product_completed(product.id)
                         verified_products.append(product_code)
                         logger.info(f"[BATCH COLLAGE] Scheduled {product_code} ({image_count} images)")
                     else:
                         logger.info(f"[BATCH COLLAGE] Skipped {product_code} - insufficient images ({image_count})")
             
-            # Process verified collages (max 2 to not slow down upload)
             if verified_products:
-                logger.info(f"[BATCH COLLAGE] Processing {len(verified_products)} verified products")
-                await smart_collage_service.process_collage_queue(db, max_concurrent=2)
+                logger.info(f"[BATCH COLLAGE] Queued {len(verified_products)} verified products")
             else:
-                logger.info(f"[BATCH COLLAGE] No products ready for collage creation")
+                logger.info(f"[BATCH COLLAGE] No additional products queued for collage creation")
                 
         except Exception as e:
             logger.error(f"[COLLAGE BATCH] Error creating collages: {e}")
@@ -390,19 +554,17 @@ class ProductUploadManager:
     async def _process_single_file(
         self,
         file,
-        current_user: User,
-        db: Session
+        current_user: User
     ):
-        """Process single file with CDN integration"""
-        return await product_cdn_processor.process_single_file(file, current_user, db)
+        """Process single file with CDN integration (own unit of work)"""
+        async with self.session_pool.session() as task_db:
+            return await product_cdn_processor.process_single_file(file, current_user, task_db)
     
     async def _create_auto_template(self, product: Product, current_user: User, db: Session):
         """Ürün için otomatik şablon oluştur"""
         try:
             from models.template import Template
-            from services.product_helpers import ProductHelpers
-            
-            helpers = ProductHelpers()
+            helpers = self.helpers
             
             # Ürün analizi yap
             product_analysis = {
@@ -449,33 +611,41 @@ class ProductUploadManager:
     
     def _find_existing_product(self, db: Session, code: str, color: str, brand_id: int) -> Optional[Product]:
         """Enhanced duplicate product detection with fuzzy matching"""
-        from services.product_helpers import ProductHelpers
-        helpers = ProductHelpers()
-        return helpers.find_existing_product(db, code, color, brand_id)
+        return self.helpers.find_existing_product(db, code, color, brand_id)
+    
+    @property
+    def helpers(self):
+        if self._helpers is None:
+            from services.product_helpers import ProductHelpers
+            self._helpers = ProductHelpers()
+        return self._helpers
+    
+    def _dependency_key(self, filename: str) -> Optional[tuple]:
+        """(code, color) key linking product images to their tag image"""
+        return filename_parser.dependency_key(filename)
+    
+    def remember_tag_ocr(self, key: str, product_info: Any):
+        """Etiket OCR'ını code_color indeksine ekle (en eski kayıt düşer)"""
+        self.ocr_cache.pop(key, None)
+        self.ocr_cache[key] = product_info
+        while len(self.ocr_cache) > self.ocr_cache_max_entries:
+            self.ocr_cache.pop(next(iter(self.ocr_cache)))
     
     def _extract_from_filename(self, filename: str) -> tuple:
         """Enhanced filename extraction with better error handling and security"""
-        from services.product_helpers import ProductHelpers
-        helpers = ProductHelpers()
-        return helpers.extract_from_filename(filename)
+        return self.helpers.extract_from_filename(filename)
     
     def _is_safe_filename(self, filename: str) -> bool:
         """Check if filename is safe from security threats"""
-        from services.product_helpers import ProductHelpers
-        helpers = ProductHelpers()
-        return helpers.is_safe_filename(filename)
+        return self.helpers.is_safe_filename(filename)
     
     def _sanitize_path_component(self, component: str) -> str:
         """Sanitize a path component for safe directory/file names"""
-        from services.product_helpers import ProductHelpers
-        helpers = ProductHelpers()
-        return helpers.sanitize_path_component(component)
+        return self.helpers.sanitize_path_component(component)
     
     def _is_safe_path(self, path: str) -> bool:
         """Check if path is safe from directory traversal attacks"""
-        from services.product_helpers import ProductHelpers
-        helpers = ProductHelpers()
-        return helpers.is_safe_path(path)
+        return self.helpers.is_safe_path(path)
     
     async def _update_job_progress(
         self,
@@ -508,23 +678,18 @@ class ProductUploadManager:
         db: Session,
         status_message: str
     ):
-        """Update upload job progress with detailed information"""
+        """Update upload job progress with detailed information (bus + debounced DB write)"""
         try:
-            job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
-            if job:
-                job.processed_files = processed_count
-                job.processing_log = {
-                    "total_files": total_tags + total_products,
-                    "tag_images": total_tags,
-                    "product_images": total_products,
-                    "tags_processed": tags_processed,
-                    "products_processed": products_processed,
-                    "failed_files": failed_count,
-                    "status": status_message
-                }
-                job.status = 'processing'
-                db.commit()
-                logger.info(f"[PROGRESS] {status_message} - {processed_count}/{total_tags + total_products}")
+            upload_progress_bus.update_progress(job_id, processed_count, {
+                "total_files": total_tags + total_products,
+                "tag_images": total_tags,
+                "product_images": total_products,
+                "tags_processed": tags_processed,
+                "products_processed": products_processed,
+                "failed_files": failed_count,
+                "status": status_message
+            })
+            logger.debug(f"[PROGRESS] {status_message} - {processed_count}/{total_tags + total_products}")
         except Exception as e:
             logger.error(f"Progress update error: {e}")
 
@@ -537,11 +702,14 @@ class ProductUploadManager:
     ):
         """Update upload job status"""
         try:
+            status = 'completed' if failed_count == 0 else 'error'
+            upload_progress_bus.finish(job_id, status, processed_count, {"failed_files": failed_count})
+            
             job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
             if job:
                 job.processed_files = processed_count
                 job.processing_log = {"failed_files": failed_count}
-                job.status = 'completed' if failed_count == 0 else 'error'
+                job.status = status
                 job.completed_at = datetime.now()
                 if failed_count > 0:
                     job.error_message = f"{failed_count} files failed to process"
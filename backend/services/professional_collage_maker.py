@@ -4,12 +4,17 @@ Revize edilmiş profesyonel kolaj oluşturucu
 """
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 from core.logging import get_logger
+from services.collage_layout import CollageLayoutCompiler
+from services.image_resize import resize_cover, resize_fit
 
 logger = get_logger('professional_collage')
 
+# Kolajda kullanılan (boyut, kalın) font çiftleri - render worker'ları başlarken yüklenir
+FONT_SIZES = [(42, True), (20, True), (16, True), (32, True), (18, True), (10, False), (14, True)]
+
 class ProfessionalCollageMaker:
     """Profesyonel kolaj oluşturucu - revize edilmiş tasarım"""
     
@@ -17,6 +22,8 @@ class ProfessionalCollageMaker:
         self.width = 720
         self.height = 1280
         self.fonts = self._initialize_fonts()
+        # truetype() dosyayı her çağrıda yeniden açıp ayrıştırır - (boyut, kalın) başına bir kez
+        self._font_cache: Dict[Tuple[int, bool], ImageFont.FreeTypeFont] = {}
         
         # Renkler
         self.bg_color = (255, 255, 255)  # Beyaz
@@ -29,6 +36,9 @@ class ProfessionalCollageMaker:
         self.bottom_height = 110  # Alt bilgi (büyük logo ve fiyat kutuları için)
         self.padding = 5  # Kenar boşluğu (minimal)
         self.image_gap = 3  # Görseller arası boşluk (minimal)
+        
+        # Düzen planları, köşe maskeleri ve marka katmanları (process başına cache)
+        self.layouts = CollageLayoutCompiler(self)
     
     def _initialize_fonts(self):
         """Font'ları yükle"""
@@ -52,8 +62,21 @@ class ProfessionalCollageMaker:
             logger.error(f"[FONTS] Error: {e}")
             return {'regular': None, 'bold': None}
     
+    def warm_fonts(self):
+        """Kolajdaki tüm font boyutlarını önceden yükle (render worker başlangıcı)"""
+        for size, bold in FONT_SIZES:
+            self._get_font(size, bold)
+    
     def _get_font(self, size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
-        """Font al"""
+        """Font al (cache'li)"""
+        font = self._font_cache.get((size, bold))
+        if font is None:
+            font = self._load_font(size, bold)
+            self._font_cache[(size, bold)] = font
+        return font
+    
+    def _load_font(self, size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+        """Font dosyasını yükle"""
         try:
             font_type = 'bold' if bold else 'regular'
             font_path = self.fonts.get(font_type)
@@ -89,22 +112,22 @@ class ProfessionalCollageMaker:
             
             # Canvas
             canvas = Image.new('RGB', (self.width, self.height), self.bg_color)
-            draw = ImageDraw.Draw(canvas)
+            bottom_area_top = self.height - self.bottom_height
             
-            # 1. Üst Marka Başlığı (Ortalanmış, Kalın, Büyük) - KOMPAKT
-            self._draw_brand_header(canvas, draw, brand)
+            # 1. Marka katmanları (başlık + alt arka plan/logo) - marka başına bir kez çizilir
+            header_layer, bottom_layer = self.layouts.brand_layers(brand)
+            canvas.paste(header_layer, (0, 0))
+            canvas.paste(bottom_layer, (0, bottom_area_top))
+            draw = ImageDraw.Draw(canvas)
             
             # 2. Badge (varsa, sağ üst)
             if badge:
                 self._draw_badge(canvas, draw, badge)
             
             # 3. Ürün Görselleri - MAKSIMUM ALAN KULLAN
-            image_area_top = self.header_height
-            image_area_height = self.height - self.header_height - self.bottom_height
-            self._draw_product_images(canvas, product_images, image_area_top, image_area_height)
+            self._draw_product_images(canvas, product_images)
             
-            # 4. Alt Bilgi Alanı - KOMPAKT VE SIKIŞIK
-            bottom_area_top = self.height - self.bottom_height
+            # 4. Alt Bilgi Alanı - ürün bilgisi ve fiyat (dinamik kısım)
             self._draw_bottom_info(canvas, draw, bottom_area_top, 
                                    product_code, color, product_type, size_range, price,
                                    product_code_2, color_2, product_type_2, size_range_2, price_2, brand)
@@ -174,8 +197,8 @@ class ProfessionalCollageMaker:
         except Exception as e:
             logger.error(f"[BADGE] Error: {e}")
     
-    def _draw_product_images(self, canvas, images: List[str], top: int, height: int):
-        """Ürün görsellerini çiz - dosya adındaki en küçük sayı ana görsel"""
+    def _draw_product_images(self, canvas, images: List[str]):
+        """Ürün görsellerini derlenmiş düzene göre çiz - dosya adındaki en küçük sayı ana görsel"""
         try:
             if not images:
                 return
@@ -193,121 +216,38 @@ class ProfessionalCollageMaker:
             sorted_images = sorted(images, key=get_image_number)
             logger.info(f"[IMAGES] Sorted {len(sorted_images)} images by number")
             
-            if len(sorted_images) == 1:
-                # Tek görsel - tam boyut
-                self._draw_single_image(canvas, sorted_images[0], top, height)
-            elif len(sorted_images) == 2:
-                # 2 görsel - yan yana
-                self._draw_two_images(canvas, sorted_images, top, height)
-            else:
-                # 3+ görsel - büyük + küçükler
-                self._draw_multiple_images(canvas, sorted_images, top, height)
+            # 1: tek görsel tam alan, 2: yan yana, 3+: büyük + 2 küçük
+            layout = self.layouts.layout(len(sorted_images))
+            for slot, img_path in zip(layout.slots, sorted_images):
+                self._draw_slot_image(canvas, slot, img_path)
                 
         except Exception as e:
             logger.error(f"[IMAGES] Error: {e}")
     
-    def _draw_single_image(self, canvas, img_path: str, top: int, height: int):
-        """Tek görsel çiz - MAKSIMUM ALAN"""
+    def _draw_slot_image(self, canvas, slot, img_path: str):
+        """Görseli slota sığdır / doldur, cache'li köşe maskesiyle tuvale bas"""
         try:
             img = Image.open(img_path)
+            if slot.cover:
+                img_resized = self._resize_cover_fit(img, slot.width, slot.height)
+            else:
+                img_resized = self._resize_with_aspect(img, slot.width, slot.height)
+            if img_resized.mode != 'RGB':
+                img_resized = img_resized.convert('RGB')
             
-            # Boyutlandır - çok az padding
-            target_width = self.width - (self.padding * 2)
-            target_height = height - (self.padding * 2)
-            
-            img_resized = self._resize_with_aspect(img, target_width, target_height)
-            
-            # Ortala
-            x = (self.width - img_resized.width) // 2
-            y = top + (height - img_resized.height) // 2
-            
-            # Border radius ekle (küçük)
-            img_rounded = self._add_rounded_corners(img_resized, 8)
-            
-            canvas.paste(img_rounded, (x, y), img_rounded if img_rounded.mode == 'RGBA' else None)
+            mask = self.layouts.mask(img_resized.size, slot.radius)
+            canvas.paste(img_resized, slot.position(img_resized.size), mask)
             
         except Exception as e:
-            logger.error(f"[SINGLE IMAGE] Error: {e}")
+            logger.error(f"[IMAGE SLOT] {img_path}: {e}")
     
-    def _draw_two_images(self, canvas, images: List[str], top: int, height: int):
-        """2 görsel yan yana - KOMPAKT"""
-        try:
-            gap = 5  # Çok küçük aralık
-            img_width = (self.width - (self.padding * 2) - gap) // 2
-            img_height = height - (self.padding * 2)
-            
-            for i, img_path in enumerate(images[:2]):
-                img = Image.open(img_path)
-                img_resized = self._resize_with_aspect(img, img_width, img_height)
-                img_rounded = self._add_rounded_corners(img_resized, 6)
-                
-                x = self.padding + i * (img_width + gap)
-                y = top + (height - img_resized.height) // 2
-                
-                canvas.paste(img_rounded, (x, y), img_rounded if img_rounded.mode == 'RGBA' else None)
-                
-        except Exception as e:
-            logger.error(f"[TWO IMAGES] Error: {e}")
-    
-    def _draw_multiple_images(self, canvas, images: List[str], top: int, height: int):
-        """3+ görsel - sol büyük TAM YÜKSEKLİK, sağ 2 küçük TAM BİTİŞİK"""
-        try:
-            # Sol büyük görsel - %60 genişlik, TAM YÜKSEKLİK
-            left_width = int((self.width - (self.padding * 2) - self.image_gap) * 0.6)
-            left_height = height - (self.padding * 2)
-            
-            # Sağ küçük görseller - kalan genişlik, TAM YÜKSEKLİK / 2
-            right_width = self.width - left_width - (self.padding * 2) - self.image_gap
-            right_height = (left_height - self.image_gap) // 2
-            
-            # Sol büyük görsel - TAM YÜKSEKLİK, cover fit
-            main_img = Image.open(images[0])
-            main_resized = self._resize_cover_fit(main_img, left_width, left_height)
-            main_rounded = self._add_rounded_corners(main_resized, 8)
-            
-            main_x = self.padding
-            main_y = top + self.padding
-            canvas.paste(main_rounded, (main_x, main_y), main_rounded if main_rounded.mode == 'RGBA' else None)
-            
-            # Sağ üst görsel - TAM ÜSTE YASLANIR, cover fit
-            if len(images) > 1:
-                top_img = Image.open(images[1])
-                top_resized = self._resize_cover_fit(top_img, right_width, right_height)
-                top_rounded = self._add_rounded_corners(top_resized, 6)
-                
-                top_x = main_x + left_width + self.image_gap
-                top_y = top + self.padding
-                canvas.paste(top_rounded, (top_x, top_y), top_rounded if top_rounded.mode == 'RGBA' else None)
-            
-            # Sağ alt görsel - TAM ALTA YASLANIR, cover fit
-            if len(images) > 2:
-                bottom_img = Image.open(images[2])
-                bottom_resized = self._resize_cover_fit(bottom_img, right_width, right_height)
-                bottom_rounded = self._add_rounded_corners(bottom_resized, 6)
-                
-                bottom_x = main_x + left_width + self.image_gap
-                bottom_y = top_y + right_height + self.image_gap
-                canvas.paste(bottom_rounded, (bottom_x, bottom_y), bottom_rounded if bottom_rounded.mode == 'RGBA' else None)
-                    
-        except Exception as e:
-            logger.error(f"[MULTIPLE IMAGES] Error: {e}")
-    
-    def _draw_bottom_info(self, canvas, draw, top: int, 
-                           code: str, color: str, ptype: str, size: str, price: Optional[float],
-                           code2: Optional[str], color2: Optional[str], ptype2: Optional[str], 
-                           size2: Optional[str], price2: Optional[float], brand: str = ""):
-        """Alt bilgi alanı - ŞABLON ÖRNEKLERİNE GÖRE TAM UYUMLU"""
+    def _draw_bottom_background(self, canvas, draw, top: int, brand: str = ""):
+        """Alt alan arka planı ve marka logosu kutusu - markaya göre sabit (marka katmanı)"""
         try:
             # ARKA PLAN - Açık gri (örneklerdeki gibi)
-            draw.rectangle((0, top, self.width, self.height), fill=(245, 245, 245))
-            
-            # Font'lar
-            font_logo = self._get_font(20, bold=True)    # Sol logo için BÜYÜK
-            font_info = self._get_font(16, bold=True)     # Orta bilgiler için
-            font_price = self._get_font(32, bold=True)    # Sağ fiyat için BÜYÜK
+            draw.rectangle((0, top, self.width, top + self.bottom_height), fill=(245, 245, 245))
             
             padding = 12
-            y_center = top + (self.bottom_height // 2)
             
             # 1. SOL: MARKA LOGOSU (büyük yuvarlatılmış çerçeve - örneklerdeki gibi)
             # Marka adını kullan (sabit "DZYN Line" yerine)
@@ -324,10 +264,6 @@ class ProfessionalCollageMaker:
                 logo_text = "BRAND"
                 logo_subtext = ""
             
-            bbox_logo = draw.textbbox((0, 0), logo_text, font=font_logo)
-            logo_width = bbox_logo[2] - bbox_logo[0]
-            logo_height = bbox_logo[3] - bbox_logo[1]
-            
             # Logo kutusu - BÜYÜK (örneklerdeki gibi)
             box_size = 85  # Sabit boyut
             box_x1 = padding
@@ -360,6 +296,22 @@ class ProfessionalCollageMaker:
             
             draw.text((sub_x, sub_y), logo_subtext, font=sub_font, fill=(80, 80, 80))
             
+        except Exception as e:
+            logger.error(f"[BOTTOM BACKGROUND] Error: {e}")
+    
+    def _draw_bottom_info(self, canvas, draw, top: int, 
+                           code: str, color: str, ptype: str, size: str, price: Optional[float],
+                           code2: Optional[str], color2: Optional[str], ptype2: Optional[str], 
+                           size2: Optional[str], price2: Optional[float], brand: str = ""):
+        """Alt bilgi alanı - ürün bilgisi ve fiyat (arka plan ve logo marka katmanında)"""
+        try:
+            # Font'lar
+            font_info = self._get_font(16, bold=True)     # Orta bilgiler için
+            font_price = self._get_font(32, bold=True)    # Sağ fiyat için BÜYÜK
+            
+            padding = 12
+            y_center = top + (self.bottom_height // 2)
+            
             # 2. ORTA: ÜRÜN BİLGİLERİ (TİP:KOD RENK BEDEN formatında)
             # Örnek: "JACKET:4121 ECRU 36-42" veya "SET:AN-8980 B BLACK-WHITE 42-48"
             info_parts = []
@@ -434,65 +386,12 @@ class ProfessionalCollageMaker:
             logger.error(f"[BRAND LOGO] Error: {e}")
     
     def _resize_with_aspect(self, img: Image.Image, max_width: int, max_height: int) -> Image.Image:
-        """Aspect ratio koruyarak yeniden boyutlandır"""
-        img_ratio = img.width / img.height
-        target_ratio = max_width / max_height
-        
-        if img_ratio > target_ratio:
-            # Genişlik sınırlayıcı
-            new_width = max_width
-            new_height = int(max_width / img_ratio)
-        else:
-            # Yükseklik sınırlayıcı
-            new_height = max_height
-            new_width = int(max_height * img_ratio)
-        
-        return img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        """Aspect ratio koruyarak yeniden boyutlandır (JPEG draft + reduce + LANCZOS)"""
+        return resize_fit(img, (max_width, max_height))
     
     def _resize_cover_fit(self, img: Image.Image, target_width: int, target_height: int) -> Image.Image:
         """Görseli TAM DOLDUR (cover fit) - kenarlardan kırpılır ama tam dolar"""
-        img_ratio = img.width / img.height
-        target_ratio = target_width / target_height
-        
-        if img_ratio > target_ratio:
-            # Yüksekliğe göre ölçeklendir, genişlikten kırp
-            new_height = target_height
-            new_width = int(target_height * img_ratio)
-        else:
-            # Genişliğe göre ölçeklendir, yükseklikten kırp
-            new_width = target_width
-            new_height = int(target_width / img_ratio)
-        
-        img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # Merkezi kırp
-        left = (new_width - target_width) // 2
-        top = (new_height - target_height) // 2
-        right = left + target_width
-        bottom = top + target_height
-        
-        return img_resized.crop((left, top, right, bottom))
-    
-    def _add_rounded_corners(self, img: Image.Image, radius: int) -> Image.Image:
-        """Yuvarlatılmış köşeler ekle"""
-        try:
-            # Mask oluştur
-            mask = Image.new('L', img.size, 0)
-            draw = ImageDraw.Draw(mask)
-            draw.rounded_rectangle([(0, 0), img.size], radius, fill=255)
-            
-            # RGBA'ya çevir ve mask uygula
-            if img.mode != 'RGBA':
-                img = img.convert('RGBA')
-            
-            output = Image.new('RGBA', img.size, (255, 255, 255, 0))
-            output.paste(img, (0, 0))
-            output.putalpha(mask)
-            
-            return output
-            
-        except:
-            return img
+        return resize_cover(img, (target_width, target_height))
     
     def _draw_rounded_rectangle(self, draw, coords, radius: int, fill):
         """Yuvarlatılmış dikdörtgen çiz"""
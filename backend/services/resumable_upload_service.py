@@ -0,0 +1,350 @@
+"""
+Resumable Upload Service
+Parçalı (chunked), kaldığı yerden devam edebilen toplu ürün yükleme
+
+Protokol:
+    1. POST   /upload-sessions                         -> job + chunk_size
+    2. PUT    /upload-sessions/{job}/files/{i}/chunks/{n}  (X-Chunk-Checksum: md5)
+    3. GET    /upload-sessions/{job}                   -> alınan/eksik parçalar
+    4. POST   /upload-sessions/{job}/complete          -> doğrulama + işleme
+
+Parçalar dosya içindeki kendi offset'lerine yazılır, bu yüzden istemci
+birden fazla paralel hat (lane) açabilir. Alınan her parça için staging
+dizininde bir işaret dosyası tutulur; bu sayede durum birden fazla worker
+arasında ve yeniden başlatmalardan sonra da korunur.
+
+Durumlar: uploading -> finalizing -> processing. Tamamlama koşullu UPDATE ile
+'finalizing'e geçer; eşzamanlı iki /complete'ten sadece biri job'u başlatır.
+resumable_session_ttl_hours boyunca parça gelmeyen 'uploading' oturumları
+'expired' olur ve staging dosyaları silinir.
+"""
+
+import os
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Set
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models.upload_job import UploadJob
+from services.upload_staging import upload_staging_service, StagedFile
+from core.config import settings
+from core.exceptions import ValidationError
+from core.logging import get_logger
+
+logger = get_logger('resumable_upload')
+
+
+class ResumableUploadService:
+    """Parçalı upload oturumları - offset takibi UploadJob.file_list üzerinde"""
+
+    def __init__(self):
+        self.chunk_size = settings.upload.resumable_chunk_size_kb * 1024
+        self.session_ttl_seconds = settings.upload.resumable_session_ttl_hours * 3600
+
+    # ------------------------------------------------------------------
+    # Oturum
+    # ------------------------------------------------------------------
+
+    def validate_manifest(self, files: List[Any]):
+        """Dosya listesini upload limitlerine göre doğrula"""
+        limits = settings.get_upload_limits()
+        if len(files) > limits['max_file_count']:
+            raise ValidationError(f"Too many files: {len(files)}", details={'max_file_count': limits['max_file_count']})
+
+        max_size = limits['max_file_size_mb'] * 1024 * 1024
+        total_size = 0
+        for spec in files:
+            extension = spec.filename.rsplit('.', 1)[-1].lower() if '.' in spec.filename else ''
+            if extension not in limits['allowed_extensions']:
+                raise ValidationError(f"File type not allowed: {spec.filename}")
+            if spec.size > max_size:
+                raise ValidationError(f"File too large: {spec.filename}", details={'max_file_size_mb': limits['max_file_size_mb']})
+            total_size += spec.size
+
+        if total_size > limits['total_upload_size_mb'] * 1024 * 1024:
+            raise ValidationError("Total upload size exceeded", details={'total_upload_size_mb': limits['total_upload_size_mb']})
+
+    def init_session(self, job: UploadJob, files: List[Any], db: Session) -> Dict[str, Any]:
+        """Job için staging dizinini ve dosya manifestini hazırla"""
+        job_dir = upload_staging_service.get_job_dir(job.id)
+        os.makedirs(os.path.join(job_dir, '.chunks'), exist_ok=True)
+
+        manifest = []
+        for index, spec in enumerate(files):
+            path = upload_staging_service.get_staged_path(job.id, index, spec.filename)
+            # Boş dosyayı önceden oluştur; parçalar offset'lerine yazılır
+            with open(path, 'wb') as handle:
+                handle.truncate(spec.size)
+            manifest.append({
+                'index': index,
+                'filename': spec.filename,
+                'size': spec.size,
+                'checksum': spec.checksum.lower(),
+                'chunk_count': self._chunk_count(spec.size),
+                'path': path
+            })
+
+        job.file_list = manifest
+        job.processing_log = {'chunk_size': self.chunk_size, 'status': 'Dosyalar yükleniyor...'}
+        db.commit()
+
+        logger.info(f"[RESUMABLE] Session {job.id}: {len(manifest)} files, chunk_size={self.chunk_size}")
+        return self.get_status(job)
+
+    def _chunk_count(self, size: int) -> int:
+        return max(1, -(-size // self.chunk_size))
+
+    def max_chunk_bytes(self, job: UploadJob) -> int:
+        """Bu oturumda bir parça isteğinin gövdesi en fazla bu kadar olabilir"""
+        return self._get_chunk_size(job)
+
+    def _get_chunk_size(self, job: UploadJob) -> int:
+        # Oturum oluşturulduktan sonra ayar değişse bile oturumun parça boyutu geçerli
+        if isinstance(job.processing_log, dict) and job.processing_log.get('chunk_size'):
+            return int(job.processing_log['chunk_size'])
+        return self.chunk_size
+
+    def _get_file_entry(self, job: UploadJob, file_index: int) -> Dict[str, Any]:
+        manifest = job.file_list or []
+        if file_index < 0 or file_index >= len(manifest):
+            raise ValidationError(f"Unknown file index: {file_index}")
+        return manifest[file_index]
+
+    def _marker_dir(self, job_id, file_index: int) -> str:
+        return os.path.join(upload_staging_service.get_job_dir(job_id), '.chunks', str(file_index))
+
+    def _received_chunks(self, job_id, file_index: int) -> Set[int]:
+        marker_dir = self._marker_dir(job_id, file_index)
+        if not os.path.isdir(marker_dir):
+            return set()
+        return {int(name) for name in os.listdir(marker_dir) if name.isdigit()}
+
+    # ------------------------------------------------------------------
+    # Parçalar
+    # ------------------------------------------------------------------
+
+    async def write_chunk(
+        self,
+        job: UploadJob,
+        file_index: int,
+        chunk_index: int,
+        data: bytes,
+        checksum: str
+    ) -> Dict[str, Any]:
+        """Parçayı doğrula ve dosyadaki offset'ine yaz (idempotent)"""
+        entry = self._get_file_entry(job, file_index)
+        chunk_size = self._get_chunk_size(job)
+        chunk_count = max(1, -(-entry['size'] // chunk_size))
+
+        if chunk_index < 0 or chunk_index >= chunk_count:
+            raise ValidationError(f"Chunk index out of range: {chunk_index}", details={'chunk_count': chunk_count})
+
+        offset = chunk_index * chunk_size
+        expected_length = min(chunk_size, entry['size'] - offset)
+        if len(data) != expected_length:
+            raise ValidationError(
+                "Chunk length mismatch",
+                details={'expected': expected_length, 'received': len(data)}
+            )
+
+        if not checksum or hashlib.md5(data).hexdigest() != checksum.lower():
+            raise ValidationError("Chunk checksum mismatch", details={'file_index': file_index, 'chunk_index': chunk_index})
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write_at, entry['path'], offset, data)
+
+        # İşaret dosyası veriden SONRA yazılır: işaret varsa veri diskte demektir
+        marker_dir = self._marker_dir(job.id, file_index)
+        os.makedirs(marker_dir, exist_ok=True)
+        open(os.path.join(marker_dir, str(chunk_index)), 'w').close()
+
+        received = self._received_chunks(job.id, file_index)
+        return {
+            'file_index': file_index,
+            'chunk_index': chunk_index,
+            'received_chunks': len(received),
+            'chunk_count': chunk_count,
+            'committed_offset': self._committed_offset(received, entry['size'], chunk_size)
+        }
+
+    def _write_at(self, path: str, offset: int, data: bytes):
+        fd = os.open(path, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            if hasattr(os, 'pwrite'):
+                os.pwrite(fd, data, offset)
+            else:
+                os.lseek(fd, offset, os.SEEK_SET)
+                os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _committed_offset(self, received: Set[int], size: int, chunk_size: int) -> int:
+        """Baştan itibaren kesintisiz alınmış byte sayısı"""
+        contiguous = 0
+        while contiguous in received:
+            contiguous += 1
+        return min(contiguous * chunk_size, size)
+
+    # ------------------------------------------------------------------
+    # Durum / tamamlama
+    # ------------------------------------------------------------------
+
+    def get_status(self, job: UploadJob) -> Dict[str, Any]:
+        """Kaldığı yerden devam için dosya bazında alınan/eksik parçalar"""
+        chunk_size = self._get_chunk_size(job)
+        files = []
+        received_bytes = 0
+        total_bytes = 0
+
+        for entry in job.file_list or []:
+            chunk_count = max(1, -(-entry['size'] // chunk_size))
+            received = self._received_chunks(job.id, entry['index'])
+            missing = [i for i in range(chunk_count) if i not in received]
+            file_received = sum(
+                min(chunk_size, entry['size'] - i * chunk_size) for i in received if i < chunk_count
+            )
+            received_bytes += file_received
+            total_bytes += entry['size']
+            files.append({
+                'index': entry['index'],
+                'filename': entry['filename'],
+                'size': entry['size'],
+                'chunk_count': chunk_count,
+                'received_chunks': len(received),
+                'committed_offset': self._committed_offset(received, entry['size'], chunk_size),
+                'missing_chunks': missing,
+                'complete': not missing
+            })
+
+        return {
+            'job_id': job.id,
+            'status': job.status,
+            'chunk_size': chunk_size,
+            'total_bytes': total_bytes,
+            'received_bytes': received_bytes,
+            'files': files
+        }
+
+    def _transition(self, job: UploadJob, db: Session, from_status: str, to_status: str) -> bool:
+        """Koşullu durum geçişi - başka bir istek önce geçirdiyse False"""
+        changed = db.execute(
+            update(UploadJob)
+            .where(UploadJob.id == job.id, UploadJob.status == from_status)
+            .values(status=to_status)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        db.refresh(job)
+        return changed == 1
+
+    def begin_completion(self, job: UploadJob, db: Session) -> bool:
+        """uploading -> finalizing; eşzamanlı ikinci /complete False alır"""
+        return self._transition(job, db, 'uploading', 'finalizing')
+
+    def abort_completion(self, job: UploadJob, db: Session):
+        """Doğrulama başarısız - istemci eksik/bozuk parçaları tekrar gönderebilsin"""
+        self._transition(job, db, 'finalizing', 'uploading')
+
+    async def finalize(self, job: UploadJob) -> List[StagedFile]:
+        """Tüm parçaların geldiğini ve dosya checksum'larını doğrula"""
+        status = self.get_status(job)
+        incomplete = [f['filename'] for f in status['files'] if not f['complete']]
+        if incomplete:
+            raise ValidationError("Upload incomplete", details={'incomplete_files': incomplete[:50]})
+
+        loop = asyncio.get_event_loop()
+        staged_files = []
+        mismatched = []
+        for entry in job.file_list or []:
+            checksum = await loop.run_in_executor(None, self._file_md5, entry['path'])
+            if checksum != entry['checksum']:
+                mismatched.append(entry['filename'])
+                continue
+            staged_files.append(StagedFile(
+                filename=entry['filename'],
+                path=entry['path'],
+                size=entry['size'],
+                checksum=checksum,
+                job_id=job.id
+            ))
+
+        if mismatched:
+            # Bozuk dosyaların işaretlerini sil ki istemci sadece onları tekrar göndersin
+            for entry in job.file_list or []:
+                if entry['filename'] in mismatched:
+                    marker_dir = self._marker_dir(job.id, entry['index'])
+                    for name in os.listdir(marker_dir) if os.path.isdir(marker_dir) else []:
+                        os.unlink(os.path.join(marker_dir, name))
+            raise ValidationError("File checksum mismatch", details={'mismatched_files': mismatched[:50]})
+
+        logger.info(f"[RESUMABLE] Session {job.id} verified: {len(staged_files)} files")
+        return staged_files
+
+    # ------------------------------------------------------------------
+    # Terk edilmiş oturumlar
+    # ------------------------------------------------------------------
+
+    def _last_activity(self, job: UploadJob) -> float:
+        """Son parça zamanı (işaret dizinlerinin mtime'ı), parça yoksa oluşturulma"""
+        latest = job.created_at.replace(tzinfo=timezone.utc).timestamp() if job.created_at else 0.0
+        chunks_dir = os.path.join(upload_staging_service.get_job_dir(job.id), '.chunks')
+        try:
+            latest = max(latest, os.path.getmtime(chunks_dir))
+            for entry in os.scandir(chunks_dir):
+                latest = max(latest, entry.stat().st_mtime)
+        except OSError:
+            pass
+        return latest
+
+    def expire_stale_sessions(self, db: Session) -> int:
+        """TTL süresince parça gelmeyen 'uploading' oturumlarını expire et, staging'i sil"""
+        cutoff = time.time() - self.session_ttl_seconds
+        # Parça gelmiş olsa bile TTL'den yeni oluşturulan oturum aday değil
+        created_before = datetime.utcnow() - timedelta(seconds=self.session_ttl_seconds)
+        candidates = db.query(UploadJob).filter(
+            UploadJob.status == 'uploading',
+            UploadJob.created_at < created_before
+        ).all()
+
+        expired = 0
+        for job in candidates:
+            if self._last_activity(job) >= cutoff:
+                continue
+            if not self._transition(job, db, 'uploading', 'expired'):
+                continue
+            job.error_message = 'Upload session expired'
+            db.commit()
+            upload_staging_service.cleanup_job(job.id)
+            expired += 1
+        if expired:
+            logger.info(f"[RESUMABLE] Expired {expired} abandoned upload sessions")
+        return expired
+
+    async def sweep_expired_sessions(self):
+        """Terk edilmiş oturumları periyodik olarak temizle (startup'ta başlar)"""
+        from database import SessionLocal
+
+        interval = max(60, min(3600, self.session_ttl_seconds // 4))
+        while True:
+            try:
+                with SessionLocal() as db:
+                    self.expire_stale_sessions(db)
+            except Exception as e:
+                logger.error(f"[RESUMABLE] Session sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    def _file_md5(self, path: str) -> str:
+        digest = hashlib.md5()
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(upload_staging_service.chunk_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+# Global instance
+resumable_upload_service = ResumableUploadService()
@@ -5,6 +5,8 @@ Lazy loading ve cache stratejileri ile hızlı kolaj yönetimi
 
 import os
 import asyncio
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
@@ -13,17 +15,26 @@ from sqlalchemy import func
 from models.product import Product, ProductImage
 from models.user import User
 from services.bunny_cdn_service import bunny_cdn_service
+from services.collage_queue import CollageQueueItem, create_collage_queue
+from core.exceptions import ExternalServiceError
 from core.logging import get_logger
 
 logger = get_logger('smart_collage_service')
 
+# Tamamlanma sinyali bekleyen ürün sayısı sınırı (ack gelmeyenler için)
+MAX_PENDING_SIGNALS = 10000
+
 class SmartCollageService:
     """Akıllı kolaj servisi - performans odaklı"""
     
     def __init__(self):
-        self.collage_queue = []  # Kolaj kuyruğu
-        self.processing_products = set()  # İşlenmekte olan ürünler
+        self.collage_queue = create_collage_queue()  # Kalıcı, tekilleştiren öncelik kuyruğu
+        self.processing_products = set()  # Bu process'te işlenmekte olan ürünler
+        self._wakeup: Optional[asyncio.Event] = None  # Yeni öğe geldi - boşaltan worker'ları uyandır
         self.collage_cache = {}  # Kolaj cache'i
+        # Ürün tamamlandı sinyali -> kolaj hazır süresi (time-to-collage)
+        self._signalled_at: "OrderedDict[int, float]" = OrderedDict()
+        self._time_to_collage = deque(maxlen=500)
         logger.info("Smart Collage Service initialized")
     
     async def schedule_collage_creation(
@@ -36,88 +47,114 @@ class SmartCollageService:
         priority: "immediate", "normal", "low"
         """
         try:
-            if product_id in self.processing_products:
-                logger.info(f"[SMART COLLAGE] Product {product_id} already in queue")
-                return True
-            
-            # Kuyruğa ekle
-            queue_item = {
-                'product_id': product_id,
-                'priority': priority,
-                'scheduled_at': datetime.now(),
-                'attempts': 0
-            }
-            
-            # Öncelik sırasına göre ekle
-            if priority == "immediate":
-                self.collage_queue.insert(0, queue_item)
-            else:
-                self.collage_queue.append(queue_item)
-            
-            logger.info(f"[SMART COLLAGE] Scheduled product {product_id} with priority {priority}")
+            outcome = await self._queue_call(self.collage_queue.enqueue, product_id, priority)
+            self._get_wakeup().set()
+            logger.info(f"[SMART COLLAGE] Product {product_id} ({priority}): {outcome}")
             return True
             
         except Exception as e:
             logger.error(f"[SMART COLLAGE] Error scheduling collage: {e}")
             return False
     
+    async def product_completed(self, product_id: int, priority: str = "normal", refresh: bool = False) -> bool:
+        """
+        Ürün tamamlandı (son gerekli görsel commit edildi ya da eksik bilgiler
+        girildi): kuyruğa ekle ve boştaki render worker'ını hemen uyandır.
+        refresh=True ise bu ürünün cache'teki kolajı geçersiz sayılır.
+        """
+        if refresh:
+            self.invalidate_product(product_id)
+        if product_id not in self._signalled_at:
+            self._signalled_at[product_id] = time.monotonic()
+            while len(self._signalled_at) > MAX_PENDING_SIGNALS:
+                self._signalled_at.popitem(last=False)
+        return await self.schedule_collage_creation(product_id, priority=priority)
+    
+    def invalidate_product(self, product_id: int):
+        """Ürünün cache'teki kolajını at (bilgileri değişti - yeniden render edilmeli)"""
+        for key in [key for key, data in self.collage_cache.items() if data.get('product_id') == product_id]:
+            del self.collage_cache[key]
+    
+    async def _queue_call(self, operation, *args):
+        """
+        Kuyruk işlemini thread'de çalıştır: SQLite BEGIN IMMEDIATE kilit
+        beklemesi (timeout=5) ve Redis round trip'leri event loop'u bloklamaz
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, operation, *args)
+    
+    def _get_wakeup(self) -> asyncio.Event:
+        # Event çalışan loop içinde oluşturulmalı (import anında değil)
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+    
+    async def wait_for_work(self, timeout: float):
+        """Yeni öğe eklenene (bu process'te) ya da timeout'a kadar bekle"""
+        wakeup = self._get_wakeup()
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+    
+    async def _run_leased(self, item: CollageQueueItem, db: Session):
+        """
+        Lease edilmiş öğeyi işle. Kolaj üretildiyse ya da ürün kolaja uygun
+        değilse (yok / yeterli görsel yok) ack; klasör, render ya da yükleme
+        başarısızsa fail - geri çekilmeyle tekrar, limit aşılınca dead-letter.
+        """
+        self.processing_products.add(item.product_id)
+        try:
+            collage_url = await self._process_single_collage(item, db)
+        except Exception as e:
+            logger.error(f"[SMART COLLAGE] Error processing {item.product_id} (attempt {item.attempts}): {e}")
+            await self._queue_call(self.collage_queue.fail, item, str(e))
+            return False
+        finally:
+            self.processing_products.discard(item.product_id)
+        await self._queue_call(self.collage_queue.ack, item)
+        signalled_at = self._signalled_at.pop(item.product_id, None)
+        if signalled_at is not None and collage_url:
+            self._time_to_collage.append(time.monotonic() - signalled_at)
+        logger.info(f"[SMART COLLAGE] Successfully processed {item.product_id}")
+        return True
+    
+    async def process_next(self) -> bool:
+        """Kuyruktan bir öğe al ve kendi DB session'ıyla işle; kuyruk boşsa False"""
+        items = await self._queue_call(self.collage_queue.lease, 1)
+        if not items:
+            return False
+        
+        from database import SessionLocal
+        
+        with SessionLocal() as db:
+            await self._run_leased(items[0], db)
+        return True
+    
     async def process_collage_queue(self, db: Session, max_concurrent: int = 3):
         """
-        Kolaj kuyruğunu işle - paralel ve akıllı
+        Kuyruktan en fazla max_concurrent öğe al ve paralel işle
         """
         try:
-            if not self.collage_queue:
-                return
-            
             # Maksimum eş zamanlı işlem sayısını kontrol et
             active_tasks = len(self.processing_products)
             if active_tasks >= max_concurrent:
                 logger.info(f"[SMART COLLAGE] Max concurrent limit reached: {active_tasks}")
                 return
             
-            # İşlenecek öğeleri seç
-            items_to_process = []
-            for _ in range(min(max_concurrent - active_tasks, len(self.collage_queue))):
-                if self.collage_queue:
-                    item = self.collage_queue.pop(0)
-                    items_to_process.append(item)
-            
-            if not items_to_process:
+            items = await self._queue_call(self.collage_queue.lease, max_concurrent - active_tasks)
+            if not items:
                 return
             
-            # Paralel işlem başlat
-            tasks = []
-            for item in items_to_process:
-                self.processing_products.add(item['product_id'])
-                task = asyncio.create_task(
-                    self._process_single_collage(item, db)
-                )
-                tasks.append(task)
-            
-            # Tüm görevleri bekle
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Sonuçları işle
-            for i, result in enumerate(results):
-                product_id = items_to_process[i]['product_id']
-                self.processing_products.discard(product_id)
-                
-                if isinstance(result, Exception):
-                    logger.error(f"[SMART COLLAGE] Error processing {product_id}: {result}")
-                    # Hatalı olanları tekrar kuyruğa ekle (max 3 deneme)
-                    if items_to_process[i]['attempts'] < 3:
-                        items_to_process[i]['attempts'] += 1
-                        self.collage_queue.append(items_to_process[i])
-                else:
-                    logger.info(f"[SMART COLLAGE] Successfully processed {product_id}")
+            await asyncio.gather(*(self._run_leased(item, db) for item in items))
             
         except Exception as e:
             logger.error(f"[SMART COLLAGE] Queue processing error: {e}")
     
-    async def _process_single_collage(self, queue_item: Dict[str, Any], db: Session):
+    async def _process_single_collage(self, queue_item: CollageQueueItem, db: Session):
         """Tek kolaj işlemi"""
         try:
-            product_id = queue_item['product_id']
+            product_id = queue_item.product_id
             
             # Ürün bilgilerini al
             product = db.query(Product).filter(
@@ -141,10 +178,12 @@ class SmartCollageService:
             db.refresh(product)  # Refresh product from database
             
             # Görselleri al - fresh query
+            # Yakın-kopya olarak işaretli görseller asıl görseli tekrarlar - kolaja girmez
             images = db.query(ProductImage).filter(
                 ProductImage.product_id == product_id,
                 ProductImage.is_active == True,
-                ProductImage.image_type == 'product'
+                ProductImage.image_type == 'product',
+                ProductImage.duplicate_of_id.is_(None)
             ).all()
             
             if len(images) < 2:
@@ -177,8 +216,7 @@ class SmartCollageService:
             )
             
             if not collage_folder:
-                logger.error(f"[SMART COLLAGE] Failed to create folder for {product.code}")
-                return
+                raise ExternalServiceError(f"Failed to create collage folder for {product.code}")
             
             # Kolaj oluştur ve yükle
             collage_url = await product_cdn_processor._create_and_upload_collage(
@@ -195,6 +233,9 @@ class SmartCollageService:
                 logger.info(f"[SMART COLLAGE] Created and cached: {collage_url}")
                 return collage_url
             
+            # Yeterli geçerli görsel vardı - render / yükleme başarısız (ack edilmez)
+            raise ExternalServiceError(f"Collage render or upload failed for {product.code}")
+            
         except Exception as e:
             logger.error(f"[SMART COLLAGE] Single collage error: {e}")
             raise
@@ -225,9 +266,11 @@ class SmartCollageService:
                     logger.info(f"[SMART COLLAGE] Returning cached collage: {cache_key}")
                     return cache_data['url']
             
-            # Hemen kolaj oluştur (immediate priority)
+            # Hemen kolaj oluştur (immediate priority) - başka worker işlemiyorsa bu istekte
             await self.schedule_collage_creation(product_id, priority="immediate")
-            await self.process_collage_queue(db, max_concurrent=1)
+            item = await self._queue_call(self.collage_queue.claim, product_id)
+            if item:
+                await self._run_leased(item, db)
             
             # Cache'den döndür
             if cache_key in self.collage_cache:
@@ -241,19 +284,26 @@ class SmartCollageService:
     
     def get_queue_status(self) -> Dict[str, Any]:
         """Kuyruk durumunu döndür"""
+        stats = self.collage_queue.get_stats()
         return {
-            'queue_size': len(self.collage_queue),
+            'queue_size': stats.get('ready', 0) + stats.get('delayed', 0),
             'processing_count': len(self.processing_products),
             'cache_size': len(self.collage_cache),
-            'queue_items': [
-                {
-                    'product_id': item['product_id'],
-                    'priority': item['priority'],
-                    'scheduled_at': item['scheduled_at'].isoformat(),
-                    'attempts': item['attempts']
-                }
-                for item in self.collage_queue[:10]  # İlk 10 öğe
-            ]
+            'queue': stats,
+            'time_to_collage': self._time_to_collage_stats(),
+            'queue_items': self.collage_queue.peek(10)  # İlk 10 öğe
+        }
+    
+    def _time_to_collage_stats(self) -> Dict[str, Any]:
+        """Tamamlanma sinyalinden kolajın hazır olmasına kadar geçen süre (son 500 ürün)"""
+        samples = sorted(self._time_to_collage)
+        if not samples:
+            return {'count': 0}
+        return {
+            'count': len(samples),
+            'p50_seconds': round(samples[len(samples) // 2], 2),
+            'p95_seconds': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+            'max_seconds': round(samples[-1], 2)
         }
     
     def clear_old_cache(self, max_age_hours: int = 24):
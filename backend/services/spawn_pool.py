@@ -0,0 +1,90 @@
+"""
+Spawn Pool
+CPU'ya bağlı işler için spawn context'li ProcessPoolExecutor, çökme sayacı ve yedek
+
+Kolaj render'ı (collage_render_farm) ve toplu etiket / fiyat çıkarma
+(extraction_batch) aynı havuz yaşam döngüsünü kullanır:
+
+    - Havuz ilk işte kurulur; kurulamazsa workers 0'a çekilir
+    - Worker ölürse (OOM vb.) BrokenProcessPool: havuz kapatılır, bir
+      sonraki işte yeniden kurulur
+    - Arka arkaya max_breaks çöküşten sonra process pool bırakılır; get()
+      None döner ve çağıran kendi yedek executor'ını kullanır
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from core.logging import get_logger
+
+logger = get_logger('spawn_pool')
+
+# Arka arkaya bu kadar çöken havuzdan sonra process pool bırakılır
+MAX_POOL_BREAKS = 3
+
+
+class SpawnPool:
+    """Yeniden kurulabilen spawn process pool"""
+
+    def __init__(
+        self,
+        tag: str,
+        workers: int,
+        initializer: Optional[Callable[[], None]] = None,
+        max_breaks: int = MAX_POOL_BREAKS
+    ):
+        self.tag = tag  # Log etiketi, ör. "RENDER FARM"
+        self.workers = workers  # <= 0: process pool yok
+        self.initializer = initializer
+        self.max_breaks = max_breaks
+        self.breaks = 0
+        self.restarts = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def get(self) -> Optional[ProcessPoolExecutor]:
+        """Çalışan havuz; process pool kullanılamıyorsa None"""
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            try:
+                # fork, ebeveynin DB bağlantılarını / thread'lerini kopyalar - spawn güvenli
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=self.initializer
+                )
+                logger.info(f"[{self.tag}] Process pool started ({self.workers} workers)")
+            except Exception as e:
+                logger.warning(f"[{self.tag}] Process pool unavailable, using fallback executor: {e}")
+                self.workers = 0
+        return self._pool
+
+    def succeeded(self):
+        """Havuzda bir iş tamamlandı - çökme serisi bitti"""
+        self.breaks = 0
+
+    def broken(self, error: BaseException, pool: Optional[ProcessPoolExecutor] = None):
+        """
+        BrokenProcessPool sonrası: havuzu kapat, seri uzadıysa process pool'u bırak.
+        pool verilirse ve o havuz zaten değiştirildiyse (aynı çöküşü gören başka
+        bir iş) tekrar sayılmaz.
+        """
+        if pool is not None and pool is not self._pool:
+            return
+        logger.error(f"[{self.tag}] Worker pool broken: {error}")
+        self.restarts += 1
+        self.breaks += 1
+        self.shutdown()
+        if self.breaks >= self.max_breaks:
+            logger.error(f"[{self.tag}] Workers keep failing, falling back to in-process execution")
+            self.workers = 0
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -19,7 +19,8 @@ class TelegramService:
     def __init__(self):
         self.default_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.default_chat_id = os.getenv('TELEGRAM_CHAT_ID')
-        self.default_api_url = f"https://api.telegram.org/bot{self.default_bot_token}" if self.default_bot_token else None
+        self.api_base_url = os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org')
+        self.default_api_url = f"{self.api_base_url}/bot{self.default_bot_token}" if self.default_bot_token else None
         
     def send_collage(self, 
                     image_path: str, 
@@ -40,7 +41,7 @@ class TelegramService:
                 bot_token = self.default_bot_token
                 chat_id = self.default_chat_id
             
-            api_url = f"https://api.telegram.org/bot{bot_token}"
+            api_url = f"{self.api_base_url}/bot{bot_token}"
             
             # Görseli yükle
             with open(image_path, 'rb') as photo:
@@ -89,7 +90,7 @@ class TelegramService:
                 bot_token = self.default_bot_token
                 chat_id = self.default_chat_id
             
-            api_url = f"https://api.telegram.org/bot{bot_token}"
+            api_url = f"{self.api_base_url}/bot{bot_token}"
             
             # Videoyu yükle
             with open(video_path, 'rb') as video:
@@ -152,7 +153,7 @@ class TelegramService:
                 bot_token = self.default_bot_token
                 chat_id = self.default_chat_id
             
-            api_url = f"https://api.telegram.org/bot{bot_token}"
+            api_url = f"{self.api_base_url}/bot{bot_token}"
             
             # Simülasyon - gerçek sistemde frontend'den PNG alınacak
             logger.info(f"[TELEGRAM] Would send to brand {brand_id}: {caption}")
@@ -218,7 +219,7 @@ class TelegramService:
                 logger.warning("[TELEGRAM] Bot token not configured")
                 return False
 
-            test_api_url = f"https://api.telegram.org/bot{test_bot_token}"
+            test_api_url = f"{self.api_base_url}/bot{test_bot_token}"
             response = requests.get(f"{test_api_url}/getMe", timeout=10)
 
             if response.status_code == 200:
@@ -7,29 +7,32 @@ PERFORMANS HEDEFLERİ:
 - Memory kullanımı < 500MB
 - Database transaction sayısı minimum
 - CDN upload paralel
-- OCR cache persistent
+- OCR cache persistent (içerik hash'li ocr_result_store)
 """
 
 import asyncio
 import aiohttp
 import aiofiles
-import redis
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-import json
-import hashlib
+from sqlalchemy import text, select, insert, tuple_
 from concurrent.futures import ThreadPoolExecutor
-import tempfile
-import os
 
 from models.user import User
 from models.brand import Brand
 from models.product import Product, ProductImage
 from models.upload_job import UploadJob
+from database.upsert import upsert_rows
 from services.bunny_cdn_service import bunny_cdn_service
 from services.unified_ocr_service import UnifiedOCRService
+from services.upload_staging import upload_staging_service
+from services.filename_parser import filename_parser
+from services.upload_journal import upload_journal
+from services.upload_progress_bus import upload_progress_bus
+from services.product_helpers import reactivate_products
+from services.keyword_matcher import brand_dictionary
+from services.perceptual_hash import filename_image_scope, filename_scope, perceptual_index, to_hex
 from core.logging import get_logger
 
 logger = get_logger('ultra_fast_upload')
@@ -37,20 +40,11 @@ logger = get_logger('ultra_fast_upload')
 class UltraFastUploadService:
     """Ultra hızlı upload servisi - yeni nesil"""
     
+    # IN listelerini makul boyutta tut (MySQL packet / planner limitleri)
+    DB_IN_CHUNK = 1000
+    
     def __init__(self):
-        # Redis cache for OCR results (persistent)
-        try:
-            self.redis_client = redis.Redis(host='localhost', port=6379, db=2, decode_responses=True)
-            self.redis_client.ping()
-            logger.info("Redis OCR cache connected")
-        except:
-            self.redis_client = None
-            logger.warning("Redis not available, using memory cache")
-        
-        # Memory cache as fallback
-        self.memory_ocr_cache = {}
-        
-        # OCR service
+        # OCR service - sonuçlar içerik hash'i ile ocr_result_store'da (bellek LRU + SQLite)
         self.ocr_service = UnifiedOCRService()
         
         # Thread pool for CPU-bound operations
@@ -62,7 +56,8 @@ class UltraFastUploadService:
             'ocr_cache_hits': 0,
             'ocr_cache_misses': 0,
             'database_batches': 0,
-            'cdn_uploads': 0
+            'cdn_uploads': 0,
+            'duplicates_flagged': 0
         }
         
         logger.info("Ultra Fast Upload Service initialized")
@@ -86,13 +81,17 @@ class UltraFastUploadService:
             
             # PHASE 3: CDN Upload (Parallel) (1-2s)
             upload_results = await self._upload_to_cdn_ultra_fast(
-                files, current_user, ocr_results
+                files, current_user, ocr_results, db
             )
             
             # PHASE 4: Database Batch Insert (0.2s)
             db_results = await self._batch_database_insert(
                 upload_results, current_user, db
             )
+            await upload_journal.advance_many_async(
+                [(result['staged'], {}) for result in upload_results if result['success']],
+                'db_written'
+            )
             
             # PHASE 5: Update Job Status
             await self._update_job_ultra_fast(job_id, db_results, db)
@@ -114,22 +113,8 @@ class UltraFastUploadService:
     
     async def _classify_files_ultra_fast(self, files: List) -> Dict[str, List]:
         """Dosyaları ultra hızlı sınıflandır"""
-        import re
-        
-        tags = []
-        products = []
-        
-        # Regex pattern for tag detection (compiled once)
-        tag_pattern = re.compile(r'\s+\d+\s*$')
-        
-        for file in files:
-            filename = file.filename.rsplit('.', 1)[0]
-            
-            # Tag images don't have trailing numbers
-            if not tag_pattern.search(filename):
-                tags.append(file)
-            else:
-                products.append(file)
+        # Tag images don't have trailing numbers (tek geçişte, memoize edilmiş)
+        tags, products = filename_parser.classify(files)
         
         logger.info(f"[CLASSIFY] {len(tags)} tags, {len(products)} products")
         
@@ -170,70 +155,40 @@ class UltraFastUploadService:
         return ocr_results
     
     async def _process_single_ocr_cached(self, file) -> Optional[Dict[str, Any]]:
-        """Tek OCR işlemi - cache'li"""
+        """Tek OCR işlemi - cache'li (staged dosya yolu üzerinden, kopya yok)"""
         try:
-            # Generate cache key
-            file_content = await file.read()
-            file_hash = hashlib.md5(file_content).hexdigest()
-            cache_key = f"ocr:{file_hash}"
-            
-            # Check Redis cache first
-            if self.redis_client:
-                cached_result = self.redis_client.get(cache_key)
-                if cached_result:
-                    self.stats['ocr_cache_hits'] += 1
-                    logger.info(f"[OCR CACHE HIT] {file.filename}")
-                    return json.loads(cached_result)
-            
-            # Check memory cache
-            if cache_key in self.memory_ocr_cache:
+            # Staging sırasında hesaplanan checksum = OCR store anahtarı
+            staged = await upload_staging_service.ensure_staged(file)
+            
+            # Restart sonrası: OCR bu job'da zaten yapıldıysa günlükten al
+            entry = upload_journal.get(staged)
+            if entry and entry.get('ocr_data'):
                 self.stats['ocr_cache_hits'] += 1
-                logger.info(f"[OCR MEMORY HIT] {file.filename}")
-                return self.memory_ocr_cache[cache_key]
+                logger.info(f"[OCR JOURNAL HIT] {file.filename}")
+                return entry['ocr_data']
             
-            # Cache miss - process OCR
+            # Aynı içerik daha önce OCR'landıysa store'dan döner (Vision çağrısı yok)
             self.stats['ocr_cache_misses'] += 1
+            ocr_result = await self.ocr_service.process_image(
+                staged.path, content_hash=staged.checksum, scope=filename_scope(file.filename)
+            )
             
-            # Save to temp file for OCR
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-                temp_file.write(file_content)
-                temp_path = temp_file.name
-            
-            try:
-                # Process OCR
-                ocr_result = await self.ocr_service.process_image(temp_path)
-                
-                if ocr_result and ocr_result.text:
-                    # Convert OCRResult to dict for caching
-                    result_dict = {
-                        'text': ocr_result.text,
-                        'confidence': ocr_result.confidence,
-                        'language': ocr_result.language,
-                        'processing_time': ocr_result.processing_time,
-                        'method': ocr_result.method,
-                        'metadata': ocr_result.metadata,
-                        'success': True
-                    }
-                    
-                    # Cache the result
-                    result_json = json.dumps(result_dict)
-                    
-                    # Redis cache (24 hours)
-                    if self.redis_client:
-                        self.redis_client.setex(cache_key, 86400, result_json)
-                    
-                    # Memory cache
-                    self.memory_ocr_cache[cache_key] = result_dict
-                    
-                    logger.info(f"[OCR PROCESSED] {file.filename}")
-                    return result_dict
+            if ocr_result and ocr_result.text:
+                result_dict = {
+                    'text': ocr_result.text,
+                    'confidence': ocr_result.confidence,
+                    'language': ocr_result.language,
+                    'processing_time': ocr_result.processing_time,
+                    'method': ocr_result.method,
+                    'metadata': ocr_result.metadata,
+                    # Ham Vision yanıtının anahtarı - ocr_reextraction buradan okur
+                    'content_hash': ocr_result.metadata.get('content_hash'),
+                    'success': True
+                }
+                await upload_journal.advance_async(staged, 'ocr_done', ocr_data=result_dict)
                 
-            finally:
-                # Clean up temp file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
+                logger.info(f"[OCR PROCESSED] {file.filename}")
+                return result_dict
             
             return None
             
@@ -245,7 +200,8 @@ class UltraFastUploadService:
         self,
         files: List,
         current_user: User,
-        ocr_results: Dict[str, Any]
+        ocr_results: Dict[str, Any],
+        db: Session
     ) -> List[Dict[str, Any]]:
         """CDN'e ultra hızlı yükleme"""
         
@@ -264,7 +220,7 @@ class UltraFastUploadService:
         for product_code, product_files in product_groups.items():
             task = asyncio.create_task(
                 self._upload_product_group_to_cdn(
-                    product_code, product_files, current_user, ocr_results
+                    product_code, product_files, current_user, ocr_results, db
                 )
             )
             upload_tasks.append(task)
@@ -292,7 +248,8 @@ class UltraFastUploadService:
         product_code: str,
         files: List,
         current_user: User,
-        ocr_results: Dict[str, Any]
+        ocr_results: Dict[str, Any],
+        db: Session
     ) -> List[Dict[str, Any]]:
         """Ürün grubunu CDN'e yükle"""
         
@@ -306,7 +263,6 @@ class UltraFastUploadService:
         
         if brand_name and brand_name != 'Unknown':
             # Try to find brand in database
-            from models.brand import Brand
             brand = db.query(Brand).filter(Brand.name.ilike(f"%{brand_name}%")).first()
         
         # Fallback to user's first accessible brand
@@ -320,19 +276,87 @@ class UltraFastUploadService:
                     self.name = name
             brand = MockBrand("Uploads")  # Use "Uploads" instead of "Default"
         
-        # Prepare files for batch upload
-        files_data = []
+        # Prepare files for batch upload - stream from staged paths
+        # Restart sonrası: CDN'e zaten yüklenmiş dosyalar tekrar transfer edilmez
+        staged_files = []
+        upload_results = []
         for file in files:
-            content = await file.read()
-            files_data.append({
-                'content': content,
-                'filename': file.filename
-            })
+            staged = await upload_staging_service.ensure_staged(file)
+            entry = upload_journal.get(staged)
+            if entry and entry.get('cdn_url') and upload_journal.has_reached(staged, 'cdn_uploaded'):
+                upload_results.append({
+                    'success': True,
+                    'filename': staged.filename,
+                    'cdn_url': entry['cdn_url'],
+                    'folder_path': entry['folder_path'],
+                    'error': '',
+                    'staged': staged
+                })
+            else:
+                staged_files.append(staged)
+        
+        # Yakın-kopya ürün görselleri (yeniden çekim / export) CDN'e yüklenmez; kayıt asıl
+        # görselin CDN yolu ile yazılır ve duplicate_of ile işaretlenir. Grup sadece koda göre -
+        # renk ve açı numarası her dosyanın kendi adından (farklı renk / açı kopya değildir)
+        phashes = await self._compute_phashes([result['staged'] for result in upload_results] + staged_files)
+        if upload_results:
+            # Devam: ilk çalıştırmada kopya sayılıp yüklemesi atlanan dosyalar aynı işareti alır
+            originals = perceptual_index.find_originals(
+                db, {result['filename']: (result['filename'], result['cdn_url']) for result in upload_results}
+            )
+            for result in upload_results:
+                result['phash'] = phashes.get(result['filename'])
+                result['duplicate_of'] = originals.get(result['filename'])
         
-        # Batch upload to CDN
-        upload_results = await bunny_cdn_service.upload_files_batch(
-            files_data, brand, current_user, product_code, color
+        duplicates = perceptual_index.find_duplicate_images(
+            db, ((staged.filename, phashes.get(staged.filename), filename_image_scope(staged.filename)) for staged in staged_files)
         )
+        if duplicates:
+            duplicate_results = []
+            for staged in staged_files:
+                duplicate = duplicates.get(staged.filename)
+                if duplicate:
+                    logger.info(f"[PHASH] {staged.filename} duplicates image {duplicate['image_id']} (distance {duplicate['distance']}), skipping upload")
+                    duplicate_results.append({
+                        'success': True,
+                        'filename': staged.filename,
+                        'cdn_url': duplicate['file_path'],
+                        'folder_path': '',
+                        'error': '',
+                        'staged': staged,
+                        'phash': phashes.get(staged.filename),
+                        'duplicate_of': duplicate['image_id']
+                    })
+            await upload_journal.advance_many_async(
+                [(result['staged'], {'cdn_url': result['cdn_url'], 'folder_path': ''}) for result in duplicate_results],
+                'cdn_uploaded'
+            )
+            self.stats['duplicates_flagged'] += len(duplicate_results)
+            upload_results.extend(duplicate_results)
+            staged_files = [staged for staged in staged_files if staged.filename not in duplicates]
+        
+        if staged_files:
+            files_data = [{'path': staged.path, 'filename': staged.filename} for staged in staged_files]
+            
+            # Batch upload to CDN
+            batch_results = await bunny_cdn_service.upload_files_batch(
+                files_data, brand, current_user, product_code, color
+            )
+            
+            # Sonuçlar files_data sırasıyla döner
+            for staged, result in zip(staged_files, batch_results):
+                result['staged'] = staged
+                result['phash'] = phashes.get(staged.filename)
+                if result['success']:
+                    perceptual_index.add_image(result['phash'], filename_image_scope(staged.filename), result['cdn_url'])
+            await upload_journal.advance_many_async(
+                [
+                    (result['staged'], {'cdn_url': result['cdn_url'], 'folder_path': result['folder_path']})
+                    for result in batch_results if result['success']
+                ],
+                'cdn_uploaded'
+            )
+            upload_results.extend(batch_results)
         
         # Add product info to results
         for result in upload_results:
@@ -343,29 +367,47 @@ class UltraFastUploadService:
         
         return upload_results
     
+    async def _compute_phashes(self, staged_files: List) -> Dict[str, int]:
+        """Ürün görsellerinin pHash'leri (etiketler hariç) - CPU havuzunda paralel"""
+        if not perceptual_index.enabled:
+            return {}
+        product_images = [staged for staged in staged_files if not filename_parser.is_tag(staged.filename)]
+        loop = asyncio.get_event_loop()
+        hashes = await asyncio.gather(*[
+            loop.run_in_executor(self.cpu_executor, perceptual_index.compute, staged.path)
+            for staged in product_images
+        ])
+        return {staged.filename: phash for staged, phash in zip(product_images, hashes) if phash is not None}
+    
     async def _batch_database_insert(
         self,
         upload_results: List[Dict[str, Any]],
         current_user: User,
         db: Session
     ) -> Dict[str, Any]:
-        """Veritabanına batch insert"""
+        """
+        Veritabanına set tabanlı batch upsert.
+        Satır başına sorgu yerine: mevcut kayıtlar birkaç IN sorgusuyla okunur,
+        eksikler unique anahtar üzerinden upsert edilir - 500 dosya ~8 statement.
+        Eşzamanlı job'lar aynı marka / ürünü eklerse çakışan satır mevcut kayda
+        düşer. Anahtarlar iki tarafta da aynı normalize edilir (MySQL
+        collation'ı büyük/küçük harf ve sondaki boşluğu ayırmaz).
+        """
         
         try:
             # Group by product for efficient processing
             products_to_create = {}
-            images_to_create = []
             
             for result in upload_results:
                 if not result['success']:
                     continue
                 
-                product_code = result['product_code']
-                color = result['color']
-                brand_name = result['brand_name']
+                product_code = result['product_code'].strip()
+                color = (result['color'] or '').strip()
+                brand_name = (result['brand_name'] or '').strip()
                 
                 # Prepare product data
-                product_key = f"{product_code}_{color}_{brand_name}"
+                product_key = (self._normalize(product_code), self._normalize(color), self._normalize(brand_name))
                 if product_key not in products_to_create:
                     products_to_create[product_key] = {
                         'code': product_code,
@@ -373,90 +415,123 @@ class UltraFastUploadService:
                         'color': color,
                         'brand_name': brand_name,
                         'ocr_data': result.get('ocr_data', {}),
-                        'images': []
+                        'images': {}
                     }
                 
-                # Prepare image data
-                products_to_create[product_key]['images'].append({
+                # Prepare image data (aynı dosya adı bir kez)
+                products_to_create[product_key]['images'].setdefault(result['filename'], {
                     'filename': result['filename'],
                     'cdn_url': result['cdn_url'],
-                    'folder_path': result['folder_path']
+                    'folder_path': result['folder_path'],
+                    'phash': result.get('phash'),
+                    'duplicate_of': result.get('duplicate_of')
                 })
             
-            # Batch create products and images
-            created_products = 0
-            created_images = 0
-            
-            for product_data in products_to_create.values():
-                # Find or create brand
-                brand = db.query(Brand).filter(Brand.name == product_data['brand_name']).first()
-                if not brand:
-                    brand = Brand(name=product_data['brand_name'], is_active=True)
-                    db.add(brand)
-                    db.flush()  # Get ID without commit
-                
-                # Find or create product
-                product = db.query(Product).filter(
-                    Product.code == product_data['code'],
-                    Product.color == product_data['color'],
-                    Product.brand_id == brand.id
-                ).first()
-                
-                if not product:
-                    # Extract OCR data
-                    ocr_info = product_data['ocr_data'].get('product_info', {})
-                    
-                    product = Product(
-                        code=product_data['code'],
-                        name=product_data['name'],
-                        color=product_data['color'],
-                        brand_id=brand.id,
-                        product_type=ocr_info.get('product_type'),
-                        size_range=ocr_info.get('size_range'),
-                        price=ocr_info.get('price'),
-                        ai_extracted_data=product_data['ocr_data'],
-                        is_active=True,
-                        is_processed=True,
-                        created_at=datetime.utcnow(),
-                        updated_at=datetime.utcnow()
-                    )
-                    db.add(product)
-                    db.flush()  # Get ID without commit
-                    created_products += 1
-                
-                # Create images
-                for image_data in product_data['images']:
-                    # Check if image already exists
-                    existing_image = db.query(ProductImage).filter(
-                        ProductImage.product_id == product.id,
-                        ProductImage.filename == image_data['filename']
-                    ).first()
-                    
-                    if not existing_image:
-                        is_tag = not any(char.isdigit() for char in image_data['filename'].split()[-1])
-                        
-                        image = ProductImage(
-                            product_id=product.id,
-                            filename=image_data['filename'],
-                            original_filename=image_data['filename'],
-                            file_path=image_data['cdn_url'],
-                            image_type='tag' if is_tag else 'product',
-                            is_active=True,
-                            created_at=datetime.utcnow(),
-                            updated_at=datetime.utcnow()
-                        )
-                        db.add(image)
-                        created_images += 1
+            if not products_to_create:
+                return {'products_created': 0, 'images_created': 0, 'total_processed': len(upload_results)}
+            
+            now = datetime.utcnow()
+            
+            # 1) Brands - tek IN sorgusu, eksikler toplu upsert
+            brand_names = {self._normalize(data['brand_name']): data['brand_name'] for data in products_to_create.values()}
+            brand_ids = self._fetch_brand_ids(db, brand_names.values())
+            missing_brands = [name for key, name in brand_names.items() if key not in brand_ids]
+            if missing_brands:
+                # brands.name UNIQUE - eşzamanlı job aynı markayı eklediyse mevcut kayıt kalır
+                upsert_rows(
+                    db, Brand.__table__,
+                    [
+                        {'name': name, 'logo_url': '', 'is_active': True, 'created_at': now, 'updated_at': now}
+                        for name in missing_brands
+                    ],
+                    conflict_columns=('name',)
+                )
+                brand_ids.update(self._fetch_brand_ids(db, missing_brands))
+            
+            # 2) Products - (code, color, brand_id) tuple'ları tek sorguda
+            product_keys = {}
+            for key, data in products_to_create.items():
+                brand_id = brand_ids.get(key[2])
+                if brand_id is None:
+                    logger.warning(f"[DB BATCH] Brand '{data['brand_name']}' not found after upsert, skipping {data['code']}")
+                    continue
+                product_keys[key] = (data['code'], data['color'], brand_id)
+            product_ids = self._fetch_product_ids(db, set(product_keys.values()))
+            
+            new_products = []
+            for key, (code, color, brand_id) in product_keys.items():
+                if self._product_key(code, color, brand_id) in product_ids:
+                    continue
+                data = products_to_create[key]
+                ocr_info = data['ocr_data'].get('product_info', {})
+                new_products.append({
+                    'code': code,
+                    'name': data['name'],
+                    'color': color,
+                    'brand_id': brand_id,
+                    'created_by': current_user.id,
+                    'product_type': ocr_info.get('product_type'),
+                    'size_range': ocr_info.get('size_range'),
+                    'price': ocr_info.get('price'),
+                    'ai_extracted_data': data['ocr_data'],
+                    'is_active': True,
+                    'is_processed': True,
+                    'created_at': now,
+                    'updated_at': now
+                })
+            
+            if new_products:
+                # (code, color, brand_id) UNIQUE - eşzamanlı job'un eklediği ürün yeniden eklenmez.
+                # MySQL RETURNING desteklemez - ID'ler tek bir IN sorgusuyla geri okunur
+                upsert_rows(db, Product.__table__, new_products, conflict_columns=('code', 'color', 'brand_id'))
+                product_ids.update(self._fetch_product_ids(
+                    db, {(row['code'], row['color'], row['brand_id']) for row in new_products}
+                ))
+            # Unique anahtar is_active'i kapsamaz - soft delete edilmiş ürün yeniden aktif edilir
+            reactivate_products(db, product_ids.values())
+            
+            # 3) Images - mevcut (product_id, filename) çiftleri tek sorguda
+            existing_images = self._fetch_existing_images(db, product_ids.values())
+            
+            new_images = []
+            for key, (code, color, brand_id) in product_keys.items():
+                product_id = product_ids.get(self._product_key(code, color, brand_id))
+                if product_id is None:
+                    logger.warning(f"[DB BATCH] Product {code} / {color} not found after upsert, skipping its images")
+                    continue
+                for image_data in products_to_create[key]['images'].values():
+                    if (product_id, image_data['filename']) in existing_images:
+                        continue
+                    parsed = filename_parser.parse(image_data['filename'])
+                    new_images.append({
+                        'product_id': product_id,
+                        'filename': image_data['filename'],
+                        'original_filename': image_data['filename'],
+                        'file_path': image_data['cdn_url'],
+                        'image_type': 'tag' if parsed.is_tag else 'product',
+                        'angle_number': parsed.angle_number,
+                        'phash': to_hex(image_data['phash']) if image_data['phash'] is not None else None,
+                        'duplicate_of_id': image_data['duplicate_of'],
+                        'is_active': True,
+                        'created_at': now,
+                        'updated_at': now
+                    })
+            
+            if new_images:
+                db.execute(insert(ProductImage), new_images)
             
             # SINGLE COMMIT for all operations
             db.commit()
             self.stats['database_batches'] += 1
+            if missing_brands:
+                # Yeni markalar OCR marka sözlüğüne girsin
+                brand_dictionary.invalidate()
             
-            logger.info(f"[DB BATCH] Created {created_products} products, {created_images} images")
+            logger.info(f"[DB BATCH] Created {len(new_products)} products, {len(new_images)} images")
             
             return {
-                'products_created': created_products,
-                'images_created': created_images,
+                'products_created': len(new_products),
+                'images_created': len(new_images),
                 'total_processed': len(upload_results)
             }
             
@@ -465,6 +540,50 @@ class UltraFastUploadService:
             db.rollback()
             raise
     
+    @staticmethod
+    def _normalize(value: Optional[str]) -> str:
+        """Eşleştirme anahtarı - MySQL collation'ı gibi büyük/küçük harf ve kenar boşluğu yok sayılır"""
+        return (value or '').strip().upper()
+    
+    def _product_key(self, code: str, color: str, brand_id: int) -> Tuple[str, str, int]:
+        return self._normalize(code), self._normalize(color), brand_id
+    
+    def _fetch_brand_ids(self, db: Session, names) -> Dict[str, int]:
+        """Normalize marka adı -> id (tek IN sorgusu)"""
+        rows = db.execute(select(Brand.name, Brand.id).where(Brand.name.in_(list(names)))).all()
+        ids = {}
+        for name, brand_id in rows:
+            ids.setdefault(self._normalize(name), brand_id)
+        return ids
+    
+    def _fetch_product_ids(self, db: Session, keys) -> Dict[Tuple[str, str, int], int]:
+        """Normalize (code, color, brand_id) -> product id (tek tuple IN sorgusu)"""
+        ids = {}
+        keys = list(keys)
+        for i in range(0, len(keys), self.DB_IN_CHUNK):
+            chunk = keys[i:i + self.DB_IN_CHUNK]
+            rows = db.execute(
+                select(Product.code, Product.color, Product.brand_id, Product.id)
+                .where(tuple_(Product.code, Product.color, Product.brand_id).in_(chunk))
+                .order_by(Product.id)
+            ).all()
+            for code, color, brand_id, product_id in rows:
+                # Aynı anahtarda birden fazla kayıt varsa eski davranış gibi ilkini kullan
+                ids.setdefault(self._product_key(code, color, brand_id), product_id)
+        return ids
+    
+    def _fetch_existing_images(self, db: Session, product_ids) -> set:
+        """Mevcut (product_id, filename) çiftleri"""
+        product_ids = list(set(product_ids))
+        existing = set()
+        for i in range(0, len(product_ids), self.DB_IN_CHUNK):
+            rows = db.execute(
+                select(ProductImage.product_id, ProductImage.filename)
+                .where(ProductImage.product_id.in_(product_ids[i:i + self.DB_IN_CHUNK]))
+            ).all()
+            existing.update((product_id, filename) for product_id, filename in rows)
+        return existing
+    
     async def _update_job_ultra_fast(
         self,
         job_id: int,
@@ -473,42 +592,27 @@ class UltraFastUploadService:
     ):
         """Job durumunu ultra hızlı güncelle"""
         try:
+            processing_log = {
+                'products_created': db_results['products_created'],
+                'images_created': db_results['images_created'],
+                'stats': self.stats
+            }
+            upload_progress_bus.finish(job_id, 'completed', db_results['total_processed'], processing_log)
+            
             job = db.query(UploadJob).filter(UploadJob.id == job_id).first()
             if job:
                 job.processed_files = db_results['total_processed']
                 job.status = 'completed'
                 job.completed_at = datetime.utcnow()
-                job.processing_log = {
-                    'products_created': db_results['products_created'],
-                    'images_created': db_results['images_created'],
-                    'stats': self.stats
-                }
+                job.processing_log = processing_log
                 db.commit()
                 
         except Exception as e:
             logger.error(f"[JOB UPDATE] Error: {e}")
     
     def _extract_product_code(self, filename: str) -> Optional[str]:
-        """Dosya adından ürün kodu çıkar"""
-        import re
-        
-        name_without_ext = filename.rsplit('.', 1)[0]
-        
-        # Common patterns for product codes
-        patterns = [
-            r'^([A-Z]{2,4}-?\d{3,6}(?:[-\s]?[A-Z])?)',  # VV-6124-B, VV-6124 B
-            r'^([A-Z]{2,4}\d{3,6}(?:[A-Z])?)',          # VV6124B
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, name_without_ext.upper())
-            if match:
-                code = match.group(1)
-                # Normalize format
-                code = re.sub(r'([A-Z]{2,4}-?\d{3,6})\s+([A-Z])$', r'\1-\2', code)
-                return code
-        
-        return None
+        """Dosya adından ürün kodu çıkar (VV-6124 B -> VV-6124-B)"""
+        return filename_parser.parse(filename).code
     
     def get_stats(self) -> Dict[str, Any]:
         """İstatistikleri döndür"""
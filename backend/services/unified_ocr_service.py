@@ -8,7 +8,10 @@ import tempfile
 import os
 from typing import List, Dict, Any, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+from services.ocr_result_store import ocr_result_store, content_hash_of_file
+from services.perceptual_hash import perceptual_index
+from services.keyword_matcher import KeywordMatcher, brand_dictionary
 from core.services import BaseService
 from core.config import settings
 from core.logging import get_logger, log_performance_metric
@@ -16,6 +19,44 @@ from core.exceptions import ExternalServiceError, ValidationError
 
 logger = get_logger('unified_ocr')
 
+# Sözlükler - sıra önceliktir (KeywordMatcher ile tek geçişte taranır)
+COLOR_KEYWORDS = [
+    'BLACK', 'WHITE', 'RED', 'BLUE', 'GREEN', 'YELLOW', 'PINK', 'PURPLE', 'ORANGE', 'BROWN', 'GRAY', 'GREY',
+    'NAVY', 'MAROON', 'CREAM', 'BEIGE', 'BURGUNDY', 'VIOLET', 'AMBER', 'CHOCOLATE', 'SILVER', 'GOLD',
+    'SIYAH', 'BEYAZ', 'KIRMIZI', 'MAVI', 'YESIL', 'SARI', 'PEMBE', 'MOR', 'TURUNCU', 'KAHVERENGI', 'GRI',
+    'LACIVERT', 'BORDO', 'KREM', 'BEJ', 'VİZON', 'EKRU', 'TAŞ', 'DAMSON', 'BONE', 'LEOPAR'
+]
+COLOR_SKIP_WORDS = ['BRANDS', 'BRAND', 'MADE', 'TURKEY', 'QUALITY', 'PRODUCT', 'UNDER', 'GUARANTEE']
+
+BRAND_LINE_INDICATORS = ['BRANDS', 'BRAND', 'COLLECTION', 'COMPANY', 'CORP', 'LTD', 'INC']
+BRAND_LINE_SKIP_WORDS = [
+    'VITA', 'VIEN', 'QUALITY', 'MATERIALS', 'LATEST', 'TECHNOLOGY',
+    'TRADEMARK', 'PRODUCT', 'UNDER', 'GUARANTEE', 'MADE', 'TURKEY',
+    'TULUM', 'BLUZ', 'ETEK', 'PANTOLON', 'ELBISE', 'CEKET'
+]
+
+PRODUCT_TYPE_KEYWORDS = [
+    'TULUM', 'GÖMLEK', 'PANTOLON', 'ETEK', 'CEKET', 'MONT', 'KABAN',
+    'ELBİSE', 'KAZAK', 'HIRKA', 'YELEK', 'ŞORT', 'TAYT', 'BODY',
+    'TİŞÖRT', 'POLO', 'SWEATSHIRT', 'HOODIE', 'BLUZ', 'TUNIK',
+    'JUMPSUIT', 'SHIRT', 'PANTS', 'TROUSERS', 'SKIRT', 'JACKET', 'COAT',
+    'DRESS', 'SWEATER', 'CARDIGAN', 'VEST', 'SHORTS', 'LEGGINGS',
+    'T-SHIRT', 'BLOUSE', 'TUNIC', 'JEANS', 'DENIM'
+]
+
+# Fiyat aralığı kategorileri - ilk eşleşen kategori kazanır
+PRICE_CATEGORY_KEYWORDS = [
+    ('clothing', ['blouse', 'pant', 'jean', 'shirt', 'dress', 'skirt', 'trouser', 'gömlek', 'pantolon', 'elbise', 'etek']),
+    ('shoes', ['shoe', 'boot', 'sandal', 'sneaker', 'ayakkabı', 'bot', 'sandalet', 'spor ayakkabı']),
+    ('accessories', ['bag', 'belt', 'hat', 'scarf', 'çanta', 'kemer', 'şapka', 'atkı', 'aksesuar']),
+    ('jewelry', ['ring', 'necklace', 'bracelet', 'earring', 'yüzük', 'kolye', 'bilezik', 'küpe', 'mücevher']),
+]
+
+MATERIAL_KEYWORDS = [
+    'cotton', 'polyester', 'wool', 'silk', 'leather', 'denim',
+    'pamuk', 'polyester', 'yün', 'ipek', 'deri', 'kot'
+]
+
 @dataclass
 class OCRResult:
     """OCR result data class"""
@@ -46,16 +87,28 @@ class UnifiedOCRService(BaseService):
     def __init__(self):
         super().__init__()
         self.google_ai_service = None
+        self._initialized = False
         self.parallel_workers = settings.ocr.parallel_workers
         self.timeout = settings.ocr.timeout
         self.retry_count = settings.ocr.retry_count
         self.executor = ThreadPoolExecutor(max_workers=self.parallel_workers)
         
-        # AI-powered dynamic detection - no static lists needed!
-        # The system will learn and adapt to new brands, colors, and product types automatically
+        # Sözlük otomatları bir kez kurulur; marka sözlüğü (aktif Brand'ler) brand_dictionary'de
+        self.color_matcher = KeywordMatcher(COLOR_KEYWORDS).build()
+        self.color_skip_matcher = KeywordMatcher(COLOR_SKIP_WORDS).build()
+        self.brand_indicator_matcher = KeywordMatcher(BRAND_LINE_INDICATORS).build()
+        self.brand_skip_matcher = KeywordMatcher(BRAND_LINE_SKIP_WORDS).build()
+        self.product_type_matcher = KeywordMatcher(PRODUCT_TYPE_KEYWORDS).build()
+        self.material_matcher = KeywordMatcher(MATERIAL_KEYWORDS).build()
+        self.price_category_matcher = KeywordMatcher()
+        for category, keywords in PRICE_CATEGORY_KEYWORDS:
+            for keyword in keywords:
+                self.price_category_matcher.add(keyword, category)
+        self.price_category_matcher.build()
     
     async def initialize(self) -> bool:
         """Initialize OCR service"""
+        self._initialized = True
         try:
             # Initialize Google AI Vision API
             if settings.ocr.google_ai_api_key:
@@ -82,22 +135,54 @@ class UnifiedOCRService(BaseService):
             logger.error(f"Failed to cleanup OCR service: {e}")
             return False
     
-    async def process_image(self, image_path: str) -> OCRResult:
-        """Process single image with OCR"""
-        start_time = asyncio.get_event_loop().time()
+    async def process_image(
+        self,
+        image_path: str,
+        content_hash: Optional[str] = None,
+        scope: Optional[str] = None
+    ) -> OCRResult:
+        """
+        Process single image with OCR
+        
+        content_hash: görselin MD5'i (staging checksum'ı). Verilmezse hesaplanır;
+        aynı içerik daha önce OCR'landıysa Vision'a gidilmez.
+        scope: 'KOD|RENK' (perceptual_hash.filename_scope). Verilirse aynı ürün ve
+        rengin yakın-kopya (yeniden çekilmiş) etiketinin OCR sonucu da tekrar
+        kullanılır; bu sonuç yeni içerik hash'i altında kalıcı olarak saklanmaz.
+        """
+        loop = asyncio.get_event_loop()
+        start_time = loop.time()
         
         try:
+            # Servisi kuran her yer initialize() çağırmıyor - ilk kullanımda bir kez dene
+            if not self._initialized:
+                await self.initialize()
+            
             # Try Google AI Vision API first (if available)
             if self.google_ai_service:
                 try:
-                    result = await self._process_with_google_ai(image_path)
-                    if result and result.confidence > 0.7:
-                        return result
+                    if content_hash is None:
+                        content_hash = await loop.run_in_executor(self.executor, content_hash_of_file, image_path)
+                    cached = await ocr_result_store.get_or_compute(
+                        content_hash,
+                        lambda: self._google_ai_result_dict(image_path, content_hash, scope),
+                        should_store=lambda stored: (
+                            stored['confidence'] > 0.7
+                            and 'near_duplicate_of' not in (stored.get('metadata') or {})
+                        )
+                    )
+                    if cached and cached['confidence'] > 0.7:
+                        return OCRResult(**cached)
+                    fallback_reason = 'no_text' if cached is None else 'low_confidence'
                 except Exception as e:
+                    fallback_reason = getattr(e, 'message', None) or str(e)
                     logger.warning(f"Google AI OCR failed, using filename parsing: {e}")
+            else:
+                fallback_reason = 'ocr_unavailable'
             
-            # Fallback to filename parsing
+            # Fallback to filename parsing - neden metadata'da (sessiz kalite kaybı olmasın)
             result = await self._process_with_filename(image_path)
+            result.metadata['ocr_fallback_reason'] = fallback_reason
             
             processing_time = asyncio.get_event_loop().time() - start_time
             log_performance_metric('ocr_single_image', processing_time)
@@ -236,8 +321,8 @@ class UnifiedOCRService(BaseService):
             logger.error(f"Simple product info extraction failed: {e}")
             return ProductInfo(raw_text=ocr_result.text, confidence=0.0)
     
-    async def _process_with_google_ai(self, image_path: str) -> Optional[OCRResult]:
-        """Process image with Google AI Vision API"""
+    async def _process_with_google_ai(self, image_path: str, content_hash: Optional[str] = None) -> Optional[OCRResult]:
+        """Process image with Google AI Vision API (content_hash: ham yanıt bu anahtarla saklanır)"""
         try:
             if not self.google_ai_service:
                 return None
@@ -245,13 +330,8 @@ class UnifiedOCRService(BaseService):
             import time
             start_time = time.time()
             
-            # Google AI service is synchronous, so we run it in executor
-            loop = asyncio.get_event_loop()
-            text = await loop.run_in_executor(
-                self.executor,
-                self.google_ai_service.extract_text_from_image,
-                image_path
-            )
+            # Eşzamanlı istekler vision_batcher'da çok görselli çağrılarda birleşir
+            text = await self.google_ai_service.extract_text_async(image_path, content_hash=content_hash)
             
             processing_time = time.time() - start_time
             
@@ -262,15 +342,47 @@ class UnifiedOCRService(BaseService):
                     language='tr',
                     processing_time=processing_time,
                     method='google_ai',
-                    metadata={'raw_text': text}
+                    metadata={'raw_text': text, 'content_hash': content_hash}
                 )
             
             return None
             
+        except ExternalServiceError:
+            # Sağlayıcı hatası / devre açık / kota - process_image nedeni kaydeder
+            raise
         except Exception as e:
             logger.error(f"Google AI OCR failed: {e}")
             return None
     
+    async def _google_ai_result_dict(
+        self,
+        image_path: str,
+        content_hash: str,
+        scope: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        OCR result store için serileştirilebilir sonuç. Önce aynı kapsamdaki
+        (kod + dosya adındaki renk) yakın-kopya etiket denenir - gri tonlamalı
+        pHash farklı renkleri ayıramaz, renk kapsamı olmadan tekrar kullanım yok.
+        """
+        phash = None
+        if scope and perceptual_index.enabled:
+            loop = asyncio.get_event_loop()
+            phash = await loop.run_in_executor(self.executor, perceptual_index.compute, image_path)
+            neighbour = perceptual_index.find_tag(phash, scope) if phash is not None else None
+            reused = ocr_result_store.get(neighbour) if neighbour else None
+            if reused:
+                perceptual_index.stats['tag_reuses'] += 1
+                logger.info(f"[OCR PHASH] Reusing OCR of near-duplicate tag {neighbour} for {image_path}")
+                return {**reused, 'metadata': {**reused.get('metadata', {}), 'near_duplicate_of': neighbour}}
+        
+        result = await self._process_with_google_ai(image_path, content_hash)
+        if result is None:
+            return None
+        if phash is not None and result.confidence > 0.7:
+            perceptual_index.add_tag(phash, content_hash, scope)
+        return asdict(result)
+    
     async def _process_with_filename(self, image_path: str) -> OCRResult:
         """Process image by parsing filename"""
         try:
@@ -436,18 +548,10 @@ class UnifiedOCRService(BaseService):
             import re
             
             # Common colors in Turkish and English
-            colors = [
-                'BLACK', 'WHITE', 'RED', 'BLUE', 'GREEN', 'YELLOW', 'PINK', 'PURPLE', 'ORANGE', 'BROWN', 'GRAY', 'GREY',
-                'NAVY', 'MAROON', 'CREAM', 'BEIGE', 'BURGUNDY', 'VIOLET', 'AMBER', 'CHOCOLATE', 'SILVER', 'GOLD',
-                'SIYAH', 'BEYAZ', 'KIRMIZI', 'MAVI', 'YESIL', 'SARI', 'PEMBE', 'MOR', 'TURUNCU', 'KAHVERENGI', 'GRI',
-                'LACIVERT', 'BORDO', 'KREM', 'BEJ', 'VİZON', 'EKRU', 'TAŞ', 'DAMSON', 'BONE', 'LEOPAR'
-            ]
-            
-            text_upper = text.upper()
-            for color in colors:
-                if color in text_upper:
-                    logger.info(f"[COLOR] Found: {color}")
-                    return color.title()
+            color = self.color_matcher.first(text)
+            if color:
+                logger.info(f"[COLOR] Found: {color}")
+                return color.title()
             
             # Pattern-based extraction for filename formats
             filename_patterns = [
@@ -460,8 +564,7 @@ class UnifiedOCRService(BaseService):
                 for match in matches:
                     color = match.strip()
                     if len(color) >= 3 and not re.search(r'\d', color):
-                        skip_words = ['BRANDS', 'BRAND', 'MADE', 'TURKEY', 'QUALITY', 'PRODUCT', 'UNDER', 'GUARANTEE']
-                        if not any(word in color for word in skip_words) and color != 'B':
+                        if not self.color_skip_matcher.contains_any(color) and color != 'B':
                             logger.info(f"[COLOR] Found via pattern: {color}")
                             return color.title()
             
@@ -482,7 +585,6 @@ class UnifiedOCRService(BaseService):
             # Look for brand indicators
             # FIRST PASS: Look for lines with brand indicators (highest priority)
             lines = text.split('\n')
-            brand_indicators = ['BRANDS', 'BRAND', 'COLLECTION', 'COMPANY', 'CORP', 'LTD', 'INC']
             
             for line in lines:
                 line = line.strip()
@@ -490,7 +592,7 @@ class UnifiedOCRService(BaseService):
                     continue
                 
                 # Priority 1: Lines containing brand indicators
-                if any(indicator in line.upper() for indicator in brand_indicators):
+                if self.brand_indicator_matcher.contains_any(line):
                     # Clean the brand name
                     brand = line.strip().title()
                     # Special case: "DZAYN BRANDS" or "DIZAYN BRANDS"
@@ -500,7 +602,14 @@ class UnifiedOCRService(BaseService):
                     logger.info(f"[BRAND] Found with indicator: {safe_brand}")
                     return brand
             
-            # SECOND PASS: Look for standalone brand names (lower priority)
+            # SECOND PASS: Active brands from the database (whole word)
+            for _, brand_name in brand_dictionary.matcher().ranked(text):
+                if brand_name:
+                    safe_brand = brand_name.encode('ascii', 'ignore').decode('ascii')
+                    logger.info(f"[BRAND] Found known brand: {safe_brand}")
+                    return brand_name
+            
+            # THIRD PASS: Look for standalone brand names (lower priority)
             for line in lines:
                 line = line.strip()
                 if not line or len(line) < 3:
@@ -517,10 +626,7 @@ class UnifiedOCRService(BaseService):
                 # If line looks like a brand name (reasonable length, no numbers)
                 if 4 <= len(line) <= 30 and not re.search(r'\d', line):
                     # Skip common non-brand words and product names
-                    skip_words = ['VITA', 'VIEN', 'QUALITY', 'MATERIALS', 'LATEST', 'TECHNOLOGY', 
-                                 'TRADEMARK', 'PRODUCT', 'UNDER', 'GUARANTEE', 'MADE', 'TURKEY',
-                                 'TULUM', 'BLUZ', 'ETEK', 'PANTOLON', 'ELBISE', 'CEKET']
-                    if not any(word in line.upper() for word in skip_words):
+                    if not self.brand_skip_matcher.contains_any(line):
                         brand = line.strip().title()
                         safe_brand = brand.encode('ascii', 'ignore').decode('ascii')
                         logger.info(f"[BRAND] Found standalone: {safe_brand}")
@@ -539,23 +645,10 @@ class UnifiedOCRService(BaseService):
         """Extract product type from text - simple approach"""
         try:
             # Simple approach: look for clothing/product type words
-            import re
-            
-            # Common product types in Turkish and English
-            product_types = [
-                'TULUM', 'GÖMLEK', 'PANTOLON', 'ETEK', 'CEKET', 'MONT', 'KABAN',
-                'ELBİSE', 'KAZAK', 'HIRKA', 'YELEK', 'ŞORT', 'TAYT', 'BODY',
-                'TİŞÖRT', 'POLO', 'SWEATSHIRT', 'HOODIE', 'BLUZ', 'TUNIK',
-                'JUMPSUIT', 'SHIRT', 'PANTS', 'TROUSERS', 'SKIRT', 'JACKET', 'COAT',
-                'DRESS', 'SWEATER', 'CARDIGAN', 'VEST', 'SHORTS', 'LEGGINGS',
-                'T-SHIRT', 'BLOUSE', 'TUNIC', 'JEANS', 'DENIM'
-            ]
-            
-            text_upper = text.upper()
-            for product_type in product_types:
-                if product_type in text_upper:
-                    logger.info(f"[PRODUCT TYPE] Found: {product_type}")
-                    return product_type
+            product_type = self.product_type_matcher.first(text)
+            if product_type:
+                logger.info(f"[PRODUCT TYPE] Found: {product_type}")
+                return product_type
             
             # If no product type found, return "Eksik"
             logger.info("[PRODUCT TYPE] No product type found, returning 'Eksik'")
@@ -602,16 +695,8 @@ class UnifiedOCRService(BaseService):
     
     def _extract_material(self, text: str) -> Optional[str]:
         """Extract material from text"""
-        materials = [
-            'cotton', 'polyester', 'wool', 'silk', 'leather', 'denim',
-            'pamuk', 'polyester', 'yün', 'ipek', 'deri', 'kot'
-        ]
-        
-        for material in materials:
-            if material.lower() in text.lower():
-                return material.title()
-        
-        return None
+        material = self.material_matcher.first(text)
+        return material.title() if material else None
     
     def _extract_price(self, text: str) -> Optional[str]:
         """Extract price using smart, modular approach"""
@@ -648,29 +733,8 @@ class UnifiedOCRService(BaseService):
     
     def _determine_product_type(self, text: str) -> str:
         """Determine product type from text for better price extraction"""
-        text_lower = text.lower()
-        
-        # Clothing keywords
-        clothing_keywords = ['blouse', 'pant', 'jean', 'shirt', 'dress', 'skirt', 'trouser', 'gömlek', 'pantolon', 'elbise', 'etek']
-        if any(keyword in text_lower for keyword in clothing_keywords):
-            return 'clothing'
-        
-        # Shoe keywords
-        shoe_keywords = ['shoe', 'boot', 'sandal', 'sneaker', 'ayakkabı', 'bot', 'sandalet', 'spor ayakkabı']
-        if any(keyword in text_lower for keyword in shoe_keywords):
-            return 'shoes'
-        
-        # Accessory keywords
-        accessory_keywords = ['bag', 'belt', 'hat', 'scarf', 'çanta', 'kemer', 'şapka', 'atkı', 'aksesuar']
-        if any(keyword in text_lower for keyword in accessory_keywords):
-            return 'accessories'
-        
-        # Jewelry keywords
-        jewelry_keywords = ['ring', 'necklace', 'bracelet', 'earring', 'yüzük', 'kolye', 'bilezik', 'küpe', 'mücevher']
-        if any(keyword in text_lower for keyword in jewelry_keywords):
-            return 'jewelry'
-        
-        return 'default'
+        # clothing > shoes > accessories > jewelry (PRICE_CATEGORY_KEYWORDS sırası)
+        return self.price_category_matcher.first(text) or 'default'
     
     def _extract_price_simple(self, text: str) -> Optional[str]:
         """Simple fallback price extraction"""
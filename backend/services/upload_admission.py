@@ -0,0 +1,280 @@
+"""
+Upload Admission Controller
+Eşzamanlı upload job'ları için global kabul kontrolü ve kaynak bütçesi
+
+Her job başlamadan önce üç bütçeden pay ayırır:
+    - bytes: aynı anda işlenen staged veri (bellek / disk I/O)
+    - ocr:   bekleyen OCR çağrısı (etiket görseli sayısı, Vision kotası)
+    - cpu:   aynı anda işlenen dosya (resize, hash, CDN hazırlığı)
+
+Bütçe doluysa job kuyrukta bekler (istek hemen döner, işleme sırası gelince
+başlar). Kuyruk da doluysa ServiceOverloadedError (503 + Retry-After).
+
+Küçük job'lar kuyruğun önüne geçer ve bütçenin bir payı yalnızca onlara
+ayrılır; büyük bir yükleme patlaması sırasında bile birkaç dosyalık bir
+job'un gecikmesi öngörülebilir kalır. Bütçeden büyük tek bir job kendi
+payına kırpılır - kabul edilir ama başka büyük job'larla paylaşmaz.
+"""
+
+import asyncio
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from services.filename_parser import filename_parser
+from core.config import settings
+from core.exceptions import ServiceOverloadedError
+from core.logging import get_logger
+
+logger = get_logger('upload_admission')
+
+RESOURCES = ('bytes', 'ocr', 'cpu')
+
+
+@dataclass
+class AdmissionTicket:
+    """Bir job'un bütçe talebi"""
+    job_id: int
+    demand: Dict[str, int]
+    small: bool
+    seq: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+    granted_at: Optional[float] = None
+    released: bool = False
+    _event: Optional[asyncio.Event] = field(default=None, repr=False)
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+    @property
+    def event(self) -> asyncio.Event:
+        if self._event is None:
+            self._event = asyncio.Event()
+            if self.granted:
+                self._event.set()
+        return self._event
+
+
+class UploadAdmissionController:
+    """Job kabulü: bütçe muhasebesi + öncelikli kuyruk"""
+
+    def __init__(
+        self,
+        max_inflight_mb: int = 1024,
+        max_ocr_calls: int = 300,
+        max_cpu_units: int = 1500,
+        max_queued_jobs: int = 20,
+        small_job_files: int = 50,
+        small_job_reserve: float = 0.2
+    ):
+        self.capacity = {
+            'bytes': max(1, max_inflight_mb) * 1024 * 1024,
+            'ocr': max(1, max_ocr_calls),
+            'cpu': max(1, max_cpu_units)
+        }
+        self.max_queued_jobs = max_queued_jobs
+        self.small_job_files = small_job_files
+        # Küçük job'lara ayrılan pay; büyük job'lar bütçenin sadece kalanını kullanabilir
+        self.small_reserve = min(max(small_job_reserve, 0.0), 0.9)
+        self.large_share = 1.0 - self.small_reserve
+
+        self.in_use = {resource: 0 for resource in RESOURCES}
+        # Küçük job'ların kullandığı kısım (büyük job beklerken ayrılmış payla sınırlı)
+        self.in_use_small = {resource: 0 for resource in RESOURCES}
+        self.running: Dict[int, AdmissionTicket] = {}
+        self.queue: List[AdmissionTicket] = []
+        self._seq = itertools.count()
+
+        # Retry-After tahmini için job süresi ortalaması (EWMA)
+        self.avg_job_seconds = 30.0
+        self.stats = {'admitted': 0, 'queued': 0, 'rejected': 0, 'total_wait_seconds': 0.0}
+
+    # ------------------------------------------------------------------
+    # Talep
+    # ------------------------------------------------------------------
+
+    def demand_for(self, files: List) -> Dict[str, int]:
+        """Staged dosyalardan bütçe talebi (job'un kullanabileceği paya kırpılmış)"""
+        share = 1.0 if len(files) <= self.small_job_files else self.large_share
+        tags, _ = filename_parser.classify(files)
+        demand = {
+            'bytes': sum(getattr(file, 'size', 0) or 0 for file in files),
+            'ocr': len(tags),
+            'cpu': len(files)
+        }
+        return {resource: min(amount, int(self.capacity[resource] * share)) for resource, amount in demand.items()}
+
+    def check_capacity(self):
+        """Kuyruk doluysa yeni job'u baştan reddet (staging'e hiç yazılmadan)"""
+        if len(self.queue) >= self.max_queued_jobs:
+            self.stats['rejected'] += 1
+            raise ServiceOverloadedError(
+                "Upload capacity exhausted, please retry later",
+                retry_after=self.estimate_retry_after(),
+                details={'queued_jobs': len(self.queue), 'running_jobs': len(self.running)}
+            )
+
+    def reserve(self, job_id: int, files: List, force: bool = False) -> AdmissionTicket:
+        """
+        Job için bilet al. Bütçe uygunsa hemen verilir, değilse kuyruğa girer.
+        force=False iken kuyruk doluysa ServiceOverloadedError.
+        """
+        ticket = AdmissionTicket(
+            job_id=job_id,
+            demand=self.demand_for(files),
+            small=len(files) <= self.small_job_files,
+            seq=next(self._seq)
+        )
+
+        if not self.queue_ahead(ticket) and self._fits(ticket, self._large_waiting()):
+            self._grant(ticket)
+            return ticket
+
+        if not force:
+            self.check_capacity()
+        self.queue.append(ticket)
+        self.queue.sort(key=lambda queued: (not queued.small, queued.seq))
+        self.stats['queued'] += 1
+        logger.info(
+            f"[ADMISSION] Job {job_id} queued at position {self.queue.index(ticket) + 1} "
+            f"(demand {ticket.demand}, in use {self.in_use})"
+        )
+        return ticket
+
+    def queue_ahead(self, ticket: AdmissionTicket) -> bool:
+        """Bu bilet önünde bekleyen (aynı ya da daha yüksek öncelikli) job var mı"""
+        return any(queued.small or not ticket.small for queued in self.queue)
+
+    async def acquire(self, ticket: AdmissionTicket):
+        """Bilet verilene kadar bekle"""
+        if not ticket.granted:
+            await ticket.event.wait()
+
+    def release(self, ticket: AdmissionTicket):
+        """Job bitti (ya da iptal) - payı geri ver, kuyruğu ilerlet"""
+        if ticket.released:
+            return
+        ticket.released = True
+
+        if ticket.granted:
+            self.running.pop(ticket.job_id, None)
+            for resource in RESOURCES:
+                self.in_use[resource] -= ticket.demand[resource]
+                if ticket.small:
+                    self.in_use_small[resource] -= ticket.demand[resource]
+            elapsed = time.monotonic() - ticket.granted_at
+            self.avg_job_seconds = 0.8 * self.avg_job_seconds + 0.2 * elapsed
+        elif ticket in self.queue:
+            self.queue.remove(ticket)
+
+        self._dispatch()
+
+    def position(self, ticket: AdmissionTicket) -> int:
+        """Kuyruk sırası (1'den başlar), çalışıyorsa 0"""
+        return self.queue.index(ticket) + 1 if ticket in self.queue else 0
+
+    # ------------------------------------------------------------------
+    # Muhasebe
+    # ------------------------------------------------------------------
+
+    def _large_waiting(self) -> bool:
+        return any(not queued.small for queued in self.queue)
+
+    def _fits(self, ticket: AdmissionTicket, large_waiting: bool = False) -> bool:
+        if not self.running:
+            return True
+        share = 1.0 if ticket.small else self.large_share
+        fits = all(
+            self.in_use[resource] + ticket.demand[resource] <= self.capacity[resource] * share
+            for resource in RESOURCES
+        )
+        if fits and ticket.small and large_waiting:
+            # Büyük job beklerken küçükler sadece ayrılmış payı kullanır - büyük job aç kalmaz
+            fits = all(
+                self.in_use_small[resource] + ticket.demand[resource] <= self.capacity[resource] * self.small_reserve
+                for resource in RESOURCES
+            )
+        return fits
+
+    def _grant(self, ticket: AdmissionTicket):
+        for resource in RESOURCES:
+            self.in_use[resource] += ticket.demand[resource]
+            if ticket.small:
+                self.in_use_small[resource] += ticket.demand[resource]
+        ticket.granted_at = time.monotonic()
+        self.running[ticket.job_id] = ticket
+        self.stats['admitted'] += 1
+        self.stats['total_wait_seconds'] += ticket.granted_at - ticket.enqueued_at
+        if ticket._event is not None:
+            ticket.event.set()
+
+    def _dispatch(self):
+        """Sırayla sığan job'ları başlat; sığmayan ilk büyük job diğer büyükleri bekletir (FIFO)"""
+        large_blocked = False
+        large_waiting = self._large_waiting()
+        for ticket in list(self.queue):
+            if not ticket.small and large_blocked:
+                continue
+            if self._fits(ticket, large_waiting):
+                self.queue.remove(ticket)
+                self._grant(ticket)
+                logger.info(f"[ADMISSION] Job {ticket.job_id} admitted after {ticket.granted_at - ticket.enqueued_at:.1f}s")
+            elif not ticket.small:
+                large_blocked = True
+            large_waiting = self._large_waiting()
+
+    def estimate_retry_after(self) -> int:
+        """Kuyruğun bir job boşaltması için tahmini süre (saniye)"""
+        slots = max(1, len(self.running))
+        waves = (len(self.queue) + 1) / slots
+        return max(1, min(300, math.ceil(self.avg_job_seconds * waves)))
+
+    def get_state(self) -> Dict[str, Any]:
+        """Anlık bütçe, çalışan ve bekleyen job'lar"""
+        now = time.monotonic()
+        return {
+            'capacity': {
+                'inflight_mb': round(self.capacity['bytes'] / 1024 / 1024, 1),
+                'ocr_calls': self.capacity['ocr'],
+                'cpu_units': self.capacity['cpu']
+            },
+            'in_use': {
+                'inflight_mb': round(self.in_use['bytes'] / 1024 / 1024, 1),
+                'ocr_calls': self.in_use['ocr'],
+                'cpu_units': self.in_use['cpu']
+            },
+            'utilization': {
+                resource: round(self.in_use[resource] / self.capacity[resource], 3)
+                for resource in RESOURCES
+            },
+            'running': [
+                {'job_id': ticket.job_id, 'small': ticket.small, 'running_seconds': round(now - ticket.granted_at, 1)}
+                for ticket in self.running.values()
+            ],
+            'queue': [
+                {'job_id': ticket.job_id, 'small': ticket.small, 'waiting_seconds': round(now - ticket.enqueued_at, 1)}
+                for ticket in self.queue
+            ],
+            'max_queued_jobs': self.max_queued_jobs,
+            'avg_job_seconds': round(self.avg_job_seconds, 1),
+            'retry_after_estimate': self.estimate_retry_after(),
+            'stats': {
+                **self.stats,
+                'avg_wait_seconds': round(self.stats['total_wait_seconds'] / self.stats['admitted'], 2)
+                if self.stats['admitted'] else 0.0
+            }
+        }
+
+
+# Global instance
+upload_admission = UploadAdmissionController(
+    max_inflight_mb=settings.upload.admission_max_inflight_mb,
+    max_ocr_calls=settings.upload.admission_max_ocr_calls,
+    max_cpu_units=settings.upload.admission_max_cpu_units,
+    max_queued_jobs=settings.upload.admission_max_queued_jobs,
+    small_job_files=settings.upload.admission_small_job_files,
+    small_job_reserve=settings.upload.admission_small_job_reserve
+)
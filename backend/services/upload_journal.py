@@ -0,0 +1,324 @@
+"""
+Upload Stage Journal
+Dosya bazında kalıcı aşama günlüğü (upload_job_files)
+
+Her staged dosya için tamamlanan son aşama ve o aşamanın sonucu saklanır:
+    staged -> ocr_done -> cdn_uploaded -> db_written -> collage_scheduled
+Process yeniden başlarsa job kaldığı aşamadan devam eder; OCR sonucu ve CDN
+URL'i günlükten okunduğu için ücretli OCR çağrısı ve CDN transferi tekrarlanmaz.
+
+Günlük yazımları kendi kısa ömürlü session'ı ile yapılır; böylece işlem hattının
+transaction'larını (ör. ultra fast batch insert) erkenden commit etmez. İşlem
+hattı *_async varyantlarını kullanır: DB yazımı executor'da, event loop bloklanmaz.
+
+Job sahipliği upload_jobs.lease_owner / lease_expires_at ile tutulur: job'u
+çalıştıran (ya da admission kuyruğunda bekleten) worker lease'i heartbeat ile
+uzatır. Sadece lease'i dolmuş job'lar devralınır - yavaş bir aşama ya da
+kuyrukta bekleyen job başka worker'da ikinci kez çalışmaz; devraldıktan sonra
+çöken worker'ın 'resuming' job'u da lease dolunca tekrar devralınır.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, or_, select, update
+
+from database import SessionLocal
+from models.upload_job import UploadJob, UploadJobFile
+from services.upload_progress_bus import upload_progress_bus
+from core.logging import get_logger
+
+logger = get_logger('upload_journal')
+
+STAGES = ['staged', 'ocr_done', 'cdn_uploaded', 'db_written', 'collage_scheduled']
+STAGE_RANK = {stage: rank for rank, stage in enumerate(STAGES)}
+
+# Bu process'in lease sahibi kimliği
+WORKER_ID = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Devralınabilir job durumları
+RESUMABLE_STATUSES = ('processing', 'resuming')
+
+
+def lease_until(lease_seconds: int) -> datetime:
+    return datetime.utcnow() + timedelta(seconds=lease_seconds)
+
+
+class UploadJournal:
+    """upload_job_files üzerinde aşama takibi - hatalar işlem hattını durdurmaz"""
+
+    def __init__(self):
+        # job_id -> staged_path -> entry (son bilinen durum)
+        self._entries: Dict[int, Dict[str, Dict[str, Any]]] = {}
+
+    # ------------------------------------------------------------------
+    # Okuma
+    # ------------------------------------------------------------------
+
+    def load(self, job_id: int) -> Dict[str, Dict[str, Any]]:
+        """Job'un günlüğünü DB'den oku ve bellekte tut"""
+        with SessionLocal() as session:
+            rows = session.execute(
+                select(UploadJobFile).where(UploadJobFile.job_id == job_id).order_by(UploadJobFile.file_index)
+            ).scalars().all()
+            entries = {
+                row.staged_path: {
+                    'id': row.id,
+                    'file_index': row.file_index,
+                    'filename': row.filename,
+                    'staged_path': row.staged_path,
+                    'checksum': row.checksum,
+                    'size': row.size,
+                    'stage': row.stage,
+                    'ocr_data': row.ocr_data,
+                    'cdn_url': row.cdn_url,
+                    'folder_path': row.folder_path
+                }
+                for row in rows
+            }
+        self._entries[job_id] = entries
+        return entries
+
+    def get(self, staged) -> Optional[Dict[str, Any]]:
+        """Staged dosyanın günlük kaydı (job'a bağlı değilse None)"""
+        job_id = getattr(staged, 'job_id', None)
+        if job_id is None:
+            return None
+        entries = self._entries.get(job_id)
+        if entries is None:
+            try:
+                entries = self.load(job_id)
+            except Exception as e:
+                logger.warning(f"[JOURNAL] Could not load job {job_id}: {e}")
+                return None
+        return entries.get(staged.path)
+
+    def has_reached(self, staged, stage: str) -> bool:
+        entry = self.get(staged)
+        return bool(entry) and STAGE_RANK.get(entry['stage'], -1) >= STAGE_RANK[stage]
+
+    # ------------------------------------------------------------------
+    # Yazma
+    # ------------------------------------------------------------------
+
+    def record_staged(self, job_id: int, staged_files: List) -> None:
+        """Staging tamamlandı - dosya başına bir satır (tekrar çağrılırsa eksikleri ekler)"""
+        try:
+            existing = self.load(job_id)
+            now = datetime.utcnow()
+            rows = [
+                {
+                    'job_id': job_id,
+                    'file_index': index,
+                    'filename': staged.filename,
+                    'staged_path': staged.path,
+                    'checksum': staged.checksum,
+                    'size': staged.size,
+                    'stage': 'staged',
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for index, staged in enumerate(staged_files)
+                if staged.path not in existing
+            ]
+            if rows:
+                with SessionLocal() as session:
+                    session.execute(insert(UploadJobFile), rows)
+                    session.commit()
+                self.load(job_id)
+            logger.info(f"[JOURNAL] Job {job_id}: {len(rows)} files journaled as staged")
+        except Exception as e:
+            logger.warning(f"[JOURNAL] Could not record staged files for job {job_id}: {e}")
+
+    def advance(self, staged, stage: str, **fields) -> None:
+        """Tek dosyayı bir sonraki aşamaya taşı"""
+        self.advance_many([(staged, fields)], stage)
+
+    def advance_many(self, updates: Iterable, stage: str, requires: Optional[str] = None) -> None:
+        """
+        Birden fazla dosyayı tek statement ile ilerlet.
+        updates: [(staged, {alan: değer}), ...] - aşama geriye gitmez.
+        requires: verilirse sadece bu aşamaya ulaşmış dosyalar ilerler.
+        """
+        rows, touched = self._plan_advance(updates, stage, requires)
+        if rows and self._write_rows(rows, f"advance {len(rows)} files to {stage}"):
+            self._apply_advance(touched, stage)
+
+    async def advance_async(self, staged, stage: str, **fields) -> None:
+        """advance - event loop'tan çağrılır, DB yazımı executor'da"""
+        await self.advance_many_async([(staged, fields)], stage)
+
+    async def advance_many_async(self, updates: Iterable, stage: str, requires: Optional[str] = None) -> None:
+        """advance_many - event loop'tan çağrılır, DB yazımı executor'da"""
+        updates = list(updates)
+        await self._ensure_loaded(staged for staged, _ in updates)
+        rows, touched = self._plan_advance(updates, stage, requires)
+        if rows and await asyncio.get_event_loop().run_in_executor(
+            None, self._write_rows, rows, f"advance {len(rows)} files to {stage}"
+        ):
+            # Bellek kaydı ve ilerleme olayları event loop'ta güncellenir
+            self._apply_advance(touched, stage)
+
+    def mark_failed(self, staged, error: str) -> None:
+        """Devam ettirilemeyen dosya (staging kaybolduysa)"""
+        entry = self.get(staged)
+        if entry and self._write_rows([self._failed_row(entry, error)], f"mark {entry['filename']} as failed"):
+            entry['stage'] = 'failed'
+
+    async def mark_failed_async(self, staged, error: str) -> None:
+        """mark_failed - event loop'tan çağrılır, DB yazımı executor'da"""
+        await self._ensure_loaded([staged])
+        entry = self.get(staged)
+        if entry and await asyncio.get_event_loop().run_in_executor(
+            None, self._write_rows, [self._failed_row(entry, error)], f"mark {entry['filename']} as failed"
+        ):
+            entry['stage'] = 'failed'
+
+    def _plan_advance(self, updates: Iterable, stage: str, requires: Optional[str]):
+        now = datetime.utcnow()
+        rows = []
+        touched = []
+        for staged, fields in updates:
+            entry = self.get(staged)
+            if not entry:
+                continue
+            rank = STAGE_RANK.get(entry['stage'], -1)
+            if rank >= STAGE_RANK[stage] or (requires and rank < STAGE_RANK[requires]):
+                continue
+            rows.append({'id': entry['id'], 'stage': stage, 'updated_at': now, **fields})
+            touched.append((staged.job_id, entry, fields))
+        return rows, touched
+
+    def _apply_advance(self, touched: List, stage: str) -> None:
+        for job_id, entry, fields in touched:
+            entry['stage'] = stage
+            entry.update(fields)
+            upload_progress_bus.file_event(job_id, entry['filename'], stage)
+
+    @staticmethod
+    def _failed_row(entry: Dict[str, Any], error: str) -> Dict[str, Any]:
+        return {'id': entry['id'], 'stage': 'failed', 'error_message': error[:1000], 'updated_at': datetime.utcnow()}
+
+    def _write_rows(self, rows: List[Dict[str, Any]], action: str) -> bool:
+        """ORM bulk UPDATE by primary key (executemany) - thread-safe, bellek kaydına dokunmaz"""
+        try:
+            with SessionLocal() as session:
+                session.execute(update(UploadJobFile), rows)
+                session.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"[JOURNAL] Could not {action}: {e}")
+            return False
+
+    async def _ensure_loaded(self, staged_files: Iterable) -> None:
+        """Belleğe alınmamış job'ların günlüğünü executor'da oku (get() event loop'u bloklamasın)"""
+        job_ids = {getattr(staged, 'job_id', None) for staged in staged_files} - {None} - set(self._entries)
+        for job_id in job_ids:
+            try:
+                await asyncio.get_event_loop().run_in_executor(None, self.load, job_id)
+            except Exception as e:
+                logger.warning(f"[JOURNAL] Could not load job {job_id}: {e}")
+
+    def forget(self, job_id: int) -> None:
+        """Job bitti - bellek kaydını bırak (DB satırları denetim için kalır)"""
+        self._entries.pop(job_id, None)
+
+    # ------------------------------------------------------------------
+    # Yeniden başlatma
+    # ------------------------------------------------------------------
+
+    def find_interrupted_jobs(self, stale_seconds: int) -> List[int]:
+        """
+        Lease'i dolmuş 'processing' / 'resuming' job'lar (günlüğü olanlar).
+        Lease'i hiç olmayan eski kayıtlar için günlüğün stale_seconds süredir
+        ilerlememesi yeterli sayılır.
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=stale_seconds)
+        with SessionLocal() as session:
+            rows = session.execute(
+                select(UploadJobFile.job_id)
+                .join(UploadJob, UploadJob.id == UploadJobFile.job_id)
+                .where(
+                    UploadJob.status.in_(RESUMABLE_STATUSES),
+                    or_(UploadJob.lease_expires_at.is_(None), UploadJob.lease_expires_at < now)
+                )
+                .group_by(UploadJobFile.job_id, UploadJob.lease_expires_at)
+                .having(or_(UploadJob.lease_expires_at.isnot(None), func.max(UploadJobFile.updated_at) < cutoff))
+            ).all()
+        return [row[0] for row in rows]
+
+    def claim_job(self, job_id: int, lease_seconds: int) -> bool:
+        """
+        Lease'i dolmuş job'u bu process için sahiplen - koşullu UPDATE, aynı job'u
+        birden fazla worker devralamaz.
+        """
+        now = datetime.utcnow()
+        with SessionLocal() as session:
+            claimed = session.execute(
+                update(UploadJob)
+                .where(
+                    UploadJob.id == job_id,
+                    UploadJob.status.in_(RESUMABLE_STATUSES),
+                    or_(UploadJob.lease_expires_at.is_(None), UploadJob.lease_expires_at < now)
+                )
+                .values(status='resuming', lease_owner=WORKER_ID, lease_expires_at=lease_until(lease_seconds))
+            ).rowcount
+            session.commit()
+        return claimed == 1
+
+    def fail_job(self, job_id: int, error: str) -> bool:
+        """
+        Job'u bu process adına kalıcı olarak 'error' durumuna al (lease de bırakılır).
+        Yazılamazsa False - job devralınabilir kalır, staging silinmemeli.
+        """
+        try:
+            with SessionLocal() as session:
+                failed = session.execute(
+                    update(UploadJob)
+                    .where(
+                        UploadJob.id == job_id,
+                        UploadJob.lease_owner == WORKER_ID,
+                        UploadJob.status.in_(RESUMABLE_STATUSES)
+                    )
+                    .values(
+                        status='error',
+                        error_message=error[:1000],
+                        completed_at=datetime.now(),
+                        lease_owner=None,
+                        lease_expires_at=None
+                    )
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                session.commit()
+            return failed == 1
+        except Exception as e:
+            logger.error(f"[JOURNAL] Could not mark job {job_id} as failed: {e}")
+            return False
+
+    def renew_leases(self, job_ids: Iterable[int], lease_seconds: int) -> int:
+        """Bu process'in job'larının lease'ini uzat (heartbeat) - uzatılan job sayısı"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        with SessionLocal() as session:
+            renewed = session.execute(
+                update(UploadJob)
+                .where(
+                    UploadJob.id.in_(job_ids),
+                    UploadJob.lease_owner == WORKER_ID,
+                    UploadJob.status.in_(RESUMABLE_STATUSES)
+                )
+                .values(lease_expires_at=lease_until(lease_seconds))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+        return renewed
+
+
+# Global instance
+upload_journal = UploadJournal()
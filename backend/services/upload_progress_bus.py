@@ -0,0 +1,222 @@
+"""
+Upload Progress Bus
+Upload job ilerlemesi için bellek içi yayın kanalı
+
+- Her ilerleme güncellemesi bellekteki snapshot'ı günceller ve abonelere
+  (SSE bağlantıları) anında iletilir.
+- UploadJob satırı her dosyada değil, debounce ile en fazla
+  flush_interval saniyede bir yazılır; job bitince bekleyen yazım iptal
+  edilir ve son durum çağıran tarafından tek seferde yazılır.
+- Dosya bazlı aşama olayları (staged, ocr_done, cdn_uploaded, ...) sadece
+  yayınlanır; kalıcı kayıtları upload_journal tutar.
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set
+
+from database import SessionLocal
+from models.upload_job import UploadJob
+from core.config import settings
+from core.logging import get_logger
+
+logger = get_logger('upload_progress_bus')
+
+TERMINAL_STATUSES = ('completed', 'error')
+
+
+class UploadProgressBus:
+    """Job bazında snapshot + abonelik + debounce'lu kalıcılık"""
+
+    def __init__(self, flush_interval: float = 2.0, queue_size: int = 500, history_size: int = 200):
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.history_size = history_size
+
+        self._snapshots: Dict[int, Dict[str, Any]] = {}
+        self._history: Dict[int, Deque[Dict[str, Any]]] = {}
+        self._owners: Dict[int, int] = {}  # job_id -> uploader_id (erişim kontrolü DB'ye gitmeden)
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
+
+        self.stats = {'events_published': 0, 'db_flushes': 0, 'updates_coalesced': 0}
+
+    # ------------------------------------------------------------------
+    # Yayın
+    # ------------------------------------------------------------------
+
+    def start(self, job: UploadJob):
+        """Job işleme başladı - snapshot'ı DB satırından başlat"""
+        self._snapshots[job.id] = {
+            'job_id': job.id,
+            'status': 'processing',
+            'total_files': job.total_files,
+            'processed_files': job.processed_files or 0,
+            'failed_files': 0,
+            'processing_log': {},
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'completed_at': None
+        }
+        self._history[job.id] = deque(maxlen=self.history_size)
+        self._owners[job.id] = job.uploader_id
+        self._publish(job.id, 'progress', self._snapshots[job.id])
+
+    def get_owner(self, job_id: int) -> Optional[int]:
+        """Bu process'te izlenen job'un yükleyicisi"""
+        return self._owners.get(job_id)
+
+    def get_snapshot(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Bu process'te izlenen job'un son durumu (DB'ye gitmeden)"""
+        return self._snapshots.get(job_id)
+
+    def update_progress(
+        self,
+        job_id: int,
+        processed_files: int,
+        processing_log: Dict[str, Any]
+    ):
+        """İlerlemeyi yayınla, DB yazımını debounce et"""
+        snapshot = self._snapshots.get(job_id)
+        if snapshot is None:
+            return
+        snapshot['processed_files'] = processed_files
+        snapshot['processing_log'] = processing_log
+        snapshot['failed_files'] = processing_log.get('failed_files', 0)
+        self._publish(job_id, 'progress', snapshot)
+
+        if job_id in self._flush_tasks:
+            self.stats['updates_coalesced'] += 1
+            return
+        try:
+            self._flush_tasks[job_id] = asyncio.get_event_loop().create_task(self._flush_later(job_id))
+        except RuntimeError:
+            # Event loop yok (senkron çağrı) - doğrudan yaz
+            self._flush(job_id)
+
+    def file_event(self, job_id: int, filename: str, stage: str, **data):
+        """Dosya bazlı aşama olayı"""
+        if job_id not in self._snapshots:
+            return
+        self._publish(job_id, 'file', {'filename': filename, 'stage': stage, **data})
+
+    def finish(self, job_id: int, status: str, processed_files: int, processing_log: Optional[Dict[str, Any]] = None):
+        """
+        Job bitti: bekleyen debounce yazımını iptal et (çağıran son durumu yazar),
+        'complete' olayını yayınla ve aboneleri kapat.
+        """
+        task = self._flush_tasks.pop(job_id, None)
+        if task:
+            task.cancel()
+
+        snapshot = self._snapshots.pop(job_id, None)
+        self._owners.pop(job_id, None)
+        if snapshot is None:
+            return
+        snapshot.update({
+            'status': status,
+            'processed_files': processed_files,
+            'completed_at': datetime.utcnow().isoformat()
+        })
+        if processing_log is not None:
+            snapshot['processing_log'] = processing_log
+            snapshot['failed_files'] = processing_log.get('failed_files', 0)
+        self._publish(job_id, 'complete', snapshot)
+
+        for queue in self._subscribers.pop(job_id, set()):
+            self._put(queue, None)
+        self._history.pop(job_id, None)
+
+    def _publish(self, job_id: int, event: str, data: Dict[str, Any]):
+        message = {'event': event, 'data': dict(data), 'ts': time.time()}
+        history = self._history.get(job_id)
+        if history is not None and event == 'file':
+            history.append(message)
+        for queue in self._subscribers.get(job_id, ()):
+            self._put(queue, message)
+        self.stats['events_published'] += 1
+
+    def _put(self, queue: asyncio.Queue, message):
+        # Yavaş istemci üreticiyi bloklamaz - en eski olay düşer
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(message)
+
+    # ------------------------------------------------------------------
+    # Abonelik
+    # ------------------------------------------------------------------
+
+    async def subscribe(self, job_id: int, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Job olaylarını akıt. Önce mevcut snapshot ve son dosya olayları,
+        sonra canlı olaylar. Heartbeat için None döner; job bitince sonlanır.
+        """
+        snapshot = self._snapshots.get(job_id)
+        if snapshot is None:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            yield {'event': 'progress', 'data': dict(snapshot), 'ts': time.time()}
+            for message in list(self._history.get(job_id, ())):
+                yield message
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if message is None:
+                    return
+                yield message
+                if message['event'] == 'complete':
+                    return
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+
+    # ------------------------------------------------------------------
+    # Kalıcılık
+    # ------------------------------------------------------------------
+
+    async def _flush_later(self, job_id: int):
+        try:
+            await asyncio.sleep(self.flush_interval)
+        except asyncio.CancelledError:
+            return
+        self._flush_tasks.pop(job_id, None)
+        self._flush(job_id)
+
+    def _flush(self, job_id: int):
+        snapshot = self._snapshots.get(job_id)
+        if snapshot is None:
+            return
+        try:
+            with SessionLocal() as session:
+                session.query(UploadJob).filter(UploadJob.id == job_id).update({
+                    UploadJob.processed_files: snapshot['processed_files'],
+                    UploadJob.processing_log: snapshot['processing_log'],
+                    UploadJob.status: 'processing'
+                }, synchronize_session=False)
+                session.commit()
+            self.stats['db_flushes'] += 1
+        except Exception as e:
+            logger.warning(f"[PROGRESS] Flush failed for job {job_id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'active_jobs': len(self._snapshots),
+            'subscribers': sum(len(queues) for queues in self._subscribers.values())
+        }
+
+
+# Global instance
+upload_progress_bus = UploadProgressBus(flush_interval=settings.upload.progress_flush_seconds)
@@ -0,0 +1,98 @@
+"""
+Upload Dependency Scheduler
+Etiket (tag) OCR'ları paralel çalışır, ürün görselleri sadece kendi etiketini bekler
+
+Bağımlılık grafiği (code, color) anahtarı üzerinden kurulur:
+    tag(AN-50226-B, BLACK)  --->  AN-50226 B BLACK 11.jpg
+                            --->  AN-50226 B BLACK 12.jpg
+Etiketi olmayan ürün görselleri hiçbir şey beklemeden işlenir.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from core.logging import get_logger
+
+logger = get_logger('upload_scheduler')
+
+ProcessFn = Callable[[Any], Awaitable[Any]]
+CompleteFn = Callable[[Any, Any, bool], Awaitable[None]]
+
+
+class UploadDependencyScheduler:
+    """DAG scheduler - her ürün görseli yalnızca kendi etiketinin future'ını bekler"""
+
+    def __init__(
+        self,
+        key_fn: Callable[[str], Optional[Hashable]],
+        is_tag_fn: Callable[[str], bool],
+        tag_concurrency: int = 10,
+        product_concurrency: int = 10
+    ):
+        self.key_fn = key_fn
+        self.is_tag_fn = is_tag_fn
+        self.tag_concurrency = max(1, tag_concurrency)
+        self.product_concurrency = max(1, product_concurrency)
+
+    async def run(
+        self,
+        files: List,
+        process_fn: ProcessFn,
+        on_complete: Optional[CompleteFn] = None
+    ) -> List[Any]:
+        """
+        Tüm dosyaları bağımlılık sırasına göre işle.
+        Sonuçlar girdi sırasıyla döner; hatalar Exception olarak listede yer alır.
+        """
+        tag_semaphore = asyncio.Semaphore(self.tag_concurrency)
+        product_semaphore = asyncio.Semaphore(self.product_concurrency)
+        tag_tasks: Dict[Hashable, List[asyncio.Task]] = {}
+
+        async def run_one(file, is_tag: bool, semaphore: asyncio.Semaphore):
+            async with semaphore:
+                try:
+                    result = await process_fn(file)
+                except Exception as e:
+                    logger.error(f"[SCHEDULER] Error with {file.filename}: {e}")
+                    result = e
+            if on_complete:
+                try:
+                    await on_complete(file, result, is_tag)
+                except Exception as e:
+                    logger.warning(f"[SCHEDULER] Completion callback failed: {e}")
+            return result
+
+        async def run_after_tag(file, key):
+            # Bir ürün sadece kendi etiketini bekler; etiketin hatası ürünü bloklamaz
+            dependencies = tag_tasks.get(key) if key is not None else None
+            if dependencies:
+                await asyncio.wait(dependencies)
+            return await run_one(file, False, product_semaphore)
+
+        plan = [(file, self.is_tag_fn(file.filename), self.key_fn(file.filename)) for file in files]
+
+        # 1) Etiketleri hemen başlat ki ürünler future'larını bekleyebilsin
+        all_tasks: List[asyncio.Task] = []
+        for file, is_tag, key in plan:
+            if is_tag:
+                task = asyncio.create_task(run_one(file, True, tag_semaphore))
+                tag_tasks.setdefault(key, []).append(task)
+                all_tasks.append(task)
+            else:
+                all_tasks.append(None)
+
+        # 2) Ürün görselleri - kendi etiketlerine bağlanır, girdi sırası korunur
+        waiting = 0
+        for index, (file, is_tag, key) in enumerate(plan):
+            if not is_tag:
+                if key is not None and key in tag_tasks:
+                    waiting += 1
+                all_tasks[index] = asyncio.create_task(run_after_tag(file, key))
+
+        tag_count = sum(len(tasks) for tasks in tag_tasks.values())
+        logger.info(
+            f"[SCHEDULER] {tag_count} tags across {len(tag_tasks)} keys, "
+            f"{len(plan) - tag_count} product images ({waiting} waiting on their tag)"
+        )
+
+        return await asyncio.gather(*all_tasks, return_exceptions=True)
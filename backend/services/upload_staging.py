@@ -0,0 +1,154 @@
+"""
+Upload Staging Service
+Multipart parçalarını tek geçişte diske akıtır (streaming ingest)
+
+Her dosya sabit boyutlu parçalar halinde okunur, aynı geçişte checksum
+hesaplanır ve doğrudan job'a ait staging dizinine yazılır. Sonraki aşamalar
+(OCR, CDN, kalıcı dizin) byte yerine bu dosyanın yolunu kullanır.
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import itertools
+from dataclasses import dataclass
+from typing import List, Optional, BinaryIO
+
+import aiofiles
+
+from core.config import settings
+from core.exceptions import ValidationError
+from core.logging import get_logger
+
+logger = get_logger('upload_staging')
+
+
+@dataclass
+class StagedFile:
+    """Staging dizinine yazılmış upload parçası"""
+    filename: str  # Orijinal dosya adı (parsing için)
+    path: str  # Staging dizinindeki mutlak yol
+    size: int
+    checksum: str  # MD5 (OCR cache anahtarlarıyla uyumlu)
+    content_type: Optional[str] = None
+    job_id: Optional[int] = None  # Aşama günlüğü (upload_job_files) anahtarı
+
+    def open(self) -> BinaryIO:
+        """Dosyayı okumak için binary handle döndür"""
+        return open(self.path, 'rb')
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+
+class UploadStagingService:
+    """Streaming ingest - her upload bir kez okunur, hiç kopyalanmaz"""
+
+    def __init__(self, staging_root: str = None):
+        if staging_root is None:
+            # backend/uploads/staging - kalıcı ürün dizini ile aynı dosya sisteminde
+            # tutulur ki final konuma taşıma bir rename olsun
+            staging_root = os.path.abspath(
+                os.path.join(os.path.dirname(__file__), "..", "uploads", "staging")
+            )
+        self.staging_root = staging_root
+        self.chunk_size = settings.upload.staging_chunk_size_kb * 1024
+        self.max_file_size = settings.upload.max_file_size_mb * 1024 * 1024
+        self._adhoc_index = itertools.count()
+
+    def get_job_dir(self, job_id) -> str:
+        """Job'a ait staging dizini"""
+        return os.path.join(self.staging_root, str(job_id))
+
+    def _storage_name(self, index: int, filename: str) -> str:
+        """Staging için güvenli ve çakışmasız dosya adı"""
+        base = os.path.basename(filename or 'upload')
+        safe = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', base).strip('. ') or 'upload'
+        return f"{index:04d}_{safe}"
+
+    def get_staged_path(self, job_id, index: int, filename: str) -> str:
+        """Job içindeki index'inci dosyanın staging yolu"""
+        return os.path.join(self.get_job_dir(job_id), self._storage_name(index, filename))
+
+    async def stage_file(self, file, job_id, index: int = 0) -> StagedFile:
+        """Tek bir UploadFile'ı parça parça staging dizinine yaz"""
+        os.makedirs(self.get_job_dir(job_id), exist_ok=True)
+
+        target_path = self.get_staged_path(job_id, index, file.filename)
+        digest = hashlib.md5()
+        size = 0
+
+        try:
+            async with aiofiles.open(target_path, 'wb') as out:
+                while True:
+                    chunk = await file.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_file_size:
+                        raise ValidationError(
+                            f"File too large: {file.filename}",
+                            details={'max_file_size_mb': settings.upload.max_file_size_mb}
+                        )
+                    digest.update(chunk)
+                    await out.write(chunk)
+        except Exception:
+            if os.path.exists(target_path):
+                os.unlink(target_path)
+            raise
+
+        staged = StagedFile(
+            filename=file.filename,
+            path=target_path,
+            size=size,
+            checksum=digest.hexdigest(),
+            content_type=getattr(file, 'content_type', None),
+            job_id=job_id if isinstance(job_id, int) else None
+        )
+        logger.debug(f"[STAGED] {file.filename} -> {target_path} ({size/1024:.1f}KB)")
+        return staged
+
+    async def stage_files(self, files: List, job_id) -> List[StagedFile]:
+        """Tüm upload parçalarını sırayla stage et"""
+        staged_files = []
+        total_bytes = 0
+
+        for index, file in enumerate(files):
+            staged = await self.stage_file(file, job_id, index)
+            staged_files.append(staged)
+            total_bytes += staged.size
+
+        logger.info(f"[STAGING] Job {job_id}: {len(staged_files)} files, {total_bytes/1024/1024:.1f}MB staged")
+        return staged_files
+
+    async def ensure_staged(self, file, job_id='adhoc') -> StagedFile:
+        """UploadFile gelirse stage et, StagedFile gelirse aynen döndür"""
+        if isinstance(file, StagedFile):
+            return file
+        return await self.stage_file(file, job_id, next(self._adhoc_index))
+
+    def move_to(self, staged: StagedFile, destination: str) -> str:
+        """Staged dosyayı final konumuna taşı (aynı FS'de rename, kopya yok)"""
+        try:
+            os.replace(staged.path, destination)
+        except OSError:
+            # Farklı dosya sistemi - son çare
+            shutil.move(staged.path, destination)
+        staged.path = destination
+        return destination
+
+    def cleanup_job(self, job_id):
+        """Job tamamlanınca staging dizinini temizle"""
+        job_dir = self.get_job_dir(job_id)
+        try:
+            if os.path.isdir(job_dir):
+                shutil.rmtree(job_dir, ignore_errors=True)
+                logger.info(f"[STAGING] Cleaned up job {job_id}")
+        except Exception as e:
+            logger.warning(f"[STAGING] Cleanup failed for job {job_id}: {e}")
+
+
+# Global instance
+upload_staging_service = UploadStagingService()
@@ -0,0 +1,170 @@
+"""
+Vision Batcher
+Eşzamanlı OCR isteklerini çok görselli images:annotate çağrılarında birleştirir
+
+Tüm upload job'larından gelen tekil OCR istekleri kısa bir pencerede
+toplanır ve tek HTTP isteği olarak gönderilir:
+    - max_images görsele ulaşınca (Vision sınırı: istek başına 16)
+    - toplam base64 boyutu max_bytes'ı aşacaksa (istek gövdesi sınırı)
+    - ya da ilk istekten window saniye sonra
+Yanıtlar sırayla bekleyen çağıranlara dağıtılır; görsel bazlı hata yalnızca
+o görselin çağıranına döner. Gönderim task'ları referansla tutulur (GC'ye
+gitmez) ve kapanışta (close) beklenir, süre dolarsa iptal edilir.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from core.config import settings
+from core.exceptions import ExternalServiceError
+from core.logging import get_logger
+
+logger = get_logger('vision_batcher')
+
+SendBatch = Callable[[List[str]], Awaitable[List[Dict[str, Any]]]]
+
+
+class VisionBatcher:
+    """Boyut / bayt / zaman penceresi ile flush eden istek birleştirici"""
+
+    def __init__(
+        self,
+        max_images: int = 16,
+        max_bytes: int = 8 * 1024 * 1024,
+        window: float = 0.025,
+        max_concurrent_batches: int = 10
+    ):
+        self.max_images = max(1, min(max_images, 16))
+        self.max_bytes = max_bytes
+        self.window = window
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+
+        self._send_batch: Optional[SendBatch] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._pending_bytes = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Uçuştaki gönderimler - event loop task'lara sadece zayıf referans tutar
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.stats = {
+            'requests': 0,
+            'batches': 0,
+            'images_sent': 0,
+            'image_errors': 0,
+            'batch_errors': 0,
+            'flush_size': 0,
+            'flush_bytes': 0,
+            'flush_window': 0
+        }
+
+    def set_transport(self, send_batch: SendBatch):
+        """Görsel listesini (base64) gönderip görsel başına yanıt döndüren çağrı"""
+        self._send_batch = send_batch
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Event loop başladıktan sonra oluştur
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+        return self._semaphore
+
+    async def submit(self, image_data: str) -> Dict[str, Any]:
+        """Tek görseli kuyruğa ekle, kendi annotate yanıtını bekle"""
+        if self._send_batch is None:
+            raise ExternalServiceError("Vision batcher has no transport configured")
+
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        size = len(image_data)
+        self.stats['requests'] += 1
+
+        # Bu görsel bayt sınırını aşacaksa önce bekleyenleri gönder
+        if self._pending and self._pending_bytes + size > self.max_bytes:
+            self._flush('flush_bytes')
+
+        self._pending.append((image_data, future))
+        self._pending_bytes += size
+
+        if len(self._pending) >= self.max_images:
+            self._flush('flush_size')
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush, 'flush_window')
+
+        return await future
+
+    def _flush(self, reason: str):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self._pending_bytes = 0
+        self.stats[reason] += 1
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self, timeout: float = 10.0):
+        """Bekleyenleri gönder, uçuştaki batch'leri timeout saniye bekle, kalanları iptal et"""
+        self._flush('flush_window')
+        if not self._tasks:
+            return
+        _, unfinished = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            logger.warning(f"[VISION BATCH] Cancelled {len(unfinished)} in-flight batches on shutdown")
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]):
+        async with self.semaphore:
+            try:
+                responses = await self._send_batch([image_data for image_data, _ in batch])
+            except asyncio.CancelledError:
+                # Kapanış: çağıranlar sonsuza kadar beklemesin
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(ExternalServiceError("Vision batcher shut down"))
+                raise
+            except Exception as e:
+                self.stats['batch_errors'] += 1
+                logger.error(f"[VISION BATCH] {len(batch)} image batch failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e if isinstance(e, ExternalServiceError) else ExternalServiceError(str(e)))
+                return
+
+        self.stats['batches'] += 1
+        self.stats['images_sent'] += len(batch)
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            response = responses[index] if index < len(responses) else {'error': {'message': 'Missing response'}}
+            if 'error' in response:
+                self.stats['image_errors'] += 1
+                future.set_exception(ExternalServiceError(
+                    f"Vision annotate failed: {response['error'].get('message', 'unknown error')}"
+                ))
+            else:
+                future.set_result(response)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'pending': len(self._pending),
+            'in_flight_batches': len(self._tasks),
+            'avg_batch_size': round(self.stats['images_sent'] / self.stats['batches'], 2) if self.stats['batches'] else 0.0
+        }
+
+
+# Global instance - tüm GoogleAIOCRService örnekleri aynı kuyruğu paylaşır
+vision_batcher = VisionBatcher(
+    max_images=settings.ocr.batch_max_images,
+    max_bytes=settings.ocr.batch_max_mb * 1024 * 1024,
+    window=settings.ocr.batch_window_ms / 1000.0,
+    max_concurrent_batches=settings.ocr.http_pool_size
+)
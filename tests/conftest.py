@@ -0,0 +1,57 @@
+"""Shared test setup: backend on sys.path, in-memory database and data files kept out of backend/data."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+try:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    import models  # noqa: F401 - tüm tabloları Base'e kaydeder
+    from database import Base
+except ImportError:
+    Base = None
+
+
+@pytest.fixture()
+def session_factory():
+    """Tüm tablolarla bellek içi SQLite - her session aynı veritabanını görür"""
+    if Base is None:
+        pytest.skip("backend dependencies not installed")
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_data_files(tmp_path_factory):
+    """OCR önbelleği ve kolaj kuyruğu backend/data yerine geçici dizine yazılır"""
+    try:
+        from core.config import settings
+    except ImportError:
+        return
+    data = tmp_path_factory.mktemp("data")
+    settings.ocr.cache_path = str(data / "ocr_cache.sqlite3")
+    settings.upload.collage_queue_path = str(data / "collage_queue.sqlite3")
+
+    # Toplama sırasında oluşan global'ler dosyayı ilk kullanımda açar - henüz açmadılar
+    store = sys.modules.get("services.ocr_result_store")
+    if store is not None:
+        store.ocr_result_store.path = settings.ocr.cache_path
+    collage = sys.modules.get("services.smart_collage_service")
+    if collage is not None and collage.smart_collage_service.collage_queue.backend == 'sqlite':
+        collage.smart_collage_service.collage_queue.path = settings.upload.collage_queue_path
@@ -0,0 +1,248 @@
+"""Regression tests for the SQLite collage queue."""
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from services import collage_queue
+from services.collage_queue import SQLiteCollageQueue
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture()
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(
+        collage_queue, "time", SimpleNamespace(time=fake, localtime=time.localtime, strftime=time.strftime)
+    )
+    return fake
+
+
+@pytest.fixture()
+def queue(tmp_path, clock) -> SQLiteCollageQueue:
+    return SQLiteCollageQueue(
+        str(tmp_path / "q.sqlite3"), visibility_seconds=10, max_attempts=2, retry_base_seconds=1.0
+    )
+
+
+def test_enqueue_deduplicates_and_upgrades_priority(queue):
+    assert queue.enqueue(1, "low") == collage_queue.QUEUED
+    assert queue.enqueue(1, "low") == collage_queue.DUPLICATE
+    assert queue.enqueue(1, "normal") == collage_queue.UPGRADED
+    # Düşük önceliğe geri inmez
+    assert queue.enqueue(1, "low") == collage_queue.DUPLICATE
+
+    assert queue.depth()["ready"] == 1
+    assert queue.depth()["ready_by_priority"] == {"normal": 1}
+    assert queue.counters["enqueued"] == 1
+    assert queue.counters["deduplicated"] == 3
+
+
+def test_lease_orders_by_priority_then_fifo(queue, clock):
+    queue.enqueue(1, "low")
+    clock.advance(1)
+    queue.enqueue(2, "normal")
+    clock.advance(1)
+    queue.enqueue(3, "immediate")
+    clock.advance(1)
+    queue.enqueue(4, "normal")
+
+    leased = queue.lease(count=10)
+
+    assert [item.product_id for item in leased] == [3, 2, 4, 1]
+    assert [item.priority_name for item in leased] == ["immediate", "normal", "normal", "low"]
+    assert all(item.attempts == 1 for item in leased)
+    assert queue.lease() == []
+
+
+def test_ack_removes_item(queue):
+    queue.enqueue(1)
+    item = queue.lease()[0]
+
+    assert queue.ack(item)
+    assert queue.depth()["ready"] == 0
+    assert queue.depth()["leased"] == 0
+    assert queue.lease() == []
+
+
+def test_enqueue_while_leased_reruns_after_ack(queue):
+    queue.enqueue(1, "low")
+    item = queue.lease()[0]
+
+    assert queue.enqueue(1, "immediate") == collage_queue.RERUN
+    assert queue.ack(item)
+
+    again = queue.lease()
+    assert [entry.product_id for entry in again] == [1]
+    assert again[0].priority_name == "immediate"
+    assert again[0].attempts == 1
+    assert queue.counters["reruns"] == 1
+
+
+def test_stale_ack_is_rejected(queue, clock):
+    queue.enqueue(1)
+    first = queue.lease()[0]
+    # Lease bitişi + en büyük geri çekilme
+    clock.advance(10 + 1.25 + 0.01)
+    second = queue.lease()[0]
+
+    assert not queue.ack(first)
+    assert not queue.fail(first, "late")
+    assert queue.counters["stale_acks"] == 2
+    assert queue.ack(second)
+
+
+def test_expired_lease_backs_off_then_dead_letters(queue, clock):
+    queue.enqueue(1)
+    item = queue.lease()[0]
+
+    clock.advance(9)
+    assert queue.lease() == []
+    assert queue.depth()["leased"] == 1
+
+    # Sahibi kayboldu: başarısız deneme sayılır, lease bitişinden itibaren geri çekilir
+    clock.advance(1.5)
+    assert queue.lease() == []
+    assert queue.counters["lease_expired"] == 1
+    assert queue.peek()[0]["last_error"] == "Lease expired"
+
+    clock.advance(1.0)
+    redelivered = queue.lease()
+    assert [entry.product_id for entry in redelivered] == [1]
+    assert redelivered[0].attempts == item.attempts + 1
+    assert redelivered[0].lease_token != item.lease_token
+
+    # max_attempts (2) doldu - tekrar dağıtılmaz
+    clock.advance(10)
+    assert queue.lease() == []
+    assert queue.depth()["dead"] == 1
+    assert queue.counters["dead_lettered"] == 1
+
+
+def test_enqueue_resets_backoff(queue, clock):
+    queue.enqueue(1)
+    queue.fail(queue.lease()[0], "transient")
+    assert queue.lease() == []
+
+    # Yeni iş geldi: geri çekilme beklenmez, denemeler korunur
+    assert queue.enqueue(1) == collage_queue.DUPLICATE
+    item = queue.lease()[0]
+    assert item.attempts == 2
+
+
+def test_fail_retries_with_backoff_then_dead_letters(queue, clock):
+    queue.enqueue(1)
+    first = queue.lease()[0]
+
+    assert queue.fail(first, "render failed")
+    assert queue.depth()["delayed"] == 1
+    assert queue.lease() == []
+
+    # retry_base_seconds * 2^0 * 1.25 (en büyük jitter)
+    clock.advance(1.25 + 0.01)
+    second = queue.lease()[0]
+    assert second.attempts == 2
+
+    assert queue.fail(second, "render failed again")
+    depth = queue.depth()
+    assert depth["dead"] == 1
+    assert depth["ready"] == depth["delayed"] == depth["leased"] == 0
+    assert queue.counters["retries"] == 1
+    assert queue.counters["dead_lettered"] == 1
+
+    clock.advance(collage_queue.MAX_RETRY_DELAY)
+    assert queue.lease() == []
+
+
+def test_enqueue_revives_dead_item(queue):
+    queue.enqueue(1)
+    queue.max_attempts = 1
+    queue.fail(queue.lease()[0], "boom")
+    assert queue.depth()["dead"] == 1
+
+    assert queue.enqueue(1, "immediate") == collage_queue.REVIVED
+
+    item = queue.lease()[0]
+    assert item.attempts == 1
+    assert item.priority_name == "immediate"
+    assert queue.peek()[0]["last_error"] is None
+
+
+def test_claim_skips_backoff_but_not_active_lease(queue):
+    queue.enqueue(1)
+    queue.fail(queue.lease()[0], "transient")
+    assert queue.lease() == []
+
+    claimed = queue.claim(1)
+    assert claimed is not None and claimed.product_id == 1
+    assert queue.claim(1) is None
+    assert queue.claim(99) is None
+
+
+def test_queue_survives_reopen(tmp_path, clock):
+    path = str(tmp_path / "q.sqlite3")
+    first = SQLiteCollageQueue(path)
+    first.enqueue(7, "immediate")
+    first.enqueue(8, "low")
+
+    reopened = SQLiteCollageQueue(path)
+
+    assert reopened.path == path
+    assert [item.product_id for item in reopened.lease(count=5)] == [7, 8]
+
+
+def test_service_runs_queue_operations_off_the_event_loop(queue, monkeypatch):
+    pytest.importorskip("pymysql")
+    from services.smart_collage_service import SmartCollageService
+
+    threads = []
+    for name in ("enqueue", "lease", "ack"):
+        operation = getattr(queue, name)
+
+        def recorded(*args, _operation=operation):
+            threads.append(threading.get_ident())
+            return _operation(*args)
+
+        monkeypatch.setattr(queue, name, recorded)
+
+    service = SmartCollageService.__new__(SmartCollageService)
+    service.__dict__.update(
+        collage_queue=queue, processing_products=set(), _wakeup=None, _signalled_at={}, _time_to_collage=[]
+    )
+
+    async def process_single_collage(item, db):
+        return "https://cdn/collage.jpg"
+
+    monkeypatch.setattr(service, "_process_single_collage", process_single_collage)
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        assert await service.schedule_collage_creation(1)
+        (item,) = await service._queue_call(queue.lease, 1)
+        assert await service._run_leased(item, db=None)
+        return loop_thread
+
+    loop_thread = asyncio.run(scenario())
+    assert len(threads) == 3
+    assert loop_thread not in threads
+    assert queue.depth()["ready"] == 0
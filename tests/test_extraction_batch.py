@@ -0,0 +1,48 @@
+"""Regression tests for the streaming NDJSON reader of the extraction batch endpoint."""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from services import extraction_batch
+from services.extraction_batch import items_from_ndjson
+
+
+def read(*chunks: bytes):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [item async for item in items_from_ndjson(body(), "ELBİSE", 1, None)]
+
+    return asyncio.run(collect())
+
+
+def line(**record) -> bytes:
+    return json.dumps(record, ensure_ascii=False).encode() + b"\n"
+
+
+def test_invalid_utf8_only_fails_its_line():
+    items = read(line(id="a", text="FİYAT 100"), b'{"id": "b", "text": "\xff\xfe"}', b'\n{broken\n', line(id="c", text="ok"))
+
+    assert [item[0] for item in items] == ["a", "b", 2, "c"]
+    # Bozuk bayt yerine U+FFFD, akış devam eder
+    assert items[1][1] == "��"
+    assert items[2][1] is None
+
+
+def test_overlong_line_is_dropped_without_buffering(monkeypatch):
+    monkeypatch.setattr(extraction_batch, "MAX_NDJSON_LINE_BYTES", 30)
+    # Satır sonu gelmeden sınır aşılır; kalanı sonraki satır sonuna kadar atılır
+    items = read(line(id="a", text="x"), b'{"id": "long", "text": "', b"y" * 40, b'"}\n', line(id="b", text="z"))
+
+    assert [(item[0], item[1]) for item in items] == [("a", "x"), (1, None), ("b", "z")]
@@ -0,0 +1,120 @@
+"""Regression tests for the upload filename parser."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from services.filename_parser import FilenameParser
+
+
+@pytest.fixture()
+def parser() -> FilenameParser:
+    return FilenameParser(max_entries=16)
+
+
+@pytest.mark.parametrize(
+    "filename, code, color",
+    [
+        # Renk kelimesinin ilk harfi kod son eki sayılmaz
+        ("VV-6124 BLACK.jpg", "VV-6124", "BLACK"),
+        ("VV-6124 BROWN 14.jpg", "VV-6124", "BROWN"),
+        # Tek harfli son ek koda katılır ve normalize edilir
+        ("AN-50226 B BLACK.jpg", "AN-50226-B", "BLACK"),
+        ("AN-50226 B BLACK 11.jpg", "AN-50226-B", "BLACK"),
+        ("VV-6124-B BLACK 2.jpg", "VV-6124-B", "BLACK"),
+        # Kod büyük harfe çevrilir, renk olduğu gibi kalır
+        ("vv-6124 black.jpg", "VV-6124", "black"),
+        ("VV-6124.jpg", "VV-6124", ""),
+    ],
+)
+def test_code_and_color(parser, filename, code, color):
+    parsed = parser.parse(filename)
+
+    assert parsed.code == code
+    assert parsed.color == color
+    assert parsed.brand_hint == code.split("-")[0]
+
+
+@pytest.mark.parametrize(
+    "filename, angle",
+    [
+        ("AN-50226 B BLACK.jpg", None),
+        ("AN-50226 B BLACK 11.jpg", 11),
+        ("VV-6124 2.jpg", 2),
+        ("PF-1234 BEYAZ 3.JPG", 3),
+        ("VV-6124.jpg", None),
+    ],
+)
+def test_angle_number_decides_tag(parser, filename, angle):
+    parsed = parser.parse(filename)
+
+    assert parsed.angle_number == angle
+    assert parsed.is_tag is (angle is None)
+
+
+def test_product_images_share_dependency_key_with_their_tag(parser):
+    tag = parser.parse("AN-50226 B BLACK.jpg")
+    image = parser.parse("AN-50226 B BLACK 11.jpg")
+    other_color = parser.parse("AN-50226 B BROWN 11.jpg")
+
+    assert tag.dependency_key == ("AN-50226-B", "BLACK")
+    assert image.dependency_key == tag.dependency_key
+    assert other_color.dependency_key != tag.dependency_key
+    # Küçük harfli renk de aynı anahtara düşer
+    assert parser.parse("an-50226 b black 3.jpg").dependency_key == tag.dependency_key
+
+
+def test_filename_without_code_has_no_dependency_key(parser):
+    parsed = parser.parse("IMG_1234.jpg")
+
+    assert parsed.code is None
+    assert parsed.dependency_key is None
+
+
+@pytest.mark.parametrize(
+    "filename, parts",
+    [
+        ("VV-6124 BLACK & VV-2590 BLACK.jpg", ("VV-6124 BLACK", "VV-2590 BLACK")),
+        ("VV-6124 BLACK + VV-2590 BLACK.jpg", ("VV-6124 BLACK", "VV-2590 BLACK")),
+        # Koddaki tireler ayıraç değil
+        ("LL-2Z27 B BLACK - LL-2V28 B BLACK.jpg", ("LL-2Z27 B BLACK", "LL-2V28 B BLACK")),
+        ("KY-557 - SNL-11026 BROWN.jpg", ("KY-557", "SNL-11026 BROWN")),
+    ],
+)
+def test_dual_products(parser, filename, parts):
+    parsed = parser.parse(filename)
+
+    assert parsed.is_dual
+    assert parsed.dual_parts == parts
+
+
+@pytest.mark.parametrize("filename", ["VV-6124 BLACK.jpg", "AN-50226 B BLACK 11.jpg"])
+def test_single_products_are_not_dual(parser, filename):
+    assert not parser.parse(filename).is_dual
+
+
+def test_results_are_memoized_and_bounded(parser):
+    first = parser.parse("VV-6124 BLACK 1.jpg")
+
+    assert parser.parse("VV-6124 BLACK 1.jpg") is first
+    assert parser.stats == {"hits": 1, "misses": 1}
+
+    for index in range(40):
+        parser.parse(f"VV-6124 BLACK {index + 2}.jpg")
+    assert parser.get_stats()["cached"] <= 16
+
+
+def test_classify_splits_tags_and_products(parser):
+    files = [SimpleNamespace(filename=name) for name in ("VV-6124.jpg", "VV-6124 BLACK 1.jpg", "VV-6124 BLACK.jpg")]
+
+    tags, products = parser.classify(files)
+
+    assert [file.filename for file in tags] == ["VV-6124.jpg", "VV-6124 BLACK.jpg"]
+    assert [file.filename for file in products] == ["VV-6124 BLACK 1.jpg"]
@@ -0,0 +1,146 @@
+"""Regression tests for the Aho-Corasick keyword matcher."""
+from __future__ import annotations
+
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from services.keyword_matcher import KeywordMatcher, turkish_fold
+
+# Eski _extract_color listesi - sıra önceliktir
+LEGACY_COLORS = [
+    'BLACK', 'WHITE', 'RED', 'BLUE', 'GREEN', 'YELLOW', 'PINK', 'PURPLE', 'ORANGE', 'BROWN', 'GRAY', 'GREY',
+    'NAVY', 'MAROON', 'CREAM', 'BEIGE', 'BURGUNDY', 'VIOLET', 'AMBER', 'CHOCOLATE', 'SILVER', 'GOLD',
+    'SIYAH', 'BEYAZ', 'KIRMIZI', 'MAVI', 'YESIL', 'SARI', 'PEMBE', 'MOR', 'TURUNCU', 'KAHVERENGI', 'GRI',
+    'LACIVERT', 'BORDO', 'KREM', 'BEJ', 'VİZON', 'EKRU', 'TAŞ', 'DAMSON', 'BONE', 'LEOPAR'
+]
+
+LABEL_WORDS = [
+    'VITA', 'BRANDS', 'CODE', 'SIZE', 'S-M-L', 'PRICE', '1250', 'TL', 'MADE', 'IN', 'TURKEY', 'HIRKA',
+    'hırka', 'Kahverengi', 'açık', 'ELBİSE', 'vizon', 'Gri', 'GOLDEN', 'REDMOND', 'MORE', 'BEJ/KREM', '-',
+]
+
+
+def legacy_first(keywords, text):
+    """Eski akış: `for k in list: if k in text.upper(): return k`"""
+    text_upper = text.upper()
+    for keyword in keywords:
+        if keyword in text_upper:
+            return keyword
+    return None
+
+
+def folded_ranked(keywords, text):
+    """Katlamalı referans: sözlük sırasıyla metinde geçen tüm kelimeler"""
+    folded = turkish_fold(text)
+    return [keyword for keyword in keywords if turkish_fold(keyword) in folded]
+
+
+def random_texts(count=300, seed=17):
+    rng = random.Random(seed)
+    vocabulary = LABEL_WORDS + LEGACY_COLORS
+    for _ in range(count):
+        yield ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12)))
+
+
+@pytest.fixture(scope="module")
+def colors() -> KeywordMatcher:
+    return KeywordMatcher(LEGACY_COLORS).build()
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("VITA BRANDS CODE VV-6124 BLACK", "BLACK"),
+        # Listede önce gelen kazanır, metindeki konum değil
+        ("GRI / KAHVERENGI", "KAHVERENGI"),
+        ("WHITE BLACK", "BLACK"),
+        # Alt dize eşleşmesi (eski davranış): GOLDEN -> GOLD, REDMOND -> RED
+        ("GOLDEN", "GOLD"),
+        ("REDMOND", "RED"),
+        ("SIZE 36-42", None),
+        ("", None),
+    ],
+)
+def test_first_matches_legacy_priority(colors, text, expected):
+    assert colors.first(text) == expected
+    assert legacy_first(LEGACY_COLORS, text) == expected
+
+
+def test_first_equals_legacy_loop_whenever_legacy_matches(colors):
+    for text in random_texts():
+        legacy = legacy_first(LEGACY_COLORS, text)
+        if legacy is not None:
+            assert colors.first(text) == legacy, text
+
+
+def test_ranked_equals_folded_reference(colors):
+    for text in random_texts():
+        assert colors.ranked(text) == folded_ranked(LEGACY_COLORS, text), text
+        assert colors.contains_any(text) == bool(folded_ranked(LEGACY_COLORS, text))
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        # OCR 'İ' yerine ASCII 'I' okur; küçük harf metinde de eşleşir
+        ("vizon", "VİZON"),
+        ("VIZON", "VİZON"),
+        ("Vizon Hırka", "VİZON"),
+        ("kahverengi", "KAHVERENGI"),
+        ("açık gri", "GRI"),
+    ],
+)
+def test_turkish_case_folding(colors, text, expected):
+    assert colors.first(text) == expected
+
+
+def test_turkish_fold_normalizes_dotted_and_dotless_i():
+    # str.lower() 'İ' harfini iki karaktere çevirir; katlama tek 'i' verir
+    assert 'İ'.lower() != 'i'
+    assert turkish_fold('İ') == turkish_fold('I') == turkish_fold('ı') == turkish_fold('i') == 'i'
+    assert turkish_fold('HIRKA') == turkish_fold('hırka') == 'hirka'
+    assert turkish_fold('ELBİSE') == 'elbise'
+
+
+def test_payloads_and_overlapping_keywords():
+    matcher = KeywordMatcher()
+    matcher.add('KAHVE', payload='Coffee')
+    matcher.add('KAHVERENGI', payload='Brown')
+    matcher.add('RENGI', payload='Colour')
+    matcher.build()
+
+    assert matcher.ranked('kahverengi') == ['Coffee', 'Brown', 'Colour']
+    assert matcher.first('KAHVERENGİ') == 'Coffee'
+    spans = sorted((start, end) for start, end, _, _ in matcher.iter_matches('kahverengi'))
+    assert spans == [(0, 5), (0, 10), (5, 10)]
+
+
+def test_whole_word_matches_regex_word_boundaries():
+    keywords = ['GRI', 'MOR', 'RED', 'BEJ']
+    matcher = KeywordMatcher(keywords, whole_word=True).build()
+    regexes = [(keyword, re.compile(r'\b' + re.escape(turkish_fold(keyword)) + r'\b')) for keyword in keywords]
+
+    for text in random_texts(seed=23):
+        folded = turkish_fold(text)
+        expected = [keyword for keyword, regex in regexes if regex.search(folded)]
+        assert matcher.ranked(text) == expected, text
+
+    assert matcher.first('MORE GRI') == 'GRI'
+    assert matcher.first('BEJ/KREM') == 'BEJ'
+    assert matcher.first('REDMOND') is None
+
+
+def test_adding_after_build_rebuilds():
+    matcher = KeywordMatcher(['BLACK']).build()
+    matcher.add('EKRU')
+
+    assert matcher.first('ekru') == 'EKRU'
+    assert matcher.size == 2
@@ -0,0 +1,78 @@
+"""Label field engine output vs. the pre-engine extractor loaded from git history."""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("pymysql")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from benchmarks.label_corpus import generate_corpus
+from benchmarks.label_extraction import TURKISH_I, _dotted_keywords, _run, classify_mismatches
+from benchmarks.label_reference import ReferenceUnavailable, load_reference_extractor
+from services.smart_label_extractor import SmartLabelExtractor
+
+
+@pytest.fixture(scope="module")
+def reference():
+    try:
+        return load_reference_extractor()
+    except ReferenceUnavailable as e:
+        pytest.skip(str(e))
+
+
+@pytest.fixture(scope="module")
+def engine() -> SmartLabelExtractor:
+    return SmartLabelExtractor()
+
+
+@pytest.fixture(scope="module")
+def outputs(reference, engine):
+    corpus = generate_corpus(400, seed=7)
+    return corpus, asyncio.run(_run(reference, corpus)), asyncio.run(_run(engine, corpus))
+
+
+def test_engine_matches_reference_except_turkish_i_folding(engine, outputs):
+    corpus, expected, actual = outputs
+    folding, unexpected = classify_mismatches(engine, corpus, expected, actual)
+
+    # Katlama farkları sadece İ/ı içeren etiketlerde ya da ı'lı sözlük kelimelerinde, sözlük alanlarında
+    assert unexpected == []
+    assert 0 < len(folding) < len(corpus)
+
+
+def test_labels_without_turkish_i_are_identical(engine, outputs):
+    corpus, expected, actual = outputs
+    dotted = _dotted_keywords(engine)
+    plain = [
+        (old, new) for text, old, new in zip(corpus, expected, actual)
+        if not TURKISH_I & set(text) and not dotted.contains_any(text)
+    ]
+    assert plain
+    assert all(dataclasses.asdict(old) == dataclasses.asdict(new) for old, new in plain)
+
+
+def test_hirka_is_a_folding_difference(reference, engine):
+    text = "LILIUM\nREF LM-441\nRenk: Vizon\nHIRKA\n36-40\nS/S"
+    expected = asyncio.run(_run(reference, [text]))
+    actual = asyncio.run(_run(engine, [text]))
+    folding, unexpected = classify_mismatches(engine, [text], expected, actual)
+
+    assert unexpected == []
+    assert folding == [(text, {'product_type': ('REF', 'HIRKA')})]
+
+
+def test_non_dictionary_change_is_unexpected(reference, engine):
+    text = "DZAYN BRANDS\nVV-6124-B\nSİYAH\nELBİSE\nBEDEN 36-42"
+    expected = asyncio.run(_run(reference, [text]))
+    actual = [dataclasses.replace(asyncio.run(_run(engine, [text]))[0], size_range="99-99")]
+    folding, unexpected = classify_mismatches(engine, [text], expected, actual)
+
+    assert folding == []
+    assert unexpected[0][1]['size_range'] == ('36-42', '99-99')
@@ -0,0 +1,182 @@
+"""Regression tests for the OCR dispatcher circuit breaker, AIMD limit and daily quota."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from core.exceptions import ExternalServiceError
+from services import ocr_dispatcher as dispatcher_module
+from services.ocr_dispatcher import CLOSED, HALF_OPEN, OPEN, OCRDispatcher
+
+PACIFIC = ZoneInfo("America/Los_Angeles")
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture()
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(dispatcher_module, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def responding(status: int, latency: float = 0.1):
+    async def call(observe):
+        observe(status, latency, None)
+        return status
+    return call
+
+
+def test_circuit_opens_half_opens_and_closes(clock):
+    dispatcher = OCRDispatcher(min_calls=4, window=4, open_seconds=30.0, queue_timeout=1.0)
+    for status in (429, 503, 200, 429):
+        dispatcher._observe(status, 0.1)
+    assert dispatcher.state == OPEN
+
+    # Açıkken sağlayıcıya gidilmez
+    with pytest.raises(ExternalServiceError):
+        asyncio.run(dispatcher.run(1, responding(200)))
+
+    clock.advance(30.0)
+    seen = []
+
+    async def probe(observe):
+        seen.append(dispatcher.state)
+        observe(200, 0.1, None)
+
+    asyncio.run(dispatcher.run(1, probe))
+    assert seen == [HALF_OPEN]
+    assert dispatcher.state == CLOSED
+    assert dispatcher.stats['probes'] == 1
+
+
+def test_failed_probe_reopens_for_longer(clock):
+    dispatcher = OCRDispatcher(min_calls=2, window=2, open_seconds=10.0, queue_timeout=1.0)
+    dispatcher._observe(429, 0.1)
+    dispatcher._observe(429, 0.1)
+    assert dispatcher.state == OPEN
+
+    clock.advance(10.0)
+    asyncio.run(dispatcher.run(1, responding(503)))
+    assert dispatcher.state == OPEN
+    assert dispatcher.get_stats()['circuit_retry_in'] == 20.0
+
+
+def test_aimd_increases_additively_and_decreases_multiplicatively(clock):
+    dispatcher = OCRDispatcher(initial_limit=8, min_limit=1, max_limit=64)
+    # Her başarılı yanıtta +1/sınır: bir tur (~sınır kadar yanıt) sonunda +1
+    for _ in range(9):
+        dispatcher._observe(200, 0.1)
+    assert int(dispatcher.limit) == 9
+    assert dispatcher.stats['increases'] == 1
+
+    clock.advance(1.0)
+    dispatcher._observe(429, 0.1)
+    assert int(dispatcher.limit) == 4
+    # Aynı tıkanıklık turunda ikinci düşüş yok
+    dispatcher._observe(503, 0.1)
+    assert int(dispatcher.limit) == 4
+
+    clock.advance(5.0)  # yavaş yanıt EWMA'yı ~2 saniyeye çıkarır: tur ondan uzun olmalı
+    limit = dispatcher.limit
+    dispatcher._observe(200, 10.0)  # gecikme tabanın tolerans katını aştı
+    assert dispatcher.limit == pytest.approx(limit * 0.9)
+
+
+def pacific_now(dispatcher: OCRDispatcher, monkeypatch, *moment: int) -> dict:
+    current = {'now': datetime(*moment, tzinfo=PACIFIC)}
+    monkeypatch.setattr(dispatcher, "_now", lambda: current['now'])
+    dispatcher.quota_day = current['now'].date()
+    return current
+
+
+def test_daily_quota_is_a_hard_cap_until_pacific_midnight(clock, monkeypatch):
+    dispatcher = OCRDispatcher(daily_quota=100, quota_burst=100, queue_timeout=1.0)
+    current = pacific_now(dispatcher, monkeypatch, 2026, 10, 16, 23, 0)
+
+    asyncio.run(dispatcher.run(60, responding(200)))
+    dispatcher.tokens = dispatcher.capacity  # kova dolu - sadece günlük sayaç sınırlar
+    with pytest.raises(ExternalServiceError) as error:
+        asyncio.run(dispatcher.run(60, responding(200)))
+    assert error.value.details['retry_after'] == 3600.0
+    assert dispatcher.get_stats()['quota_used_today'] == 60
+
+    current['now'] = datetime(2026, 10, 17, 0, 0, 1, tzinfo=PACIFIC)
+    asyncio.run(dispatcher.run(60, responding(200)))
+    assert dispatcher.day_used == 60
+    assert dispatcher.stats['quota_used'] == 120
+
+
+def test_quota_day_ignores_utc_midnight(clock, monkeypatch):
+    dispatcher = OCRDispatcher(daily_quota=100, quota_burst=100, queue_timeout=1.0)
+    # 16:30 PDT = 23:30 UTC; 17:30 PDT UTC'de ertesi gün - Google'ın günü sürüyor
+    current = pacific_now(dispatcher, monkeypatch, 2026, 10, 16, 16, 30)
+    asyncio.run(dispatcher.run(80, responding(200)))
+
+    current['now'] = datetime(2026, 10, 16, 17, 30, tzinfo=PACIFIC)
+    dispatcher.tokens = dispatcher.capacity
+    with pytest.raises(ExternalServiceError):
+        asyncio.run(dispatcher.run(30, responding(200)))
+    assert dispatcher.day_used == 80
+
+
+def test_quota_reset_accounts_for_dst(monkeypatch):
+    dispatcher = OCRDispatcher(daily_quota=100)
+    # 2026-11-01 yaz saati biter: gün 25 saat
+    pacific_now(dispatcher, monkeypatch, 2026, 11, 1, 0, 0)
+    assert dispatcher._roll_quota_day() == 25 * 3600
+
+
+def test_bucket_smooths_bursts(clock):
+    dispatcher = OCRDispatcher(daily_quota=86400, quota_burst=10, queue_timeout=1.0)
+    asyncio.run(dispatcher.run(10, responding(200)))
+    # Kova boş, saniyede 1 birim dolar: 5 birim 1 saniyelik sırada beklenemez
+    with pytest.raises(ExternalServiceError) as error:
+        asyncio.run(dispatcher.run(5, responding(200)))
+    assert error.value.details['retry_after'] == 5.0
+    assert dispatcher.day_used == 10
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    dispatcher = OCRDispatcher(initial_limit=1, min_limit=1, max_limit=1, queue_timeout=10.0)
+    release = asyncio.Event()
+
+    async def holding(observe):
+        await release.wait()
+        observe(200, 0.1, None)
+
+    async def scenario():
+        holder = asyncio.ensure_future(dispatcher.run(1, holding))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(dispatcher.run(1, responding(200)))
+        await asyncio.sleep(0)
+        assert len(dispatcher._waiters) == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
+    # İptal edilen bekleyene slot devredilip sahipsiz kalmaz
+    assert not dispatcher._waiters
+    assert dispatcher.in_flight == 0
@@ -0,0 +1,91 @@
+"""Regression tests for OCR preprocessing: label crop bounds and pass-through of unusable images."""
+from __future__ import annotations
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from PIL import Image, ImageDraw
+
+from services.ocr_preprocessor import OCRPreprocessor
+
+LABEL = (420, 260, 820, 700)
+
+
+def photo(size=(1200, 900), label=LABEL) -> Image.Image:
+    """Düz arka plan üzerinde kenarlıklı, metin satırlı bir etiket"""
+    image = Image.new('L', size, 170)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle(label, fill=250, outline=20, width=3)
+    left, top, right, bottom = label
+    for y in range(top + 30, bottom - 30, 40):
+        draw.rectangle((left + 30, y, right - 30 - (y % 120), y + 14), fill=10)
+    return image
+
+
+def contains(box, inner) -> bool:
+    return box[0] <= inner[0] and box[1] <= inner[1] and box[2] >= inner[2] and box[3] >= inner[3]
+
+
+def save(image: Image.Image, tmp_path) -> str:
+    path = str(tmp_path / "tag.jpg")
+    image.save(path, 'JPEG', quality=95)
+    return path
+
+
+@pytest.fixture()
+def preprocessor() -> OCRPreprocessor:
+    return OCRPreprocessor(max_side=1600)
+
+
+def test_crop_keeps_the_whole_label(preprocessor):
+    box = preprocessor.label_box(photo())
+
+    assert box is not None
+    assert contains(box, LABEL)
+    # Arka planın çoğu gider
+    assert (box[2] - box[0]) * (box[3] - box[1]) < 0.5 * 1200 * 900
+
+
+def test_label_touching_the_edge_is_not_cut(preprocessor):
+    label = (0, 500, 380, 899)
+    box = preprocessor.label_box(photo(label=label))
+
+    assert box is not None
+    assert contains(box, (0, 500, 380, 900))
+
+
+def test_prepare_crops_to_the_label(preprocessor, tmp_path):
+    data = preprocessor.prepare(save(photo(), tmp_path))
+
+    width, height = Image.open(io.BytesIO(data)).size
+    assert width >= LABEL[2] - LABEL[0] and height >= LABEL[3] - LABEL[1]
+    assert width < 1200 and height < 900
+    assert preprocessor.stats['cropped'] == 1
+
+
+@pytest.mark.parametrize("image", [
+    Image.new('L', (6, 6), 0),
+    # Düşük kontrastlı doku: belirgin kenar yok
+    Image.fromarray((np.random.default_rng(1).integers(0, 12, (600, 800)) + 120).astype('uint8')),
+    Image.new('L', (800, 600), 200),
+], ids=["tiny", "low-contrast", "blank"])
+def test_unusable_images_pass_through(preprocessor, tmp_path, image):
+    assert preprocessor.label_box(image) is None
+
+    data = preprocessor.prepare(save(image, tmp_path))
+    assert Image.open(io.BytesIO(data)).size == image.size
+    assert preprocessor.stats['cropped'] == 0
+
+
+def test_label_filling_the_frame_is_not_cropped(preprocessor):
+    # Kazanç yok (max_crop_ratio üstü) - görsel olduğu gibi gönderilir
+    assert preprocessor.label_box(photo(label=(5, 5, 1194, 894))) is None
@@ -0,0 +1,95 @@
+"""Regression tests for near-duplicate product image flagging."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("numpy")
+pytest.importorskip("pymysql")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from models.product import Product, ProductImage
+from services.perceptual_hash import PerceptualHashIndex, filename_image_scope, image_scope, to_hex
+
+PHASH = 0xF0F0F0F0F0F0F0F0
+NEAR = PHASH ^ 0b111  # Hamming mesafesi 3
+
+
+@pytest.fixture()
+def index() -> PerceptualHashIndex:
+    return PerceptualHashIndex(tag_radius=4, duplicate_radius=6)
+
+
+def add_image(db, filename: str, file_path: str, phash=PHASH, duplicate_of=None) -> ProductImage:
+    product = db.query(Product).filter_by(code="AN-50226-B", color="BLACK").first()
+    if product is None:
+        product = Product(name="AN-50226-B - BLACK", code="AN-50226-B", color="BLACK", brand_id=1, created_by=1)
+        db.add(product)
+        db.flush()
+    image = ProductImage(
+        product_id=product.id,
+        filename=filename,
+        original_filename=filename,
+        file_path=file_path,
+        image_type="product",
+        phash=to_hex(phash),
+        duplicate_of_id=duplicate_of,
+        is_active=True,
+    )
+    db.add(image)
+    db.commit()
+    return image
+
+
+def test_image_scope_includes_angle_number():
+    assert filename_image_scope("AN-50226 B BLACK 11.jpg") == "AN-50226-B|BLACK|11"
+    assert filename_image_scope("AN-50226 B BLACK 11.jpg") != filename_image_scope("AN-50226 B BLACK 12.jpg")
+    # Açı numarası yoksa (etiket) eşleşme yapılmaz
+    assert filename_image_scope("AN-50226 B BLACK.jpg") is None
+    assert image_scope("AN-50226-B", "BLACK", None) is None
+    assert image_scope("AN-50226-B", "Unknown", 11) is None
+
+
+def test_same_angle_near_duplicate_is_found(db, index):
+    original = add_image(db, "AN-50226 B BLACK 11.jpg", "https://cdn/a11.jpg")
+    found = index.find_duplicate_images(
+        db, [("reshot", NEAR, filename_image_scope("AN-50226 B BLACK 11.JPG"))]
+    )
+    assert found["reshot"]["image_id"] == original.id
+    assert found["reshot"]["file_path"] == "https://cdn/a11.jpg"
+
+
+def test_different_angle_is_never_a_duplicate(db, index):
+    add_image(db, "AN-50226 B BLACK 11.jpg", "https://cdn/a11.jpg")
+    found = index.find_duplicate_images(
+        db, [("other_angle", PHASH, filename_image_scope("AN-50226 B BLACK 12.jpg"))]
+    )
+    assert found == {}
+
+
+def test_flagged_duplicates_are_not_originals(db, index):
+    original = add_image(db, "AN-50226 B BLACK 11.jpg", "https://cdn/a11.jpg")
+    add_image(db, "AN-50226 B BLACK 11 (1).jpg", "https://cdn/a11.jpg", duplicate_of=original.id)
+
+    found = index.find_duplicate_images(db, [("x", PHASH, filename_image_scope("AN-50226 B BLACK 11.jpg"))])
+    assert found["x"]["image_id"] == original.id
+    assert index.images.size == 1
+
+
+def test_find_originals_on_resume(db, index):
+    original = add_image(db, "AN-50226 B BLACK 11.jpg", "https://cdn/a11.jpg")
+    add_image(db, "AN-50226 B BLACK 12.jpg", "https://cdn/a12.jpg")
+
+    originals = index.find_originals(db, {
+        # İlk çalıştırmada yüklemesi atlanmış kopya: günlükteki yol başka dosyanın
+        "reshot.jpg": ("reshot.jpg", "https://cdn/a11.jpg"),
+        # Kendi yüklemesi: asıl kayıt kendisi
+        "AN-50226 B BLACK 12.jpg": ("AN-50226 B BLACK 12.jpg", "https://cdn/a12.jpg"),
+        # Henüz kaydı olmayan kendi yüklemesi
+        "new.jpg": ("new.jpg", "https://cdn/new.jpg"),
+    })
+    assert originals == {"reshot.jpg": original.id}
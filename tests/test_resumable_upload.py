@@ -0,0 +1,155 @@
+"""Regression tests for resumable upload session states, chunk size and expiry."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("pymysql")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from core.exceptions import ValidationError
+from models.upload_job import UploadJob
+from services import upload_staging
+from services.resumable_upload_service import ResumableUploadService
+
+CONTENT = b"0123456789"  # 4 byte'lık parçalarla 3 parça: 4 + 4 + 2
+USER = SimpleNamespace(id=7)
+
+
+@pytest.fixture(autouse=True)
+def staging(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_staging.upload_staging_service, "staging_root", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture()
+def service() -> ResumableUploadService:
+    service = ResumableUploadService()
+    service.chunk_size = 4
+    service.session_ttl_seconds = 3600
+    return service
+
+
+def new_job(db, created_at=None) -> UploadJob:
+    job = UploadJob(
+        brand_id=1, uploader_id=USER.id, upload_date=datetime.now(), status='uploading',
+        total_files=1, base_path='uploads', created_at=created_at or datetime.utcnow()
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def open_session(service, db, created_at=None) -> UploadJob:
+    job = new_job(db, created_at)
+    spec = SimpleNamespace(filename="AN-50226 B BLACK 11.jpg", size=len(CONTENT),
+                           checksum=hashlib.md5(CONTENT).hexdigest())
+    service.init_session(job, [spec], db)
+    return job
+
+
+def send(service, job, index: int, data: bytes):
+    return asyncio.run(service.write_chunk(job, 0, index, data, hashlib.md5(data).hexdigest()))
+
+
+def send_all(service, job):
+    for index, start in enumerate(range(0, len(CONTENT), 4)):
+        send(service, job, index, CONTENT[start:start + 4])
+
+
+def test_uploading_finalizing_processing(service, db, monkeypatch):
+    from services import product_upload_manager as manager_module
+    from services.upload_admission import upload_admission
+
+    job = open_session(service, db)
+    send(service, job, 2, CONTENT[8:])
+    assert service.get_status(job)['files'][0]['missing_chunks'] == [0, 1]
+    send_all(service, job)
+
+    assert service.begin_completion(job, db)
+    assert job.status == 'finalizing'
+    # Eşzamanlı ikinci /complete job'u tekrar başlatmaz
+    assert not service.begin_completion(job, db)
+
+    staged = asyncio.run(service.finalize(job))
+    assert [Path(file.path).read_bytes() for file in staged] == [CONTENT]
+
+    monkeypatch.setattr(manager_module.upload_journal, "record_staged", lambda *args: None)
+    monkeypatch.setattr(manager_module.upload_progress_bus, "start", lambda *args: None)
+    manager = manager_module.ProductUploadManager.__new__(manager_module.ProductUploadManager)
+    manager._active_jobs = set()
+    tasks = []
+    background = SimpleNamespace(add_task=lambda *args: tasks.append(args))
+
+    result = manager.start_processing(staged, USER, job, db, background)
+    upload_admission.release(tasks[0][-1])
+
+    assert result['status'] == 'processing'
+    assert db.get(UploadJob, job.id).status == 'processing'
+
+
+def test_failed_verification_returns_to_uploading(service, db):
+    job = open_session(service, db)
+    send_all(service, job)
+    # Parça diske yazıldıktan sonra bozuldu: dosya checksum'ı tutmaz
+    with open(job.file_list[0]['path'], 'r+b') as handle:
+        handle.write(b"X")
+
+    assert service.begin_completion(job, db)
+    with pytest.raises(ValidationError):
+        asyncio.run(service.finalize(job))
+    service.abort_completion(job, db)
+
+    assert job.status == 'uploading'
+    # Bozuk dosyanın parçaları tekrar istenir
+    assert service.get_status(job)['files'][0]['missing_chunks'] == [0, 1, 2]
+
+
+def test_chunk_size_is_capped_per_session(service, db):
+    job = open_session(service, db)
+    # Ayar değişse de oturum kendi parça boyutunu korur
+    service.chunk_size = 1024
+    assert service.max_chunk_bytes(job) == 4
+
+    with pytest.raises(ValidationError):
+        send(service, job, 0, CONTENT[:8])
+    with pytest.raises(ValidationError):
+        send(service, job, 3, CONTENT[:2])
+    # Son parça dosyanın kalanı kadar
+    assert send(service, job, 2, CONTENT[8:])['committed_offset'] == 0
+
+
+def test_expiry_sweep_removes_only_abandoned_sessions(service, db, staging):
+    old = datetime.utcnow() - timedelta(hours=2)
+    abandoned = open_session(service, db, created_at=old)
+    active = open_session(service, db, created_at=old)
+    fresh = open_session(service, db)
+
+    # abandoned'ın son parçası TTL'den eski, active'inki yeni
+    send(service, abandoned, 0, CONTENT[:4])
+    stale = time.time() - 7200
+    abandoned_chunks = staging / str(abandoned.id) / ".chunks"
+    for path in [abandoned_chunks, *abandoned_chunks.rglob("*")]:
+        os.utime(path, (stale, stale))
+    send(service, active, 0, CONTENT[:4])
+
+    assert service.expire_stale_sessions(db) == 1
+
+    db.expire_all()
+    assert db.get(UploadJob, abandoned.id).status == 'expired'
+    assert db.get(UploadJob, abandoned.id).error_message == 'Upload session expired'
+    assert not (staging / str(abandoned.id)).exists()
+    assert db.get(UploadJob, active.id).status == 'uploading'
+    assert db.get(UploadJob, fresh.id).status == 'uploading'
+    # Tekrar çalıştırmak bir şey değiştirmez
+    assert service.expire_stale_sessions(db) == 0
@@ -0,0 +1,118 @@
+"""Regression tests for the shared spawn pool break handling and render retry."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from services.collage_render_farm import CollageRenderFarm, CollageRenderSpec
+from services.spawn_pool import SpawnPool
+
+
+class FakePool(Executor):
+    """İşi çalıştırmaz: broken=True ise BrokenProcessPool, değilse spec.output_path döner"""
+
+    def __init__(self, broken: bool = False):
+        self.broken = broken
+        self.submitted = 0
+        self.closed = False
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool("worker died"))
+        else:
+            future.set_result(args[0].output_path)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.closed = True
+
+
+def install(pool: SpawnPool, *executors: FakePool):
+    queue = list(executors)
+
+    def get():
+        if pool.workers <= 0:
+            return None
+        if pool._pool is None:
+            pool._pool = queue.pop(0)
+        return pool._pool
+
+    pool.get = get
+
+
+def spec() -> CollageRenderSpec:
+    return CollageRenderSpec(
+        product_code="AN-50226-B", color="BLACK", brand="Pofuduk", product_type="ELBİSE",
+        size_range="36-42", price=None, product_images=[], output_path="/tmp/collage.jpg"
+    )
+
+
+def test_consecutive_breaks_fall_back():
+    pool = SpawnPool("TEST", workers=2, max_breaks=2)
+    first, second = FakePool(), FakePool()
+    install(pool, first, second)
+
+    pool.broken(RuntimeError("x"), pool.get())
+    assert first.closed and not pool.running
+    assert pool.workers == 2
+
+    pool.broken(RuntimeError("x"), pool.get())
+    assert pool.workers == 0
+    assert pool.get() is None
+    assert pool.restarts == 2
+
+
+def test_same_crash_is_counted_once():
+    pool = SpawnPool("TEST", workers=2, max_breaks=2)
+    crashed = FakePool()
+    install(pool, crashed, FakePool())
+
+    assert pool.get() is crashed
+    # Aynı havuzdaki üç iş aynı çöküşü görür
+    for _ in range(3):
+        pool.broken(RuntimeError("x"), crashed)
+    assert pool.breaks == 1
+    assert pool.workers == 2
+
+
+def test_success_resets_break_streak():
+    pool = SpawnPool("TEST", workers=2, max_breaks=2)
+    install(pool, FakePool(), FakePool())
+
+    pool.broken(RuntimeError("x"), pool.get())
+    pool.succeeded()
+    pool.broken(RuntimeError("x"), pool.get())
+    assert pool.workers == 2
+
+
+def test_render_retries_once_on_rebuilt_pool():
+    farm = CollageRenderFarm(workers=2)
+    crashed, rebuilt = FakePool(broken=True), FakePool()
+    install(farm.pool, crashed, rebuilt)
+
+    assert asyncio.run(farm.render(spec())) == "/tmp/collage.jpg"
+    assert crashed.submitted == 1 and rebuilt.submitted == 1
+    stats = farm.get_stats()
+    assert stats['worker_restarts'] == 1
+    assert stats['failures'] == 0
+
+
+def test_render_gives_up_after_second_crash():
+    farm = CollageRenderFarm(workers=2)
+    install(farm.pool, FakePool(broken=True), FakePool(broken=True), FakePool())
+
+    assert asyncio.run(farm.render(spec())) is None
+    stats = farm.get_stats()
+    assert stats['worker_restarts'] == 2
+    assert stats['failures'] == 1
@@ -0,0 +1,184 @@
+"""Regression tests for the ultra fast set-based bulk upsert on SQLite."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("pymysql")
+pytest.importorskip("aiohttp")
+pytest.importorskip("aiofiles")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from sqlalchemy import MetaData, String, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models.brand import Brand
+from models.product import Product, ProductImage
+from services.ultra_fast_upload_service import UltraFastUploadService
+
+USER = SimpleNamespace(id=7)
+
+
+@pytest.fixture()
+def ci_db():
+    """MySQL'in büyük/küçük harf duyarsız collation'ı gibi: ad / kod / renk NOCASE"""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        for column in copy.columns:
+            if (copy.name, column.name) in {('brands', 'name'), ('products', 'code'), ('products', 'color')}:
+                column.type = String(column.type.length, collation='NOCASE')
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture()
+def service() -> UltraFastUploadService:
+    # Global instance'ı kullanmadan: sadece DB yardımcıları test edilir
+    service = UltraFastUploadService.__new__(UltraFastUploadService)
+    service.stats = {'database_batches': 0}
+    return service
+
+
+def result(filename: str, color: str = "BLACK", brand: str = "Pofuduk", **extra):
+    return {
+        'success': True,
+        'filename': filename,
+        'cdn_url': f"https://cdn/{filename}",
+        'folder_path': 'f',
+        'product_code': 'AN-50226-B',
+        'color': color,
+        'brand_name': brand,
+        'ocr_data': {'product_info': {'price': 12.5}},
+        **extra,
+    }
+
+
+def insert(service, db, results):
+    return asyncio.run(service._batch_database_insert(results, USER, db))
+
+
+def test_bulk_insert_maps_ids(service, db):
+    stats = insert(service, db, [
+        result("AN-50226 B BLACK.jpg"),
+        result("AN-50226 B BLACK 11.jpg"),
+        result("AN-50226 B RED 11.jpg", color="RED"),
+    ])
+    assert stats['products_created'] == 2
+    assert stats['images_created'] == 3
+
+    products = {p.color: p for p in db.query(Product)}
+    assert products["BLACK"].price == 12.5
+    images = {i.filename: i for i in db.query(ProductImage)}
+    assert images["AN-50226 B BLACK 11.jpg"].product_id == products["BLACK"].id
+    assert images["AN-50226 B BLACK 11.jpg"].angle_number == 11
+    assert images["AN-50226 B BLACK.jpg"].image_type == 'tag'
+    assert images["AN-50226 B RED 11.jpg"].product_id == products["RED"].id
+    assert db.query(Brand).count() == 1
+
+
+def test_surrounding_whitespace_is_ignored(service, db):
+    insert(service, db, [result("AN-50226 B BLACK 11.jpg")])
+    stats = insert(service, db, [result("AN-50226 B BLACK 12.jpg", color=" BLACK ", brand="Pofuduk ")])
+
+    assert stats['products_created'] == 0
+    assert db.query(Product).count() == 1
+    assert db.query(Brand).count() == 1
+
+
+def test_keys_are_normalised_on_both_sides(service, ci_db):
+    db = ci_db
+    insert(service, db, [result("AN-50226 B BLACK 11.jpg")])
+    # DB farklı harf büyüklüğüyle döner - aynı ürün / marka (KeyError yok)
+    stats = insert(service, db, [result("AN-50226 B BLACK 12.jpg", color=" black ", brand="POFUDUK ")])
+
+    assert stats['products_created'] == 0
+    assert stats['images_created'] == 1
+    assert db.query(Product).count() == 1
+    assert db.query(Brand).count() == 1
+    assert {i.product_id for i in db.query(ProductImage)} == {db.query(Product).one().id}
+
+
+def test_concurrent_insert_does_not_duplicate_product(service, db, monkeypatch):
+    insert(service, db, [result("AN-50226 B BLACK 11.jpg")])
+
+    # Başka bir job ürünü okuma ile ekleme arasında eklemiş gibi: ilk okuma boş döner
+    original = service._fetch_product_ids
+    calls = []
+
+    def fetch(db, keys):
+        calls.append(keys)
+        return {} if len(calls) == 1 else original(db, keys)
+
+    monkeypatch.setattr(service, "_fetch_product_ids", fetch)
+    stats = insert(service, db, [result("AN-50226 B BLACK 12.jpg")])
+
+    assert db.query(Product).count() == 1
+    assert stats['images_created'] == 1
+    assert {i.product_id for i in db.query(ProductImage)} == {db.query(Product).one().id}
+
+
+def test_duplicate_images_keep_their_row(service, db):
+    insert(service, db, [result("AN-50226 B BLACK 11.jpg")])
+    original = db.query(ProductImage).one()
+
+    insert(service, db, [result(
+        "AN-50226 B BLACK 11 reshot.jpg", cdn_url=original.file_path, duplicate_of=original.id
+    )])
+    duplicate = db.query(ProductImage).filter_by(filename="AN-50226 B BLACK 11 reshot.jpg").one()
+    assert duplicate.duplicate_of_id == original.id
+    assert duplicate.file_path == original.file_path
+
+
+def test_soft_deleted_product_is_reactivated(service, db):
+    insert(service, db, [result("AN-50226 B BLACK 11.jpg")])
+    db.query(Product).update({'is_active': False})
+    db.commit()
+
+    # Unique anahtar is_active'i kapsamaz: yeni satır değil eski satır geri gelir
+    stats = insert(service, db, [result("AN-50226 B BLACK 12.jpg")])
+
+    assert stats['products_created'] == 0
+    product = db.query(Product).one()
+    db.refresh(product)
+    assert product.is_active
+    assert {i.product_id for i in db.query(ProductImage)} == {product.id}
+
+
+def test_cdn_processor_reuses_soft_deleted_product(service, db):
+    from services.product_cdn_processor import ProductCDNProcessor
+
+    insert(service, db, [result("AN-50226 B BLACK 11.jpg")])
+    original = db.query(Product).one()
+    original.is_active = False
+    db.commit()
+
+    processor = ProductCDNProcessor.__new__(ProductCDNProcessor)
+    product = processor._find_or_create_product(db, "AN-50226-B", "BLACK", db.query(Brand).one(), USER)
+
+    assert product.id == original.id
+    assert product.is_active
+    assert db.query(Product).count() == 1
+
+
+def test_new_brand_invalidates_brand_dictionary(service, db):
+    from services.keyword_matcher import brand_dictionary
+
+    before = brand_dictionary.stats['invalidations']
+    insert(service, db, [result("AN-50226 B BLACK 11.jpg")])
+    assert brand_dictionary.stats['invalidations'] == before + 1
+
+    # Mevcut marka - sözlük geçerli kalır
+    insert(service, db, [result("AN-50226 B BLACK 12.jpg")])
+    assert brand_dictionary.stats['invalidations'] == before + 1
@@ -0,0 +1,128 @@
+"""Regression tests for upload admission budgets, queue order and the small-job reserve."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from core.exceptions import ServiceOverloadedError
+from services.upload_admission import UploadAdmissionController
+
+
+def files(count: int, tags: int = 0):
+    """count ürün görseli (+ tags etiket görseli), her biri 1 byte"""
+    return (
+        [SimpleNamespace(filename=f"AN-50226 B BLACK {index + 11}.jpg", size=1) for index in range(count)]
+        + [SimpleNamespace(filename=f"AN-5022{index} B BLACK.jpg", size=1) for index in range(tags)]
+    )
+
+
+@pytest.fixture()
+def admission() -> UploadAdmissionController:
+    # cpu bütçesi 10 dosya; 2 dosyaya kadar küçük job, büyükler 8'e kadar (%20 küçüklere ayrılmış)
+    return UploadAdmissionController(
+        max_cpu_units=10, max_queued_jobs=2, small_job_files=2, small_job_reserve=0.2
+    )
+
+
+def test_grant_reserves_the_budget(admission):
+    ticket = admission.reserve(1, files(3, tags=1))
+
+    assert ticket.granted
+    assert ticket.demand == {'bytes': 4, 'ocr': 1, 'cpu': 4}
+    assert admission.in_use['cpu'] == 4
+    assert admission.position(ticket) == 0
+
+    admission.release(ticket)
+    admission.release(ticket)  # iki kez bırakmak bütçeyi bozmaz
+    assert admission.in_use == {'bytes': 0, 'ocr': 0, 'cpu': 0}
+    assert not admission.running
+
+
+def test_oversized_job_is_clipped_to_its_share(admission):
+    ticket = admission.reserve(1, files(50))
+
+    assert ticket.granted
+    assert ticket.demand['cpu'] == 8
+
+
+def test_queue_releases_in_order(admission):
+    running = admission.reserve(1, files(6))
+    first = admission.reserve(2, files(5))
+    second = admission.reserve(3, files(4))
+
+    assert not first.granted and not second.granted
+    assert [admission.position(first), admission.position(second)] == [1, 2]
+
+    # İkisi birden sığmaz: önce ilk gelen
+    admission.release(running)
+    assert first.granted and not second.granted
+    admission.release(first)
+    assert second.granted
+    assert admission.stats['queued'] == 2
+
+
+def test_large_job_does_not_jump_the_queue(admission):
+    admission.reserve(1, files(4))
+    admission.reserve(2, files(5))
+
+    # Bütçeye sığsa da öndeki büyük job'u geçmez
+    later = admission.reserve(3, files(3))
+    assert not later.granted
+    assert admission.position(later) == 2
+
+
+def test_acquire_waits_until_granted(admission):
+    running = admission.reserve(1, files(8))
+    waiting = admission.reserve(2, files(4))
+
+    async def scenario():
+        task = asyncio.ensure_future(admission.acquire(waiting))
+        await asyncio.sleep(0)
+        assert not task.done()
+        admission.release(running)
+        await asyncio.wait_for(task, 1.0)
+
+    asyncio.run(scenario())
+    assert waiting.granted
+
+
+def test_full_queue_rejects_with_retry_after(admission):
+    admission.reserve(1, files(8))
+    admission.reserve(2, files(4))
+    admission.reserve(3, files(4))
+
+    with pytest.raises(ServiceOverloadedError) as error:
+        admission.reserve(4, files(4))
+    assert error.value.status_code == 503
+    assert error.value.retry_after >= 1
+    assert error.value.details['queued_jobs'] == 2
+    assert admission.stats['rejected'] == 1
+
+    # Devralınan (resume) job kuyruk dolu olsa da kabul edilir
+    forced = admission.reserve(5, files(4), force=True)
+    assert admission.position(forced) == 3
+
+
+def test_small_jobs_skip_the_queue_within_the_reserve(admission):
+    admission.reserve(1, files(8))
+    large = admission.reserve(2, files(4))
+    assert not large.granted
+
+    # Büyük job beklerken küçükler sadece ayrılmış payı (2 birim) kullanır
+    small = admission.reserve(3, files(2))
+    assert small.granted
+    blocked = admission.reserve(4, files(1))
+    assert not blocked.granted
+    # Küçük job, bekleyen büyük job'un önüne dizilir
+    assert admission.position(blocked) == 1
+
+    admission.release(small)
+    assert blocked.granted and not large.granted
@@ -0,0 +1,248 @@
+"""Regression tests for upload job leases and journal-based resume."""
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("pymysql")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+import database
+from models.upload_job import UploadJob, UploadJobFile
+from models.user import User
+from services import upload_journal as journal_module
+from services.upload_journal import UploadJournal
+
+OTHER_WORKER = "other-host:1:deadbeef"
+
+
+@pytest.fixture()
+def session_factory(session_factory, monkeypatch):
+    # Günlük kendi session'larını açar: conftest'teki ortak bellek içi veritabanı
+    monkeypatch.setattr(journal_module, "SessionLocal", session_factory)
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+    return session_factory
+
+
+@pytest.fixture()
+def journal(session_factory) -> UploadJournal:
+    return UploadJournal()
+
+
+def add_job(factory, status="processing", lease_owner=None, lease_in=None, journal_age=0, files=1) -> int:
+    now = datetime.utcnow()
+    with factory() as db:
+        user = db.query(User).first()
+        if user is None:
+            user = User(email="uploader@example.com", password_hash="x", first_name="A", last_name="B", role_id=1)
+            db.add(user)
+            db.flush()
+        job = UploadJob(
+            brand_id=1, uploader_id=user.id, upload_date=now, status=status, total_files=files,
+            base_path="uploads", lease_owner=lease_owner,
+            lease_expires_at=now + timedelta(seconds=lease_in) if lease_in is not None else None
+        )
+        db.add(job)
+        db.flush()
+        updated = now - timedelta(seconds=journal_age)
+        for index in range(files):
+            db.add(UploadJobFile(
+                job_id=job.id, file_index=index, filename=f"AN-50226 B BLACK {index + 11}.jpg",
+                staged_path=f"/staging/{job.id}/{index}", stage="staged", created_at=updated, updated_at=updated
+            ))
+        db.commit()
+        return job.id
+
+
+def job_row(factory, job_id) -> UploadJob:
+    with factory() as db:
+        return db.get(UploadJob, job_id)
+
+
+def test_find_interrupted_jobs_respects_leases(journal, session_factory):
+    expired = add_job(session_factory, lease_owner=OTHER_WORKER, lease_in=-5)
+    resuming_crashed = add_job(session_factory, status="resuming", lease_owner=OTHER_WORKER, lease_in=-5)
+    add_job(session_factory, lease_owner=OTHER_WORKER, lease_in=60)  # sahibi hâlâ çalışıyor
+    add_job(session_factory, status="completed", lease_in=-5)
+    legacy_stale = add_job(session_factory, journal_age=600)  # lease'siz eski kayıt
+    add_job(session_factory, journal_age=10)  # lease'siz ama günlük ilerliyor
+
+    assert sorted(journal.find_interrupted_jobs(stale_seconds=300)) == sorted(
+        [expired, resuming_crashed, legacy_stale]
+    )
+
+
+def test_claim_is_exclusive_until_the_lease_expires(journal, session_factory, monkeypatch):
+    job_id = add_job(session_factory, lease_owner=OTHER_WORKER, lease_in=-5)
+
+    assert journal.claim_job(job_id, lease_seconds=60)
+    row = job_row(session_factory, job_id)
+    assert row.status == "resuming"
+    assert row.lease_owner == journal_module.WORKER_ID
+    # İkinci worker aktif lease'i devralamaz
+    assert not journal.claim_job(job_id, lease_seconds=60)
+
+    # Sahibi öldü: lease dolunca tekrar devralınabilir
+    with session_factory() as db:
+        db.get(UploadJob, job_id).lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+    monkeypatch.setattr(journal_module, "WORKER_ID", OTHER_WORKER)
+    assert journal.claim_job(job_id, lease_seconds=60)
+    assert job_row(session_factory, job_id).lease_owner == OTHER_WORKER
+
+
+def test_only_the_owner_renews_or_fails_a_job(journal, session_factory):
+    mine = add_job(session_factory, lease_owner=journal_module.WORKER_ID, lease_in=5)
+    theirs = add_job(session_factory, lease_owner=OTHER_WORKER, lease_in=5)
+
+    assert journal.renew_leases([mine, theirs], lease_seconds=600) == 1
+    assert job_row(session_factory, mine).lease_expires_at > datetime.utcnow() + timedelta(seconds=500)
+    assert job_row(session_factory, theirs).lease_expires_at < datetime.utcnow() + timedelta(seconds=10)
+
+    assert not journal.fail_job(theirs, "nope")
+    assert journal.fail_job(mine, "Uploader not found on resume")
+    row = job_row(session_factory, mine)
+    assert (row.status, row.lease_owner, row.lease_expires_at) == ("error", None, None)
+
+
+def test_journal_survives_restart_and_never_moves_back(journal, session_factory):
+    job_id = add_job(session_factory, files=0)
+    staged = [SimpleNamespace(filename=f"f{i}.jpg", path=f"/staging/{job_id}/{i}", checksum=None, size=1, job_id=job_id)
+              for i in range(2)]
+    journal.record_staged(job_id, staged)
+    journal.advance(staged[0], "cdn_uploaded", cdn_url="https://cdn/f0.jpg", ocr_data={"text": "AN"})
+
+    restarted = UploadJournal()  # yeni process: bellek boş, durum DB'den
+    assert restarted.has_reached(staged[0], "cdn_uploaded")
+    assert restarted.get(staged[0])["cdn_url"] == "https://cdn/f0.jpg"
+    assert not restarted.has_reached(staged[1], "ocr_done")
+
+    restarted.advance(staged[0], "ocr_done")
+    assert UploadJournal().get(staged[0])["stage"] == "cdn_uploaded"
+    # Tekrar kayıt eksikleri ekler, mevcutları çoğaltmaz
+    restarted.record_staged(job_id, staged)
+    with session_factory() as db:
+        assert db.query(UploadJobFile).filter_by(job_id=job_id).count() == 2
+
+
+def test_async_writes_run_off_the_event_loop(journal, session_factory, monkeypatch):
+    job_id = add_job(session_factory, files=2)
+    staged = [SimpleNamespace(filename=f"AN-50226 B BLACK {i + 11}.jpg", path=f"/staging/{job_id}/{i}", job_id=job_id)
+              for i in range(2)]
+    writer_threads = []
+
+    def write_rows(rows, action):
+        writer_threads.append(threading.current_thread())
+        return UploadJournal._write_rows(journal, rows, action)
+
+    monkeypatch.setattr(journal, "_write_rows", write_rows)
+
+    async def scenario():
+        await journal.advance_many_async([(file, {"cdn_url": "https://cdn/x.jpg"}) for file in staged], "cdn_uploaded")
+        await journal.mark_failed_async(staged[1], "lost")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(writer_threads) == 2 and loop_thread not in writer_threads
+    # Bellek kaydı ve DB aynı sonucu verir
+    assert journal.get(staged[0])["stage"] == "cdn_uploaded"
+    assert UploadJournal().get(staged[0])["cdn_url"] == "https://cdn/x.jpg"
+    assert UploadJournal().get(staged[1])["stage"] == "failed"
+
+
+@pytest.fixture()
+def manager(monkeypatch):
+    from services import product_upload_manager as manager_module
+
+    monkeypatch.setattr(manager_module.upload_progress_bus, "start", lambda *args: None)
+    manager = manager_module.ProductUploadManager.__new__(manager_module.ProductUploadManager)
+    manager._active_jobs = set()
+    return manager
+
+
+def test_resume_continues_from_the_journal(journal, session_factory, manager, monkeypatch, tmp_path):
+    from services import product_upload_manager as manager_module
+    from services.upload_admission import upload_admission
+
+    monkeypatch.setattr(manager_module, "upload_journal", journal)
+    job_id = add_job(session_factory, lease_owner=OTHER_WORKER, lease_in=-5, files=0)
+    present = tmp_path / "present.jpg"
+    present.write_bytes(b"x")
+    staged = [
+        SimpleNamespace(filename="uploaded.jpg", path=str(tmp_path / "gone-after-cdn.jpg"), checksum=None, size=1, job_id=job_id),
+        SimpleNamespace(filename="present.jpg", path=str(present), checksum=None, size=1, job_id=job_id),
+        SimpleNamespace(filename="lost.jpg", path=str(tmp_path / "lost.jpg"), checksum=None, size=1, job_id=job_id),
+    ]
+    journal.record_staged(job_id, staged)
+    journal.advance(staged[0], "cdn_uploaded", cdn_url="https://cdn/uploaded.jpg")
+    assert journal.claim_job(job_id, lease_seconds=60)
+
+    runs = []
+
+    async def run_job(mode, files, current_user, run_job_id, db, ticket):
+        runs.append([file.filename for file in files])
+        upload_admission.release(ticket)
+
+    monkeypatch.setattr(manager, "_run_job", run_job)
+    manager._active_jobs.add(job_id)
+    asyncio.run(manager._resume_job(job_id))
+
+    # CDN'e yüklenmiş dosyanın staging kopyası gerekmez; yüklenmeden kaybolan başarısız
+    assert runs == [["uploaded.jpg", "present.jpg"]]
+    assert UploadJournal().get(staged[2])["stage"] == "failed"
+    assert job_row(session_factory, job_id).status == "processing"
+    assert job_id not in manager._active_jobs
+
+
+def test_resume_without_uploader_fails_the_job(journal, session_factory, manager, monkeypatch):
+    from services import product_upload_manager as manager_module
+
+    cleaned = []
+    monkeypatch.setattr(manager_module, "upload_journal", journal)
+    monkeypatch.setattr(manager_module.upload_staging_service, "cleanup_job", cleaned.append)
+    job_id = add_job(session_factory, lease_owner=OTHER_WORKER, lease_in=-5)
+    assert journal.claim_job(job_id, lease_seconds=60)
+    with session_factory() as db:
+        db.query(User).delete()
+        db.commit()
+
+    asyncio.run(manager._resume_job(job_id))
+
+    row = job_row(session_factory, job_id)
+    assert (row.status, row.lease_owner) == ("error", None)
+    assert cleaned == [job_id]
+
+
+def test_background_error_fails_the_job(journal, session_factory, manager, monkeypatch):
+    from services import product_upload_manager as manager_module
+
+    cleaned = []
+    monkeypatch.setattr(manager_module, "upload_journal", journal)
+    monkeypatch.setattr(manager_module.upload_staging_service, "cleanup_job", cleaned.append)
+    job_id = add_job(session_factory, lease_owner=journal_module.WORKER_ID, lease_in=60)
+
+    async def broken(*args):
+        raise RuntimeError("db gone")
+
+    monkeypatch.setattr(manager, "_update_job_progress_detailed", broken)
+    files = [SimpleNamespace(filename="AN-50226 B BLACK 11.jpg")]
+    asyncio.run(manager._process_files_background(files, SimpleNamespace(id=1), job_id, None))
+
+    # 'processing'de kalıp lease'i tutmaz
+    row = job_row(session_factory, job_id)
+    assert (row.status, row.lease_owner) == ("error", None)
+    assert cleaned == [job_id]
+
+    # Lease başka worker'a geçtiyse staging onun devralması için kalır
+    theirs = add_job(session_factory, lease_owner=OTHER_WORKER, lease_in=60)
+    asyncio.run(manager._process_files_background(files, SimpleNamespace(id=1), theirs, None))
+    assert job_row(session_factory, theirs).status == "processing"
+    assert cleaned == [job_id]
@@ -0,0 +1,77 @@
+"""Regression tests for Vision batcher send-task ownership and shutdown."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from core.exceptions import ExternalServiceError
+from services.vision_batcher import VisionBatcher
+
+
+def test_send_tasks_are_tracked_until_done():
+    batcher = VisionBatcher(max_images=2, window=10.0)
+    release = asyncio.Event()
+
+    async def send(images):
+        await release.wait()
+        return [{'text': image} for image in images]
+
+    batcher.set_transport(send)
+
+    async def scenario():
+        calls = [asyncio.ensure_future(batcher.submit(image)) for image in ("a", "b")]
+        await asyncio.sleep(0)
+        assert len(batcher._tasks) == 1
+        release.set()
+        results = await asyncio.gather(*calls)
+        await asyncio.sleep(0)
+        return results
+
+    assert asyncio.run(scenario()) == [{'text': 'a'}, {'text': 'b'}]
+    assert not batcher._tasks
+
+
+def test_close_flushes_pending_and_waits_for_batches():
+    batcher = VisionBatcher(max_images=16, window=10.0)
+
+    async def send(images):
+        await asyncio.sleep(0.01)
+        return [{'text': image} for image in images]
+
+    batcher.set_transport(send)
+
+    async def scenario():
+        call = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0)
+        await batcher.close()
+        assert call.done()
+        return call.result()
+
+    assert asyncio.run(scenario()) == {'text': 'a'}
+    assert batcher.stats['batches'] == 1
+
+
+def test_close_cancels_stuck_batches_and_fails_callers():
+    batcher = VisionBatcher(max_images=1)
+
+    async def send(images):
+        await asyncio.sleep(60)
+
+    batcher.set_transport(send)
+
+    async def scenario():
+        call = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0)
+        await batcher.close(timeout=0.01)
+        with pytest.raises(ExternalServiceError):
+            await call
+
+    asyncio.run(scenario())
+    assert not batcher._tasks